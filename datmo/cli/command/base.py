@@ -1,5 +1,7 @@
 #!/usr/bin/python
 
+import keyword
+
 from datmo.config import Config
 from datmo.core.util.i18n import get as __
 from datmo.core.util.exceptions import ClassMethodNotFound
@@ -74,6 +76,10 @@ class BaseCommand(object):
             if "subcommand" in command_args and command_args['subcommand'] is not None:
                 function_name = getattr(self.args, "subcommand",
                                         self.args.command)
+                # Subcommands named like python keywords (e.g. import) are
+                # implemented by methods with a trailing underscore
+                if keyword.iskeyword(function_name):
+                    function_name = function_name + "_"
                 method = getattr(self, function_name)
             else:
                 function_name = getattr(self.args, "command",
@@ -191,4 +191,50 @@ class ProjectCommand(BaseCommand):
                             "name": self.project_controller.model.name,
                             "path": self.project_controller.home
                         }))
-        return False
\ No newline at end of file
+        return False
+
+    @Helper.notify_no_project_found
+    def gc(self, remove=False, workers=4):
+        garbage = self.project_controller.gc(remove=remove, workers=workers)
+        message_key = "cli.project.gc.remove" if remove else "cli.project.gc"
+        for kind in [
+                "code", "environment", "file_collection", "code_ref",
+                "code_object", "collection", "chunks", "manifests", "cache"
+        ]:
+            self.cli_helper.echo(
+                __("info", message_key, (len(garbage[kind]), kind)))
+            if not remove:
+                for name in garbage[kind]:
+                    self.cli_helper.echo("  " + name)
+        return garbage
+
+    @Helper.notify_no_project_found
+    def fsck(self, days=None, workers=4):
+        report = self.project_controller.fsck(days=days, workers=workers)
+        megabytes = report["bytes"] / (1024.0 * 1024.0)
+        self.cli_helper.echo(
+            __("info", "cli.project.fsck",
+               (report["checked"], report["skipped"], megabytes,
+                report["seconds"], megabytes / max(report["seconds"], 1e-6))))
+        for status in ["corrupt", "missing"]:
+            for name in report[status]:
+                self.cli_helper.echo(
+                    __("error", "cli.project.fsck." + status, name))
+        return report
+
+    @Helper.notify_no_project_found
+    def repack(self, days=None, compression=None):
+        result = self.project_controller.repack(
+            days=days, compression=compression)
+        if result["filepath"] is None:
+            self.cli_helper.echo(__("info", "cli.project.repack.none"))
+        else:
+            self.cli_helper.echo(
+                __("info", "cli.project.repack",
+                   (result["objects"], result["loose"],
+                    os.path.basename(result["filepath"]),
+                    result["size"] / (1024.0 * 1024.0))))
+        if result["dropped"]:
+            self.cli_helper.echo(
+                __("info", "cli.project.repack.dropped", result["dropped"]))
+        return result
@@ -0,0 +1,33 @@
+from datmo.core.util.i18n import get as __
+from datmo.cli.driver.helper import Helper
+from datmo.cli.command.project import ProjectCommand
+from datmo.core.controller.remote import RemoteController
+
+
+class RemoteCommand(ProjectCommand):
+    def __init__(self, cli_helper):
+        super(RemoteCommand, self).__init__(cli_helper)
+
+    @Helper.notify_no_project_found
+    def push(self, **kwargs):
+        self.remote_controller = RemoteController()
+        result = self.remote_controller.push(
+            remote=kwargs.get("remote"),
+            snapshot_ids=kwargs.get("snapshot_ids"),
+            workers=kwargs.get("workers"))
+        self.cli_helper.echo(
+            __("info", "cli.remote.push",
+               (len(result["snapshots"]), len(result["blobs"]))))
+        return result
+
+    @Helper.notify_no_project_found
+    def pull(self, **kwargs):
+        self.remote_controller = RemoteController()
+        result = self.remote_controller.pull(
+            remote=kwargs.get("remote"),
+            snapshot_ids=kwargs.get("snapshot_ids"),
+            workers=kwargs.get("workers"))
+        self.cli_helper.echo(
+            __("info", "cli.remote.pull",
+               (len(result["snapshots"]), len(result["blobs"]))))
+        return result
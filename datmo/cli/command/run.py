@@ -58,12 +58,14 @@ class RunObject():
     results : dict
         dictionary containing output results from the run
     files : list
-        returns list of file objects for the run in read mode
+        returns list of references to the files for the run, which are opened when read
 
     Methods
     -------
     get_files(mode="r")
         Returns a list of file objects for the run
+    list_files(mode="r")
+        Returns a list of references to the files for the run without opening them
 
     Raises
     ------
@@ -144,7 +146,8 @@ class RunObject():
 
     @property
     def files(self):
-        self._files = self.get_files()
+        if self._files is None:
+            self._files = self.list_files()
         return self._files
 
     def __get_core_task(self):
@@ -189,6 +192,25 @@ class RunObject():
         self._core_snapshot = self.__get_core_snapshot()
         return snapshot_controller.get_files(self._core_snapshot.id, mode=mode)
 
+    def list_files(self, mode="r"):
+        """Returns a list of references to the files for the run without opening them
+
+        Parameters
+        ----------
+        mode : str
+            file object mode used when reading from the references
+            (default is "r" which signifies read mode)
+
+        Returns
+        -------
+        list
+            list of datmo.core.util.file_reference.FileReference objects
+        """
+        snapshot_controller = SnapshotController()
+        self._core_snapshot = self.__get_core_snapshot()
+        return snapshot_controller.list_files(
+            self._core_snapshot.id, mode=mode)
+
     def __eq__(self, other):
         return self.id == other.id if other else False
 
@@ -253,7 +275,8 @@ class RunCommand(ProjectCommand):
         task_dict = {
             "ports": kwargs['ports'],
             "interactive": kwargs['interactive'],
-            "mem_limit": kwargs['mem_limit']
+            "mem_limit": kwargs['mem_limit'],
+            "rebuild": kwargs.get('rebuild', False)
         }
         if not isinstance(kwargs['cmd'], list):
             if platform.system() == "Windows":
@@ -9,6 +9,7 @@ from datmo.core.util.misc_functions import mutually_exclusive, printable_object,
 from datmo.core.util.exceptions import (SnapshotCreateFromTaskArgs)
 from datmo.cli.command.project import ProjectCommand
 from datmo.core.controller.snapshot import SnapshotController
+from datmo.core.controller.remote import RemoteController
 
 
 class SnapshotCommand(ProjectCommand):
@@ -247,11 +248,18 @@ class SnapshotCommand(ProjectCommand):
     def checkout(self, **kwargs):
         self.snapshot_controller = SnapshotController()
         snapshot_id = kwargs.get('id')
-        checkout_success = self.snapshot_controller.checkout(snapshot_id)
+        paths = kwargs.get('paths', None)
+        checkout_success = self.snapshot_controller.checkout(
+            snapshot_id, paths=paths)
         if checkout_success:
-            self.cli_helper.echo(
-                __("info", "cli.snapshot.checkout.success", snapshot_id))
-        return self.snapshot_controller.checkout(snapshot_id)
+            if paths:
+                self.cli_helper.echo(
+                    __("info", "cli.snapshot.checkout.paths.success",
+                       (snapshot_id, ", ".join(paths))))
+            else:
+                self.cli_helper.echo(
+                    __("info", "cli.snapshot.checkout.success", snapshot_id))
+        return checkout_success
 
     @Helper.notify_no_project_found
     def diff(self, **kwargs):
@@ -277,9 +285,46 @@ class SnapshotCommand(ProjectCommand):
                 value_2 = prettify_datetime(value_2)
             table_data.append([attribute, value_1, "->", value_2])
         output = format_table(table_data)
+        file_diff = self.snapshot_controller.diff(snapshot_id_1, snapshot_id_2)
+        file_table_data = []
+        for change, symbol in [("added", "+"), ("removed", "-"),
+                               ("modified", "M")]:
+            for entry in file_diff[change]:
+                file_table_data.append(
+                    [symbol, entry['path'], "%+d B" % entry['size_delta']])
+        output += "\n" + __("info", "cli.snapshot.diff.files",
+                            (len(file_diff['added']),
+                             len(file_diff['removed']),
+                             len(file_diff['modified']),
+                             file_diff['size_delta'])) + "\n"
+        if file_table_data:
+            output += format_table(file_table_data)
         self.cli_helper.echo(output)
         return output
 
+    @Helper.notify_no_project_found
+    def export(self, **kwargs):
+        self.remote_controller = RemoteController()
+        snapshot_id = kwargs.get("id")
+        output_path = kwargs.get("output_path")
+        result = self.remote_controller.export_bundle(
+            [snapshot_id],
+            output_path,
+            compression=kwargs.get("compression", None))
+        self.cli_helper.echo(
+            __("info", "cli.snapshot.export",
+               (snapshot_id, output_path, len(result["blobs"]))))
+        return result
+
+    @Helper.notify_no_project_found
+    def import_(self, **kwargs):
+        self.remote_controller = RemoteController()
+        result = self.remote_controller.import_bundle(kwargs.get("path"))
+        self.cli_helper.echo(
+            __("info", "cli.snapshot.import",
+               (len(result["snapshots"]), len(result["blobs"]))))
+        return result
+
     @Helper.notify_no_project_found
     def inspect(self, **kwargs):
         self.snapshot_controller = SnapshotController()
@@ -42,7 +42,8 @@ class TaskCommand(ProjectCommand):
         task_dict = {
             "ports": kwargs['ports'],
             "interactive": kwargs['interactive'],
-            "mem_limit": kwargs['mem_limit']
+            "mem_limit": kwargs['mem_limit'],
+            "rebuild": kwargs.get('rebuild', False)
         }
         if not isinstance(kwargs['cmd'], list):
             if platform.system() == "Windows":
@@ -292,3 +292,87 @@ class TestProjectCommand():
         except UnrecognizedCLIArgument:
             exception_thrown = True
         assert exception_thrown
+
+    def test_gc(self):
+        test_name = "foobar"
+        test_description = "test model"
+        self.project_command.parse(
+            ["init", "--name", test_name, "--description", test_description])
+
+        @self.project_command.cli_helper.input("\n")
+        def dummy(self):
+            return self.project_command.execute()
+
+        _ = dummy(self)
+
+        # Create a file collection which no snapshot references
+        filepath = os.path.join(self.temp_dir, "orphan")
+        with open(filepath, "wb") as f:
+            f.write(to_bytes("orphan contents"))
+        filehash = self.project_command.project_controller.file_driver.\
+            create_collection([filepath])
+
+        self.project_command.parse(["gc"])
+        result = self.project_command.execute()
+        assert result["collection"] == [filehash]
+        assert self.project_command.project_controller.file_driver.\
+            exists_collection(filehash)
+
+        self.project_command.parse(["gc", "--remove", "--workers", "2"])
+        result = self.project_command.execute()
+        assert result["collection"] == [filehash]
+        assert not self.project_command.project_controller.file_driver.\
+            exists_collection(filehash)
+
+    def test_repack(self):
+        self.project_command.parse(
+            ["init", "--name", "foobar", "--description", "test model"])
+
+        @self.project_command.cli_helper.input("\n")
+        def dummy(self):
+            return self.project_command.execute()
+
+        _ = dummy(self)
+        with open(os.path.join(self.temp_dir, "script.py"), "wb") as f:
+            f.write(to_bytes("print('hello')"))
+        self.project_command.project_controller.code_driver.create_ref()
+
+        self.project_command.parse(["repack", "--compression", "zlib"])
+        result = self.project_command.execute()
+        assert result["objects"] == 1 and result["filepath"]
+
+        self.project_command.parse(["repack", "--days", "1"])
+        result = self.project_command.execute()
+        assert result["filepath"] is None
+
+    def test_fsck(self):
+        self.project_command.parse(
+            ["init", "--name", "foobar", "--description", "test model"])
+
+        @self.project_command.cli_helper.input("\n")
+        def dummy(self):
+            return self.project_command.execute()
+
+        _ = dummy(self)
+        filepath = os.path.join(self.temp_dir, "filepath1")
+        with open(filepath, "wb") as f:
+            f.write(to_bytes("contents"))
+        self.project_command.project_controller.file_driver.create_collection(
+            [filepath])
+
+        self.project_command.parse(["fsck", "--workers", "2"])
+        result = self.project_command.execute()
+        assert result["checked"] > 0
+        assert result["corrupt"] == [] and result["missing"] == []
+
+        self.project_command.parse(["fsck", "--days", "1"])
+        result = self.project_command.execute()
+        assert result["checked"] == 0
+
+    def test_gc_invalid_arg(self):
+        exception_thrown = False
+        try:
+            self.project_command.parse(["gc", "--foobar"])
+        except UnrecognizedCLIArgument:
+            exception_thrown = True
+        assert exception_thrown
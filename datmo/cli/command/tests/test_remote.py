@@ -0,0 +1,94 @@
+"""
+Tests for RemoteCommand
+"""
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import tempfile
+import platform
+try:
+
+    def to_bytes(val):
+        return bytes(val)
+
+    to_bytes("test")
+except TypeError:
+
+    def to_bytes(val):
+        return bytes(val, "utf-8")
+
+    to_bytes("test")
+
+from datmo.config import Config
+from datmo.cli.driver.helper import Helper
+from datmo.cli.command.project import ProjectCommand
+from datmo.cli.command.remote import RemoteCommand
+from datmo.core.controller.snapshot import SnapshotController
+from datmo.core.util.exceptions import UnrecognizedCLIArgument
+
+# provide mountable tmp directory for docker
+tempfile.tempdir = "/tmp" if not platform.system() == "Windows" else None
+test_datmo_dir = os.environ.get('TEST_DATMO_DIR', tempfile.gettempdir())
+
+
+class TestRemoteCommand():
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp(dir=test_datmo_dir)
+        self.other_temp_dir = tempfile.mkdtemp(dir=test_datmo_dir)
+        self.remote_dir = tempfile.mkdtemp(dir=test_datmo_dir)
+        self.cli_helper = Helper()
+
+    def teardown_method(self):
+        pass
+
+    def __set_variables(self, home):
+        Config().set_home(home)
+        self.project_command = ProjectCommand(self.cli_helper)
+        self.project_command.parse(
+            ["init", "--name", "foobar", "--description", "test model"])
+
+        @self.project_command.cli_helper.input("\n")
+        def dummy(self):
+            return self.project_command.execute()
+
+        dummy(self)
+        self.remote_command = RemoteCommand(self.cli_helper)
+
+    def test_push_pull(self):
+        self.__set_variables(self.temp_dir)
+        filepath = os.path.join(self.temp_dir, "filepath1")
+        with open(filepath, "wb") as f:
+            f.write(to_bytes("test contents"))
+        env_def_path = os.path.join(self.temp_dir, "Dockerfile")
+        with open(env_def_path, "wb") as f:
+            f.write(to_bytes("FROM python:3.5-alpine"))
+        snapshot_obj = SnapshotController().create({
+            "message": "my test snapshot",
+            "paths": [filepath],
+            "environment_paths": [env_def_path]
+        })
+
+        self.remote_command.parse([
+            "push", self.remote_dir, "--snapshot-id", snapshot_obj.id,
+            "--workers", "2"
+        ])
+        result = self.remote_command.execute()
+        assert result["snapshots"] == [snapshot_obj.id]
+
+        self.__set_variables(self.other_temp_dir)
+        self.remote_command.parse(["pull", self.remote_dir])
+        result = self.remote_command.execute()
+        assert result["snapshots"] == [snapshot_obj.id]
+        assert SnapshotController().get(snapshot_obj.id).message == \
+               "my test snapshot"
+
+    def test_push_invalid_arg(self):
+        self.__set_variables(self.temp_dir)
+        exception_thrown = False
+        try:
+            self.remote_command.parse(["push", "--foobar"])
+        except UnrecognizedCLIArgument:
+            exception_thrown = True
+        assert exception_thrown
@@ -749,6 +749,17 @@ class TestSnapshotCommand():
         result = self.snapshot_command.execute()
         assert result
 
+        # Test checkout of only the paths given
+        with open(self.filepath, "wb") as f:
+            f.write(to_bytes(str("changed")))
+        self.snapshot_command.parse(
+            ["snapshot", "checkout", snapshot_obj.id, "--paths", "file.txt"])
+
+        result = self.snapshot_command.execute()
+        assert result
+        with open(self.filepath, "r") as f:
+            assert f.read() == "test"
+
     def test_snapshot_diff(self):
         self.__set_variables()
         # Create snapshots to test
@@ -761,8 +772,10 @@ class TestSnapshotCommand():
         with open(self.filepath_3, "wb") as f:
             f.write(to_bytes(str("test")))
 
-        self.snapshot_command.parse(
-            ["snapshot", "create", "-m", "my second snapshot"])
+        self.snapshot_command.parse([
+            "snapshot", "create", "-m", "my second snapshot", "--paths",
+            self.filepath_3
+        ])
         snapshot_obj_2 = self.snapshot_command.execute()
 
         # Test diff with the above two snapshots
@@ -771,6 +784,30 @@ class TestSnapshotCommand():
 
         result = self.snapshot_command.execute()
         assert result
+        assert "Files: 1 added, 0 removed, 0 modified (+4 B)" in result
+        assert "file3.txt" in result
+
+    def test_snapshot_export_import(self):
+        self.__set_variables()
+        self.snapshot_command.parse(
+            ["snapshot", "create", "-m", "my test snapshot"])
+        snapshot_obj = self.snapshot_command.execute()
+        bundle_filepath = os.path.join(tempfile.mkdtemp(), "bundle.tar")
+
+        self.snapshot_command.parse([
+            "snapshot", "export", snapshot_obj.id, "-o", bundle_filepath,
+            "--compression", "zlib"
+        ])
+        result = self.snapshot_command.execute()
+        assert result["snapshots"] == [snapshot_obj.id]
+        assert os.path.isfile(bundle_filepath)
+
+        # Import the snapshot back once deleted
+        self.snapshot_command.parse(["snapshot", "delete", snapshot_obj.id])
+        self.snapshot_command.execute()
+        self.snapshot_command.parse(["snapshot", "import", bundle_filepath])
+        result = self.snapshot_command.execute()
+        assert result["snapshots"] == [snapshot_obj.id]
 
     def test_snapshot_inspect(self):
         self.__set_variables()
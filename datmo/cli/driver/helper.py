@@ -150,9 +150,9 @@ class Helper():
 
     def get_command_choices(self):
         return [
-            "init", "version", "--version", "-v", "status", "cleanup",
+            "init", "version", "--version", "-v", "status", "cleanup", "gc",
             "snapshot", "task", "session", "notebook", "rstudio",
-            "environment", "run"
+            "environment", "run", "push", "pull", "fsck", "repack"
         ]
 
     def prompt_available_environments(self, available_environments):
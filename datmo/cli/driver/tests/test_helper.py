@@ -226,7 +226,7 @@ class TestHelper():
     def test_get_command_choices(self):
         # assert same as output
         assert self.cli.get_command_choices() == [
-            "init", "version", "--version", "-v", "status", "cleanup",
+            "init", "version", "--version", "-v", "status", "cleanup", "gc",
             "snapshot", "task", "session", "notebook", "rstudio",
-            "environment", "run"
+            "environment", "run", "push", "pull", "fsck", "repack"
         ]
@@ -44,6 +44,10 @@ def main():
         elif command_name == "cleanup":
             command_name = "project"
             sys.argv[1] = "cleanup"
+        elif command_name in ["gc", "fsck", "repack"]:
+            command_name = "project"
+        elif command_name in ["push", "pull"]:
+            command_name = "remote"
         elif command_name in ["notebook", "rstudio"]:
             sys.argv[1] = command_name
             command_name = "workspace"
@@ -18,6 +18,79 @@ def get_datmo_parser():
 
     cleanup_parser = subparsers.add_parser("cleanup", help="remove project")
 
+    gc_parser = subparsers.add_parser(
+        "gc", help="find and remove objects not referenced by any snapshot")
+    gc_parser.add_argument(
+        "--remove",
+        dest="remove",
+        action="store_true",
+        help="remove the unreferenced objects instead of only listing them")
+    gc_parser.add_argument(
+        "--workers",
+        dest="workers",
+        default=4,
+        type=int,
+        help="number of objects to remove in parallel")
+
+    fsck_parser = subparsers.add_parser(
+        "fsck",
+        help="hash the stored collections and code objects again to check them"
+    )
+    fsck_parser.add_argument(
+        "--days",
+        dest="days",
+        default=None,
+        type=float,
+        help="only check the objects not verified in this many days")
+    fsck_parser.add_argument(
+        "--workers",
+        dest="workers",
+        default=4,
+        type=int,
+        help="number of objects to hash in parallel")
+
+    repack_parser = subparsers.add_parser(
+        "repack", help="move loose code objects into a single pack file")
+    repack_parser.add_argument(
+        "--days",
+        dest="days",
+        default=None,
+        type=float,
+        help="only pack the loose objects not modified in this many days")
+    repack_parser.add_argument(
+        "--compression",
+        dest="compression",
+        default=None,
+        help="compression of the objects in the pack, zlib or lzma "
+        "(default is none)")
+
+    # Remote
+    for remote_command, remote_help in [
+        ("push", "push snapshots and their files to a remote"),
+        ("pull", "pull snapshots and their files from a remote")
+    ]:
+        remote_parser = subparsers.add_parser(remote_command, help=remote_help)
+        remote_parser.add_argument(
+            "remote",
+            nargs="?",
+            default=None,
+            help=
+            "http(s) url or directory path of the remote, defaults to the remote last used"
+        )
+        remote_parser.add_argument(
+            "--snapshot-id",
+            dest="snapshot_ids",
+            default=None,
+            action="append",
+            type=str,
+            help="id of a snapshot to transfer, defaults to every snapshot")
+        remote_parser.add_argument(
+            "--workers",
+            dest="workers",
+            default=4,
+            type=int,
+            help="number of files to transfer in parallel")
+
     # Notebook
     notebook_parser = subparsers.add_parser(
         "notebook", help="To run jupyter notebook")
@@ -120,6 +193,11 @@ def get_datmo_parser():
         help=
         "maximum amount of memory the task environment can use (these options take a positive integer, followed by a suffix of b, k, m, g, to indicate bytes, kilobytes, megabytes, or gigabytes. e.g. 4g)"
     )
+    run_parser.add_argument(
+        "--rebuild",
+        dest="rebuild",
+        action="store_true",
+        help="build the environment even if an image of it exists")
     run_parser.add_argument(
         "--interactive",
         dest="interactive",
@@ -468,12 +546,41 @@ def get_datmo_parser():
     snapshot_checkout = snapshot_subcommand_parsers.add_parser(
         "checkout", help="checkout a snapshot by id")
     snapshot_checkout.add_argument("id", help="snapshot id to checkout")
+    snapshot_checkout.add_argument(
+        "--paths",
+        dest="paths",
+        default=None,
+        action="append",
+        type=str,
+        help=
+        "only checkout the files matching these .gitignore style patterns, e.g. 'models/*.pt'; other files and the environment are left as is"
+    )
 
     snapshot_diff = snapshot_subcommand_parsers.add_parser(
         "diff", help="view diff between 2 snapshots")
     snapshot_diff.add_argument("id_1", default=None, help="snapshot id 1")
     snapshot_diff.add_argument("id_2", default=None, help="snapshot id 2")
 
+    snapshot_export = snapshot_subcommand_parsers.add_parser(
+        "export", help="write a snapshot to a tar bundle")
+    snapshot_export.add_argument("id", help="snapshot id to export")
+    snapshot_export.add_argument(
+        "-o",
+        "--output",
+        dest="output_path",
+        required=True,
+        help="path of the tar bundle to write")
+    snapshot_export.add_argument(
+        "--compression",
+        dest="compression",
+        default=None,
+        help="compression of the bundle, zlib or lzma (default is none)")
+
+    snapshot_import = snapshot_subcommand_parsers.add_parser(
+        "import", help="create the snapshots in a tar bundle")
+    snapshot_import.add_argument(
+        "path", help="path of the tar bundle written by datmo snapshot export")
+
     snapshot_inspect = snapshot_subcommand_parsers.add_parser(
         "inspect", help="inspect a snapshot by id")
     snapshot_inspect.add_argument("id", default=None, help="snapshot id")
@@ -534,6 +641,11 @@ def get_datmo_parser():
     #     dest="environment_description",
     #     default=None,
     #     help="description of environment")
+    task_run.add_argument(
+        "--rebuild",
+        dest="rebuild",
+        action="store_true",
+        help="build the environment even if an image of it exists")
     task_run.add_argument(
         "--interactive",
         dest="interactive",
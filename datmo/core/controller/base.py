@@ -4,6 +4,7 @@ from datmo.core.util.i18n import get as __
 from datmo.core.util.logger import DatmoLogger
 from datmo.core.util import get_class_contructor
 from datmo.core.util.json_store import JSONStore
+from datmo.core.util.misc_functions import DEFAULT_HASH_ALGORITHM
 from datmo.core.util.exceptions import (InvalidProjectPath,
                                         DatmoModelNotInitialized)
 from datmo.config import Config
@@ -30,6 +31,9 @@ class BaseController(object):
     file_driver : datmo.core.controller.file.driver.FileDriver
     environment_driver : datmo.core.controller.environment.driver.EnvironmentDriver
     is_initialized : bool
+    hash_algorithm : str
+        name of the hash algorithm used for the project files and code,
+        set with the "hash_algorithm" key in the project config (default is "md5")
 
     Methods
     -------
@@ -41,6 +45,16 @@ class BaseController(object):
         Return the config dictionary based on key
     get_config_defaults()
         Return the configuration defaults
+
+    Notes
+    -----
+    Files at or above the "chunk_threshold" key in the project config (in bytes)
+    are stored as content defined chunks by the file driver, and files worth
+    compressing are stored with the "compression" key ("zlib" or "lzma") if set
+
+    Code is versioned with git instead of by the file code driver if the
+    "code_driver" key is "git", and snapshots are staged in an index of their
+    own, leaving the branch of the user as it is, if "git_private_index" is set
     """
 
     def __init__(self):
@@ -111,6 +125,11 @@ class BaseController(object):
                 **module_details["options"])
         return self._environment_driver
 
+    @property
+    def hash_algorithm(self):
+        return self.config_store.get("hash_algorithm") or \
+               DEFAULT_HASH_ALGORITHM
+
     @property
     def is_initialized(self):
         if not self._is_initialized:
@@ -144,19 +163,37 @@ class BaseController(object):
         return module_details
 
     def get_config_defaults(self):
-        return {
-            "controller.code.driver": {
+        code_driver_details = {
+            "class_constructor":
+                "datmo.core.controller.code.driver.file.FileCodeDriver",
+            "options": {
+                "filepath": self.home,
+                "hash_algorithm": self.hash_algorithm
+            }
+        }
+        if self.config_store.get("code_driver") == "git":
+            code_driver_details = {
                 "class_constructor":
-                    "datmo.core.controller.code.driver.file.FileCodeDriver",
+                    "datmo.core.controller.code.driver.git.GitCodeDriver",
                 "options": {
-                    "filepath": self.home
+                    "filepath":
+                        self.home,
+                    "execpath":
+                        "git",
+                    "private_index":
+                        bool(self.config_store.get("git_private_index"))
                 }
-            },
+            }
+        return {
+            "controller.code.driver": code_driver_details,
             "controller.file.driver": {
                 "class_constructor":
                     "datmo.core.controller.file.driver.local.LocalFileDriver",
                 "options": {
-                    "root": self.home
+                    "root": self.home,
+                    "hash_algorithm": self.hash_algorithm,
+                    "chunk_threshold": self.config_store.get("chunk_threshold"),
+                    "compression": self.config_store.get("compression")
                 }
             },
             "controller.environment.driver": {
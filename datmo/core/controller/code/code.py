@@ -62,11 +62,15 @@ class CodeController(BaseController):
             elif required_arg == "commit_id":
                 create_dict[required_arg] = \
                     self.code_driver.create_ref(commit_id=commit_id)
-                # If code object with commit id exists, return it
-                results = self.dal.code.query({
-                    "commit_id": create_dict[required_arg],
-                    "model_id": self.model.id
-                })
+                create_dict['hash_algorithm'] = self.code_driver.hash_algorithm
+                # If code object with commit id and hash algorithm exists, return it
+                results = [
+                    code_obj for code_obj in self.dal.code.query({
+                        "commit_id": create_dict[required_arg],
+                        "model_id": self.model.id
+                    }) if code_obj.hash_algorithm ==
+                    create_dict['hash_algorithm']
+                ]
                 if results: return results[0]
             else:
                 raise NotImplementedError()
@@ -58,8 +58,8 @@ class CodeDriver(with_metaclass(ABCMeta, object)):
 
         Returns
         -------
-        commit_id : str
-            the latest commit_id in the ref list
+        commit_id : str or None
+            the latest commit_id in the ref list, None if there are no refs
 
         Raises
         ------
@@ -192,3 +192,74 @@ class CodeDriver(with_metaclass(ABCMeta, object)):
             error if not initialized (must initialize first)
         """
         pass
+
+    @abstractmethod
+    def checkout_paths(self, commit_id, paths):
+        """Checkout only the files of the commit reference matching the paths
+
+        Files matching are replaced and no other files are touched
+
+        Parameters
+        ----------
+        commit_id : str
+            commit id for commit ref
+        paths : list
+            .gitignore style patterns of the filepaths relative to the project root
+
+        Returns
+        -------
+        list
+            filepaths relative to the project root which were checked out
+
+        Raises
+        ------
+        CodeNotInitialized
+            error if not initialized (must initialize first)
+        """
+        pass
+
+    @abstractmethod
+    def export_ref(self, commit_id, dst_dirpath):
+        """Write everything needed to recreate the commit reference into a directory
+
+        Parameters
+        ----------
+        commit_id : str
+            commit id for commit ref
+        dst_dirpath : str
+            absolute path of an empty directory to write into
+
+        Returns
+        -------
+        bool
+            True if success
+
+        Raises
+        ------
+        CodeNotInitialized
+            error if not initialized (must initialize first)
+        """
+        pass
+
+    @abstractmethod
+    def import_ref(self, commit_id, src_dirpath):
+        """Recreate a commit reference from a directory written by export_ref()
+
+        Parameters
+        ----------
+        commit_id : str
+            commit id for commit ref
+        src_dirpath : str
+            absolute path of the directory written by export_ref()
+
+        Returns
+        -------
+        bool
+            True if success
+
+        Raises
+        ------
+        CodeNotInitialized
+            error if not initialized (must initialize first)
+        """
+        pass
@@ -1,27 +1,68 @@
 import os
+import json
+import stat
+import time
+import zlib
 import shutil
-import pathspec
-import tempfile
-import hashlib
-import checksumdir
+from functools import partial
+try:
+    import lzma
+except ImportError:
+    lzma = None
 try:
     to_unicode = unicode
 except NameError:
     to_unicode = str
 
-from datmo.core.util.misc_functions import list_all_filepaths
+from datmo.core.util.misc_functions import (
+    list_all_filepaths, get_filehash, get_hash_function, get_tree_hash,
+    reduce_filehashes, match_paths, DEFAULT_HASH_ALGORITHM, HASH_BUFFER_SIZE)
+from datmo.core.util.compression import validate_compression
 from datmo.core.util.i18n import get as __
+from datmo.core.util.reflog import RefLog
 from datmo.core.util.exceptions import (PathDoesNotExist, FileIOError,
                                         UnstagedChanges, CodeNotInitialized,
                                         CommitDoesNotExist, CommitFailed)
 from datmo.core.controller.code.driver import CodeDriver
 
+# Index of the hash of each tracked file, within the .datmo directory
+INDEX_FILENAME = "code_index.json"
+# Files modified within this many seconds of being hashed are not indexed
+INDEX_RACY_SECONDS = 2
+# Log of the commits created and deleted, within the code directory
+REFLOG_FILENAME = "reflog"
+PACK_VERSION = 1
+
+
+def _get_compressor(compression):
+    if compression == "zlib":
+        return zlib.compressobj(6)
+    if compression == "lzma":
+        return lzma.LZMACompressor()
+    return None
+
+
+def _get_decompressor(compression):
+    if compression == "zlib":
+        return zlib.decompressobj()
+    if compression == "lzma":
+        return lzma.LZMADecompressor()
+    return None
+
 
 class FileCodeDriver(CodeDriver):
     """File-based Code Driver handles source control management for the project with files
+
+    Parameters
+    ----------
+    filepath : str
+        absolute path of the project root
+    hash_algorithm : str, optional
+        name of the hash algorithm used for file and commit hashes
+        (default is "md5")
     """
 
-    def __init__(self, filepath):
+    def __init__(self, filepath, hash_algorithm=DEFAULT_HASH_ALGORITHM):
         super(FileCodeDriver, self).__init__()
         self.filepath = filepath
         # Check if filepath exists
@@ -29,6 +70,9 @@ class FileCodeDriver(CodeDriver):
             raise PathDoesNotExist(
                 __("error", "controller.code.driver.git.__init__.dne",
                    filepath))
+        # Validate the hash algorithm before any hashing is done
+        get_hash_function(hash_algorithm)
+        self.hash_algorithm = hash_algorithm
         self._datmo_directory_name = ".datmo"
         self._datmo_directory_path = os.path.join(self.filepath,
                                                   self._datmo_directory_name)
@@ -39,8 +83,18 @@ class FileCodeDriver(CodeDriver):
         self._files_directory_path = os.path.join(self.filepath,
                                                   self._files_directory_name)
         self._code_filepath = os.path.join(self._datmo_directory_path, "code")
+        # Objects are stored once by the hash of their contents, shared by all paths
+        self._objects_filepath = os.path.join(self._code_filepath, "objects")
+        # Packs of objects with their indexes
+        self._packs_filepath = os.path.join(self._code_filepath, "packs")
+        self._packed_objects, self._pack_filenames = None, None
         self._datmo_ignore_filepath = os.path.join(self.filepath,
                                                    ".datmoignore")
+        self._index_filepath = os.path.join(self._datmo_directory_path,
+                                            INDEX_FILENAME)
+        self._reflog = RefLog(
+            os.path.join(self._code_filepath, REFLOG_FILENAME),
+            self._list_commit_files)
         self._is_initialized = self.is_initialized
         self.type = "file"
 
@@ -63,7 +117,8 @@ class FileCodeDriver(CodeDriver):
         """Return list of tracked files relative to the root directory
 
         This will look through all of the files and will exclude any datmo directories
-        (.datmo, datmo_environment/, datmo_files/) and any paths included in .datmoignore
+        (.datmo, datmo_environment/, datmo_files/) and any paths included in .datmoignore.
+        The repository is walked once and ignored directories are not descended into
         TODO: add general list of directories to ignore here (should be passed in by higher level code)
 
         Returns
@@ -71,88 +126,105 @@ class FileCodeDriver(CodeDriver):
         list
             list of filepaths relative to the the root of the repo
         """
-        all_files = set(list_all_filepaths(self.filepath))
+        # TODO: REMOVE datmo_snapshots AND datmo_tasks
+        ignore_patterns = [
+            self._datmo_directory_name, ".git",
+            self._environment_directory_name, self._files_directory_name,
+            "datmo_snapshots", "datmo_tasks", "/.datmoignore"
+        ]
+        # Load ignored files from .datmoignore file if exists
+        if os.path.isfile(self._datmo_ignore_filepath):
+            with open(self._datmo_ignore_filepath, "r") as f:
+                ignore_patterns.extend(f.read().splitlines())
+        return list_all_filepaths(
+            self.filepath, ignore_patterns=ignore_patterns)
 
-        # Ignore the .datmo/ folder and all contents within it
-        spec = pathspec.PathSpec.from_lines('gitwildmatch',
-                                            [self._datmo_directory_name])
-        dot_datmo_files = set(spec.match_tree(self.filepath))
+    def _calculate_commit_hash(self, tracked_files):
+        """Return the commit hash of the repository
 
-        # Ignore the .git/ folder and all contents within it
-        spec = pathspec.PathSpec.from_lines('gitwildmatch', [".git"])
-        dot_git_files = set(spec.match_tree(self.filepath))
+        The hash is a Merkle hash of the path and contents of each tracked
+        file, hashed straight from the working tree
+        """
+        return self._get_commit_hash(self._hash_tracked_files(tracked_files))
 
-        # Ignore the datmo_environment/ folder and all contents within it
-        spec = pathspec.PathSpec.from_lines('gitwildmatch',
-                                            [self._environment_directory_name])
-        datmo_environment_files = set(spec.match_tree(self.filepath))
+    def _get_commit_hash(self, filehashes):
+        """Return the commit hash of the files given by the hash of their contents
 
-        # Ignore the datmo_files/ folder and all contents within it
-        spec = pathspec.PathSpec.from_lines('gitwildmatch',
-                                            [self._files_directory_name])
-        datmo_files_files = set(spec.match_tree(self.filepath))
+        Commits made before commit hashes were Merkle hashes are named by a
+        hash of the file contents alone. The id of such a commit is returned
+        if it has exactly the same files, so existing commits are still found
+        """
+        commit_hash = get_tree_hash(filehashes, self.hash_algorithm)
+        if self.exists_ref(commit_hash):
+            return commit_hash
+        legacy_commit_hash = reduce_filehashes(
+            list(filehashes.values()), self.hash_algorithm)
+        if legacy_commit_hash != commit_hash and \
+                self.exists_ref(legacy_commit_hash) and \
+                self.get_ref_objects(legacy_commit_hash) == filehashes:
+            return legacy_commit_hash
+        return commit_hash
 
-        # TODO: REMOVE THIS CODE
-        # Ignore the datmo_snapshots/ folder and all contents within it
-        spec = pathspec.PathSpec.from_lines('gitwildmatch',
-                                            ["datmo_snapshots"])
-        datmo_snapshots_files = set(spec.match_tree(self.filepath))
+    def _hash_tracked_files(self, tracked_files):
+        """Return the hash of the contents of each tracked file
 
-        # Ignore the datmo_tasks/ folder and all contents within it
-        spec = pathspec.PathSpec.from_lines('gitwildmatch', ["datmo_tasks"])
-        datmo_tasks_files = set(spec.match_tree(self.filepath))
+        Hashes are kept in an index with the size and modification time of
+        each file, so only files changed since they were last hashed are read
 
-        # TODO: REMOVE THE ABOVE
+        Returns
+        -------
+        dict
+            file hashes keyed by the tracked filepath relative to the project root
+        """
+        index = self._load_index()
+        start_time = time.time()
+        filehashes, new_index = {}, {}
+        for tracked_filepath in tracked_files:
+            absolute_filepath = os.path.join(self.filepath, tracked_filepath)
+            file_stat = os.stat(absolute_filepath)
+            signature = [file_stat.st_size, file_stat.st_mtime]
+            entry = index.get(tracked_filepath)
+            if entry is not None and entry[:2] == signature:
+                filehash = entry[2]
+            else:
+                filehash = self._get_filehash(absolute_filepath)
+            filehashes[tracked_filepath] = filehash
+            # Files modified just now could change again without their
+            # modification time changing, so they are hashed every time
+            if file_stat.st_mtime < start_time - INDEX_RACY_SECONDS:
+                new_index[tracked_filepath] = signature + [filehash]
+        if new_index != index:
+            self._save_index(new_index)
+        return filehashes
 
-        # Load ignored files from .datmoignore file if exists
-        datmoignore_files = {".datmoignore"}
-        if os.path.isfile(os.path.join(self.filepath, ".datmoignore")):
-            with open(self._datmo_ignore_filepath, "r") as f:
-                spec = pathspec.PathSpec.from_lines('gitignore', f)
-                datmoignore_files.update(set(spec.match_tree(self.filepath)))
-        return list(
-            all_files - dot_datmo_files - dot_git_files -
-            datmo_environment_files - datmo_files_files -
-            datmo_snapshots_files - datmo_tasks_files - datmoignore_files)
+    def _load_index(self):
+        """Return the entries of the index, empty if it is missing or was made with another hash algorithm"""
+        try:
+            with open(self._index_filepath, "r") as f:
+                index = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        if index.get("hash_algorithm") != self.hash_algorithm:
+            return {}
+        return index.get("files", {})
 
-    def _calculate_commit_hash(self, tracked_files):
-        """Return the commit hash of the repository"""
-        # Move tracked files to temp directory within _code_filepath
-        # Hash files and return hash
-        temp_dir = tempfile.mkdtemp(dir=self._code_filepath)
-        for rel_filepath in tracked_files:
-            # Ensure new directory will exist in the temp dir
-            filename = os.path.basename(rel_filepath)
-            rel_dirpath = rel_filepath.replace(filename, "")
-            new_dirpath = os.path.join(temp_dir, rel_dirpath)
-            # Ensure directory exists
-            if not os.path.isdir(new_dirpath):
-                os.makedirs(new_dirpath)
-            # Move individual file from old_filepath to new_filepath
-            old_filepath = os.path.join(self.filepath, rel_filepath)
-            new_filepath = os.path.join(new_dirpath, filename)
-            shutil.copy2(old_filepath, new_filepath)
-        return self._get_dirhash(temp_dir)
+    def _save_index(self, index):
+        if not os.path.isdir(self._datmo_directory_path):
+            return
+        temp_index_filepath = self._index_filepath + ".tmp"
+        with open(temp_index_filepath, "w") as f:
+            f.write(
+                to_unicode(
+                    json.dumps({
+                        "hash_algorithm": self.hash_algorithm,
+                        "files": index
+                    })))
+        if os.path.exists(self._index_filepath):
+            os.remove(self._index_filepath)
+        os.rename(temp_index_filepath, self._index_filepath)
 
-    @staticmethod
-    def _get_filehash(absolute_filepath):
-        if not os.path.isfile(absolute_filepath):
-            raise PathDoesNotExist(
-                __("error", "util.misc_functions.get_filehash",
-                   absolute_filepath))
-        BUFF_SIZE = 65536
-        sha1 = hashlib.md5()
-        with open(absolute_filepath, "rb") as f:
-            while True:
-                data = f.read(BUFF_SIZE)
-                if not data:
-                    break
-                sha1.update(data)
-        return sha1.hexdigest()
-
-    @staticmethod
-    def _get_dirhash(absolute_dirpath):
-        return checksumdir.dirhash(absolute_dirpath)
+    def _get_filehash(self, absolute_filepath):
+        return get_filehash(absolute_filepath, self.hash_algorithm)
 
     def _has_unstaged_changes(self):
         """Return whether there are unstaged changes"""
@@ -203,8 +275,9 @@ class FileCodeDriver(CodeDriver):
             raise CommitFailed(
                 __("error",
                    "controller.code.driver.file.create_ref.cannot_commit"))
-        # Create the hash of the files (_calculate_commit_hash)
-        commit_hash = self._calculate_commit_hash(tracked_filepaths)
+        # Hash the files (_hash_tracked_files) and create the commit hash from them
+        filehashes = self._hash_tracked_files(tracked_filepaths)
+        commit_hash = self._get_commit_hash(filehashes)
         # Check if the hash already exists with exists_ref
         if self.exists_ref(commit_hash):
             return commit_hash
@@ -215,19 +288,13 @@ class FileCodeDriver(CodeDriver):
             for tracked_filepath in tracked_filepaths:
                 absolute_filepath = os.path.join(self.filepath,
                                                  tracked_filepath)
-                absolute_dirpath = os.path.join(self._code_filepath,
-                                                tracked_filepath)
-                # 1) create dir for file (use path name from tracked files list) -- if already exists skip
-                if not os.path.isdir(absolute_dirpath):
-                    os.makedirs(absolute_dirpath)
-                # 2) hash the file
-                filehash = self._get_filehash(absolute_filepath)
-                # 3) add file with file hash as name to folder for the file (if already exists, will overwrite file -- new ts)
-                new_absolute_filepath = os.path.join(absolute_dirpath,
-                                                     filehash)
-                shutil.copy2(absolute_filepath, new_absolute_filepath)
-                # 4) append a line into the new file for the commit hash with the following "filepath, filehash"
+                # 1) store the file as an object named by its hash (if already exists, it is the same contents)
+                filehash = filehashes[tracked_filepath]
+                self._store_object(absolute_filepath, tracked_filepath,
+                                   filehash)
+                # 2) append a line into the new file for the commit hash with the following "filepath, filehash"
                 f.write(tracked_filepath + "," + filehash + "\n")
+        self._reflog.add(commit_hash)
         # Return commit hash if success else ERROR
         return commit_hash
 
@@ -259,22 +326,25 @@ class FileCodeDriver(CodeDriver):
         """
         if not self.is_initialized:
             raise CodeNotInitialized()
+        return self._reflog.latest()
 
-        def getmtime(absolute_filepath):
-            # Keeping it granular as timestaps in git
-            return int(os.path.getmtime(absolute_filepath))
-
-        # List all files in the code directory (ignore directories)
-        for _, _, commit_hashes in os.walk(self._code_filepath):
-            sorted_commit_hashes = sorted(
-                [
-                    os.path.join(self._code_filepath, commit_hash)
-                    for commit_hash in commit_hashes
-                ],
-                key=getmtime,
-                reverse=True)
-            _, filename = os.path.split(sorted_commit_hashes[0])
-            return filename
+    def _list_commit_files(self):
+        """Return the commit ids of the commit files, oldest first"""
+        if not os.path.isdir(self._code_filepath):
+            return []
+        commit_filepaths = [
+            os.path.join(self._code_filepath, filename)
+            for filename in os.listdir(self._code_filepath)
+            if filename != REFLOG_FILENAME and not filename.endswith(".tmp")
+        ]
+        return [
+            os.path.basename(commit_filepath)
+            for commit_filepath in sorted(
+                (commit_filepath for commit_filepath in commit_filepaths
+                 if os.path.isfile(commit_filepath)),
+                key=lambda commit_filepath: (os.path.getmtime(commit_filepath),
+                                             commit_filepath))
+        ]
 
     def exists_ref(self, commit_id):
         """Returns a boolean if the commit exists
@@ -296,16 +366,14 @@ class FileCodeDriver(CodeDriver):
         """
         if not self.is_initialized:
             raise CodeNotInitialized()
-        # List all files in code directory
-        commit_hashes = self.list_refs()
-        # Check if commit_id exists in the list
-        if commit_id in commit_hashes:
-            return True
-        return False
+        return self._reflog.exists(commit_id)
 
     def delete_ref(self, commit_id):
         """Removes the commit hash file, but not the file references
 
+        The objects of the commit may be shared by other commits, so they are
+        only removed by prune_objects
+
         Raises
         ------
         CodeNotInitialized
@@ -317,6 +385,7 @@ class FileCodeDriver(CodeDriver):
             raise FileIOError(
                 __("error", "controller.code.driver.file.delete_ref"))
         commit_filepath = os.path.join(self._code_filepath, commit_id)
+        self._reflog.delete(commit_id)
         os.remove(commit_filepath)
         return True
 
@@ -330,9 +399,7 @@ class FileCodeDriver(CodeDriver):
         """
         if not self.is_initialized:
             raise CodeNotInitialized()
-        # List all files in the code directory (ignore directories)
-        for _, _, commit_hashes in os.walk(self._code_filepath):
-            return commit_hashes
+        return self._reflog.list()
 
     def check_unstaged_changes(self):
         """Checks if there exists any unstaged changes for code. Returns False if it's already staged
@@ -371,26 +438,598 @@ class FileCodeDriver(CodeDriver):
         if not self.exists_ref(commit_id):
             raise FileIOError(
                 __("error", "controller.code.driver.file.checkout_ref"))
+        # The working tree is hashed once, for both checks below
+        filehashes = self._hash_tracked_files(self._get_tracked_files())
+        current_commit_hash = self._get_commit_hash(filehashes)
         # Check if unstaged changes exist
-        if self._has_unstaged_changes():
+        if not self.exists_ref(current_commit_hash):
             raise UnstagedChanges()
         # Check if commit given is same as current
-        tracked_filepaths = self._get_tracked_files()
-        if self._calculate_commit_hash(tracked_filepaths) == commit_id:
+        if current_commit_hash == commit_id:
             return True
-        # Remove all tracked files from repository
-        for tracked_filepath in self._get_tracked_files():
-            absolute_filepath = os.path.join(self.filepath, tracked_filepath)
-            os.remove(absolute_filepath)
-        # Add in files from the commit
+        # Only the files which differ from the commit are removed or written
+        commit_filehashes = self.get_ref_objects(commit_id)
+        index = self._load_index()
+        for tracked_filepath in filehashes:
+            if tracked_filepath not in commit_filehashes:
+                os.remove(os.path.join(self.filepath, tracked_filepath))
+                index.pop(tracked_filepath, None)
+        start_time = time.time()
+        for tracked_filepath, filehash in commit_filehashes.items():
+            if filehashes.get(tracked_filepath) == filehash:
+                continue
+            destination_absolute_filepath = os.path.join(
+                self.filepath, tracked_filepath)
+            if not os.path.isdir(
+                    os.path.dirname(destination_absolute_filepath)):
+                os.makedirs(os.path.dirname(destination_absolute_filepath))
+            self._copy_object(tracked_filepath, filehash,
+                              destination_absolute_filepath)
+            # The hash of the file written is known, so it is not read again
+            file_stat = os.stat(destination_absolute_filepath)
+            if file_stat.st_mtime < start_time - INDEX_RACY_SECONDS:
+                index[tracked_filepath] = [
+                    file_stat.st_size, file_stat.st_mtime, filehash
+                ]
+            else:
+                index.pop(tracked_filepath, None)
+        self._save_index(index)
+        return True
+
+    def get_ref_objects(self, commit_id):
+        """Return the hash of the contents of each file in the commit
+
+        Returns
+        -------
+        dict
+            file hashes keyed by the tracked filepath relative to the project root
+        """
         commit_filepath = os.path.join(self._code_filepath, commit_id)
         with open(commit_filepath, "r") as f:
-            for line in f:
-                tracked_filepath, filehash = line.rstrip().split(",")
-                source_absolute_filepath = os.path.join(
-                    self._code_filepath, tracked_filepath, filehash)
-                destination_absolute_filepath = os.path.join(
-                    self.filepath, tracked_filepath)
-                shutil.copy2(source_absolute_filepath,
-                             destination_absolute_filepath)
+            return dict(line.rstrip().split(",") for line in f)
+
+    def get_object_filepath(self, tracked_filepath, filehash):
+        """Return the absolute path the contents of a tracked file are stored at
+
+        Objects stored before the shared object store are found under the
+        path of the file they were stored for. Packed objects are not stored
+        at the path returned
+        """
+        object_filepath = os.path.join(self._objects_filepath, filehash[:2],
+                                       filehash)
+        if not os.path.isfile(object_filepath) and \
+                tracked_filepath is not None:
+            legacy_object_filepath = os.path.join(self._code_filepath,
+                                                  tracked_filepath, filehash)
+            if os.path.isfile(legacy_object_filepath):
+                return legacy_object_filepath
+        return object_filepath
+
+    def _store_object(self, absolute_filepath, tracked_filepath, filehash):
+        """Store the contents of a file unless an object with the same hash is stored"""
+        object_filepath = self.get_object_filepath(tracked_filepath, filehash)
+        if os.path.isfile(object_filepath) or \
+                filehash in self._get_packed_objects():
+            return False
+        if not os.path.isdir(os.path.dirname(object_filepath)):
+            os.makedirs(os.path.dirname(object_filepath))
+        # Copy to a temporary file first so partial objects are never reused
+        temp_object_filepath = object_filepath + ".tmp"
+        shutil.copy2(absolute_filepath, temp_object_filepath)
+        if os.path.exists(object_filepath):
+            os.remove(object_filepath)
+        os.rename(temp_object_filepath, object_filepath)
+        return True
+
+    def _get_packed_objects(self):
+        """Return the location of each packed object by its hash
+
+        The indexes of the packs are read again only when packs were added
+        or removed
+
+        Returns
+        -------
+        dict
+            dictionary keyed by object hash with values of the form
+            (pack_filepath, offset, length, size, mode, compression)
+        """
+        try:
+            pack_filenames = sorted(os.listdir(self._packs_filepath))
+        except OSError:
+            pack_filenames = []
+        if self._packed_objects is not None and \
+                pack_filenames == self._pack_filenames:
+            return self._packed_objects
+        packed_objects = {}
+        for pack_filename in pack_filenames:
+            if not pack_filename.endswith(".idx"):
+                continue
+            index_filepath = os.path.join(self._packs_filepath,
+                                          pack_filename)
+            pack_filepath = index_filepath[:-len(".idx")] + ".pack"
+            with open(index_filepath, "r") as f:
+                pack_index = json.load(f)
+            for filehash, (offset, length, size, mode,
+                           compression) in pack_index["objects"].items():
+                packed_objects[filehash] = (pack_filepath, offset, length,
+                                            size, mode, compression)
+        self._packed_objects, self._pack_filenames = \
+            packed_objects, pack_filenames
+        return packed_objects
+
+    def _iter_object(self, tracked_filepath, filehash):
+        """Yield the contents of a stored object in blocks, whether loose or packed"""
+        object_filepath = self.get_object_filepath(tracked_filepath, filehash)
+        if os.path.isfile(object_filepath):
+            with open(object_filepath, "rb") as f:
+                for block in iter(lambda: f.read(HASH_BUFFER_SIZE), b""):
+                    yield block
+            return
+        packed_object = self._get_packed_objects().get(filehash)
+        if packed_object is None:
+            raise PathDoesNotExist(
+                __("error", "controller.code.driver.file.object",
+                   (tracked_filepath, filehash)))
+        pack_filepath, offset, length, _, _, compression = packed_object
+        decompressor = _get_decompressor(compression)
+        with open(pack_filepath, "rb") as f:
+            # Objects are read in place so any object is found with one seek
+            f.seek(offset)
+            remaining = length
+            while remaining > 0:
+                block = f.read(min(HASH_BUFFER_SIZE, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                yield decompressor.decompress(block) \
+                    if decompressor is not None else block
+        if compression == "zlib":
+            yield decompressor.flush()
+
+    def _copy_object(self, tracked_filepath, filehash, dst_filepath):
+        """Write the contents of a stored object to a file"""
+        object_filepath = self.get_object_filepath(tracked_filepath, filehash)
+        if os.path.isfile(object_filepath):
+            shutil.copy2(object_filepath, dst_filepath)
+            return True
+        with open(dst_filepath, "wb") as f:
+            for block in self._iter_object(tracked_filepath, filehash):
+                f.write(block)
+        os.chmod(dst_filepath, self._get_packed_objects()[filehash][4])
+        return True
+
+    def hash_object(self, tracked_filepath, filehash, hash_algorithm=None):
+        """Hash the contents of a stored object, whether loose or packed
+
+        Parameters
+        ----------
+        tracked_filepath : str
+            path of a file the object is stored for, relative to the project root
+        filehash : str
+            hash the object is stored by
+        hash_algorithm : str, optional
+            name of the hash algorithm to use
+            (default is None, which uses the hash algorithm of the driver)
+
+        Returns
+        -------
+        tuple
+            hex digest of the contents and their size in bytes
+
+        Raises
+        ------
+        PathDoesNotExist
+            if the object is not stored
+        """
+        hasher = get_hash_function(hash_algorithm or self.hash_algorithm)()
+        size = 0
+        for block in self._iter_object(tracked_filepath, filehash):
+            hasher.update(block)
+            size += len(block)
+        return hasher.hexdigest(), size
+
+    def repack(self, days=None, compression=None, live_commit_ids=None):
+        """Move loose objects into a single indexed pack file
+
+        Every loose object referenced by a live commit, and every packed
+        object a live commit still uses, is written into one new pack,
+        optionally compressed object by object. Packed objects no live commit
+        uses are dropped. The pack index gives the offset of each object so
+        it can be read without reading the rest of the pack. Loose objects
+        and packs are only removed once the new pack is complete
+
+        Parameters
+        ----------
+        days : float, optional
+            only pack the loose objects not modified in this many days
+            (default is None, which packs every loose object)
+        compression : str, optional
+            name of the compression of the objects, "zlib" or "lzma"
+            (default is None, which stores the objects raw)
+        live_commit_ids : list, optional
+            commit ids whose objects are kept
+            (default is None, which keeps the objects of every commit)
+
+        Returns
+        -------
+        dict
+            dictionary with the number of "objects" packed and the number of
+            "loose" objects they include, the number of packed objects
+            "dropped", the "size" of the pack in bytes and its "filepath",
+            which is None if no pack was written
+
+        Raises
+        ------
+        CodeNotInitialized
+            error if not initialized (must initialize first)
+        """
+        if not self.is_initialized:
+            raise CodeNotInitialized()
+        if compression is not None:
+            validate_compression(compression)
+        if live_commit_ids is None:
+            live_commit_ids = self.list_refs()
+        packed_objects = self._get_packed_objects()
+        modified_before = time.time() - days * 24 * 60 * 60 \
+            if days is not None else None
+        loose_objects, live_filehashes = {}, set()
+        for commit_id in live_commit_ids:
+            for tracked_filepath, filehash in self.get_ref_objects(
+                    commit_id).items():
+                live_filehashes.add(filehash)
+                object_filepath = self.get_object_filepath(
+                    tracked_filepath, filehash)
+                if not os.path.isfile(object_filepath):
+                    continue
+                if modified_before is not None and \
+                        os.path.getmtime(object_filepath) >= modified_before:
+                    continue
+                loose_objects.setdefault(filehash, []).append(
+                    (tracked_filepath, object_filepath))
+        dropped_filehashes = set(packed_objects) - live_filehashes
+        filehashes = sorted(
+            set(loose_objects) | (set(packed_objects) - dropped_filehashes))
+        old_pack_filepaths = sorted(
+            set(packed_object[0] for packed_object in packed_objects.values()))
+        if not loose_objects and not dropped_filehashes and \
+                len(old_pack_filepaths) <= 1:
+            return {
+                "objects": 0,
+                "loose": 0,
+                "dropped": 0,
+                "size": 0,
+                "filepath": None
+            }
+
+        def write_object(f, filehash):
+            if filehash in loose_objects:
+                tracked_filepath, object_filepath = loose_objects[filehash][0]
+                mode = stat.S_IMODE(os.stat(object_filepath).st_mode)
+            else:
+                tracked_filepath = None
+                mode = packed_objects[filehash][4]
+            size, stored_compression = self._write_pack_object(
+                f, partial(self._iter_object, tracked_filepath, filehash),
+                compression)
+            return size, mode, stored_compression
+
+        pack_filepath = self._write_pack(filehashes, write_object) \
+            if filehashes else None
+        self._remove_packs(old_pack_filepaths, keep_pack_filepath=pack_filepath)
+        for object_locations in loose_objects.values():
+            for _, object_filepath in object_locations:
+                self._remove_object_file(object_filepath)
+        return {
+            "objects": len(filehashes),
+            "loose": len(loose_objects),
+            "dropped": len(dropped_filehashes),
+            "size": os.path.getsize(pack_filepath) if pack_filepath else 0,
+            "filepath": pack_filepath
+        }
+
+    def _write_pack(self, filehashes, write_object):
+        """Write the objects into a new pack with its index
+
+        Parameters
+        ----------
+        filehashes : list
+            sorted hashes of the objects to write
+        write_object : function
+            writes an object at the end of the pack, given the pack file and
+            the hash of the object, and returns its size, mode and compression
+
+        Returns
+        -------
+        str
+            absolute path of the pack written
+        """
+        if not os.path.isdir(self._packs_filepath):
+            os.makedirs(self._packs_filepath)
+        pack_name = "pack-" + reduce_filehashes(filehashes,
+                                                self.hash_algorithm)
+        pack_filepath = os.path.join(self._packs_filepath, pack_name + ".pack")
+        index_filepath = os.path.join(self._packs_filepath, pack_name + ".idx")
+        pack_index = {}
+        with open(pack_filepath + ".tmp", "wb") as f:
+            for filehash in filehashes:
+                offset = f.tell()
+                size, mode, compression = write_object(f, filehash)
+                pack_index[filehash] = [
+                    offset, f.tell() - offset, size, mode, compression
+                ]
+        with open(index_filepath + ".tmp", "w") as f:
+            f.write(
+                to_unicode(
+                    json.dumps({
+                        "version": PACK_VERSION,
+                        "objects": pack_index
+                    },
+                               sort_keys=True)))
+        # The index is moved last so the pack is complete once it is listed
+        for filepath in [pack_filepath, index_filepath]:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            os.rename(filepath + ".tmp", filepath)
+        return pack_filepath
+
+    @staticmethod
+    def _remove_packs(pack_filepaths, keep_pack_filepath=None):
+        for pack_filepath in pack_filepaths:
+            if pack_filepath != keep_pack_filepath:
+                os.remove(pack_filepath[:-len(".pack")] + ".idx")
+                os.remove(pack_filepath)
+
+    def _remove_object_file(self, object_filepath):
+        """Remove a loose object along with the directories it leaves empty"""
+        if os.path.isfile(object_filepath):
+            os.remove(object_filepath)
+        dirpath = os.path.dirname(object_filepath)
+        while dirpath != self._code_filepath and \
+                os.path.isdir(dirpath) and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+            dirpath = os.path.dirname(dirpath)
+
+    def _list_loose_objects(self):
+        """Yield the hash and absolute path of every loose object
+
+        Objects stored before the shared object store are found in the
+        directories of the code path, named by their hash
+        """
+        for dirpath, _, filenames in os.walk(self._code_filepath):
+            if dirpath == self._code_filepath or \
+                    dirpath == self._packs_filepath or \
+                    dirpath.startswith(self._packs_filepath + os.sep):
+                continue
+            for filename in filenames:
+                if not filename.endswith(".tmp"):
+                    yield filename, os.path.join(dirpath, filename)
+
+    def _find_unreferenced_objects(self, live_commit_ids):
+        """Return the loose and packed objects no live commit uses
+
+        Returns
+        -------
+        tuple
+            list of (filehash, object_filepath) of the loose objects and set
+            of the hashes of the packed objects
+        """
+        live_filehashes, live_object_filepaths = set(), set()
+        for commit_id in live_commit_ids:
+            for tracked_filepath, filehash in self.get_ref_objects(
+                    commit_id).items():
+                live_filehashes.add(filehash)
+                live_object_filepaths.add(
+                    self.get_object_filepath(tracked_filepath, filehash))
+        loose_objects = []
+        for filehash, object_filepath in self._list_loose_objects():
+            if object_filepath.startswith(self._objects_filepath + os.sep):
+                live = filehash in live_filehashes
+            else:
+                # Objects of the legacy layout are only read by their path
+                live = object_filepath in live_object_filepaths
+            if not live:
+                loose_objects.append((filehash, object_filepath))
+        packed_filehashes = set(
+            self._get_packed_objects()) - live_filehashes
+        return loose_objects, packed_filehashes
+
+    def list_unreferenced_objects(self, live_commit_ids=None):
+        """Return the hashes of the stored objects no live commit uses
+
+        Parameters
+        ----------
+        live_commit_ids : list, optional
+            commit ids whose objects are kept
+            (default is None, which keeps the objects of every commit)
+
+        Returns
+        -------
+        list
+            sorted hashes of the objects, loose or packed
+
+        Raises
+        ------
+        CodeNotInitialized
+            error if not initialized (must initialize first)
+        """
+        if not self.is_initialized:
+            raise CodeNotInitialized()
+        if live_commit_ids is None:
+            live_commit_ids = self.list_refs()
+        loose_objects, packed_filehashes = \
+            self._find_unreferenced_objects(live_commit_ids)
+        return sorted(
+            set(filehash for filehash, _ in loose_objects) | packed_filehashes)
+
+    def prune_objects(self, live_commit_ids=None):
+        """Remove the stored objects no live commit uses
+
+        Objects are marked from the files of the live commits and every other
+        loose object is removed. Packs holding unmarked objects are rewritten
+        with only the marked ones, copied as stored, or removed if none are
+        left. Commits not given can no longer be checked out, so they should
+        be deleted first
+
+        Parameters
+        ----------
+        live_commit_ids : list, optional
+            commit ids whose objects are kept
+            (default is None, which keeps the objects of every commit)
+
+        Returns
+        -------
+        list
+            sorted hashes of the objects removed
+
+        Raises
+        ------
+        CodeNotInitialized
+            error if not initialized (must initialize first)
+        """
+        if not self.is_initialized:
+            raise CodeNotInitialized()
+        if live_commit_ids is None:
+            live_commit_ids = self.list_refs()
+        loose_objects, packed_filehashes = \
+            self._find_unreferenced_objects(live_commit_ids)
+        for _, object_filepath in loose_objects:
+            self._remove_object_file(object_filepath)
+        if packed_filehashes:
+            packed_objects = self._get_packed_objects()
+            old_pack_filepaths = sorted(
+                set(packed_object[0]
+                    for packed_object in packed_objects.values()))
+            filehashes = sorted(set(packed_objects) - packed_filehashes)
+
+            def copy_object(f, filehash):
+                # Objects are copied as stored, without decompressing them
+                pack_filepath, offset, length, size, mode, compression = \
+                    packed_objects[filehash]
+                with open(pack_filepath, "rb") as pack_file:
+                    pack_file.seek(offset)
+                    remaining = length
+                    while remaining > 0:
+                        block = pack_file.read(
+                            min(HASH_BUFFER_SIZE, remaining))
+                        if not block:
+                            break
+                        f.write(block)
+                        remaining -= len(block)
+                return size, mode, compression
+
+            pack_filepath = self._write_pack(filehashes, copy_object) \
+                if filehashes else None
+            self._remove_packs(
+                old_pack_filepaths, keep_pack_filepath=pack_filepath)
+        return sorted(
+            set(filehash for filehash, _ in loose_objects) | packed_filehashes)
+
+    @staticmethod
+    def _write_pack_object(f, iter_blocks, compression):
+        """Write an object at the end of the pack, compressed unless that makes it larger
+
+        Parameters
+        ----------
+        f : file
+            pack file open for writing
+        iter_blocks : function
+            returns an iterator over the contents of the object in blocks
+        compression : str or None
+            name of the compression to try
+
+        Returns
+        -------
+        tuple
+            size of the object and the compression it is stored with
+        """
+        offset = f.tell()
+        compressor = _get_compressor(compression)
+        size = 0
+        for block in iter_blocks():
+            f.write(compressor.compress(block)
+                    if compressor is not None else block)
+            size += len(block)
+        if compressor is None:
+            return size, None
+        f.write(compressor.flush())
+        if f.tell() - offset < size:
+            return size, compression
+        # The object is read again and stored raw
+        f.seek(offset)
+        f.truncate()
+        for block in iter_blocks():
+            f.write(block)
+        return size, None
+
+    def checkout_paths(self, commit_id, paths, dst_dirpath=None):
+        """Checkout only the files of the commit matching the paths
+
+        Parameters
+        ----------
+        dst_dirpath : str, optional
+            absolute path of the directory to write the files into
+            (default is None, which writes them into the project)
+
+        Raises
+        ------
+        CodeNotInitialized
+            error if not initialized (must initialize first)
+        """
+        if not self.is_initialized:
+            raise CodeNotInitialized()
+        if not self.exists_ref(commit_id):
+            raise FileIOError(
+                __("error", "controller.code.driver.file.checkout_ref"))
+        filehashes = self.get_ref_objects(commit_id)
+        tracked_filepaths = match_paths(filehashes, paths)
+        for tracked_filepath in tracked_filepaths:
+            destination_absolute_filepath = os.path.join(
+                dst_dirpath or self.filepath, tracked_filepath)
+            if not os.path.isdir(
+                    os.path.dirname(destination_absolute_filepath)):
+                os.makedirs(os.path.dirname(destination_absolute_filepath))
+            self._copy_object(tracked_filepath, filehashes[tracked_filepath],
+                              destination_absolute_filepath)
+        return tracked_filepaths
+
+    def export_ref(self, commit_id, dst_dirpath):
+        """Copy the files of the commit into the directory
+
+        Raises
+        ------
+        CodeNotInitialized
+            error if not initialized (must initialize first)
+        """
+        if not self.is_initialized:
+            raise CodeNotInitialized()
+        if not self.exists_ref(commit_id):
+            raise FileIOError(
+                __("error", "controller.code.driver.file.checkout_ref"))
+        self.checkout_paths(commit_id, ["*"], dst_dirpath=dst_dirpath)
+        return True
+
+    def import_ref(self, commit_id, src_dirpath):
+        """Store the files in the directory as the commit
+
+        Raises
+        ------
+        CodeNotInitialized
+            error if not initialized (must initialize first)
+        """
+        if not self.is_initialized:
+            raise CodeNotInitialized()
+        if self.exists_ref(commit_id):
+            return True
+        commit_filepath = os.path.join(self._code_filepath, commit_id)
+        temp_commit_filepath = commit_filepath + ".tmp"
+        with open(temp_commit_filepath, "w") as f:
+            for tracked_filepath in sorted(list_all_filepaths(src_dirpath)):
+                absolute_filepath = os.path.join(src_dirpath, tracked_filepath)
+                filehash = self._get_filehash(absolute_filepath)
+                self._store_object(absolute_filepath, tracked_filepath,
+                                   filehash)
+                f.write(tracked_filepath + "," + filehash + "\n")
+        # The commit is only listed once all of its files are stored
+        os.rename(temp_commit_filepath, commit_filepath)
+        self._reflog.add(commit_id)
         return True
@@ -1,8 +1,12 @@
 import os
+import re
+import atexit
 import shutil
+import threading
 import subprocess
 import semver
 from io import open
+from collections import OrderedDict
 try:
     to_unicode = unicode
 except NameError:
@@ -25,18 +29,161 @@ from datmo.core.util.i18n import get as __
 from datmo.core.util.exceptions import (
     PathDoesNotExist, GitUrlArgumentError, GitExecutionError, FileIOError,
     CommitDoesNotExist, CommitFailed, DatmoFolderInWorkTree, UnstagedChanges)
+from datmo.core.util.misc_functions import match_paths
+from datmo.core.util.reflog import RefLog
 from datmo.core.controller.code.driver import CodeDriver
 from datmo.config import Config
 
+# Log of the datmo code refs, within the .git directory
+REFLOG_FILENAME = "datmo_reflog"
+# Index of the snapshots made with a private index, within the .git directory
+INDEX_FILENAME = "datmo_index"
+# Number of git cat-file processes kept running for different repositories
+MAX_OBJECT_READERS = 8
+
+_OBJECT_ID_PATTERN = re.compile(r"^(?:[0-9a-f]{40}|[0-9a-f]{64})$")
+# Output of git version for each git executable, checked once per process
+_git_versions = {}
+_object_readers = OrderedDict()
+_object_readers_lock = threading.Lock()
+
+
+class GitObjectReader(object):
+    """Long lived git cat-file --batch-check process answering object queries
+
+    The process is started on the first query and reused for every query
+    after, instead of starting git for each one. It is started again if it
+    exits
+
+    Parameters
+    ----------
+    execpath : str
+        path of the git executable
+    filepath : str
+        absolute path of the repository
+    """
+
+    def __init__(self, execpath, filepath):
+        self.execpath = execpath
+        self.filepath = filepath
+        self._process = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with open(os.devnull, "wb") as devnull:
+            self._process = subprocess.Popen(
+                [self.execpath, "cat-file", "--batch-check"],
+                cwd=self.filepath,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=devnull)
+
+    def get_object(self, name):
+        """Return the id and type of the object named, None if there is no such object
+
+        Parameters
+        ----------
+        name : str
+            object id or any revision git understands (e.g. "HEAD:path")
+
+        Returns
+        -------
+        tuple or None
+            object id and type, one of "commit", "tree", "blob" or "tag"
+
+        Raises
+        ------
+        GitExecutionError
+            if git cannot answer
+        """
+        if not name or "\n" in name:
+            return None
+        with self._lock:
+            line = ""
+            for _ in range(2):
+                if self._process is None or self._process.poll() is not None:
+                    self._start()
+                try:
+                    self._process.stdin.write(to_bytes(name + "\n"))
+                    self._process.stdin.flush()
+                    line = self._process.stdout.readline().decode(
+                        "utf-8").strip()
+                except (IOError, OSError):
+                    line = ""
+                if line:
+                    break
+                # The process exited, it is started again once
+                self.close()
+        if not line:
+            raise GitExecutionError(
+                __("error", "controller.code.driver.git.cat_file", name))
+        parts = line.split()
+        # Unknown names give "<name> missing" and "<name> ambiguous"
+        if len(parts) != 3:
+            return None
+        return parts[0], parts[1]
+
+    def get_type(self, name):
+        """Return the type of the object named, None if there is no such object"""
+        git_object = self.get_object(name)
+        return git_object[1] if git_object else None
+
+    def close(self):
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+                self._process.wait()
+            except (IOError, OSError):
+                pass
+            self._process = None
+
+
+def get_object_reader(execpath, filepath):
+    """Return the object reader of a repository, shared within the process"""
+    key = (execpath, os.path.abspath(filepath))
+    with _object_readers_lock:
+        object_reader = _object_readers.pop(key, None)
+        if object_reader is None:
+            object_reader = GitObjectReader(execpath, filepath)
+        _object_readers[key] = object_reader
+        while len(_object_readers) > MAX_OBJECT_READERS:
+            _, oldest_object_reader = _object_readers.popitem(last=False)
+            oldest_object_reader.close()
+    return object_reader
+
+
+@atexit.register
+def close_object_readers():
+    with _object_readers_lock:
+        while _object_readers:
+            _object_readers.popitem()[1].close()
+
 
 class GitCodeDriver(CodeDriver):
     """
     TODO: Reimplement functions with robust library: https://github.com/gitpython-developers/GitPython
 
     This CodeDriver manages source control management for the project using git
+
+    Parameters
+    ----------
+    filepath : str
+        absolute path of the repository
+    execpath : str
+        path of the git executable
+    remote_url : str, optional
+        url of the remote repository
+    private_index : bool, optional
+        if True, snapshots are staged in an index of their own and committed
+        only to refs/datmo, leaving the index and branch of the user as they
+        are. The working tree is then compared with snapshots through that
+        index and snapshots are checked out without moving HEAD. If False,
+        snapshots are committed on the current branch
+        (default is False)
     """
 
-    def __init__(self, filepath, execpath, remote_url=None):
+    def __init__(self, filepath, execpath, remote_url=None,
+                 private_index=False):
         super(GitCodeDriver, self).__init__()
         self.filepath = filepath
         # Check if filepath exists
@@ -45,25 +192,29 @@ class GitCodeDriver(CodeDriver):
                 __("error", "controller.code.driver.git.__init__.dne",
                    filepath))
         self.execpath = execpath
-        # Check the execpath and the version
+        # Check the execpath and the version, once for each executable
         try:
-            p = subprocess.Popen(
-                [self.execpath, "version"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                cwd=self.filepath)
-            out, err = p.communicate()
-            out, err = out.decode(), err.decode()
-            if err:
-                raise GitExecutionError(
-                    __("error", "controller.code.driver.git.__init__.giterror",
-                       err))
+            out = _git_versions.get(self.execpath)
+            if out is None:
+                p = subprocess.Popen(
+                    [self.execpath, "version"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    cwd=self.filepath)
+                out, err = p.communicate()
+                out, err = out.decode(), err.decode()
+                if err:
+                    raise GitExecutionError(
+                        __("error",
+                           "controller.code.driver.git.__init__.giterror",
+                           err))
             version = str(out.split()[2].split(".windows")[0])
             if not semver.match(version, ">=1.9.7"):
                 raise GitExecutionError(
                     __("error",
                        "controller.code.driver.git.__init__.gitversion",
                        out.split()[2]))
+            _git_versions[self.execpath] = out
         except Exception as e:
             raise GitExecutionError(
                 __("error", "controller.code.driver.git.__init__.giterror",
@@ -72,6 +223,13 @@ class GitCodeDriver(CodeDriver):
         # TODO: handle multiple remote urls
         # self.git_host_driver = GitHostDriver()
         self.remote_url = remote_url
+        self.private_index = private_index
+        # Answers object queries without starting git for each
+        self._object_reader = get_object_reader(self.execpath, self.filepath)
+        # Log of the datmo code refs created and deleted
+        self._reflog = RefLog(
+            os.path.join(self.filepath, ".git", REFLOG_FILENAME),
+            self._list_code_ref_files)
 
         self._is_initialized = self.is_initialized
 
@@ -88,6 +246,8 @@ class GitCodeDriver(CodeDriver):
             # self._remote_url = self.remote_url
             # self._remote_access = False
         self.type = "git"
+        # commit ids are object hashes computed by git itself
+        self.hash_algorithm = "sha1"
 
     @property
     def is_initialized(self):
@@ -169,7 +329,9 @@ class GitCodeDriver(CodeDriver):
             commit could not be created
         """
         self.ensure_code_refs_dir()
-        if not commit_id:
+        if not commit_id and self.private_index:
+            commit_id = self._commit_private_index()
+        elif not commit_id:
             try:
                 _ = self.latest_commit()
                 message = "auto commit by datmo"
@@ -195,33 +357,130 @@ class GitCodeDriver(CodeDriver):
                                      commit_id)
         with open(code_ref_path, "wb") as f:
             f.write(to_bytes(commit_id))
+        self._reflog.add(commit_id)
         return commit_id
 
+    def _run_index_command(self, args):
+        """Run git against the private index and return its output
+
+        Raises
+        ------
+        GitExecutionError
+            error if git fails
+        """
+        env = os.environ.copy()
+        env["GIT_INDEX_FILE"] = os.path.join(self.filepath, ".git",
+                                             INDEX_FILENAME)
+        try:
+            process = subprocess.Popen(
+                [self.execpath] + args,
+                cwd=self.filepath,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE)
+            stdout, stderr = process.communicate()
+            if process.returncode > 0:
+                raise GitExecutionError(
+                    __("error", "controller.code.driver.git.index",
+                       stderr.decode()))
+        except (subprocess.CalledProcessError, OSError) as e:
+            raise GitExecutionError(
+                __("error", "controller.code.driver.git.index", str(e)))
+        return stdout.decode().strip()
+
+    def _write_private_index_tree(self):
+        """Stage the working tree in the private index and return its tree id
+
+        The private index starts as a copy of the index of the user, so git
+        only reads again the files whose stat data changed since
+        """
+        index_filepath = os.path.join(self.filepath, ".git", INDEX_FILENAME)
+        user_index_filepath = os.path.join(self.filepath, ".git", "index")
+        if not os.path.isfile(index_filepath) and \
+                os.path.isfile(user_index_filepath):
+            shutil.copyfile(user_index_filepath, index_filepath)
+        self._run_index_command(["add", "-A"])
+        return self._run_index_command(["write-tree"])
+
+    def _get_ref_tree(self, commit_id):
+        """Return the tree id of a datmo code ref, None if it has none"""
+        tree = self._object_reader.get_object(commit_id + "^{tree}")
+        return tree[0] if tree else None
+
+    def _commit_private_index(self):
+        """Commit the working tree through the private index, without a branch
+
+        The commit has the current commit as its parent and is only reachable
+        from its datmo code ref. If the tree is the same as the one of the
+        latest ref, that ref is returned instead of a new commit
+
+        Returns
+        -------
+        str
+            commit id of the snapshot
+
+        Raises
+        ------
+        CommitFailed
+            commit could not be created
+        """
+        try:
+            tree_id = self._write_private_index_tree()
+            latest_ref = self.latest_ref()
+            if latest_ref and self._get_ref_tree(latest_ref) == tree_id:
+                return latest_ref
+            parent_args = []
+            parent_commit = self._object_reader.get_object("HEAD^{commit}")
+            if parent_commit:
+                parent_args = ["-p", parent_commit[0]]
+            return self._run_index_command(
+                ["commit-tree", tree_id] + parent_args +
+                ["-m", "auto commit by datmo"])
+        except GitExecutionError as e:
+            raise CommitFailed(
+                __("error",
+                   "controller.code.driver.git.create_ref.cannot_commit",
+                   str(e)))
+
     def current_ref(self):
-        return self.latest_commit()
+        """Returns the current ref of the code (may not be a commit id, if not saved)
+
+        With the private index, this is the latest ref with the same tree as
+        the working tree, or the id of the tree if no ref has it. Otherwise
+        it is the current commit
+
+        Returns
+        -------
+        commit_id : str
+            the current commit_id (this may not be a commit id)
+        """
+        if not self.private_index:
+            return self.latest_commit()
+        tree_id = self._write_private_index_tree()
+        for commit_id in reversed(self.list_refs()):
+            if self._get_ref_tree(commit_id) == tree_id:
+                return commit_id
+        return tree_id
 
     def latest_ref(self):
-        def getmtime(absolute_filepath):
-            # Keeping it granular as timestaps in git
-            return int(os.path.getmtime(absolute_filepath))
+        return self._reflog.latest()
 
+    def _list_code_ref_files(self):
+        """Return the commit ids of the datmo code refs, oldest first"""
         code_refs_path = os.path.join(self.filepath, ".git/refs/datmo/")
-        sorted_code_refs = sorted(
-            [
-                os.path.join(code_refs_path, filename)
-                for filename in os.listdir(code_refs_path)
-            ],
-            key=getmtime,
-            reverse=True)
-        _, filename = os.path.split(sorted_code_refs[0])
-        return filename
+        if not os.path.isdir(code_refs_path):
+            return []
+        return [
+            os.path.basename(code_ref_path)
+            for code_ref_path in sorted(
+                (os.path.join(code_refs_path, filename)
+                 for filename in os.listdir(code_refs_path)),
+                key=lambda code_ref_path: (os.path.getmtime(code_ref_path),
+                                           code_ref_path))
+        ]
 
     def exists_ref(self, commit_id):
-        code_ref_path = os.path.join(self.filepath, ".git/refs/datmo/",
-                                     commit_id)
-        if not os.path.isfile(code_ref_path):
-            return False
-        return True
+        return self._reflog.exists(commit_id)
 
     def delete_ref(self, commit_id):
         self.ensure_code_refs_dir()
@@ -230,14 +489,14 @@ class GitCodeDriver(CodeDriver):
         if not self.exists_ref(commit_id):
             raise FileIOError(
                 __("error", "controller.code.driver.git.delete_ref"))
-        os.remove(code_ref_path)
+        self._reflog.delete(commit_id)
+        if os.path.isfile(code_ref_path):
+            os.remove(code_ref_path)
         return True
 
     def list_refs(self):
         self.ensure_code_refs_dir()
-        code_refs_path = os.path.join(self.filepath, ".git/refs/datmo/")
-        code_refs_list = os.listdir(code_refs_path)
-        return code_refs_list
+        return self._reflog.list()
 
     # Datmo specific remote calls
     # def push_ref(self, commit_id="*"):
@@ -265,9 +524,19 @@ class GitCodeDriver(CodeDriver):
     #     return True
 
     def checkout_ref(self, commit_id):
+        if self.private_index:
+            # Files in the working tree are overwritten as they are
+            self.check_unstaged_changes()
         try:
-            # Run checkout for the specific ref as usual
             datmo_ref = "refs/datmo/" + commit_id
+            if self.private_index:
+                # The working tree is switched from the tree in the private
+                # index to the one of the ref, leaving HEAD as it is
+                tree_id = self._write_private_index_tree()
+                self._run_index_command(
+                    ["read-tree", "-m", "-u", tree_id, datmo_ref])
+                return True
+            # Run checkout for the specific ref as usual
             checkout_result = self.checkout(datmo_ref)
             return checkout_result
         except Exception as e:
@@ -275,6 +544,84 @@ class GitCodeDriver(CodeDriver):
                 __("error", "controller.code.driver.git.checkout_ref",
                    (commit_id, str(e))))
 
+    def checkout_paths(self, commit_id, paths):
+        datmo_ref = "refs/datmo/" + commit_id
+        try:
+            process = subprocess.Popen(
+                [
+                    self.execpath, "ls-tree", "-r", "--name-only", "-z",
+                    datmo_ref
+                ],
+                cwd=self.filepath,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE)
+            stdout, stderr = process.communicate()
+            if process.returncode > 0:
+                raise GitExecutionError(
+                    __("error", "controller.code.driver.git.checkout_ref",
+                       (commit_id, str(stderr))))
+            tracked_filepaths = match_paths(
+                [
+                    tracked_filepath
+                    for tracked_filepath in stdout.decode().split("\0")
+                    if tracked_filepath
+                ], paths)
+            if tracked_filepaths:
+                # Only the matching files are written, HEAD is left as is
+                process = subprocess.Popen(
+                    [self.execpath, "checkout", datmo_ref, "--"] +
+                    tracked_filepaths,
+                    cwd=self.filepath,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE)
+                stdout, stderr = process.communicate()
+                if process.returncode > 0:
+                    raise GitExecutionError(
+                        __("error", "controller.code.driver.git.checkout_ref",
+                           (commit_id, str(stderr))))
+        except subprocess.CalledProcessError as e:
+            raise GitExecutionError(
+                __("error", "controller.code.driver.git.checkout_ref",
+                   (commit_id, str(e))))
+        return tracked_filepaths
+
+    def _run_ref_command(self, commit_id, args):
+        try:
+            process = subprocess.Popen(
+                [self.execpath] + args,
+                cwd=self.filepath,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE)
+            stdout, stderr = process.communicate()
+            if process.returncode > 0:
+                raise GitExecutionError(
+                    __("error", "controller.code.driver.git.checkout_ref",
+                       (commit_id, str(stderr))))
+        except subprocess.CalledProcessError as e:
+            raise GitExecutionError(
+                __("error", "controller.code.driver.git.checkout_ref",
+                   (commit_id, str(e))))
+        return True
+
+    def export_ref(self, commit_id, dst_dirpath):
+        # A git bundle holds the commit with its history and the datmo ref
+        return self._run_ref_command(commit_id, [
+            "bundle", "create",
+            os.path.join(dst_dirpath, "code.bundle"), "refs/datmo/" + commit_id
+        ])
+
+    def import_ref(self, commit_id, src_dirpath):
+        if self.exists_ref(commit_id):
+            return True
+        datmo_ref = "refs/datmo/" + commit_id
+        self._run_ref_command(commit_id, [
+            "fetch", "--quiet",
+            os.path.join(src_dirpath, "code.bundle"),
+            "%s:%s" % (datmo_ref, datmo_ref)
+        ])
+        self._reflog.add(commit_id)
+        return True
+
     def exists_datmo_files_ignored(self):
         exclude_file = os.path.join(self.filepath, ".git/info/exclude")
         try:
@@ -300,20 +647,10 @@ class GitCodeDriver(CodeDriver):
         return True
 
     def exists_datmo_files_in_worktree(self):
+        """Return whether the .datmo directory is committed in the current commit"""
         try:
-            process = subprocess.Popen(
-                [self.execpath, "ls-files", "|", "grep", ".datmo"],
-                cwd=self.filepath,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE)
-            stdout, stderr = process.communicate()
-            if process.returncode > 0:
-                raise GitExecutionError(
-                    __("error", "controller.code.driver.git.init",
-                       str(stderr)))
-            result = stdout.decode().strip()
-            return True if result else False
-        except subprocess.CalledProcessError as e:
+            return self._object_reader.get_type("HEAD:.datmo") is not None
+        except GitExecutionError as e:
             raise GitExecutionError(
                 __("error", "controller.code.driver.git.init", str(e)))
 
@@ -431,17 +768,9 @@ class GitCodeDriver(CodeDriver):
 
     def exists_commit(self, commit_id):
         try:
-            process = subprocess.Popen(
-                [self.execpath, "show", commit_id],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                cwd=self.filepath)
-            stdout, stderr = process.communicate()
-            if process.returncode > 0 or "fatal" in str(stdout):
-                return False
-        except subprocess.CalledProcessError:
+            return self._object_reader.get_type(commit_id) == "commit"
+        except GitExecutionError:
             return False
-        return True
 
     # def branch(self, name, option=None):
     #     try:
@@ -480,9 +809,15 @@ class GitCodeDriver(CodeDriver):
             error if there exists any error while using git
 
         """
+        if self.private_index:
+            # Changes are those not saved in any ref, as the branch is not
+            # where snapshots are committed
+            if not self.exists_ref(self.current_ref()):
+                raise UnstagedChanges()
+            return False
         try:
             process = subprocess.Popen(
-                [self.execpath, "status"],
+                [self.execpath, "status", "--porcelain"],
                 cwd=self.filepath,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE)
@@ -491,8 +826,9 @@ class GitCodeDriver(CodeDriver):
                 raise GitExecutionError(
                     __("error", "controller.code.driver.git.status",
                        str(stderr)))
+            # Any changed or untracked path is listed
             stdout = stdout.decode().strip()
-            if "working tree clean" not in stdout:
+            if stdout:
                 raise UnstagedChanges()
         except subprocess.CalledProcessError as e:
             raise GitExecutionError(
@@ -626,7 +962,49 @@ class GitCodeDriver(CodeDriver):
     #             __("error", "controller.code.driver.git.stash_apply", str(e)))
     #     return git_stash_apply
 
+    def _read_ref_file(self, git_dirpath, refname):
+        """Return the object id of a ref read from .git, None if not found there"""
+        ref_filepath = os.path.join(git_dirpath, *refname.split("/"))
+        if os.path.isfile(ref_filepath):
+            with open(ref_filepath, "r") as f:
+                return f.read().strip()
+        packed_refs_filepath = os.path.join(git_dirpath, "packed-refs")
+        if os.path.isfile(packed_refs_filepath):
+            with open(packed_refs_filepath, "r") as f:
+                for line in f:
+                    parts = line.strip().split(" ")
+                    if len(parts) == 2 and parts[1] == refname:
+                        return parts[0]
+        return None
+
+    def _read_head(self):
+        """Return the commit id of HEAD read from .git, None if git has to be asked
+
+        Git writes refs by renaming a complete file into place, so they can be
+        read while git runs. Linked worktrees, unborn branches and other ref
+        storage are left to git
+        """
+        git_dirpath = os.path.join(self.filepath, ".git")
+        try:
+            if not os.path.isdir(git_dirpath):
+                return None
+            with open(os.path.join(git_dirpath, "HEAD"), "r") as f:
+                head = f.read().strip()
+            # Symbolic refs are followed a few levels at most
+            for _ in range(5):
+                if not head.startswith("ref: "):
+                    break
+                head = self._read_ref_file(git_dirpath, head[5:].strip())
+                if head is None:
+                    return None
+        except (IOError, OSError):
+            return None
+        return head if _OBJECT_ID_PATTERN.match(head) else None
+
     def latest_commit(self):
+        git_commit = self._read_head()
+        if git_commit is not None:
+            return git_commit
         try:
             process = subprocess.Popen(
                 [self.execpath, "log", "--format=%H", "-n", "1"],
@@ -830,6 +1208,7 @@ class GitCodeDriver(CodeDriver):
         try:
             if os.path.isdir(dir_path):
                 shutil.rmtree(dir_path)
+            self._reflog.clear()
         except Exception as e:
             raise FileIOError(
                 __("error", "controller.code.driver.git.delete_code_refs_dir",
@@ -160,20 +160,72 @@ class TestFileCodeDriver():
         result = self.file_code_manager._get_tracked_files()
         assert result == ["test2.txt"]
 
+        # Test if it ignores directories in .datmoignore and all within
+        os.makedirs(os.path.join(self.temp_dir, "node_modules", "module"))
+        with open(
+                os.path.join(self.temp_dir, "node_modules", "module",
+                             "index.js"), "wb") as f:
+            f.write(to_bytes("cool"))
+        with open(os.path.join(self.temp_dir, ".datmoignore"), "wb") as f:
+            f.write(to_bytes("test.txt\nnode_modules/"))
+        result = self.file_code_manager._get_tracked_files()
+        assert result == ["test2.txt"]
+
     def test_calculate_commit_hash(self):
         self.__setup()
         # Test if the hash matches the test file
         tracked_filepaths = self.file_code_manager._get_tracked_files()
         result = self.file_code_manager._calculate_commit_hash(
             tracked_filepaths)
-        temp_dir_path = os.path.join(
-            self.file_code_manager._code_filepath,
-            os.listdir(self.file_code_manager._code_filepath)[0])
-        # Assert temp directory was created and populated correctly
-        for item in list_all_filepaths(temp_dir_path):
-            assert item in tracked_filepaths
+        # Assert nothing was copied into the code directory
+        assert os.listdir(self.file_code_manager._code_filepath) == []
         # Assert the correct commit hash was returned
-        assert result == "69a329523ce1ec88bf63061863d9cb14"
+        assert result == "f82a21e6786afcc2f6734b0bba049637"
+
+        # Test if the hash changes when a file is renamed
+        os.rename(
+            os.path.join(self.temp_dir, "test.txt"),
+            os.path.join(self.temp_dir, "test2.txt"))
+        result = self.file_code_manager._calculate_commit_hash(
+            self.file_code_manager._get_tracked_files())
+        assert result != "f82a21e6786afcc2f6734b0bba049637"
+
+    def test_calculate_commit_hash_index(self):
+        self.__setup()
+        filepath = os.path.join(self.temp_dir, "test.txt")
+        # Files hashed long after they were modified are indexed
+        old_time = time.time() - 60
+        os.utime(filepath, (old_time, old_time))
+        result = self.file_code_manager._hash_tracked_files(["test.txt"])
+        assert result == {"test.txt": "5d41402abc4b2a76b9719d911017c592"}
+        assert os.path.isfile(self.file_code_manager._index_filepath)
+        # Indexed hashes are reused while the size and time are unchanged
+        with open(filepath, "wb") as f:
+            f.write(to_bytes("hallo"))
+        os.utime(filepath, (old_time, old_time))
+        result = self.file_code_manager._hash_tracked_files(["test.txt"])
+        assert result == {"test.txt": "5d41402abc4b2a76b9719d911017c592"}
+        # Files are hashed again once changed
+        os.utime(filepath, (old_time + 1, old_time + 1))
+        result = self.file_code_manager._hash_tracked_files(["test.txt"])
+        assert result == {"test.txt": "598d4c200461b81522a3328565c25f7c"}
+
+    def test_calculate_commit_hash_legacy(self):
+        self.__setup()
+        # Commits made before Merkle hashes are named by the contents alone
+        legacy_commit_hash = "69a329523ce1ec88bf63061863d9cb14"
+        with open(
+                os.path.join(self.file_code_manager._code_filepath,
+                             legacy_commit_hash), "w") as f:
+            f.write("test.txt,5d41402abc4b2a76b9719d911017c592\n")
+        assert self.file_code_manager.current_ref() == legacy_commit_hash
+        assert self.file_code_manager.create_ref() == legacy_commit_hash
+        assert self.file_code_manager.list_refs() == [legacy_commit_hash]
+        # The legacy commit is not used for other paths with the same contents
+        os.rename(
+            os.path.join(self.temp_dir, "test.txt"),
+            os.path.join(self.temp_dir, "test2.txt"))
+        assert self.file_code_manager.create_ref() != legacy_commit_hash
 
     def test_create_ref(self):
         # Test failure, not initialized
@@ -201,22 +253,204 @@ class TestFileCodeDriver():
         # Test successful creation of ref
         self.__setup()
         result = self.file_code_manager.create_ref()
-        assert result == "69a329523ce1ec88bf63061863d9cb14"
+        assert result == "f82a21e6786afcc2f6734b0bba049637"
         # Assert the commit file was added in the correct place
         commit_filepath = os.path.join(self.file_code_manager._code_filepath,
                                        result)
         assert os.path.isfile(commit_filepath)
-        # Assert only the tracked files were added in the correct locations
+        # Assert only the tracked files were added as objects named by their hash
         tracked_filepaths = self.file_code_manager._get_tracked_files()
+        objects_dirpath = os.path.join(self.file_code_manager._code_filepath,
+                                       "objects")
+        assert len(list_all_filepaths(objects_dirpath)) == 1
         for tracked_filepath in tracked_filepaths:
-            absolute_dirpath = os.path.join(
-                self.file_code_manager._code_filepath, tracked_filepath)
-            assert os.path.isdir(absolute_dirpath)
-            assert len(os.listdir(absolute_dirpath)) == 1
-            file_line_str = tracked_filepath + "," + os.listdir(
-                absolute_dirpath)[0]
+            filehash = "5d41402abc4b2a76b9719d911017c592"
+            assert os.path.isfile(
+                os.path.join(objects_dirpath, filehash[:2], filehash))
+            file_line_str = tracked_filepath + "," + filehash
             assert file_line_str in open(commit_filepath).read()
 
+    def test_create_ref_shared_objects(self):
+        self.__setup()
+        self.file_code_manager.create_ref()
+        objects_dirpath = os.path.join(self.file_code_manager._code_filepath,
+                                       "objects")
+        object_filepath = os.path.join(objects_dirpath, "5d",
+                                       "5d41402abc4b2a76b9719d911017c592")
+        object_mtime = os.path.getmtime(object_filepath)
+        # Identical contents at other paths and renamed files are stored once
+        os.makedirs(os.path.join(self.temp_dir, "dir"))
+        shutil.copy(
+            os.path.join(self.temp_dir, "test.txt"),
+            os.path.join(self.temp_dir, "dir", "copy.txt"))
+        commit_hash = self.file_code_manager.create_ref()
+        os.rename(
+            os.path.join(self.temp_dir, "test.txt"),
+            os.path.join(self.temp_dir, "renamed.txt"))
+        commit_hash_2 = self.file_code_manager.create_ref()
+        assert commit_hash != commit_hash_2
+        assert list_all_filepaths(objects_dirpath) == [
+            os.path.join("5d", "5d41402abc4b2a76b9719d911017c592")
+        ]
+        assert os.path.getmtime(object_filepath) == object_mtime
+        assert self.file_code_manager.get_ref_objects(commit_hash_2) == {
+            "renamed.txt": "5d41402abc4b2a76b9719d911017c592",
+            os.path.join("dir", "copy.txt"): "5d41402abc4b2a76b9719d911017c592"
+        }
+
+        # Objects stored under the path of their file are still found
+        legacy_dirpath = os.path.join(self.file_code_manager._code_filepath,
+                                      "old.txt")
+        os.makedirs(legacy_dirpath)
+        with open(os.path.join(legacy_dirpath, "legacy"), "wb") as f:
+            f.write(to_bytes("old"))
+        assert self.file_code_manager.get_object_filepath(
+            "old.txt", "legacy") == os.path.join(legacy_dirpath, "legacy")
+
+    def test_repack(self):
+        # Test failure, not initialized
+        failed = False
+        try:
+            self.file_code_manager.repack()
+        except CodeNotInitialized:
+            failed = True
+        assert failed
+        self.__setup()
+        with open(os.path.join(self.temp_dir, "data.txt"), "wb") as f:
+            f.write(to_bytes("datmo " * 1000))
+        with open(os.path.join(self.temp_dir, "random.bin"), "wb") as f:
+            f.write(os.urandom(1000))
+        os.chmod(os.path.join(self.temp_dir, "random.bin"), 0o755)
+        commit_hash = self.file_code_manager.create_ref()
+        filehashes = self.file_code_manager.get_ref_objects(commit_hash)
+        objects_dirpath = os.path.join(self.file_code_manager._code_filepath,
+                                       "objects")
+
+        # Objects modified recently are left loose
+        result = self.file_code_manager.repack(days=1)
+        assert result["objects"] == 0 and result["filepath"] is None
+
+        result = self.file_code_manager.repack(compression="zlib")
+        assert result["objects"] == 3 and result["loose"] == 3
+        assert os.path.isfile(result["filepath"])
+        assert not os.path.isdir(objects_dirpath)
+        # Only objects smaller compressed are stored compressed
+        assert result["size"] < 1000 + 6000
+        for tracked_filepath, filehash in filehashes.items():
+            assert self.file_code_manager.hash_object(
+                tracked_filepath, filehash) == (filehash, os.path.getsize(
+                    os.path.join(self.temp_dir, tracked_filepath)))
+
+        # Packed objects are checked out and not stored again
+        os.remove(os.path.join(self.temp_dir, "data.txt"))
+        os.remove(os.path.join(self.temp_dir, "random.bin"))
+        assert self.file_code_manager.checkout_paths(
+            commit_hash,
+            ["*.txt", "*.bin"]) == ["data.txt", "random.bin", "test.txt"]
+        with open(os.path.join(self.temp_dir, "data.txt"), "rb") as f:
+            assert f.read() == to_bytes("datmo " * 1000)
+        if platform.system() != "Windows":
+            assert os.stat(os.path.join(self.temp_dir,
+                                        "random.bin")).st_mode & 0o777 == 0o755
+        with open(os.path.join(self.temp_dir, "new.txt"), "wb") as f:
+            f.write(to_bytes("new"))
+        commit_hash_2 = self.file_code_manager.create_ref()
+        assert len(list_all_filepaths(objects_dirpath)) == 1
+
+        # Repacking merges the existing pack and new loose objects
+        pack_filepath = result["filepath"]
+        result = self.file_code_manager.repack()
+        assert result["objects"] == 4 and result["loose"] == 1
+        assert not os.path.exists(pack_filepath)
+        self.file_code_manager.checkout_ref(commit_hash)
+        assert not os.path.exists(os.path.join(self.temp_dir, "new.txt"))
+        self.file_code_manager.checkout_ref(commit_hash_2)
+        with open(os.path.join(self.temp_dir, "new.txt"), "rb") as f:
+            assert f.read() == to_bytes("new")
+
+        # Nothing is left to pack
+        result = self.file_code_manager.repack()
+        assert result["filepath"] is None
+
+        # Packed objects no ref uses are not carried into the new pack
+        self.file_code_manager.checkout_ref(commit_hash)
+        self.file_code_manager.delete_ref(commit_hash_2)
+        pack_filepaths = os.listdir(self.file_code_manager._packs_filepath)
+        result = self.file_code_manager.repack()
+        assert result["objects"] == 3 and result["dropped"] == 1
+        assert len(self.file_code_manager._get_packed_objects()) == 3
+        assert not set(pack_filepaths) & set(
+            os.listdir(self.file_code_manager._packs_filepath))
+
+        failed = False
+        try:
+            self.file_code_manager.hash_object("missing.txt", "0" * 32)
+        except PathDoesNotExist:
+            failed = True
+        assert failed
+
+    def test_prune_objects(self):
+        # Test failure, not initialized
+        failed = False
+        try:
+            self.file_code_manager.prune_objects()
+        except CodeNotInitialized:
+            failed = True
+        assert failed
+        self.__setup()
+        with open(os.path.join(self.temp_dir, "data.txt"), "wb") as f:
+            f.write(to_bytes("datmo " * 1000))
+        commit_hash = self.file_code_manager.create_ref()
+        with open(os.path.join(self.temp_dir, "packed.txt"), "wb") as f:
+            f.write(to_bytes("packed"))
+        commit_hash_2 = self.file_code_manager.create_ref()
+        self.file_code_manager.repack(compression="zlib")
+        with open(os.path.join(self.temp_dir, "loose.txt"), "wb") as f:
+            f.write(to_bytes("loose"))
+        commit_hash_3 = self.file_code_manager.create_ref()
+        filehashes_2 = self.file_code_manager.get_ref_objects(commit_hash_2)
+        filehashes_3 = self.file_code_manager.get_ref_objects(commit_hash_3)
+        # An object stored under the path of its file, used by no commit
+        legacy_dirpath = os.path.join(self.file_code_manager._code_filepath,
+                                      "old.txt")
+        os.makedirs(legacy_dirpath)
+        with open(os.path.join(legacy_dirpath, "0" * 32), "wb") as f:
+            f.write(to_bytes("old"))
+
+        # Objects of every commit are kept by default
+        assert self.file_code_manager.list_unreferenced_objects() == ["0" * 32]
+        assert self.file_code_manager.prune_objects() == ["0" * 32]
+        assert not os.path.exists(legacy_dirpath)
+
+        # Loose and packed objects of deleted commits are removed
+        self.file_code_manager.delete_ref(commit_hash_2)
+        self.file_code_manager.delete_ref(commit_hash_3)
+        assert self.file_code_manager.list_unreferenced_objects() == sorted(
+            [filehashes_2["packed.txt"], filehashes_3["loose.txt"]])
+        assert self.file_code_manager.prune_objects() == sorted(
+            [filehashes_2["packed.txt"], filehashes_3["loose.txt"]])
+        assert not os.path.isdir(self.file_code_manager._objects_filepath)
+        packed_objects = self.file_code_manager._get_packed_objects()
+        assert sorted(packed_objects) == sorted(
+            self.file_code_manager.get_ref_objects(commit_hash).values())
+        # Packed objects are kept as they were stored
+        data_filehash = self.file_code_manager.get_ref_objects(
+            commit_hash)["data.txt"]
+        assert packed_objects[data_filehash][5] == "zlib"
+        os.remove(os.path.join(self.temp_dir, "loose.txt"))
+        os.remove(os.path.join(self.temp_dir, "packed.txt"))
+        os.remove(os.path.join(self.temp_dir, "data.txt"))
+        assert self.file_code_manager.checkout_paths(
+            commit_hash, ["*.txt"]) == ["data.txt", "test.txt"]
+        with open(os.path.join(self.temp_dir, "data.txt"), "rb") as f:
+            assert f.read() == to_bytes("datmo " * 1000)
+
+        # Packs left without live objects are removed
+        self.file_code_manager.delete_ref(commit_hash)
+        self.file_code_manager.prune_objects()
+        assert not self.file_code_manager._get_packed_objects()
+        assert not os.listdir(self.file_code_manager._packs_filepath)
+
     def test_current_ref(self):
         # Test failure, not initialized
         failed = False
@@ -267,6 +501,15 @@ class TestFileCodeDriver():
         self.file_code_manager.checkout_ref(commit_id=commit_hash)
         result = self.file_code_manager.latest_ref()
         assert result == commit_hash_2
+        # Test success for commits made within the same second
+        with open(os.path.join(self.temp_dir, "test3.txt"), "wb") as f:
+            f.write(to_bytes("hello"))
+        commit_hash_3 = self.file_code_manager.create_ref()
+        assert self.file_code_manager.latest_ref() == commit_hash_3
+        # Test success after deleting the latest commit
+        self.file_code_manager.delete_ref(commit_hash_3)
+        assert self.file_code_manager.latest_ref() == commit_hash_2
+        assert not self.file_code_manager.exists_ref(commit_hash_3)
 
     def test_exists_ref(self):
         # Test failure, not initialized
@@ -399,3 +642,86 @@ class TestFileCodeDriver():
                     destination_absolute_filepath)
         # Check that files in the latest commit are not present
         assert not os.path.isfile(os.path.join(self.temp_dir, "test2.txt"))
+
+    def test_checkout_ref_incremental(self):
+        self.__setup()
+        with open(os.path.join(self.temp_dir, "same.txt"), "wb") as f:
+            f.write(to_bytes("same"))
+        with open(os.path.join(self.temp_dir, "changed.txt"), "wb") as f:
+            f.write(to_bytes("old"))
+        os.makedirs(os.path.join(self.temp_dir, "models"))
+        with open(os.path.join(self.temp_dir, "models", "a.pt"), "wb") as f:
+            f.write(to_bytes("a"))
+        commit_hash = self.file_code_manager.create_ref()
+        with open(os.path.join(self.temp_dir, "changed.txt"), "wb") as f:
+            f.write(to_bytes("new"))
+        with open(os.path.join(self.temp_dir, "added.txt"), "wb") as f:
+            f.write(to_bytes("added"))
+        os.remove(os.path.join(self.temp_dir, "models", "a.pt"))
+        os.rmdir(os.path.join(self.temp_dir, "models"))
+        commit_hash_2 = self.file_code_manager.create_ref()
+        same_stat = os.stat(os.path.join(self.temp_dir, "same.txt"))
+
+        result = self.file_code_manager.checkout_ref(commit_id=commit_hash)
+        assert result
+        # Files which are the same in both commits are not written again
+        assert os.stat(os.path.join(self.temp_dir, "same.txt")).st_ino == \
+            same_stat.st_ino
+        with open(os.path.join(self.temp_dir, "changed.txt"), "r") as f:
+            assert f.read() == "old"
+        with open(os.path.join(self.temp_dir, "models", "a.pt"), "r") as f:
+            assert f.read() == "a"
+        assert not os.path.exists(os.path.join(self.temp_dir, "added.txt"))
+        assert self.file_code_manager.current_ref() == commit_hash
+        assert "added.txt" not in self.file_code_manager._load_index()
+
+        result = self.file_code_manager.checkout_ref(commit_id=commit_hash_2)
+        assert result
+        assert self.file_code_manager.current_ref() == commit_hash_2
+        assert not os.path.exists(os.path.join(self.temp_dir, "models", "a.pt"))
+
+    def test_checkout_paths(self):
+        self.__setup()
+        os.makedirs(os.path.join(self.temp_dir, "models"))
+        with open(os.path.join(self.temp_dir, "models", "a.pt"), "wb") as f:
+            f.write(to_bytes("a"))
+        commit_hash = self.file_code_manager.create_ref()
+        with open(os.path.join(self.temp_dir, "test.txt"), "wb") as f:
+            f.write(to_bytes("changed"))
+        os.remove(os.path.join(self.temp_dir, "models", "a.pt"))
+        os.rmdir(os.path.join(self.temp_dir, "models"))
+        # Only the files matching are checked out
+        result = self.file_code_manager.checkout_paths(commit_hash,
+                                                       ["models/*.pt"])
+        assert result == [os.path.join("models", "a.pt")]
+        with open(os.path.join(self.temp_dir, "models", "a.pt"), "r") as f:
+            assert f.read() == "a"
+        with open(os.path.join(self.temp_dir, "test.txt"), "r") as f:
+            assert f.read() == "changed"
+        result = self.file_code_manager.checkout_paths(commit_hash,
+                                                       ["*.csv"])
+        assert result == []
+
+    def test_export_import_ref(self):
+        self.__setup()
+        os.makedirs(os.path.join(self.temp_dir, "dirpath"))
+        with open(os.path.join(self.temp_dir, "dirpath", "test2.txt"),
+                  "wb") as f:
+            f.write(to_bytes("hello2"))
+        commit_hash = self.file_code_manager.create_ref()
+        export_dirpath = tempfile.mkdtemp()
+        result = self.file_code_manager.export_ref(commit_hash, export_dirpath)
+        assert result == True
+        assert sorted(list_all_filepaths(export_dirpath)) == \
+            [os.path.join("dirpath", "test2.txt"), "test.txt"]
+
+        other_code_manager = FileCodeDriver(filepath=tempfile.mkdtemp())
+        other_code_manager.init()
+        result = other_code_manager.import_ref(commit_hash, export_dirpath)
+        assert result == True
+        assert other_code_manager.exists_ref(commit_hash)
+        other_code_manager.checkout_paths(commit_hash, ["*"])
+        with open(os.path.join(other_code_manager.filepath, "dirpath",
+                               "test2.txt"), "r") as f:
+            assert f.read() == "hello2"
+        assert other_code_manager.current_ref() == commit_hash
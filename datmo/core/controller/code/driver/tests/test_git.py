@@ -7,6 +7,7 @@ from __future__ import unicode_literals
 import os
 import time
 import shutil
+import subprocess
 import tempfile
 import platform
 from io import open
@@ -159,6 +160,95 @@ class TestGitCodeDriver():
             failed = True
         assert failed
 
+    def test_create_ref_private_index(self):
+        git_code_manager = GitCodeDriver(
+            filepath=self.temp_dir, execpath="git", private_index=True)
+        git_code_manager.init()
+        test_filepath = os.path.join(git_code_manager.filepath, "test.txt")
+        with open(test_filepath, "wb") as f:
+            f.write(to_bytes(str("test")))
+        git_code_manager.add(test_filepath)
+        git_code_manager.commit(["-m", "test"])
+        head_commit = git_code_manager.latest_commit()
+        with open(test_filepath, "wb") as f:
+            f.write(to_bytes(str("test changed")))
+        test_filepath_2 = os.path.join(git_code_manager.filepath, "test2.txt")
+        with open(test_filepath_2, "wb") as f:
+            f.write(to_bytes(str("test")))
+
+        commit_hash = git_code_manager.create_ref()
+        assert os.path.isfile(
+            os.path.join(git_code_manager.filepath, ".git/refs/datmo/",
+                         commit_hash))
+        assert git_code_manager.exists_ref(commit_hash)
+        assert git_code_manager.latest_ref() == commit_hash
+        # The branch and the index of the user are left as they are
+        assert git_code_manager.latest_commit() == head_commit
+        status = subprocess.check_output(
+            ["git", "status", "--porcelain"],
+            cwd=git_code_manager.filepath).decode()
+        assert " M test.txt" in status
+        assert "?? test2.txt" in status
+        # The snapshot has the current commit as its parent
+        parent = subprocess.check_output(
+            ["git", "rev-parse", commit_hash + "^"],
+            cwd=git_code_manager.filepath).decode().strip()
+        assert parent == head_commit
+        files = subprocess.check_output(
+            ["git", "ls-tree", "--name-only", commit_hash],
+            cwd=git_code_manager.filepath).decode().split()
+        assert sorted(files) == ["test.txt", "test2.txt"]
+
+        # An unchanged tree gives the latest ref again
+        assert git_code_manager.create_ref() == commit_hash
+
+        with open(test_filepath_2, "wb") as f:
+            f.write(to_bytes(str("test changed")))
+        commit_hash_2 = git_code_manager.create_ref()
+        assert commit_hash_2 != commit_hash
+        assert git_code_manager.latest_ref() == commit_hash_2
+
+        # Files of snapshots can be checked out like any other
+        git_code_manager.checkout_paths(commit_hash, ["test2.txt"])
+        with open(test_filepath_2, "r") as f:
+            assert f.read() == "test"
+
+        # The working tree is compared with the snapshots, not the branch
+        assert git_code_manager.current_ref() == commit_hash
+        assert not git_code_manager.check_unstaged_changes()
+        with open(test_filepath, "wb") as f:
+            f.write(to_bytes(str("test changed again")))
+        unstaged = False
+        try:
+            git_code_manager.check_unstaged_changes()
+        except UnstagedChanges:
+            unstaged = True
+        assert unstaged
+        assert git_code_manager.current_ref() not in [
+            commit_hash, commit_hash_2
+        ]
+        failed = False
+        try:
+            git_code_manager.checkout_ref(commit_hash_2)
+        except UnstagedChanges:
+            failed = True
+        assert failed
+        git_code_manager.create_ref()
+        git_code_manager.checkout_ref(commit_hash_2)
+        assert git_code_manager.current_ref() == commit_hash_2
+        with open(test_filepath_2, "r") as f:
+            assert f.read() == "test changed"
+        assert not git_code_manager.check_unstaged_changes()
+
+        # Snapshots are checked out without moving HEAD
+        os.remove(test_filepath_2)
+        git_code_manager.create_ref()
+        assert git_code_manager.checkout_ref(commit_hash)
+        assert git_code_manager.current_ref() == commit_hash
+        with open(test_filepath_2, "r") as f:
+            assert f.read() == "test"
+        assert git_code_manager.latest_commit() == head_commit
+
     def test_current_ref(self):
         self.git_code_manager.init()
         # Test success (single commit)
@@ -233,6 +323,8 @@ class TestGitCodeDriver():
         result = self.git_code_manager.delete_ref(code_id)
         assert result == True and \
             not os.path.isfile(code_ref_path)
+        assert not self.git_code_manager.exists_ref(code_id)
+        assert self.git_code_manager.latest_ref() is None
 
     def test_list_refs(self):
         self.git_code_manager.init()
@@ -306,6 +398,51 @@ class TestGitCodeDriver():
         assert os.path.isfile(random_filepath) and \
             "test" in open(random_filepath, "r").read()
 
+    def test_checkout_paths(self):
+        self.git_code_manager.init()
+        test_filepath = os.path.join(self.git_code_manager.filepath,
+                                     "test.txt")
+        other_filepath = os.path.join(self.git_code_manager.filepath,
+                                      "other.txt")
+        for filepath in [test_filepath, other_filepath]:
+            with open(filepath, "wb") as f:
+                f.write(to_bytes(str("test1")))
+        ref_id_1 = self.git_code_manager.create_ref()
+        for filepath in [test_filepath, other_filepath]:
+            with open(filepath, "wb") as f:
+                f.write(to_bytes(str("test2")))
+        ref_id_2 = self.git_code_manager.create_ref()
+        # Only the files matching are checked out and HEAD does not move
+        result = self.git_code_manager.checkout_paths(ref_id_1, ["test.*"])
+        assert result == ["test.txt"]
+        assert open(test_filepath, "r").read() == "test1"
+        assert open(other_filepath, "r").read() == "test2"
+        assert self.git_code_manager.latest_commit() == ref_id_2
+        result = self.git_code_manager.checkout_paths(ref_id_1, ["*.csv"])
+        assert result == []
+
+    def test_export_import_ref(self):
+        self.git_code_manager.init()
+        with open(os.path.join(self.temp_dir, "test.txt"), "wb") as f:
+            f.write(to_bytes(str("test1")))
+        ref_id = self.git_code_manager.create_ref()
+        export_dirpath = tempfile.mkdtemp()
+        result = self.git_code_manager.export_ref(ref_id, export_dirpath)
+        assert result == True
+        assert os.listdir(export_dirpath) == ["code.bundle"]
+
+        other_code_manager = GitCodeDriver(
+            filepath=tempfile.mkdtemp(),
+            execpath="git")
+        other_code_manager.init()
+        result = other_code_manager.import_ref(ref_id, export_dirpath)
+        assert result == True
+        assert other_code_manager.exists_ref(ref_id)
+        other_code_manager.checkout_ref(ref_id)
+        with open(os.path.join(other_code_manager.filepath, "test.txt"),
+                  "r") as f:
+            assert f.read() == "test1"
+
     def test_exists_datmo_files_ignored(self):
         self.git_code_manager.init()
         result = self.git_code_manager.exists_datmo_files_ignored()
@@ -492,6 +629,60 @@ class TestGitCodeDriver():
         latest_commit = self.git_code_manager.latest_commit()
         assert latest_commit
 
+    def test_latest_commit_read_from_git_dir(self):
+        self.git_code_manager.init()
+        test_filepath = os.path.join(self.git_code_manager.filepath,
+                                     "test.txt")
+        with open(test_filepath, "wb") as f:
+            f.write(to_bytes(str("test")))
+        self.git_code_manager.add(test_filepath)
+        self.git_code_manager.commit(["-m", "test"])
+        expected = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            cwd=self.git_code_manager.filepath).decode().strip()
+        assert self.git_code_manager.latest_commit() == expected
+
+        # Branches moved into packed-refs are read from there
+        subprocess.check_call(
+            ["git", "pack-refs", "--all"], cwd=self.git_code_manager.filepath)
+        assert self.git_code_manager.latest_commit() == expected
+
+        # A detached HEAD holds the commit id itself
+        subprocess.check_call(
+            ["git", "checkout", "-q", "--detach"],
+            cwd=self.git_code_manager.filepath)
+        assert self.git_code_manager.latest_commit() == expected
+
+    def test_object_reader(self):
+        self.git_code_manager.init()
+        test_filepath = os.path.join(self.git_code_manager.filepath,
+                                     "test.txt")
+        with open(test_filepath, "wb") as f:
+            f.write(to_bytes(str("test")))
+        self.git_code_manager.add(test_filepath)
+        self.git_code_manager.commit(["-m", "test"])
+        commit_id = self.git_code_manager.latest_commit()
+        object_reader = self.git_code_manager._object_reader
+        assert object_reader.get_type(commit_id) == "commit"
+        assert object_reader.get_type("HEAD:test.txt") == "blob"
+        assert object_reader.get_type("HEAD:does_not_exist") is None
+        assert object_reader.get_type("bad\nname") is None
+
+        # Queries are answered by the same process
+        process = object_reader._process
+        assert self.git_code_manager.exists_commit(commit_id)
+        assert object_reader._process is process
+
+        # The process is started again once it exits
+        object_reader.close()
+        assert self.git_code_manager.exists_commit(commit_id)
+        assert object_reader._process is not process
+
+        # Drivers of the same repository share the process
+        git_code_manager = GitCodeDriver(
+            filepath=self.temp_dir, execpath="git")
+        assert git_code_manager._object_reader is object_reader
+
     def test_reset(self):
         self.git_code_manager.init()
         # Check if failed with non-existant commit
@@ -105,7 +105,7 @@ class EnvironmentDriver(with_metaclass(ABCMeta, object)):
         """
 
     @abstractmethod
-    def build(self, name, path):
+    def build(self, name, path, labels=None, rebuild=False):
         """Build an environment from a definition path
 
         Parameters
@@ -114,6 +114,13 @@ class EnvironmentDriver(with_metaclass(ABCMeta, object)):
             name to give to the environment built
         path : str
             absolute path to the definition file
+        labels : dict, optional
+            labels to add to the environment built. If given, an environment
+            with the same name and labels is used instead of building again
+            (default is None, which means the environment is always built)
+        rebuild : bool, optional
+            build the environment even if one with the same labels exists
+            (default is False)
 
         Returns
         -------
@@ -126,6 +133,25 @@ class EnvironmentDriver(with_metaclass(ABCMeta, object)):
         """
         pass
 
+    @abstractmethod
+    def exists_image(self, image_name, labels=None):
+        """Return whether an environment image exists with the labels given
+
+        Parameters
+        ----------
+        image_name : str
+            name of the image
+        labels : dict, optional
+            labels the image must have
+            (default is None, which means any image with the name matches)
+
+        Returns
+        -------
+        bool
+            True if the image exists with all of the labels given
+        """
+        pass
+
     @abstractmethod
     def run(self, name, options, log_filepath):
         """Run and log an instance of the environment with the options given
@@ -198,6 +224,23 @@ class EnvironmentDriver(with_metaclass(ABCMeta, object)):
         """
         pass
 
+    @staticmethod
+    @abstractmethod
+    def get_default_definition(language="python3"):
+        """Return the contents of the default definition
+
+        Parameters
+        ----------
+        language : str, optional
+            language of the environment to support
+            (default is "python3")
+
+        Returns
+        -------
+        bytes
+            contents of the default definition file
+        """
+
     @staticmethod
     @abstractmethod
     def create_default_definition(directory, language="python3"):
@@ -237,6 +280,22 @@ class EnvironmentDriver(with_metaclass(ABCMeta, object)):
             list of file names of the datmo definition file
         """
 
+    @staticmethod
+    @abstractmethod
+    def get_datmo_definition(definition):
+        """Return the contents of the datmo version of a definition
+
+        Parameters
+        ----------
+        definition : bytes
+            contents of the original definition
+
+        Returns
+        -------
+        bytes
+            contents of the datmo definition file
+        """
+
     @staticmethod
     @abstractmethod
     def create_datmo_definition(input_definition_path, output_definition_path):
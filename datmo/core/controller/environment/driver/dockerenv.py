@@ -1,9 +1,12 @@
 import ast
 import os
+import sys
 import json
+import shutil
+import tempfile
 import subprocess
 import platform
-from io import open
+from io import open, BytesIO
 try:
     to_unicode = unicode
 except NameError:
@@ -22,6 +25,7 @@ except TypeError:
     to_bytes("test")
 from docker import DockerClient
 from docker import errors
+from requests.exceptions import RequestException
 
 from datmo.core.util.i18n import get as __
 from datmo.core.util.exceptions import (
@@ -33,6 +37,22 @@ from datmo.core.controller.environment.driver import EnvironmentDriver
 
 docker_config_filepath = os.path.join(
     os.path.split(__file__)[0], "config", "docker.json")
+templates_dirpath = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "templates")
+# Labels of the containers run, used to find them again by term
+CONTAINER_IMAGE_LABEL = "datmo.image"
+CONTAINER_NAME_LABEL = "datmo.name"
+
+
+def _normalize_definition_lines(lines):
+    """Return the lines of a definition stripped, keeping a newline after lines which had one"""
+    output = []
+    for line in lines:
+        if to_bytes(os.linesep) in line:
+            output.append(line.strip() + to_bytes("\n"))
+        else:
+            output.append(line.strip())
+    return to_bytes("").join(output)
 
 
 class DockerEnvironmentDriver(EnvironmentDriver):
@@ -173,8 +193,10 @@ class DockerEnvironmentDriver(EnvironmentDriver):
         return success, path, output_path
 
     # running daemon needed
-    def build(self, name, path):
-        return self.build_image(name, path)
+    def build(self, name, path, labels=None, rebuild=False):
+        if not rebuild and labels and self.exists_image(name, labels=labels):
+            return True
+        return self.build_image(name, path, labels=labels)
 
     # running daemon needed
     def run(self, name, options, log_filepath):
@@ -279,7 +301,7 @@ class DockerEnvironmentDriver(EnvironmentDriver):
         return list_tag_names
 
     # running daemon needed
-    def build_image(self, tag, definition_path="Dockerfile"):
+    def build_image(self, tag, definition_path="Dockerfile", labels=None):
         """Builds docker image
 
         Parameters
@@ -288,6 +310,9 @@ class DockerEnvironmentDriver(EnvironmentDriver):
             name to tag image with
         definition_path : str
             absolute file path to the definition
+        labels : dict, optional
+            labels to add to the image
+            (default is None, which means no labels are added)
 
         Returns
         -------
@@ -307,6 +332,11 @@ class DockerEnvironmentDriver(EnvironmentDriver):
             docker_shell_cmd_list.append("-t")
             docker_shell_cmd_list.append(tag)
 
+            # Passing labels for the image
+            for key, value in sorted((labels or {}).items()):
+                docker_shell_cmd_list.append("--label")
+                docker_shell_cmd_list.append("%s=%s" % (key, value))
+
             # Passing path of Dockerfile
             docker_shell_cmd_list.append("-f")
             docker_shell_cmd_list.append(definition_path)
@@ -335,6 +365,17 @@ class DockerEnvironmentDriver(EnvironmentDriver):
         except errors.ImageNotFound:
             raise EnvironmentImageNotFound()
 
+    # running daemon needed
+    def exists_image(self, image_name, labels=None):
+        try:
+            image = self.get_image(image_name)
+        except EnvironmentImageNotFound:
+            return False
+        image_labels = image.labels or {}
+        return all(
+            image_labels.get(key) == value
+            for key, value in (labels or {}).items())
+
     # running daemon needed
     def list_images(self, name=None, all_images=False, filters=None):
         return self.client.images.list(
@@ -347,23 +388,8 @@ class DockerEnvironmentDriver(EnvironmentDriver):
     # running daemon needed
     def remove_image(self, image_id_or_name, force=False):
         try:
-            if force:
-                docker_image_remove_cmd = list(self.prefix)
-                docker_image_remove_cmd.extend(["rmi", "-f", image_id_or_name])
-            else:
-                docker_image_remove_cmd = list(self.prefix)
-                docker_image_remove_cmd.extend(["rmi", image_id_or_name])
-            process = subprocess.Popen(
-                docker_image_remove_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE)
-            stdout, stderr = process.communicate()
-            if process.returncode > 0:
-                raise EnvironmentExecutionError(
-                    __("error",
-                       "controller.environment.driver.docker.remove_image",
-                       str(stderr)))
-        except subprocess.CalledProcessError as e:
+            self.client.api.remove_image(image_id_or_name, force=force)
+        except (errors.APIError, RequestException) as e:
             raise EnvironmentExecutionError(
                 __("error",
                    "controller.environment.driver.docker.remove_image",
@@ -429,7 +455,8 @@ class DockerEnvironmentDriver(EnvironmentDriver):
         tty : bool, optional
             True to connect pseudo-terminal with stdin / stdout else False
         api : bool, optional
-            True if Docker python client should be used else use subprocess
+            True if the high level Docker python client should be used else
+            the low level client, or the docker command for a tty or stdin
         Returns
         -------
         if api=False:
@@ -448,99 +475,169 @@ class DockerEnvironmentDriver(EnvironmentDriver):
         EnvironmentExecutionError
              error in running the environment command
         """
+        labels = self._get_container_labels(image_name, name)
+        command = list(command) if command else command
+        if api:  # calling the docker client via the API
+            # TODO: Test this out for the API (need to verify ports work)
+            command = " ".join(command) if command else command
+            container = \
+                self.client.containers.run(image_name, command, ports=ports,
+                                           name=name, volumes=volumes,
+                                           mem_limit=mem_limit, labels=labels,
+                                           detach=detach, stdin_open=stdin_open)
+            return container if detach else container.decode()
+        if tty or stdin_open:
+            # The terminal and stdin of the user are handed over by the
+            # docker client
+            return self._run_container_cli(
+                image_name, command, ports, name, volumes, mem_limit, runtime,
+                detach, stdin_open, tty, labels)
         try:
-            container_id = None
-            if api:  # calling the docker client via the API
-                # TODO: Test this out for the API (need to verify ports work)
-                if detach:
-                    command = " ".join(command) if command else command
-                    container = \
-                        self.client.containers.run(image_name, command, ports=ports,
-                                                   name=name, volumes=volumes,
-                                                   mem_limit=mem_limit,
-                                                   detach=detach, stdin_open=stdin_open)
-                    return container
-                else:
-                    command = " ".join(command) if command else command
-                    logs = self.client.containers.run(
-                        image_name,
-                        command,
-                        ports=ports,
-                        name=name,
-                        volumes=volumes,
-                        mem_limit=mem_limit,
-                        detach=detach,
-                        stdin_open=stdin_open)
-                    return logs.decode()
-            else:  # if calling run function with the shell commands
-                docker_shell_cmd_list = list(self.prefix)
-                docker_shell_cmd_list.append("run")
-
-                if name:
-                    docker_shell_cmd_list.append("--name")
-                    docker_shell_cmd_list.append(name)
-
-                if runtime:
-                    docker_shell_cmd_list.append("--runtime")
-                    docker_shell_cmd_list.append(runtime)
-
-                if mem_limit:
-                    docker_shell_cmd_list.append("-m")
-                    docker_shell_cmd_list.append(mem_limit)
-                    docker_shell_cmd_list.append("--memory-swap")
-                    docker_shell_cmd_list.append("-1")
-
-                if stdin_open:
-                    docker_shell_cmd_list.append("-i")
-
-                if tty:
-                    docker_shell_cmd_list.append("-t")
-
-                if detach:
-                    docker_shell_cmd_list.append("-d")
-
-                # Volume
-                if volumes:
-                    # Mounting volumes
-                    for key in list(volumes):
-                        docker_shell_cmd_list.append("-v")
-                        volume_mount = key + ":" + volumes[key]["bind"] + ":" + \
-                                       volumes[key]["mode"]
-                        docker_shell_cmd_list.append(volume_mount)
-
-                if ports:
-                    # Mapping ports
-                    for mapping in ports:
-                        docker_shell_cmd_list.append("-p")
-                        docker_shell_cmd_list.append(mapping)
-
-                docker_shell_cmd_list.append(image_name)
-                if command:
-                    docker_shell_cmd_list.extend(command)
-                return_code = subprocess.call(docker_shell_cmd_list)
-                if return_code != 0:
-                    raise EnvironmentExecutionError(
-                        __("error",
-                           "controller.environment.driver.docker.run_container",
-                           str(docker_shell_cmd_list)))
-                list_process_cmd = list(self.prefix)
-                list_process_cmd.extend(["ps", "-q", "-l"])
-                process = subprocess.Popen(
-                    list_process_cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE)
-                stdout, stderr = process.communicate()
-                if process.returncode > 0:
+            exposed_ports, port_bindings = self._parse_ports(ports)
+            host_config = self.client.api.create_host_config(
+                binds=volumes,
+                port_bindings=port_bindings,
+                mem_limit=mem_limit,
+                memswap_limit=-1 if mem_limit else None,
+                runtime=runtime)
+            container_id = self.client.api.create_container(
+                image_name,
+                command=command,
+                name=name,
+                ports=exposed_ports,
+                volumes=[volume["bind"] for volume in volumes.values()]
+                if volumes else None,
+                stdin_open=stdin_open,
+                detach=detach,
+                labels=labels,
+                host_config=host_config)["Id"]
+            self.client.api.start(container_id)
+            if not detach:
+                # Output is shown as the container runs, as docker run does
+                for chunk in self.client.api.logs(
+                        container_id, stream=True, follow=True):
+                    sys.stdout.write(chunk.decode("utf-8", "replace"))
+                    sys.stdout.flush()
+                result = self.client.api.wait(container_id)
+                status_code = result["StatusCode"] \
+                    if isinstance(result, dict) else result
+                if status_code != 0:
                     raise EnvironmentExecutionError(
                         __("error",
                            "controller.environment.driver.docker.run_container",
-                           str(stderr)))
-                container_id = stdout.decode().strip()
-        except subprocess.CalledProcessError as e:
+                           str(command)))
+        except (errors.APIError, RequestException) as e:
+            raise EnvironmentExecutionError(
+                __("error",
+                   "controller.environment.driver.docker.run_container",
+                   str(e)))
+        return 0, container_id
+
+    @staticmethod
+    def _get_container_labels(image_name, name=None):
+        """Return the labels containers are found by"""
+        labels = {CONTAINER_IMAGE_LABEL: image_name}
+        if name:
+            labels[CONTAINER_NAME_LABEL] = name
+        return labels
+
+    @staticmethod
+    def _parse_ports(ports):
+        """Return the ports exposed and their bindings from docker run style mappings
+
+        Mappings are of the form "container", "host:container" or
+        "ip:host:container", where container may end in a protocol like "/udp"
+        """
+        exposed_ports, port_bindings = [], {}
+        for mapping in ports or []:
+            parts = mapping.split(":")
+            container_port = parts[-1]
+            if "/" in container_port:
+                port, protocol = container_port.split("/", 1)
+                exposed_ports.append((int(port), protocol))
+            else:
+                exposed_ports.append(int(container_port))
+            if len(parts) == 1:
+                port_bindings[container_port] = None
+            elif len(parts) == 2:
+                port_bindings[container_port] = parts[0]
+            else:
+                port_bindings[container_port] = (parts[0], parts[1])
+        return exposed_ports, port_bindings
+
+    def _run_container_cli(self, image_name, command, ports, name, volumes,
+                           mem_limit, runtime, detach, stdin_open, tty, labels):
+        """Run a container attached to the terminal or stdin of the user with docker run"""
+        docker_shell_cmd_list = list(self.prefix)
+        docker_shell_cmd_list.append("run")
+
+        if name:
+            docker_shell_cmd_list.append("--name")
+            docker_shell_cmd_list.append(name)
+
+        if runtime:
+            docker_shell_cmd_list.append("--runtime")
+            docker_shell_cmd_list.append(runtime)
+
+        if mem_limit:
+            docker_shell_cmd_list.append("-m")
+            docker_shell_cmd_list.append(mem_limit)
+            docker_shell_cmd_list.append("--memory-swap")
+            docker_shell_cmd_list.append("-1")
+
+        for key, value in sorted(labels.items()):
+            docker_shell_cmd_list.append("--label")
+            docker_shell_cmd_list.append("%s=%s" % (key, value))
+
+        if stdin_open:
+            docker_shell_cmd_list.append("-i")
+
+        if tty:
+            docker_shell_cmd_list.append("-t")
+
+        if detach:
+            docker_shell_cmd_list.append("-d")
+
+        # Volume
+        if volumes:
+            # Mounting volumes
+            for key in list(volumes):
+                docker_shell_cmd_list.append("-v")
+                volume_mount = key + ":" + volumes[key]["bind"] + ":" + \
+                               volumes[key]["mode"]
+                docker_shell_cmd_list.append(volume_mount)
+
+        if ports:
+            # Mapping ports
+            for mapping in ports:
+                docker_shell_cmd_list.append("-p")
+                docker_shell_cmd_list.append(mapping)
+
+        # The container id is written to a file instead of asking for the
+        # latest container afterwards
+        cid_dirpath = tempfile.mkdtemp()
+        cid_filepath = os.path.join(cid_dirpath, "cid")
+        docker_shell_cmd_list.extend(["--cidfile", cid_filepath])
+
+        docker_shell_cmd_list.append(image_name)
+        if command:
+            docker_shell_cmd_list.extend(command)
+        try:
+            return_code = subprocess.call(docker_shell_cmd_list)
+            if return_code != 0:
+                raise EnvironmentExecutionError(
+                    __("error",
+                       "controller.environment.driver.docker.run_container",
+                       str(docker_shell_cmd_list)))
+            with open(cid_filepath, "r") as f:
+                container_id = f.read().strip()
+        except (subprocess.CalledProcessError, IOError, OSError) as e:
             raise EnvironmentExecutionError(
                 __("error",
                    "controller.environment.driver.docker.run_container",
                    str(e)))
+        finally:
+            shutil.rmtree(cid_dirpath, ignore_errors=True)
         return return_code, container_id
 
     # running daemon needed
@@ -563,19 +660,8 @@ class DockerEnvironmentDriver(EnvironmentDriver):
     # running daemon needed
     def stop_container(self, container_id):
         try:
-            docker_container_stop_cmd = list(self.prefix)
-            docker_container_stop_cmd.extend(["stop", container_id])
-            process = subprocess.Popen(
-                docker_container_stop_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE)
-            stdout, stderr = process.communicate()
-            if process.returncode > 0:
-                raise EnvironmentExecutionError(
-                    __("error",
-                       "controller.environment.driver.docker.stop_container",
-                       str(stderr)))
-        except subprocess.CalledProcessError as e:
+            self.client.api.stop(container_id)
+        except (errors.APIError, RequestException) as e:
             raise EnvironmentExecutionError(
                 __("error",
                    "controller.environment.driver.docker.stop_container",
@@ -585,23 +671,8 @@ class DockerEnvironmentDriver(EnvironmentDriver):
     # running daemon needed
     def remove_container(self, container_id, force=False):
         try:
-            docker_container_remove_cmd_list = list(self.prefix)
-            if force:
-                docker_container_remove_cmd_list.extend(
-                    ["rm", "-f", container_id])
-            else:
-                docker_container_remove_cmd_list.extend(["rm", container_id])
-            process = subprocess.Popen(
-                docker_container_remove_cmd_list,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE)
-            stdout, stderr = process.communicate()
-            if process.returncode > 0:
-                raise EnvironmentExecutionError(
-                    __("error",
-                       "controller.environment.driver.docker.remove_container",
-                       str(stderr)))
-        except subprocess.CalledProcessError as e:
+            self.client.api.remove_container(container_id, force=force)
+        except (errors.APIError, RequestException) as e:
             raise EnvironmentExecutionError(
                 __("error",
                    "controller.environment.driver.docker.remove_container",
@@ -619,7 +690,7 @@ class DockerEnvironmentDriver(EnvironmentDriver):
         filepath : str
             Filepath to store log file
         api : bool
-            True to use the docker python api
+            unused, logs are always read through the docker python api
         follow : bool
             Tail the output
 
@@ -630,116 +701,67 @@ class DockerEnvironmentDriver(EnvironmentDriver):
         logs : str
             Output logs read into a string format
         """
-        # TODO: Fix function to better accomodate all logs in the same way
-        if api:  # calling the docker client via the API
-            with open(filepath, "wb") as log_file:
-                for line in self.client.containers.get(container_id).logs(
-                        stream=True):
-                    log_file.write(to_bytes(line.strip() + "\n"))
-        else:
-            command = list(self.prefix)
-            if follow:
-                command.extend(["logs", "--follow", str(container_id)])
-            else:
-                command.extend(["logs", str(container_id)])
-            process = subprocess.Popen(
-                command, stdout=subprocess.PIPE, universal_newlines=True)
-            with open(filepath, "wb") as log_file:
-                while True:
-                    output = process.stdout.readline()
-                    if output == "" and process.poll() is not None:
-                        break
-                    if output:
-                        printable_output = output.strip().replace("\x08", " ")
-                        log_file.write(to_bytes(printable_output + "\n"))
-            return_code = process.poll()
-            with open(filepath, "rb") as log_file:
-                logs = log_file.read()
-                if type(logs) != str:  # handle for python 3x
-                    logs = logs.decode("utf-8")
-            return return_code, logs
+        return_code = 0
+        with open(filepath, "wb") as log_file:
+            try:
+                pending = to_bytes("")
+                for chunk in self.client.api.logs(
+                        container_id, stream=True, follow=follow):
+                    lines = (pending + chunk).split(to_bytes("\n"))
+                    pending = lines.pop()
+                    for line in lines:
+                        self._write_log_line(log_file, line)
+                if pending:
+                    self._write_log_line(log_file, pending)
+            except (errors.APIError, RequestException):
+                return_code = 1
+        with open(filepath, "rb") as log_file:
+            logs = log_file.read()
+            if type(logs) != str:  # handle for python 3x
+                logs = logs.decode("utf-8")
+        return return_code, logs
+
+    @staticmethod
+    def _write_log_line(log_file, line):
+        printable_output = line.decode("utf-8", "replace").strip().replace(
+            "\x08", " ")
+        log_file.write(to_bytes(printable_output + "\n"))
 
     # running daemon needed
     def stop_remove_containers_by_term(self, term, force=False):
         """Stops and removes containers by term
+
+        Containers are matched by their id, image, names or labels containing
+        the term, as listed in a single request to the docker daemon
         """
-        # TODO: split out the find containers function from stop / remove
         try:
-            running_docker_container_cmd_list = list(self.prefix)
-            running_docker_container_cmd_list.extend([
-                "ps", "-a", "|", "grep",
-                "'%s'" % term, "|", "awk '{print $1}'"
-            ])
-
-            running_docker_container_cmd_str = str(
-                " ".join(running_docker_container_cmd_list))
-            process = subprocess.Popen(
-                running_docker_container_cmd_str,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE)
-            out_list_cmd, err_list_cmd = process.communicate()
-            if process.returncode > 0:
-                raise EnvironmentExecutionError(
-                    __("error",
-                       "controller.environment.driver.docker.stop_remove_containers_by_term",
-                       str(err_list_cmd)))
-            # checking for running container id before stopping any
-            if out_list_cmd:
-                docker_container_stop_cmd_list = list(self.prefix)
-                docker_container_stop_cmd_list = docker_container_stop_cmd_list + \
-                                                 ["stop", "$("] + running_docker_container_cmd_list + \
-                                                 [")"]
-                docker_container_stop_cmd_str = str(
-                    " ".join(docker_container_stop_cmd_list))
-                process = subprocess.Popen(
-                    docker_container_stop_cmd_str,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE)
-                _, _ = process.communicate()
-                # rechecking for container id after stopping them to ensure no errors
-                process = subprocess.Popen(
-                    running_docker_container_cmd_str,
-                    shell=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE)
-                out_list_cmd, err_list_cmd = process.communicate()
-                if process.returncode > 0:
-                    raise EnvironmentExecutionError(
-                        __("error",
-                           "controller.environment.driver.docker.stop_remove_containers_by_term",
-                           str(err_list_cmd)))
-                if out_list_cmd:
-                    docker_container_remove_cmd_list = list(self.prefix)
-                    if force:
-                        docker_container_remove_cmd_list = docker_container_remove_cmd_list + \
-                                                           ["rm", "-f", "$("] + running_docker_container_cmd_list + \
-                                                           [")"]
-                    else:
-                        docker_container_remove_cmd_list = docker_container_remove_cmd_list + \
-                                                           ["rm", "$("] + running_docker_container_cmd_list + \
-                                                           [")"]
-                    docker_container_remove_cmd_str = str(
-                        " ".join(docker_container_remove_cmd_list))
-                    process = subprocess.Popen(
-                        docker_container_remove_cmd_str,
-                        shell=True,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE)
-                    _, err_list_cmd = process.communicate()
-                    if process.returncode > 0:
-                        raise EnvironmentExecutionError(
-                            __("error",
-                               "controller.environment.driver.docker.stop_remove_containers_by_term",
-                               str(err_list_cmd)))
-        except subprocess.CalledProcessError as e:
+            for container in self.client.api.containers(all=True):
+                if not self._container_matches_term(container, term):
+                    continue
+                if container.get("State") == "running":
+                    self.client.api.stop(container["Id"])
+                self.client.api.remove_container(container["Id"], force=force)
+        except (errors.APIError, RequestException) as e:
             raise EnvironmentExecutionError(
                 __("error",
                    "controller.environment.driver.docker.stop_remove_containers_by_term",
                    str(e)))
         return True
 
+    @staticmethod
+    def _container_matches_term(container, term):
+        labels = container.get("Labels") or {}
+        fields = [
+            container.get("Id", ""),
+            container.get("Image", ""),
+            container.get("ImageID", "")
+        ]
+        fields.extend(container.get("Names") or [])
+        fields.extend(
+            labels.get(label, "")
+            for label in [CONTAINER_IMAGE_LABEL, CONTAINER_NAME_LABEL])
+        return any(term in field for field in fields)
+
     def create_requirements_file(self, package_manager="pip"):
         """Create python requirements txt file for the project
 
@@ -787,20 +809,19 @@ class DockerEnvironmentDriver(EnvironmentDriver):
                    "no such package manager"))
 
     @staticmethod
-    def create_default_definition(directory, language="python3"):
+    def get_default_definition(language="python3"):
         language_dockerfile = "%sDockerfile" % language
-        default_dockerfile_filepath = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "templates",
-            language_dockerfile)
+        default_dockerfile_filepath = os.path.join(templates_dirpath,
+                                                   language_dockerfile)
+        with open(default_dockerfile_filepath, "rb") as input_file:
+            return _normalize_definition_lines(input_file)
 
+    @staticmethod
+    def create_default_definition(directory, language="python3"):
         destination_dockerfile = os.path.join(directory, "Dockerfile")
-        with open(default_dockerfile_filepath, "rb") as input_file:
-            with open(destination_dockerfile, "wb") as output_file:
-                for line in input_file:
-                    if to_bytes(os.linesep) in line:
-                        output_file.write(line.strip() + to_bytes("\n"))
-                    else:
-                        output_file.write(line.strip())
+        with open(destination_dockerfile, "wb") as output_file:
+            output_file.write(
+                DockerEnvironmentDriver.get_default_definition(language))
         return destination_dockerfile
 
     def get_default_definition_filename(self):
@@ -822,27 +843,23 @@ class DockerEnvironmentDriver(EnvironmentDriver):
             'processor': processor
         }
 
+    @staticmethod
+    def get_datmo_definition(definition):
+        datmo_base_dockerfile_path = os.path.join(templates_dirpath,
+                                                  "baseDockerfile")
+        with open(datmo_base_dockerfile_path, "rb") as datmo_base_file:
+            return _normalize_definition_lines(BytesIO(definition)) + \
+                _normalize_definition_lines(datmo_base_file)
+
     @staticmethod
     def create_datmo_definition(input_definition_path, output_definition_path):
         """
         Creates a datmo dockerfiles to run at the output path specified
         """
-        datmo_base_dockerfile_path = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "templates",
-            "baseDockerfile")
-
         # Combine dockerfiles
         with open(input_definition_path, "rb") as input_file:
-            with open(datmo_base_dockerfile_path, "rb") as datmo_base_file:
-                with open(output_definition_path, "wb") as output_file:
-                    for line in input_file:
-                        if to_bytes(os.linesep) in line:
-                            output_file.write(line.strip() + to_bytes("\n"))
-                        else:
-                            output_file.write(line.strip())
-                    for line in datmo_base_file:
-                        if to_bytes(os.linesep) in line:
-                            output_file.write(line.strip() + to_bytes("\n"))
-                        else:
-                            output_file.write(line.strip())
+            definition = input_file.read()
+        with open(output_definition_path, "wb") as output_file:
+            output_file.write(
+                DockerEnvironmentDriver.get_datmo_definition(definition))
         return True
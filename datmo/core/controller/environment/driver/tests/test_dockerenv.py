@@ -6,11 +6,21 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import os
+import sys
+import json
+import struct
 import tempfile
 import platform
+import threading
 import uuid
 import timeout_decorator
 from io import open
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
 try:
     to_unicode = unicode
 except NameError:
@@ -28,11 +38,14 @@ except TypeError:
 
     to_bytes("test")
 
+from docker import errors
+
 from datmo.core.controller.environment.driver.dockerenv import DockerEnvironmentDriver
 from datmo.core.util.exceptions import (
     EnvironmentInitFailed, FileAlreadyExistsError,
     EnvironmentRequirementsCreateError, EnvironmentImageNotFound,
-    EnvironmentContainerNotFound, PathDoesNotExist, EnvironmentDoesNotExist)
+    EnvironmentContainerNotFound, PathDoesNotExist, EnvironmentDoesNotExist,
+    EnvironmentExecutionError)
 from datmo.core.util.misc_functions import pytest_docker_environment_failed_instantiation
 
 # provide mountable tmp directory for docker
@@ -40,6 +53,294 @@ tempfile.tempdir = "/tmp" if not platform.system() == "Windows" else None
 test_datmo_dir = os.environ.get('TEST_DATMO_DIR', tempfile.gettempdir())
 
 
+class StubImage(object):
+    def __init__(self, labels):
+        self.labels = labels
+
+
+class StubImages(object):
+    def __init__(self):
+        self.images = {}
+
+    def get(self, name):
+        if name not in self.images:
+            raise errors.ImageNotFound(name)
+        return self.images[name]
+
+
+class StubDockerClient(object):
+    """Answers the calls the driver makes to the docker daemon from memory"""
+
+    def __init__(self):
+        self.images = StubImages()
+
+    def info(self):
+        return {"Images": len(self.images.images)}
+
+
+def create_fake_docker(dirpath):
+    """Write a docker executable which logs its arguments, one call per line
+
+    Containers run with a --cidfile get the id "container-cli" written to it
+    """
+    execpath = os.path.join(dirpath, "docker")
+    log_filepath = os.path.join(dirpath, "docker.log")
+    with open(execpath, "w") as f:
+        f.write(
+            to_unicode("#!%s\nimport sys\nwith open(%r, 'a') as f:\n"
+                       "    f.write(' '.join(sys.argv[1:]) + '\\n')\n"
+                       "if '--cidfile' in sys.argv:\n"
+                       "    cid_filepath = sys.argv["
+                       "sys.argv.index('--cidfile') + 1]\n"
+                       "    with open(cid_filepath, 'w') as f:\n"
+                       "        f.write('container-cli')\n" %
+                       (sys.executable, log_filepath)))
+    os.chmod(execpath, 0o755)
+    return execpath, log_filepath
+
+
+def read_fake_docker_calls(log_filepath):
+    if not os.path.isfile(log_filepath):
+        return []
+    with open(log_filepath, "r") as f:
+        return f.read().splitlines()
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class DockerAPIStandInHandler(BaseHTTPRequestHandler):
+    """Serves the container endpoints of the docker daemon from memory
+
+    Every request is recorded as (method, path, body) and containers are kept
+    in the server as a dict of their id to their listing
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self):
+        path = self.path.partition("?")[0]
+        # Strip the api version prefix, e.g. /v1.35
+        if path.startswith("/v"):
+            path = "/" + path.split("/", 2)[2]
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        body = json.loads(body.decode("utf-8")) if body else None
+        with self.server.lock:
+            self.server.requests.append((self.command, path, body))
+        parts = path.strip("/").split("/")
+        if parts == ["info"]:
+            return self._send_json(200, {"Containers": 0})
+        if parts == ["containers", "json"]:
+            if self.server.fail_list:
+                return self._send_json(500, {"message": "server error"})
+            return self._send_json(200, list(self.server.containers.values()))
+        if parts == ["containers", "create"]:
+            container_id = "container%d" % len(self.server.containers)
+            self.server.containers[container_id] = {
+                "Id": container_id,
+                "Image": body["Image"],
+                "ImageID": "sha256:" + body["Image"],
+                "Names": [],
+                "Labels": body.get("Labels") or {},
+                "State": "created"
+            }
+            return self._send_json(201, {"Id": container_id})
+        if parts[0] == "containers" and len(parts) == 2:
+            self.server.containers.pop(parts[1], None)
+            return self._send_empty(204)
+        if parts[0] == "containers" and parts[2] in ["start", "stop"]:
+            return self._send_empty(204)
+        if parts[0] == "containers" and parts[2] == "json":
+            return self._send_json(200, {"Id": parts[1],
+                                         "Config": {"Tty": False}})
+        if parts[0] == "containers" and parts[2] == "wait":
+            return self._send_json(200, {"StatusCode": 0})
+        if parts[0] == "containers" and parts[2] == "logs":
+            # Output is multiplexed into frames of stdout
+            self.send_response(200)
+            self.send_header("Content-Type",
+                             "application/vnd.docker.raw-stream")
+            self.end_headers()
+            for chunk in self.server.logs:
+                self.wfile.write(
+                    struct.pack(">BxxxL", 1, len(chunk)) + chunk)
+            return
+        if parts[0] == "images":
+            return self._send_json(200, [])
+        return self._send_json(404, {"message": "not found"})
+
+    def _send_json(self, status_code, obj):
+        data = json.dumps(obj).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_empty(self, status_code):
+        self.send_response(status_code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_GET = _handle
+    do_POST = _handle
+    do_DELETE = _handle
+
+
+class TestDockerEnvAPI():
+    """
+    Checks the container lifecycle of the DockerEnvironmentDriver against a
+    stand in for the docker daemon
+    """
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp(dir=test_datmo_dir)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                          DockerAPIStandInHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.containers = {}
+        self.server.fail_list = False
+        self.server.logs = [b"hello\n", b"wor", b"ld\x08\n", b"done"]
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        self.docker_environment_driver = DockerEnvironmentDriver(
+            self.temp_dir,
+            docker_socket="tcp://127.0.0.1:%d" %
+            self.server.server_address[1])
+
+    def teardown_method(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _get_requests(self, method=None):
+        return [(request_method, path)
+                for request_method, path, _ in self.server.requests
+                if method is None or request_method == method]
+
+    def test_run_container(self):
+        return_code, container_id = \
+            self.docker_environment_driver.run_container(
+                "datmo-test-image",
+                command=["python", "script.py"],
+                name="datmo-task-1",
+                ports=["8888:9999"],
+                mem_limit="4g",
+                detach=True)
+        assert return_code == 0
+        assert container_id == "container0"
+        _, _, body = [
+            request for request in self.server.requests
+            if request[1] == "/containers/create"
+        ][0]
+        assert body["Cmd"] == ["python", "script.py"]
+        assert body["Labels"] == {
+            "datmo.image": "datmo-test-image",
+            "datmo.name": "datmo-task-1"
+        }
+        assert body["HostConfig"]["PortBindings"] == {
+            "9999/tcp": [{
+                "HostIp": "",
+                "HostPort": "8888"
+            }]
+        }
+        assert body["HostConfig"]["MemorySwap"] == -1
+        assert ("POST", "/containers/container0/start") in self._get_requests()
+        assert ("POST", "/containers/container0/wait") not in \
+               self._get_requests()
+
+        # Attached runs wait for the container to exit
+        self.server.requests = []
+        return_code, container_id = \
+            self.docker_environment_driver.run_container(
+                "datmo-test-image", command=["python", "script.py"])
+        assert return_code == 0
+        assert ("POST",
+                "/containers/container1/wait") in self._get_requests()
+
+        # Runs reading stdin are handed to the docker client
+        self.server.requests = []
+        execpath, log_filepath = create_fake_docker(self.temp_dir)
+        docker_environment_driver = DockerEnvironmentDriver(
+            self.temp_dir,
+            docker_execpath=execpath,
+            docker_socket=self.docker_environment_driver.docker_socket)
+        return_code, container_id = docker_environment_driver.run_container(
+            "datmo-test-image", command=["cat"], stdin_open=True)
+        assert return_code == 0
+        assert container_id == "container-cli"
+        run_args = read_fake_docker_calls(log_filepath)[0].split(" ")
+        assert "-i" in run_args and "-t" not in run_args
+        assert "datmo.image=datmo-test-image" in run_args
+        assert not self._get_requests()
+
+    def test_stop_remove_container(self):
+        result = self.docker_environment_driver.stop("container0", force=True)
+        assert result == True
+        assert self._get_requests() == [("POST", "/containers/container0/stop"),
+                                        ("DELETE", "/containers/container0")]
+
+        self.server.requests = []
+        result = self.docker_environment_driver.remove_image(
+            "datmo-test-image", force=True)
+        assert result == True
+        assert self._get_requests() == [("DELETE", "/images/datmo-test-image")]
+
+    def test_log_container(self):
+        log_filepath = os.path.join(self.temp_dir, "task.log")
+        return_code, logs = self.docker_environment_driver.log_container(
+            "container0", log_filepath)
+        assert return_code == 0
+        assert logs == "hello\nworld \ndone\n"
+        with open(log_filepath, "r") as f:
+            assert f.read() == logs
+
+    def test_stop_remove_containers_by_term(self):
+        self.docker_environment_driver.run_container(
+            "datmo-test-image", name="datmo-task-1", detach=True)
+        self.docker_environment_driver.run_container(
+            "datmo-other-image", name="datmo-task-2", detach=True)
+        self.server.containers["container1"]["State"] = "running"
+        self.server.requests = []
+
+        # Containers are found in a single request by their labels
+        result = self.docker_environment_driver.stop_remove_containers_by_term(
+            "datmo-task-2", force=True)
+        assert result == True
+        assert self._get_requests() == [("GET", "/containers/json"),
+                                        ("POST", "/containers/container1/stop"),
+                                        ("DELETE", "/containers/container1")]
+        assert list(self.server.containers) == ["container0"]
+
+        result = self.docker_environment_driver.stop_remove_containers_by_term(
+            "no-match", force=True)
+        assert result == True
+        assert list(self.server.containers) == ["container0"]
+
+        # Containers which cannot be listed are an error
+        self.server.fail_list = True
+        failed = False
+        try:
+            self.docker_environment_driver.stop_remove_containers_by_term(
+                "datmo-task-1", force=True)
+        except EnvironmentExecutionError:
+            failed = True
+        assert failed
+
+        self.teardown_method()
+        failed = False
+        try:
+            self.docker_environment_driver.stop_remove_containers_by_term(
+                "datmo-task-1", force=True)
+        except EnvironmentExecutionError:
+            failed = True
+        assert failed
+
+
 class TestDockerEnv():
     # TODO: Add more cases for each test
     """
@@ -58,8 +359,12 @@ class TestDockerEnv():
             f.write(to_bytes(str("RUN echo " + random_text)))
 
     def teardown_method(self):
-        self.docker_environment_driver.stop_remove_containers_by_term(
-            term='cooltest', force=True)
+        try:
+            self.docker_environment_driver.stop_remove_containers_by_term(
+                term='cooltest', force=True)
+        except EnvironmentExecutionError:
+            # No containers are left when the daemon cannot be reached
+            pass
 
     def test_instantiation(self):
         assert self.docker_environment_driver != None
@@ -202,6 +507,50 @@ class TestDockerEnv():
         # teardown
         self.docker_environment_driver.remove(name, force=True)
 
+    def test_build_cache(self):
+        execpath, log_filepath = create_fake_docker(self.temp_dir)
+        docker_environment_driver = DockerEnvironmentDriver(
+            self.temp_dir, docker_execpath=execpath)
+        docker_environment_driver.client = StubDockerClient()
+        path = os.path.join(self.temp_dir, "Dockerfile")
+        labels = {"datmo.environment_id": "env", "datmo.unique_hash": "hash"}
+
+        # The image is built with its labels when it does not exist
+        result = docker_environment_driver.build("env", path, labels=labels)
+        assert result == True
+        calls = read_fake_docker_calls(log_filepath)
+        assert len(calls) == 1
+        assert "build -t env" in calls[0]
+        assert "--label datmo.environment_id=env" in calls[0]
+        assert "--label datmo.unique_hash=hash" in calls[0]
+        assert not docker_environment_driver.exists_image("env")
+
+        # A matching image is not built again
+        docker_environment_driver.client.images.images["env"] = \
+            StubImage(dict(labels, other="label"))
+        assert docker_environment_driver.exists_image("env", labels=labels)
+        result = docker_environment_driver.build("env", path, labels=labels)
+        assert result == True
+        assert len(read_fake_docker_calls(log_filepath)) == 1
+
+        # An image built from other files or a rebuild is built again
+        docker_environment_driver.build(
+            "env",
+            path,
+            labels={
+                "datmo.environment_id": "env",
+                "datmo.unique_hash": "other_hash"
+            })
+        assert len(read_fake_docker_calls(log_filepath)) == 2
+        docker_environment_driver.build(
+            "env", path, labels=labels, rebuild=True)
+        assert len(read_fake_docker_calls(log_filepath)) == 3
+        # Without labels the image is always built
+        docker_environment_driver.build("env", path)
+        calls = read_fake_docker_calls(log_filepath)
+        assert len(calls) == 4
+        assert "--label" not in calls[3]
+
     @pytest_docker_environment_failed_instantiation(test_datmo_dir)
     def test_run(self):
         # TODO: add more options for run w/ volumes etc
@@ -768,6 +1117,12 @@ class TestDockerEnv():
         output = open(output_dockerfile_path, "r").read()
         print(repr(output))
         assert "datmo essential" in output
+        # The file written has the contents generated in memory
+        with open(input_dockerfile_path, "rb") as f:
+            definition = f.read()
+        with open(output_dockerfile_path, "rb") as f:
+            assert f.read() == self.docker_environment_driver.\
+                get_datmo_definition(definition)
 
     @pytest_docker_environment_failed_instantiation(test_datmo_dir)
     def test_gpu_enabled(self):
@@ -8,7 +8,8 @@ from datmo.core.util.i18n import get as __
 from datmo.core.util.validation import validate
 from datmo.core.util.spinner import Spinner
 from datmo.core.util.json_store import JSONStore
-from datmo.core.util.misc_functions import get_datmo_temp_path, parse_path, list_all_filepaths
+from datmo.core.util.misc_functions import get_datmo_temp_path, parse_path, list_all_filepaths,\
+    get_filehash, get_hash_function, reduce_filehashes
 from datmo.core.util.exceptions import PathDoesNotExist, RequiredArgumentMissing, TooManyArgumentsFound,\
     EnvironmentNotInitialized, UnstagedChanges, ArgumentError, EnvironmentDoesNotExist, ProjectNotInitialized
 
@@ -207,19 +208,83 @@ class EnvironmentController(BaseController):
         # Step 7: Create environment and return
         return self.dal.environment.create(Environment(create_dict))
 
-    def build(self, environment_id):
+    def _get_image_labels(self, environment_obj):
+        """Return the labels identifying the image built for an environment"""
+        return {
+            "datmo.environment_id": environment_obj.id,
+            "datmo.unique_hash": environment_obj.unique_hash
+        }
+
+    def is_built(self, environment_id):
+        """Return whether an image built from the environment exists
+
+        Parameters
+        ----------
+        environment_id : str
+            environment object id to check for
+
+        Returns
+        -------
+        bool
+            True if an image labeled with the environment id and its unique
+            hash exists
+
+        Raises
+        ------
+        EnvironmentDoesNotExist
+            if the specified Environment does not exist.
+        """
+        self.environment_driver.init()
+        if not self.exists(environment_id):
+            raise EnvironmentDoesNotExist(
+                __("error", "controller.environment.build", environment_id))
+        environment_obj = self.dal.environment.get_by_id(environment_id)
+        return self.environment_driver.exists_image(
+            environment_id, labels=self._get_image_labels(environment_obj))
+
+    def build(self, environment_id, rebuild=False):
         """Build environment from definition file
 
+        The image is labeled with the environment id and unique hash, and is
+        not built again while an image with those labels exists
+
         Parameters
         ----------
         environment_id : str
             environment object id to build
+        rebuild : bool, optional
+            build the image even if it exists
+            (default is False)
 
         Returns
         -------
         bool
             returns True if success
 
+        Raises
+        ------
+        EnvironmentDoesNotExist
+            if the specified Environment does not exist.
+        """
+        self.ensure_image(environment_id, rebuild=rebuild)
+        return True
+
+    def ensure_image(self, environment_id, rebuild=False):
+        """Build environment from definition file unless an image of it exists
+
+        Parameters
+        ----------
+        environment_id : str
+            environment object id to build
+        rebuild : bool, optional
+            build the image even if it exists
+            (default is False)
+
+        Returns
+        -------
+        bool
+            True if an existing image was used, False if the image was built
+
         Raises
         ------
         EnvironmentDoesNotExist
@@ -230,6 +295,11 @@ class EnvironmentController(BaseController):
             raise EnvironmentDoesNotExist(
                 __("error", "controller.environment.build", environment_id))
         environment_obj = self.dal.environment.get_by_id(environment_id)
+        labels = self._get_image_labels(environment_obj)
+        # The files are not prepared at all if the image exists
+        if not rebuild and self.environment_driver.exists_image(
+                environment_id, labels=labels):
+            return True
         file_collection_obj = self.dal.file_collection.\
             get_by_id(environment_obj.file_collection_id)
         # TODO: Check hardware info here if different from creation time
@@ -237,13 +307,30 @@ class EnvironmentController(BaseController):
         datmo_definition_filepath = os.path.join(
             self.home, file_collection_obj.path,
             "datmo" + environment_obj.definition_filename)
+        # The whole collection is the build context, so it is restored to a
+        # temp directory if any file in it is stored chunked or compressed
+        _temp_env_dir = None
+        if any(entry["storage"] != "raw"
+               for entry in self.file_driver.get_collection_manifest(
+                   file_collection_obj.filehash).values()):
+            _temp_env_dir = get_datmo_temp_path(self.home)
+            self.file_driver.transfer_collection(file_collection_obj.filehash,
+                                                 _temp_env_dir)
+            datmo_definition_filepath = os.path.join(
+                _temp_env_dir, "datmo" + environment_obj.definition_filename)
         try:
             self.spinner.start()
-            result = self.environment_driver.build(
-                environment_id, path=datmo_definition_filepath)
+            # The image was looked for above, so it is built regardless
+            self.environment_driver.build(
+                environment_id,
+                path=datmo_definition_filepath,
+                labels=labels,
+                rebuild=True)
         finally:
             self.spinner.stop()
-        return result
+            if _temp_env_dir:
+                shutil.rmtree(_temp_env_dir)
+        return False
 
     def run(self, environment_id, options, log_filepath):
         """Run and log an instance of the environment with the options given
@@ -493,11 +580,10 @@ class EnvironmentController(BaseController):
         # Add in files for that environment id
         file_collection_obj = self.dal.file_collection.\
             get_by_id(environment_obj.file_collection_id)
-        environment_definition_path = os.path.join(self.home,
-                                                   file_collection_obj.path)
         # Copy to temp folder and remove files that are datmo specific
         _temp_env_dir = get_datmo_temp_path(self.home)
-        self.file_driver.copytree(environment_definition_path, _temp_env_dir)
+        self.file_driver.transfer_collection(file_collection_obj.filehash,
+                                             _temp_env_dir)
         for filename in self.environment_driver.get_datmo_definition_filenames(
         ):
             os.remove(os.path.join(_temp_env_dir, filename))
@@ -580,7 +666,31 @@ class EnvironmentController(BaseController):
         str
             unique hash of the project environment directory
         """
-        # Populate paths from the project environment directory
+        env_hash, env_hash_no_hardware = \
+            self._calculate_project_environment_hashes()
+        return env_hash if save_hardware_file else env_hash_no_hardware
+
+    def _calculate_project_environment_hashes(self):
+        """Return the environment hashes with and without the hardware info file
+
+        The files _setup_compatible_environment would add are generated in
+        memory and hashed along with the files of the project environment
+        directory, so nothing is written and each file is read once
+
+        Returns
+        -------
+        tuple
+            unique hash of the project environment directory with the
+            hardware info file and without it
+        """
+        hash_algorithm = self.file_driver.hash_algorithm
+
+        def get_hash(contents):
+            hasher = get_hash_function(hash_algorithm)()
+            hasher.update(contents)
+            return hasher.hexdigest()
+
+        # Hash the files from the project environment directory
         paths = []
         if os.path.isdir(self.file_driver.environment_directory):
             paths.extend([
@@ -588,37 +698,34 @@ class EnvironmentController(BaseController):
                              filepath) for filepath in list_all_filepaths(
                                  self.file_driver.environment_directory)
             ])
+        filehashes = [get_filehash(path, hash_algorithm) for path in paths]
+
+        # Use the definition found or the default definition, as
+        # _setup_compatible_environment does, and add the datmo definition
+        definition_filename = \
+            self.environment_driver.get_default_definition_filename()
+        definition_paths = [
+            path for path in paths if definition_filename in path
+        ]
+        if definition_paths:
+            with open(definition_paths[-1], "rb") as f:
+                definition = f.read()
+        else:
+            definition = self.environment_driver.get_default_definition()
+            filehashes.append(get_hash(definition))
+        filehashes.append(
+            get_hash(self.environment_driver.get_datmo_definition(definition)))
 
-        # Create a temp dir to save any additional files necessary
-        _temp_dir = get_datmo_temp_path(self.home)
-
-        # Setup compatible environment and create add paths
-        paths = self._setup_compatible_environment(
-            {
-                "definition_filename":
-                    self.environment_driver.get_default_definition_filename()
-            },
-            paths,
-            _temp_dir,
-            save_hardware_file=save_hardware_file)
-
-        # Create new temp directory
-        _temp_dir_2 = get_datmo_temp_path(self.home)
-
-        # Hash the paths of the environment with a different temp dir
-        dirhash = self.file_driver.calculate_hash_paths(paths, _temp_dir_2)
-
-        # Remove both temporary directories
-        shutil.rmtree(_temp_dir)
-        shutil.rmtree(_temp_dir_2)
-
-        return dirhash
+        hardware_info_filehash = get_hash(
+            JSONStore.serialize(self.environment_driver.get_hardware_info()))
+        return (reduce_filehashes(filehashes + [hardware_info_filehash],
+                                  hash_algorithm),
+                reduce_filehashes(filehashes, hash_algorithm))
 
     def _has_unstaged_changes(self):
         """Return whether there are unstaged changes"""
-        env_hash = self._calculate_project_environment_hash()
-        env_hash_no_hardware = self._calculate_project_environment_hash(
-            save_hardware_file=False)
+        env_hash, env_hash_no_hardware = \
+            self._calculate_project_environment_hashes()
         environment_files = list_all_filepaths(
             self.file_driver.environment_directory)
         if self.exists(environment_unique_hash=env_hash) or self.exists(
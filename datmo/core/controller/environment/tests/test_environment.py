@@ -31,6 +31,10 @@ from datmo.config import Config
 from datmo.core.controller.project import ProjectController
 from datmo.core.controller.environment.environment import \
     EnvironmentController
+from datmo.core.controller.environment.driver.dockerenv import \
+    DockerEnvironmentDriver
+from datmo.core.controller.environment.driver.tests.test_dockerenv import (
+    StubImage, StubDockerClient, create_fake_docker, read_fake_docker_calls)
 from datmo.core.entity.environment import Environment
 from datmo.core.util.exceptions import (
     EntityNotFound, RequiredArgumentMissing, TooManyArgumentsFound,
@@ -976,6 +980,126 @@ class TestEnvironmentController():
         assert result == "c309ae4f58163693a91816988d9dc88b"
         assert result == environment_obj_1.unique_hash
 
+    def test_build_cache(self):
+        # Setup
+        self.__setup()
+        execpath, log_filepath = create_fake_docker(self.temp_dir)
+        environment_driver = DockerEnvironmentDriver(
+            self.temp_dir, docker_execpath=execpath)
+        environment_driver.client = StubDockerClient()
+        self.environment_controller._environment_driver = environment_driver
+        environment_obj = self.environment_controller.create({})
+        labels = {
+            "datmo.environment_id": environment_obj.id,
+            "datmo.unique_hash": environment_obj.unique_hash
+        }
+
+        assert not self.environment_controller.is_built(environment_obj.id)
+        cache_hit = self.environment_controller.ensure_image(
+            environment_obj.id)
+        assert cache_hit == False
+        calls = read_fake_docker_calls(log_filepath)
+        assert len(calls) == 1
+        assert "--label datmo.unique_hash=%s" % environment_obj.unique_hash \
+            in calls[0]
+
+        # Once the image exists it is used as it is unless rebuilt
+        environment_driver.client.images.images[environment_obj.id] = \
+            StubImage(labels)
+        assert self.environment_controller.is_built(environment_obj.id)
+        result = self.environment_controller.build(environment_obj.id)
+        assert result
+        assert len(read_fake_docker_calls(log_filepath)) == 1
+        cache_hit = self.environment_controller.ensure_image(
+            environment_obj.id)
+        assert cache_hit == True
+        assert len(read_fake_docker_calls(log_filepath)) == 1
+        cache_hit = self.environment_controller.ensure_image(
+            environment_obj.id, rebuild=True)
+        assert cache_hit == False
+        assert len(read_fake_docker_calls(log_filepath)) == 2
+
+        failed = False
+        try:
+            self.environment_controller.is_built("does_not_exist")
+        except EnvironmentDoesNotExist:
+            failed = True
+        assert failed
+
+    def test_ensure_image_compressed_context(self):
+        # Setup
+        self.__setup()
+        execpath, log_filepath = create_fake_docker(self.temp_dir)
+        environment_driver = DockerEnvironmentDriver(
+            self.temp_dir, docker_execpath=execpath)
+        environment_driver.client = StubDockerClient()
+        self.environment_controller._environment_driver = environment_driver
+        # Only the large file of the build context is stored compressed
+        requirements_filepath = os.path.join(
+            self.environment_controller.file_driver.environment_directory,
+            "requirements.txt")
+        requirements = to_bytes("numpy==1.14.0\n" * 10000)
+        with open(requirements_filepath, "wb") as f:
+            f.write(requirements)
+        self.environment_controller.file_collection.file_driver.compression = \
+            "zlib"
+        environment_obj = self.environment_controller.create({})
+        storages = [
+            entry["storage"] for entry in self.environment_controller.
+            file_driver.get_collection_manifest(
+                self.environment_controller.dal.file_collection.get_by_id(
+                    environment_obj.file_collection_id).filehash).values()
+        ]
+        assert "zlib" in storages and "raw" in storages
+
+        build_contexts = []
+        build = environment_driver.build
+
+        def record_build(environment_id, path, **kwargs):
+            context_dirpath = os.path.dirname(path)
+            with open(os.path.join(context_dirpath, "requirements.txt"),
+                      "rb") as f:
+                build_contexts.append((sorted(os.listdir(context_dirpath)),
+                                       f.read()))
+            return build(environment_id, path, **kwargs)
+
+        environment_driver.build = record_build
+        cache_hit = self.environment_controller.ensure_image(
+            environment_obj.id)
+        assert cache_hit == False
+        # The build context has every file restored as it was
+        assert len(build_contexts) == 1
+        filenames, restored_requirements = build_contexts[0]
+        assert "requirements.txt" in filenames
+        assert not any(
+            filename.endswith(".datmo-gz") for filename in filenames)
+        assert restored_requirements == requirements
+        assert len(read_fake_docker_calls(log_filepath)) == 1
+
+    def test_calculate_project_environment_hashes(self):
+        # Setup
+        self.__setup()
+        # Both hashes match those of the environments created from the files
+        env_hash, env_hash_no_hardware = \
+            self.environment_controller._calculate_project_environment_hashes()
+        assert env_hash != env_hash_no_hardware
+        environment_obj = self.environment_controller.create({})
+        assert env_hash == environment_obj.unique_hash
+        environment_obj = self.environment_controller.create(
+            {}, save_hardware_file=False)
+        assert env_hash_no_hardware == environment_obj.unique_hash
+
+        # The default definition is used when there is none
+        os.remove(self.definition_filepath)
+        env_hash_2, env_hash_no_hardware_2 = \
+            self.environment_controller._calculate_project_environment_hashes()
+        assert env_hash_2 != env_hash
+        environment_obj = self.environment_controller.create({})
+        assert env_hash_2 == environment_obj.unique_hash
+        environment_obj = self.environment_controller.create(
+            {}, save_hardware_file=False)
+        assert env_hash_no_hardware_2 == environment_obj.unique_hash
+
     def test_has_unstaged_changes(self):
         # Setup
         self.__setup()
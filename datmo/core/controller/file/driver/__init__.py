@@ -27,6 +27,30 @@ class FileDriver(with_metaclass(ABCMeta, object)):
         deletes collection based on filehash
     transfer_collection(filehash, dst_dirpath)
         transfers collection contents to absolute dst path
+    get_manifest(dirpath)
+        return the size and hash of every file within a directory
+    get_collection_manifest(filehash)
+        return the size and hash of every file within a collection
+    get_collection_directories(filehash)
+        return the directories within a collection
+    checkout_collection(filehash, dst_dirpath, dst_manifest=None)
+        makes the contents of dst path match the collection, changing only what differs
+    list_collection_files(filehash, mode="r")
+        list references to the files in the collection without opening them
+    open_collection_file(filehash, relative_filepath, mode="rb")
+        open a file within the collection
+    get_collection_filepath(filehash, relative_filepath)
+        return a path to the raw contents of a file within the collection
+    get_collection_size(filehash)
+        return the total size of the files within the collection
+    find_in_collection(filehash, filename)
+        return the filepaths within the collection with the filename given
+    list_stored_objects()
+        return the names of the objects stored outside of collections
+    get_collection_objects(filehash)
+        return the names of the objects stored outside of the collection which it uses
+    delete_stored_object(kind, name)
+        delete an object stored outside of collections
     """
 
     @abstractmethod
@@ -140,10 +164,9 @@ class FileDriver(with_metaclass(ABCMeta, object)):
         """
         pass
 
-    @staticmethod
     @abstractmethod
-    def get_filehash(filepath):
-        """Return the hash of the file path given
+    def get_filehash(self, filepath):
+        """Return the hash of the file path given using the driver hash algorithm
 
         Parameters
         ----------
@@ -156,10 +179,9 @@ class FileDriver(with_metaclass(ABCMeta, object)):
             unique hash of the file
         """
 
-    @staticmethod
     @abstractmethod
-    def get_dirhash(dirpath):
-        """Return the hash of the directory path given
+    def get_dirhash(self, dirpath):
+        """Return the hash of the directory path given using the driver hash algorithm
 
         Parameters
         ----------
@@ -289,4 +311,280 @@ class FileDriver(with_metaclass(ABCMeta, object)):
         bool
             True if successful
         """
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def get_manifest(self, dirpath):
+        """Return the size and hash of every file within the directory using the driver hash algorithm
+
+        Parameters
+        ----------
+        dirpath : str
+            path of the directory
+
+        Returns
+        -------
+        dict
+            dictionary keyed by relative filepath with values of the form
+            {"size": int, "hash": str}
+        """
+        pass
+
+    @abstractmethod
+    def get_collection_manifest(self, filehash):
+        """Return the size, hash, mode and storage of every file within the collection
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+
+        Returns
+        -------
+        dict
+            dictionary keyed by relative filepath with values of the form
+            {"size": int, "hash": str, "mode": int, "storage": str}, which
+            the caller may change
+        """
+        pass
+
+    @abstractmethod
+    def get_collection_directories(self, filehash):
+        """Return the directories within the collection, including empty ones
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+
+        Returns
+        -------
+        list
+            dirpaths relative to the collection
+        """
+        pass
+
+    @abstractmethod
+    def checkout_collection_paths(self, filehash, dst_dirpath, paths):
+        """Copies only the files within the collection matching the paths to the absolute dst path
+
+        Files matching are replaced and no other files are touched
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+        dst_dirpath : str
+            absolute dirpath to copy the files into
+        paths : list
+            .gitignore style patterns of the filepaths relative to the collection
+
+        Returns
+        -------
+        list
+            filepaths relative to the collection which were copied
+        """
+        pass
+
+    @abstractmethod
+    def hash_collection_file(self, filehash, relative_filepath):
+        """Hash the stored contents of a file within the collection again
+
+        The contents are hashed with the hash algorithm of the collection
+        manifest, so the result can be compared to the hash recorded there
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+        relative_filepath : str
+            filepath relative to the collection
+
+        Returns
+        -------
+        tuple
+            hash and size in bytes of the stored contents
+
+        Raises
+        ------
+        PathDoesNotExist
+            if the file is not within the collection
+        """
+        pass
+
+    @abstractmethod
+    def get_collection_hash_algorithm(self, filehash):
+        """Return the hash algorithm of the file hashes in the collection manifest
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+
+        Returns
+        -------
+        str
+            name of the hash algorithm
+        """
+        pass
+
+    @abstractmethod
+    def checkout_collection(self, filehash, dst_dirpath, dst_manifest=None):
+        """Makes the contents of the absolute dst path match the collection
+
+        Only files which are missing, changed or not in the collection are
+        added, replaced or removed
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+        dst_dirpath : str
+            absolute dirpath to checkout collection contents to
+        dst_manifest : dict, optional
+            manifest of dst_dirpath if already calculated
+            (default is None, which compares by size before hashing)
+
+        Returns
+        -------
+        bool
+            True if successful
+        """
+        pass
+
+    @abstractmethod
+    def list_collection_files(self, filehash, mode="r"):
+        """List references to the files in the collection without opening them
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+        mode : str, optional
+            file open mode used when reading from the references
+            (default is "r")
+
+        Returns
+        -------
+        list
+            list of datmo.core.util.file_reference.FileReference objects
+        """
+        pass
+
+    @abstractmethod
+    def open_collection_file(self, filehash, relative_filepath, mode="rb"):
+        """Open a file within the collection
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+        relative_filepath : str
+            filepath relative to the collection
+        mode : str, optional
+            file object open mode
+            (default is "rb")
+
+        Returns
+        -------
+        file
+            python file object for the file
+        """
+        pass
+
+    @abstractmethod
+    def get_collection_filepath(self, filehash, relative_filepath):
+        """Return a path to the raw contents of a file within the collection
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+        relative_filepath : str
+            filepath relative to the collection
+
+        Returns
+        -------
+        str
+            absolute path of a file with the raw contents, which must not be written to
+        """
+        pass
+
+    @abstractmethod
+    def get_collection_size(self, filehash):
+        """Return the total size of the files within the collection
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+
+        Returns
+        -------
+        int
+            total size in bytes
+        """
+        pass
+
+    @abstractmethod
+    def find_in_collection(self, filehash, filename):
+        """Return the filepaths within the collection with the filename given
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+        filename : str
+            name of the file to find
+
+        Returns
+        -------
+        list
+            filepaths relative to the collection, shallowest first
+        """
+        pass
+
+    @abstractmethod
+    def list_stored_objects(self):
+        """Return the names of the objects stored outside of collections
+
+        Returns
+        -------
+        dict
+            dictionary of the names of the objects stored for each kind
+        """
+        pass
+
+    @abstractmethod
+    def get_collection_objects(self, filehash):
+        """Return the names of the objects stored outside of the collection which it uses
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+
+        Returns
+        -------
+        dict
+            dictionary of the sets of object names used for each kind
+        """
+        pass
+
+    @abstractmethod
+    def delete_stored_object(self, kind, name):
+        """Delete an object stored outside of collections
+
+        Parameters
+        ----------
+        kind : str
+            kind of the object
+        name : str
+            name of the object as given by list_stored_objects()
+
+        Returns
+        -------
+        bool
+            True if success
+        """
+        pass
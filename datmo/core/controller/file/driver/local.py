@@ -1,10 +1,12 @@
+import io
 import os
+import json
 import stat
 import shutil
 import glob
-import hashlib
-import checksumdir
+import time
 from io import open
+from functools import partial
 try:
     to_unicode = unicode
 except NameError:
@@ -13,26 +15,81 @@ except NameError:
 from datmo.core.util.i18n import get as __
 from datmo.core.util.exceptions import (
     PathDoesNotExist, FileIOError, FileStructureError, FileAlreadyExistsError,
-    DirAlreadyExistsError)
+    DirAlreadyExistsError, InvalidHashAlgorithm)
 from datmo.core.controller.file.driver import FileDriver
-from datmo.core.util.misc_functions import get_datmo_temp_path, parse_paths
+from datmo.core.util.misc_functions import (
+    get_datmo_temp_path, parse_paths, get_filehash, get_dirhash,
+    get_dir_manifest, reduce_filehashes, get_hash_function, match_paths,
+    scan_tree, DEFAULT_HASH_ALGORITHM, HASH_BUFFER_SIZE,
+    SUPPORTED_HASH_ALGORITHMS)
+from datmo.core.util.file_reference import FileReference
+from datmo.core.util.chunking import (iter_chunks, get_chunk_path,
+                                      ChunkedFileReader)
+from datmo.core.util.compression import (
+    COMPRESSION_MIN_SIZE, COMPRESSION_SUFFIXES, validate_compression,
+    should_compress, open_compressed, get_compression_from_path)
+
+# Suffix of the chunk list stored in a collection in place of a chunked file
+CHUNKED_FILE_SUFFIX = ".datmo-chunks"
+# Suffixes of files stored in a collection which are not the raw file contents
+STORED_FILE_SUFFIXES = [CHUNKED_FILE_SUFFIX] + sorted(
+    COMPRESSION_SUFFIXES.values())
+# Suffix of the stored file for each storage recorded in collection manifests
+STORAGE_SUFFIXES = dict(raw="", chunks=CHUNKED_FILE_SUFFIX,
+                        **COMPRESSION_SUFFIXES)
+# Index of the chunks of each chunked file, within the .datmo directory
+CHUNK_INDEX_FILENAME = "chunk_index.json"
+# Files modified within this many seconds of being chunked are not indexed
+CHUNK_INDEX_RACY_SECONDS = 2
 
 
 class LocalFileDriver(FileDriver):
     """
     This FileDriver handles the datmo file tree on the local system
+
+    Parameters
+    ----------
+    root : str
+        absolute path of the project root
+    hash_algorithm : str, optional
+        name of the hash algorithm used to identify collections
+        (default is "md5")
+    chunk_threshold : int, optional
+        size in bytes at or above which files are stored as content defined
+        chunks shared across collections (default is None, which never chunks)
+    compression : str, optional
+        compression used for files which are worth compressing, either "zlib"
+        or "lzma" (default is None, which stores files raw)
     """
 
-    def __init__(self, root):
+    def __init__(self,
+                 root,
+                 hash_algorithm=DEFAULT_HASH_ALGORITHM,
+                 chunk_threshold=None,
+                 compression=None):
         super(LocalFileDriver, self).__init__()
         self.root = root
         # Check if filepath exists
         if not os.path.exists(self.root):
             raise PathDoesNotExist(
                 __("error", "controller.file.driver.local.__init__", root))
+        self.hash_algorithm = hash_algorithm
+        # Hash of a collection without any files, created on init
+        self.empty_collection_hash = get_hash_function(
+            self.hash_algorithm)().hexdigest()
         self.datmo_directory_name = ".datmo"
         self.datmo_directory = os.path.join(self.root,
                                             self.datmo_directory_name)
+        self.chunk_threshold = chunk_threshold
+        if compression is not None:
+            validate_compression(compression)
+        self.compression = compression
+        self.chunks_directory = os.path.join(self.datmo_directory, "chunks")
+        self.cache_directory = os.path.join(self.datmo_directory, "cache")
+        self._chunk_index_filepath = os.path.join(self.datmo_directory,
+                                                  CHUNK_INDEX_FILENAME)
+        # cache of collection manifests, collections are immutable
+        self._collection_manifests = {}
         self.environment_directory_name = "datmo_environment"
         self.environment_directory = os.path.join(
             self.root, self.environment_directory_name)
@@ -106,13 +163,33 @@ class LocalFileDriver(FileDriver):
         shutil.copy2(filepath, dst_filepath)
         return True
 
+    @property
+    def empty_collection_hashes(self):
+        """Hashes of a collection without any files with each supported hash algorithm
+
+        The file structure is initialized with the empty collection of the
+        hash algorithm used at the time, so any of them marks it initialized
+        once the hash algorithm of the project is changed
+        """
+        empty_collection_hashes = []
+        for hash_algorithm in SUPPORTED_HASH_ALGORITHMS:
+            try:
+                empty_collection_hashes.append(
+                    get_hash_function(hash_algorithm)().hexdigest())
+            except InvalidHashAlgorithm:
+                continue
+        return empty_collection_hashes
+
     @property
     def is_initialized(self):
         if self.exists_hidden_datmo_file_structure():
             if self.exists_collections_dir():
-                if os.path.isdir(
-                        os.path.join(self.datmo_directory, "collections",
-                                     "d41d8cd98f00b204e9800998ecf8427e")):
+                if any(
+                        os.path.isdir(
+                            os.path.join(self.datmo_directory, "collections",
+                                         empty_collection_hash))
+                        for empty_collection_hash in
+                        self.empty_collection_hashes):
                     self._is_initialized = True
                     return self._is_initialized
         self._is_initialized = False
@@ -131,10 +208,10 @@ class LocalFileDriver(FileDriver):
             # Ensure the empty collection exists
             if not os.path.isdir(
                     os.path.join(self.datmo_directory, "collections",
-                                 "d41d8cd98f00b204e9800998ecf8427e")):
+                                 self.empty_collection_hash)):
                 self.create(
                     os.path.join(self.datmo_directory, "collections",
-                                 "d41d8cd98f00b204e9800998ecf8427e"),
+                                 self.empty_collection_hash),
                     directory=True)
         except Exception as e:
             raise FileIOError(
@@ -221,31 +298,65 @@ class LocalFileDriver(FileDriver):
         self.ensure_collections_dir()
         temp_collection_path = get_datmo_temp_path(self.root)
 
-        filehash = self.calculate_hash_paths(paths, temp_collection_path)
+        # Files are stored while hashed so each file is only read once
+        collection_files, collection_directories = self._populate_paths(
+            paths, temp_collection_path, encode_files=True)
+        filehash = reduce_filehashes(
+            [entry["hash"] for entry in collection_files.values()],
+            self.hash_algorithm)
 
         # Move contents to folder with filehash as name and remove temp_collection_path
         collection_path = os.path.join(self.datmo_directory, "collections",
                                        filehash)
         if os.path.isdir(collection_path):
+            shutil.rmtree(temp_collection_path)
             return filehash
             # raise FileStructureError("exception.file.create_collection", {
             #     "exception": "File collection with id already exists."
             # })
-        os.makedirs(collection_path)
-        self.copytree(temp_collection_path, collection_path)
+        os.rename(temp_collection_path, collection_path)
 
         # Change permissions to read only for collection_path. File collection is immutable
         mode = stat.S_IRWXU | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH
 
+        os.chmod(collection_path, mode)
         for root, dirs, files in os.walk(collection_path, topdown=False):
             for dir in [os.path.join(root, d) for d in dirs]:
                 os.chmod(dir, mode)
             for file in [os.path.join(root, f) for f in files]:
                 os.chmod(file, mode)
 
+        self._write_collection_manifest(filehash, collection_files,
+                                        collection_directories)
         return filehash
 
     def calculate_hash_paths(self, paths, directory):
+        files, _ = self._populate_paths(paths, directory)
+        # Hash the files to find filehash
+        return reduce_filehashes([entry["hash"] for entry in files.values()],
+                                 self.hash_algorithm)
+
+    def _populate_paths(self, paths, directory, encode_files=False):
+        """Populate the directory with user given paths and describe the files populated
+
+        Parameters
+        ----------
+        paths : list
+            list of absolute or relative filepaths and/or dirpaths to collect with destination names
+        directory : str
+            directory to aggregate paths
+        encode_files : bool, optional
+            store files chunked or compressed where configured instead of raw
+            (default is False)
+
+        Returns
+        -------
+        files : dict
+            dictionary keyed by filepath relative to the directory with values
+            of the form {"size": int, "hash": str, "mode": int, "storage": str}
+        directories : list
+            list of dirpaths relative to the directory
+        """
         try:
             files, dirs = parse_paths(self.root, paths, directory)
         except PathDoesNotExist as e:
@@ -254,6 +365,23 @@ class LocalFileDriver(FileDriver):
                    "controller.file.driver.local.create_collection.filepath",
                    str(e)))
 
+        populated_files, populated_directories = {}, []
+
+        def populate_file(src_filepath, dst_filepath):
+            if encode_files:
+                filehash, storage = self._store_file(src_filepath,
+                                                     dst_filepath)
+            else:
+                filehash, storage = self._copy_file(src_filepath,
+                                                    dst_filepath), "raw"
+            src_stat = os.stat(src_filepath)
+            populated_files[os.path.relpath(dst_filepath, directory)] = {
+                "size": src_stat.st_size,
+                "hash": filehash,
+                "mode": stat.S_IMODE(src_stat.st_mode),
+                "storage": storage
+            }
+
         # Populate collection from left to right in lists
         for file_tuple in files:
             src_abs_filepath, dest_abs_filepath = file_tuple
@@ -263,7 +391,7 @@ class LocalFileDriver(FileDriver):
                        "controller.file.driver.create_collection.file_exists",
                        dest_abs_filepath))
             # File is copied over to the new destination path
-            shutil.copy2(src_abs_filepath, dest_abs_filepath)
+            populate_file(src_abs_filepath, dest_abs_filepath)
 
         for dir_tuple in dirs:
             src_abs_dirpath, dest_abs_dirpath = dir_tuple
@@ -272,32 +400,239 @@ class LocalFileDriver(FileDriver):
                     __("error",
                        "controller.file.driver.create_collection.dir_exists",
                        dest_abs_dirpath))
-            os.makedirs(dest_abs_dirpath)
             # All contents of directory is copied over to the new directory path
-            self.copytree(src_abs_dirpath, dest_abs_dirpath)
+            os.makedirs(dest_abs_dirpath)
+            populated_directories.append(
+                os.path.relpath(dest_abs_dirpath, directory))
+            for relative_path, is_dir in scan_tree(
+                    src_abs_dirpath, followlinks=True):
+                dest_path = os.path.join(dest_abs_dirpath, relative_path)
+                if is_dir:
+                    os.makedirs(dest_path)
+                    populated_directories.append(
+                        os.path.relpath(dest_path, directory))
+                else:
+                    populate_file(
+                        os.path.join(src_abs_dirpath, relative_path),
+                        dest_path)
+        return populated_files, populated_directories
 
-        # Hash the files to find filehash
-        return self.get_dirhash(directory)
+    def _copy_file(self, src_filepath, dst_filepath):
+        """Copy a file and its metadata while hashing its contents"""
+        hasher = get_hash_function(self.hash_algorithm)()
+        with open(src_filepath, "rb") as src_file, \
+                open(dst_filepath, "wb") as dst_file:
+            while True:
+                data = src_file.read(HASH_BUFFER_SIZE)
+                if not data:
+                    break
+                hasher.update(data)
+                dst_file.write(data)
+        shutil.copystat(src_filepath, dst_filepath)
+        return hasher.hexdigest()
 
-    @staticmethod
-    def get_filehash(absolute_filepath):
-        if not os.path.isfile(absolute_filepath):
-            raise PathDoesNotExist(
-                __("error", "util.misc_functions.get_filehash",
-                   absolute_filepath))
-        BUFF_SIZE = 65536
-        sha1 = hashlib.md5()
-        with open(absolute_filepath, "rb") as f:
+    def _store_file(self, src_filepath, dst_filepath):
+        """Store a file within a collection and return the hash of its contents and storage
+
+        Files at or above the chunk threshold are split into content defined
+        chunks kept once in the chunk store, and a chunk list is stored instead.
+        Other files worth compressing are stored compressed
+        """
+        size = os.path.getsize(src_filepath)
+        if self.chunk_threshold is not None and size >= self.chunk_threshold:
+            return self._store_chunked_file(src_filepath,
+                                            dst_filepath), "chunks"
+        if self.compression is not None and size >= COMPRESSION_MIN_SIZE and \
+                should_compress(src_filepath):
+            filehash = self._store_compressed_file(src_filepath, dst_filepath)
+            if filehash is not None:
+                return filehash, self.compression
+        return self._copy_file(src_filepath, dst_filepath), "raw"
+
+    def _store_chunked_file(self, src_filepath, dst_filepath):
+        """Store a file as a chunk list and return the hash of its contents
+
+        Chunks are kept in an index with the size and modification time of
+        each file chunked, so a file unchanged since it was last chunked is
+        not read again
+        """
+        index = self._load_chunk_index()
+        index_key = os.path.abspath(src_filepath)
+        start_time = time.time()
+        src_stat = os.stat(src_filepath)
+        signature = [src_stat.st_size, src_stat.st_mtime]
+        entry = index.get(index_key)
+        if entry is not None and entry[:2] == signature and all(
+                os.path.isfile(
+                    get_chunk_path(self.chunks_directory, chunk_hash))
+                for chunk_hash, _ in entry[3]):
+            size, filehash, chunks = entry[0], entry[2], entry[3]
+        else:
+            hasher = get_hash_function(self.hash_algorithm)()
+            chunks, size = [], 0
+            with open(src_filepath, "rb") as src_file:
+                for chunk in iter_chunks(src_file):
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    chunks.append([self._store_chunk(chunk), len(chunk)])
+            filehash = hasher.hexdigest()
+            # Files modified just now could change again without their
+            # modification time changing, so they are chunked every time
+            if src_stat.st_mtime < start_time - CHUNK_INDEX_RACY_SECONDS:
+                index[index_key] = signature + [filehash, chunks]
+            else:
+                index.pop(index_key, None)
+            self._save_chunk_index(index)
+        chunk_list_filepath = dst_filepath + CHUNKED_FILE_SUFFIX
+        with open(chunk_list_filepath, "w") as f:
+            f.write(
+                to_unicode(
+                    json.dumps({
+                        "size": size,
+                        "hash": filehash,
+                        "hash_algorithm": self.hash_algorithm,
+                        "chunks": chunks
+                    })))
+        shutil.copystat(src_filepath, chunk_list_filepath)
+        return filehash
+
+    def _load_chunk_index(self):
+        """Return the entries of the chunk index, empty if it is missing or was made with another hash algorithm"""
+        try:
+            with open(self._chunk_index_filepath, "r") as f:
+                index = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        if index.get("hash_algorithm") != self.hash_algorithm:
+            return {}
+        return index.get("files", {})
+
+    def _save_chunk_index(self, index):
+        if not os.path.isdir(self.datmo_directory):
+            return
+        temp_index_filepath = self._chunk_index_filepath + ".tmp"
+        with open(temp_index_filepath, "w") as f:
+            f.write(
+                to_unicode(
+                    json.dumps({
+                        "hash_algorithm": self.hash_algorithm,
+                        "files": index
+                    })))
+        if os.path.exists(self._chunk_index_filepath):
+            os.remove(self._chunk_index_filepath)
+        os.rename(temp_index_filepath, self._chunk_index_filepath)
+
+    def _store_compressed_file(self, src_filepath, dst_filepath):
+        compressed_filepath = dst_filepath + COMPRESSION_SUFFIXES[
+            self.compression]
+        hasher = get_hash_function(self.hash_algorithm)()
+        with open(src_filepath, "rb") as src_file, \
+                open_compressed(compressed_filepath, self.compression,
+                                mode="wb") as dst_file:
             while True:
-                data = f.read(BUFF_SIZE)
+                data = src_file.read(HASH_BUFFER_SIZE)
                 if not data:
                     break
-                sha1.update(data)
-        return sha1.hexdigest()
+                hasher.update(data)
+                dst_file.write(data)
+        # Keep the file raw if the whole file did not compress like its sample
+        if os.path.getsize(compressed_filepath) >= \
+                os.path.getsize(src_filepath):
+            os.remove(compressed_filepath)
+            return None
+        shutil.copystat(src_filepath, compressed_filepath)
+        return hasher.hexdigest()
 
-    @staticmethod
-    def get_dirhash(absolute_dirpath):
-        return checksumdir.dirhash(absolute_dirpath)
+    def _store_chunk(self, chunk):
+        """Store a chunk in the chunk store if not already present and return its hash"""
+        hasher = get_hash_function(self.hash_algorithm)()
+        hasher.update(chunk)
+        chunk_hash = hasher.hexdigest()
+        chunk_path = get_chunk_path(self.chunks_directory, chunk_hash)
+        if not os.path.isfile(chunk_path):
+            if not os.path.isdir(os.path.dirname(chunk_path)):
+                os.makedirs(os.path.dirname(chunk_path))
+            # Write to a temporary file first so partial chunks are never stored
+            temp_chunk_path = chunk_path + ".tmp"
+            with open(temp_chunk_path, "wb") as f:
+                f.write(chunk)
+            os.rename(temp_chunk_path, chunk_path)
+        return chunk_hash
+
+    def _read_chunk_list(self, chunk_list_filepath):
+        with open(chunk_list_filepath, "r") as f:
+            return json.loads(f.read())
+
+    def _iter_stored_files(self, collection_path):
+        """Yields the files stored within the collection
+
+        Yields
+        ------
+        tuple
+            tuple of the form (relative_filepath, absolute_stored_filepath)
+        """
+        for root, _, filenames in os.walk(collection_path):
+            for filename in filenames:
+                stored_filepath = os.path.join(root, filename)
+                relative_filepath = os.path.relpath(stored_filepath,
+                                                    collection_path)
+                for suffix in STORED_FILE_SUFFIXES:
+                    if filename.endswith(suffix):
+                        relative_filepath = relative_filepath[:-len(suffix)]
+                        break
+                yield relative_filepath, stored_filepath
+
+    def _get_storage_from_path(self, stored_filepath):
+        if stored_filepath.endswith(CHUNKED_FILE_SUFFIX):
+            return "chunks"
+        return get_compression_from_path(stored_filepath) or "raw"
+
+    def _is_raw_stored_file(self, stored_filepath):
+        return not any(
+            stored_filepath.endswith(suffix)
+            for suffix in STORED_FILE_SUFFIXES)
+
+    def _open_stored_file(self, stored_filepath):
+        """Return a binary file object streaming the contents of a stored file"""
+        compression = get_compression_from_path(stored_filepath)
+        if compression is not None:
+            return open_compressed(stored_filepath, compression)
+        if not stored_filepath.endswith(CHUNKED_FILE_SUFFIX):
+            return open(stored_filepath, "rb")
+        chunk_list = self._read_chunk_list(stored_filepath)
+        reader = ChunkedFileReader(
+            [(get_chunk_path(self.chunks_directory, chunk_hash), chunk_size)
+             for chunk_hash, chunk_size in chunk_list["chunks"]],
+            name=stored_filepath[:-len(CHUNKED_FILE_SUFFIX)])
+        return io.BufferedReader(reader, buffer_size=HASH_BUFFER_SIZE)
+
+    def _hash_stored_file(self, stored_filepath, hash_algorithm):
+        """Return the hash and size of the contents of a stored file, streaming them"""
+        hasher, size = get_hash_function(hash_algorithm)(), 0
+        with self._open_stored_file(stored_filepath) as f:
+            while True:
+                data = f.read(HASH_BUFFER_SIZE)
+                if not data:
+                    break
+                hasher.update(data)
+                size += len(data)
+        return hasher.hexdigest(), size
+
+    def _export_stored_file(self, stored_filepath, dst_filepath):
+        """Write the contents of a stored file to the dst filepath"""
+        if self._is_raw_stored_file(stored_filepath):
+            shutil.copy2(stored_filepath, dst_filepath)
+            return
+        with self._open_stored_file(stored_filepath) as src_file, \
+                open(dst_filepath, "wb") as dst_file:
+            shutil.copyfileobj(src_file, dst_file, HASH_BUFFER_SIZE)
+        shutil.copystat(stored_filepath, dst_filepath)
+
+    def get_filehash(self, absolute_filepath):
+        return get_filehash(absolute_filepath, self.hash_algorithm)
+
+    def get_dirhash(self, absolute_dirpath):
+        return get_dirhash(absolute_dirpath, self.hash_algorithm)
 
     def get_absolute_collection_path(self, filehash):
         return os.path.join(self.datmo_directory, "collections", filehash)
@@ -314,16 +649,241 @@ class LocalFileDriver(FileDriver):
         return self.exists(relative_collection_path, directory=True)
 
     def get_collection_files(self, filehash, mode="r"):
-        relative_collection_path = os.path.join(self.datmo_directory_name,
-                                                "collections", filehash)
-        # Call get function with the directory=True parameter
-        return self.get(relative_collection_path, mode=mode, directory=True)
+        collection_path = self.get_collection_path(filehash)
+        if not os.path.exists(collection_path):
+            raise PathDoesNotExist(
+                __("error", "controller.file.driver.local.get",
+                   collection_path))
+        return [
+            self.open_collection_file(filehash, relative_filepath, mode=mode)
+            for relative_filepath in sorted(
+                self._load_collection_manifest(filehash)["files"])
+        ]
+
+    def list_collection_files(self, filehash, mode="r"):
+        collection_path = self.get_collection_path(filehash)
+        return [
+            FileReference(
+                os.path.join(collection_path, relative_filepath),
+                entry["size"],
+                partial(self.open_collection_file, filehash,
+                        relative_filepath),
+                mode=mode) for relative_filepath, entry in sorted(
+                    self._load_collection_manifest(filehash)["files"].items())
+        ]
+
+    def open_collection_file(self, filehash, relative_filepath, mode="rb"):
+        """Open a file within the collection, decoding it if stored chunked or compressed
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+        relative_filepath : str
+            filepath relative to the collection
+        mode : str, optional
+            file object open mode, files not stored raw are read only
+            (default is "rb")
+
+        Returns
+        -------
+        file
+            python file object for the file
+
+        Raises
+        ------
+        PathDoesNotExist
+            if the file is not within the collection
+        """
+        entry = self._load_collection_manifest(filehash)["files"].get(
+            relative_filepath)
+        if entry is None:
+            raise PathDoesNotExist(
+                __("error", "controller.file.driver.local.get",
+                   os.path.join(
+                       self.get_collection_path(filehash), relative_filepath)))
+        stored_filepath = self._get_stored_filepath(filehash,
+                                                    relative_filepath, entry)
+        if self._is_raw_stored_file(stored_filepath):
+            return open(stored_filepath, mode)
+        if "b" in mode:
+            return self._open_stored_file(stored_filepath)
+        return io.TextIOWrapper(self._open_stored_file(stored_filepath))
+
+    def get_collection_filepath(self, filehash, relative_filepath):
+        """Return a path to the raw contents of a file within the collection
+
+        Files stored chunked or compressed are restored once to a read only
+        cache keyed by the hash of their contents
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+        relative_filepath : str
+            filepath relative to the collection
+
+        Returns
+        -------
+        str
+            absolute path of a file with the raw contents, which must not be written to
+
+        Raises
+        ------
+        PathDoesNotExist
+            if the file is not within the collection
+        """
+        entry = self._load_collection_manifest(filehash)["files"].get(
+            os.path.normpath(relative_filepath))
+        if entry is None:
+            raise PathDoesNotExist(
+                __("error", "controller.file.driver.local.get",
+                   os.path.join(
+                       self.get_collection_path(filehash), relative_filepath)))
+        stored_filepath = self._get_stored_filepath(
+            filehash, os.path.normpath(relative_filepath), entry)
+        if self._is_raw_stored_file(stored_filepath):
+            return stored_filepath
+        cache_filepath = get_chunk_path(self.cache_directory, entry["hash"])
+        if not os.path.isfile(cache_filepath):
+            if not os.path.isdir(os.path.dirname(cache_filepath)):
+                os.makedirs(os.path.dirname(cache_filepath))
+            # Write to a temporary file first so partial files are never used
+            temp_cache_filepath = get_datmo_temp_path(self.root)
+            temp_filepath = os.path.join(temp_cache_filepath, entry["hash"])
+            self._export_stored_file(stored_filepath, temp_filepath)
+            os.chmod(temp_filepath, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.rename(temp_filepath, cache_filepath)
+            shutil.rmtree(temp_cache_filepath)
+        return cache_filepath
+
+    def get_collection_size(self, filehash):
+        """Return the total size in bytes of the files within the collection"""
+        return self._load_collection_manifest(filehash)["total_size"]
+
+    def find_in_collection(self, filehash, filename):
+        """Return the filepaths within the collection with the filename given
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+        filename : str
+            name of the file to find
+
+        Returns
+        -------
+        list
+            filepaths relative to the collection, shallowest first
+        """
+        return sorted(
+            [
+                relative_filepath for relative_filepath in
+                self._load_collection_manifest(filehash)["files"]
+                if os.path.basename(relative_filepath) == filename
+            ],
+            key=lambda relative_filepath: (relative_filepath.count(os.sep),
+                                           relative_filepath))
 
     def delete_collection(self, filehash):
         relative_collection_path = os.path.join(self.datmo_directory_name,
                                                 "collections", filehash)
+        manifest_filepath = self._get_manifest_filepath(filehash)
+        if os.path.isfile(manifest_filepath):
+            os.remove(manifest_filepath)
+        self._collection_manifests.pop(filehash, None)
         return self.delete(relative_collection_path, directory=True)
 
+    def list_stored_objects(self):
+        """Return the names of the objects stored outside of collections
+
+        Returns
+        -------
+        dict
+            dictionary with the hashes of the stored chunks ("chunks") and
+            cached files ("cache") and the filehashes of the collection
+            manifests ("manifests")
+        """
+        stored_objects = {"chunks": [], "cache": [], "manifests": []}
+        for kind, dirpath in [("chunks", self.chunks_directory),
+                              ("cache", self.cache_directory)]:
+            if not os.path.isdir(dirpath):
+                continue
+            for prefix in sorted(os.listdir(dirpath)):
+                prefix_dirpath = os.path.join(dirpath, prefix)
+                if os.path.isdir(prefix_dirpath):
+                    stored_objects[kind].extend(
+                        sorted(os.listdir(prefix_dirpath)))
+        manifests_dirpath = os.path.join(self.datmo_directory, "manifests")
+        if os.path.isdir(manifests_dirpath):
+            stored_objects["manifests"] = sorted(
+                filename[:-len(".json")]
+                for filename in os.listdir(manifests_dirpath)
+                if filename.endswith(".json"))
+        return stored_objects
+
+    def get_collection_objects(self, filehash):
+        """Return the names of the objects stored outside of the collection which it uses
+
+        Parameters
+        ----------
+        filehash : str
+            hash representing the files in the collection
+
+        Returns
+        -------
+        dict
+            dictionary with the sets of chunk hashes ("chunks") and file
+            hashes which may be cached ("cache") used by the collection
+        """
+        collection_objects = {"chunks": set(), "cache": set()}
+        manifest = self._load_collection_manifest(filehash)
+        for relative_filepath, entry in manifest["files"].items():
+            collection_objects["cache"].add(entry["hash"])
+            if entry["storage"] == "chunks":
+                chunk_list = self._read_chunk_list(
+                    self._get_stored_filepath(filehash, relative_filepath,
+                                              entry))
+                collection_objects["chunks"].update(
+                    chunk_hash for chunk_hash, _ in chunk_list["chunks"])
+        return collection_objects
+
+    def delete_stored_object(self, kind, name):
+        """Delete an object stored outside of collections
+
+        Parameters
+        ----------
+        kind : str
+            kind of the object, one of "chunks", "cache" or "manifests"
+        name : str
+            name of the object as given by list_stored_objects()
+
+        Returns
+        -------
+        bool
+            True if success
+
+        Raises
+        ------
+        PathDoesNotExist
+            if the object does not exist
+        """
+        if kind == "manifests":
+            object_filepath = self._get_manifest_filepath(name)
+            self._collection_manifests.pop(name, None)
+        elif kind == "chunks":
+            object_filepath = get_chunk_path(self.chunks_directory, name)
+        else:
+            object_filepath = get_chunk_path(self.cache_directory, name)
+        if not os.path.isfile(object_filepath):
+            raise PathDoesNotExist(
+                __("error", "controller.file.driver.local.get",
+                   object_filepath))
+        # Cached files are read only
+        os.chmod(object_filepath, stat.S_IRUSR | stat.S_IWUSR)
+        os.remove(object_filepath)
+        return True
+
     def transfer_collection(self, filehash, dst_dirpath):
         if not self.exists_collection(filehash):
             raise PathDoesNotExist(
@@ -334,9 +894,217 @@ class LocalFileDriver(FileDriver):
                 __("error",
                    "controller.file.driver.local.transfer_collection.dst",
                    dst_dirpath))
-        collection_path = os.path.join(self.datmo_directory, "collections",
-                                       filehash)
-        return self.copytree(collection_path, dst_dirpath)
+        manifest = self._load_collection_manifest(filehash)
+        for relative_dirpath in manifest["directories"]:
+            dirpath = os.path.join(dst_dirpath, relative_dirpath)
+            if not os.path.isdir(dirpath):
+                os.makedirs(dirpath)
+        for relative_filepath, entry in manifest["files"].items():
+            dst_filepath = os.path.join(dst_dirpath, relative_filepath)
+            if os.path.lexists(dst_filepath):
+                os.remove(dst_filepath)
+            self._export_stored_file(
+                self._get_stored_filepath(filehash, relative_filepath, entry),
+                dst_filepath)
+        return True
+
+    def get_manifest(self, absolute_dirpath):
+        return get_dir_manifest(absolute_dirpath, self.hash_algorithm)
+
+    def get_collection_manifest(self, filehash):
+        # Manifests are cached, so callers are given a copy they can change
+        return dict((relative_filepath, dict(entry))
+                    for relative_filepath, entry in
+                    self._load_collection_manifest(filehash)["files"].items())
+
+    def get_collection_directories(self, filehash):
+        return list(self._load_collection_manifest(filehash)["directories"])
+
+    def hash_collection_file(self, filehash, relative_filepath):
+        manifest = self._load_collection_manifest(filehash)
+        relative_filepath = os.path.normpath(relative_filepath)
+        entry = manifest["files"].get(relative_filepath)
+        if entry is None:
+            raise PathDoesNotExist(
+                __("error", "controller.file.driver.local.get",
+                   os.path.join(
+                       self.get_collection_path(filehash), relative_filepath)))
+        return self._hash_stored_file(
+            self._get_stored_filepath(filehash, relative_filepath, entry),
+            manifest["hash_algorithm"])
+
+    def get_collection_hash_algorithm(self, filehash):
+        return self._load_collection_manifest(filehash)["hash_algorithm"]
+
+    def _get_manifest_filepath(self, filehash):
+        return os.path.join(self.datmo_directory, "manifests",
+                            filehash + ".json")
+
+    def _get_stored_filepath(self, filehash, relative_filepath, entry):
+        return os.path.join(
+            self.get_collection_path(filehash),
+            relative_filepath) + STORAGE_SUFFIXES[entry["storage"]]
+
+    def _write_collection_manifest(self, filehash, files, directories):
+        """Write the manifest of a collection with the path, size, hash, mode and storage of its files
+
+        Paths are written with "/" separators so manifests are portable
+        """
+        manifest_filepath = self._get_manifest_filepath(filehash)
+        if not os.path.isdir(os.path.dirname(manifest_filepath)):
+            os.makedirs(os.path.dirname(manifest_filepath))
+        manifest = {
+            "hash_algorithm":
+                self.hash_algorithm,
+            "total_size":
+                sum(entry["size"] for entry in files.values()),
+            "files":
+                dict((relative_filepath.replace(os.sep, "/"), entry)
+                     for relative_filepath, entry in files.items()),
+            "directories":
+                sorted(
+                    relative_dirpath.replace(os.sep, "/")
+                    for relative_dirpath in directories)
+        }
+        # Write to a temporary file first so partial manifests are never read
+        temp_manifest_filepath = manifest_filepath + ".tmp"
+        with open(temp_manifest_filepath, "w") as f:
+            f.write(to_unicode(json.dumps(manifest, sort_keys=True)))
+        os.rename(temp_manifest_filepath, manifest_filepath)
+        self._collection_manifests[filehash] = self._parse_manifest(manifest)
+        return True
+
+    def _parse_manifest(self, manifest):
+        manifest["files"] = dict(
+            (relative_filepath.replace("/", os.sep), entry)
+            for relative_filepath, entry in manifest["files"].items())
+        manifest["directories"] = [
+            relative_dirpath.replace("/", os.sep)
+            for relative_dirpath in manifest["directories"]
+        ]
+        return manifest
+
+    def _load_collection_manifest(self, filehash):
+        """Return the manifest of a collection
+
+        Collections created before manifests were written are described by
+        walking the collection once and their manifest is written then
+        """
+        if filehash in self._collection_manifests:
+            return self._collection_manifests[filehash]
+        if not self.exists_collection(filehash):
+            raise PathDoesNotExist(
+                __("error", "controller.file.driver.local.transfer_collection",
+                   filehash))
+        manifest_filepath = self._get_manifest_filepath(filehash)
+        if os.path.isfile(manifest_filepath):
+            with open(manifest_filepath, "r") as f:
+                manifest = self._parse_manifest(json.loads(f.read()))
+            self._collection_manifests[filehash] = manifest
+            return manifest
+        collection_path = self.get_collection_path(filehash)
+        files, directories = {}, []
+        for root, dirnames, _ in os.walk(collection_path):
+            for dirname in dirnames:
+                directories.append(
+                    os.path.relpath(
+                        os.path.join(root, dirname), collection_path))
+        for relative_filepath, stored_filepath in self._iter_stored_files(
+                collection_path):
+            storage = self._get_storage_from_path(stored_filepath)
+            if storage == "chunks":
+                chunk_list = self._read_chunk_list(stored_filepath)
+                size, filehash_entry = chunk_list["size"], chunk_list["hash"]
+            else:
+                # Files not stored raw are hashed while streamed
+                filehash_entry, size = self._hash_stored_file(
+                    stored_filepath, self.hash_algorithm)
+            files[relative_filepath] = {
+                "size": size,
+                "hash": filehash_entry,
+                "mode": stat.S_IMODE(os.stat(stored_filepath).st_mode),
+                "storage": storage
+            }
+        self._write_collection_manifest(filehash, files, directories)
+        return self._collection_manifests[filehash]
+
+    def checkout_collection(self, filehash, dst_dirpath, dst_manifest=None):
+        manifest = self._load_collection_manifest(filehash)
+        collection_manifest = manifest["files"]
+        if not os.path.isdir(dst_dirpath):
+            raise PathDoesNotExist(
+                __("error",
+                   "controller.file.driver.local.transfer_collection.dst",
+                   dst_dirpath))
+
+        # Find the files to remove and the files to replace
+        stale_filepaths, changed_filepaths = [], []
+        for root, _, filenames in os.walk(dst_dirpath):
+            for filename in filenames:
+                filepath = os.path.join(root, filename)
+                relative_filepath = os.path.relpath(filepath, dst_dirpath)
+                entry = collection_manifest.get(relative_filepath)
+                if entry is None:
+                    stale_filepaths.append(relative_filepath)
+                elif dst_manifest is not None:
+                    if dst_manifest[relative_filepath]["hash"] != entry["hash"]:
+                        changed_filepaths.append(relative_filepath)
+                # Only hash files of the same size, otherwise they differ
+                elif not os.path.isfile(filepath) or \
+                        os.path.getsize(filepath) != entry["size"] or \
+                        self.get_filehash(filepath) != entry["hash"]:
+                    changed_filepaths.append(relative_filepath)
+
+        for relative_filepath in stale_filepaths + changed_filepaths:
+            os.remove(os.path.join(dst_dirpath, relative_filepath))
+
+        # Remove directories which are not in the collection (bottom up) and
+        # add the ones missing, including empty directories
+        collection_directories = set(manifest["directories"])
+        for root, dirnames, _ in os.walk(dst_dirpath, topdown=False):
+            for dirname in dirnames:
+                dirpath = os.path.join(root, dirname)
+                relative_dirpath = os.path.relpath(dirpath, dst_dirpath)
+                if relative_dirpath in collection_directories:
+                    continue
+                if os.path.islink(dirpath):
+                    os.remove(dirpath)
+                else:
+                    shutil.rmtree(dirpath)
+        for relative_dirpath in sorted(collection_directories):
+            dirpath = os.path.join(dst_dirpath, relative_dirpath)
+            if not os.path.isdir(dirpath):
+                os.makedirs(dirpath)
+
+        # Copy over the changed files and the ones not yet present
+        for relative_filepath, entry in collection_manifest.items():
+            dst_filepath = os.path.join(dst_dirpath, relative_filepath)
+            if os.path.lexists(dst_filepath):
+                continue
+            self._export_stored_file(
+                self._get_stored_filepath(filehash, relative_filepath, entry),
+                dst_filepath)
+        return True
+
+    def checkout_collection_paths(self, filehash, dst_dirpath, paths):
+        collection_manifest = self._load_collection_manifest(filehash)["files"]
+        if not os.path.isdir(dst_dirpath):
+            raise PathDoesNotExist(
+                __("error",
+                   "controller.file.driver.local.transfer_collection.dst",
+                   dst_dirpath))
+        relative_filepaths = match_paths(collection_manifest, paths)
+        for relative_filepath in relative_filepaths:
+            dst_filepath = os.path.join(dst_dirpath, relative_filepath)
+            if os.path.lexists(dst_filepath):
+                os.remove(dst_filepath)
+            elif not os.path.isdir(os.path.dirname(dst_filepath)):
+                os.makedirs(os.path.dirname(dst_filepath))
+            entry = collection_manifest[relative_filepath]
+            self._export_stored_file(
+                self._get_stored_filepath(filehash, relative_filepath, entry),
+                dst_filepath)
+        return relative_filepaths
 
     # Datmo base directory
     def create_hidden_datmo_dir(self):
@@ -423,6 +1191,7 @@ class LocalFileDriver(FileDriver):
     def delete_collections_dir(self):
         relative_collections_path = os.path.join(self.datmo_directory_name,
                                                  "collections")
+        self._collection_manifests.clear()
         return self.delete(relative_collections_path, directory=True)
 
     def list_file_collections(self):
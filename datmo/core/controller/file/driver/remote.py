@@ -0,0 +1,283 @@
+import os
+import json
+import shutil
+import requests
+from io import open
+from functools import partial
+from abc import ABCMeta, abstractmethod
+from future.utils import with_metaclass
+from multiprocessing.pool import ThreadPool
+try:
+    to_unicode = unicode
+except NameError:
+    to_unicode = str
+
+from datmo.core.util.i18n import get as __
+from datmo.core.util.exceptions import PathDoesNotExist, RemoteTransferError
+from datmo.core.util.chunking import get_chunk_path
+from datmo.core.controller.file.driver.s3_remote import (
+    S3RemoteFileDriver, DEFAULT_MAX_WORKERS, TRANSFER_BUFFER_SIZE)
+
+
+class RemoteFileDriver(with_metaclass(ABCMeta, object)):
+    """RemoteFileDriver is the parent of all remotes files are pushed to and pulled from
+
+    A remote stores blobs, the contents of files named by their hash, and
+    json objects such as collection manifests. Any child must implement the
+    methods below
+
+    Methods
+    -------
+    exists_blobs(blob_hashes)
+        return the blobs given which are stored on the remote
+    upload_blob(blob_hash, src_file)
+        store the contents of a file as a blob
+    download_blob(blob_hash, dst_filepath)
+        write the contents of a blob to a file
+    get_object(name)
+        return a json object stored on the remote
+    put_object(name, obj)
+        store a json object on the remote
+    """
+
+    @abstractmethod
+    def exists_blobs(self, blob_hashes):
+        """Return the blobs given which are stored on the remote
+
+        Parameters
+        ----------
+        blob_hashes : list
+            hashes of the blobs to look for
+
+        Returns
+        -------
+        set
+            hashes of the blobs stored on the remote
+        """
+        pass
+
+    @abstractmethod
+    def upload_blob(self, blob_hash, src_file):
+        """Store the contents of a file as a blob
+
+        Parameters
+        ----------
+        blob_hash : str
+            hash of the contents of the file
+        src_file : datmo.core.util.file_reference.FileReference
+            reference to the file, which is opened in binary to stream its
+            contents, so files stored chunked or compressed are never written
+            out whole
+
+        Returns
+        -------
+        bool
+            True if success
+        """
+        pass
+
+    @abstractmethod
+    def download_blob(self, blob_hash, dst_filepath):
+        """Write the contents of a blob to a file
+
+        Parameters
+        ----------
+        blob_hash : str
+            hash of the blob
+        dst_filepath : str
+            absolute path of the file to write
+
+        Returns
+        -------
+        bool
+            True if success
+        """
+        pass
+
+    @abstractmethod
+    def get_object(self, name):
+        """Return a json object stored on the remote
+
+        Parameters
+        ----------
+        name : str
+            name of the object, which may contain "/"
+
+        Returns
+        -------
+        dict or None
+            the object or None if it is not stored
+        """
+        pass
+
+    @abstractmethod
+    def put_object(self, name, obj):
+        """Store a json object on the remote
+
+        Parameters
+        ----------
+        name : str
+            name of the object, which may contain "/"
+        obj : dict
+            object to store
+
+        Returns
+        -------
+        bool
+            True if success
+        """
+        pass
+
+
+class DirectoryRemoteFileDriver(RemoteFileDriver):
+    """Remote in a directory, such as a mounted network or external drive
+
+    Parameters
+    ----------
+    dirpath : str
+        absolute path of the directory of the remote, created if needed
+    """
+
+    def __init__(self, dirpath):
+        self.dirpath = dirpath
+        self.type = "directory"
+
+    def _get_blob_path(self, blob_hash):
+        return get_chunk_path(os.path.join(self.dirpath, "blobs"), blob_hash)
+
+    def _get_object_path(self, name):
+        return os.path.join(self.dirpath, *name.split("/"))
+
+    @staticmethod
+    def _write_file(dst_filepath, write_function):
+        # Write to a temporary file first so partial files are never read
+        if not os.path.isdir(os.path.dirname(dst_filepath)):
+            os.makedirs(os.path.dirname(dst_filepath))
+        temp_filepath = dst_filepath + ".tmp"
+        write_function(temp_filepath)
+        if os.path.exists(dst_filepath):
+            os.remove(dst_filepath)
+        os.rename(temp_filepath, dst_filepath)
+        return True
+
+    def exists_blobs(self, blob_hashes):
+        return set(blob_hash for blob_hash in blob_hashes
+                   if os.path.isfile(self._get_blob_path(blob_hash)))
+
+    def upload_blob(self, blob_hash, src_file):
+        def write_blob(temp_filepath):
+            with src_file.open(mode="rb") as src, \
+                    open(temp_filepath, "wb") as dst:
+                shutil.copyfileobj(src, dst, TRANSFER_BUFFER_SIZE)
+
+        return self._write_file(self._get_blob_path(blob_hash), write_blob)
+
+    def download_blob(self, blob_hash, dst_filepath):
+        blob_path = self._get_blob_path(blob_hash)
+        if not os.path.isfile(blob_path):
+            raise PathDoesNotExist(
+                __("error", "controller.file.driver.remote.blob", blob_hash))
+        shutil.copyfile(blob_path, dst_filepath)
+        return True
+
+    def get_object(self, name):
+        object_path = self._get_object_path(name)
+        if not os.path.isfile(object_path):
+            return None
+        with open(object_path, "r") as f:
+            return json.loads(f.read())
+
+    def put_object(self, name, obj):
+        def write_object(temp_filepath):
+            with open(temp_filepath, "w") as f:
+                f.write(to_unicode(json.dumps(obj, sort_keys=True)))
+
+        return self._write_file(self._get_object_path(name), write_object)
+
+
+class HTTPRemoteFileDriver(RemoteFileDriver):
+    """Remote served over http, storing each blob and object at its own url
+
+    Blobs are transferred with the streaming, parallel and resumable
+    transfers of S3RemoteFileDriver
+
+    Parameters
+    ----------
+    url : str
+        base url of the remote
+    max_workers : int, optional
+        number of requests made at once when looking for blobs
+        (default is DEFAULT_MAX_WORKERS)
+    """
+
+    def __init__(self, url, max_workers=DEFAULT_MAX_WORKERS):
+        self.url = url.rstrip("/")
+        self.max_workers = max_workers
+        self.transfer_driver = S3RemoteFileDriver(max_workers=max_workers)
+        self.type = "http"
+
+    def _get_blob_url(self, blob_hash):
+        return "%s/blobs/%s/%s" % (self.url, blob_hash[:2], blob_hash)
+
+    def exists_blobs(self, blob_hashes):
+        blob_hashes = list(blob_hashes)
+
+        def exists_blob(blob_hash):
+            res = requests.head(self._get_blob_url(blob_hash))
+            return res.status_code == 200
+
+        pool = ThreadPool(max(1, min(self.max_workers, len(blob_hashes))))
+        try:
+            results = pool.map(exists_blob, blob_hashes)
+        finally:
+            pool.close()
+            pool.join()
+        return set(blob_hash
+                   for blob_hash, exists in zip(blob_hashes, results)
+                   if exists)
+
+    def upload_blob(self, blob_hash, src_file):
+        return self.transfer_driver.upload_fileobj(
+            partial(src_file.open, mode="rb"), src_file.size,
+            self._get_blob_url(blob_hash))
+
+    def download_blob(self, blob_hash, dst_filepath):
+        return self.transfer_driver.download(
+            self._get_blob_url(blob_hash), dst_filepath)
+
+    def get_object(self, name):
+        res = requests.get("%s/%s" % (self.url, name))
+        if res.status_code == 404:
+            return None
+        if res.status_code != 200:
+            raise RemoteTransferError(
+                __("error", "controller.file.driver.s3_remote.transfer",
+                   (res.status_code, res.text)))
+        return res.json()
+
+    def put_object(self, name, obj):
+        res = requests.put(
+            "%s/%s" % (self.url, name),
+            data=json.dumps(obj, sort_keys=True).encode("utf-8"))
+        if not 200 <= res.status_code < 300:
+            raise RemoteTransferError(
+                __("error", "controller.file.driver.s3_remote.transfer",
+                   (res.status_code, res.text)))
+        return True
+
+
+def get_remote_file_driver(remote):
+    """Return the remote file driver for a url or directory path
+
+    Parameters
+    ----------
+    remote : str
+        http(s) url of the remote or path of a directory
+
+    Returns
+    -------
+    RemoteFileDriver
+    """
+    if remote.startswith("http://") or remote.startswith("https://"):
+        return HTTPRemoteFileDriver(remote)
+    return DirectoryRemoteFileDriver(os.path.abspath(remote))
@@ -1,36 +1,345 @@
 import os
+import re
+import time
 import requests
 from io import open
-try:
-    to_unicode = unicode
-except NameError:
-    to_unicode = str
+from functools import partial
+from multiprocessing.pool import ThreadPool
+
+from datmo.core.util.i18n import get as __
+from datmo.core.util.exceptions import PathDoesNotExist, RemoteTransferError
+
+# Size of the blocks streamed to and from the remote
+TRANSFER_BUFFER_SIZE = 1024 * 1024
+# Size of each part of a multipart transfer, S3 requires at least 5 MiB
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_RETRIES = 3
+# Seconds waited before the first retry, doubled for every retry after
+DEFAULT_RETRY_DELAY = 1.0
+
+_CONTENT_RANGE_PATTERN = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
 
 
 class S3RemoteFileDriver(object):
-    def __init__(self):
+    """Transfers files to and from S3 through presigned urls
+
+    Files are streamed in binary so they are never read into memory whole.
+    Large files are sent as parts in parallel with a multipart upload and
+    downloaded as byte ranges in parallel. Failed requests are retried,
+    resuming from the bytes already transferred
+
+    Parameters
+    ----------
+    part_size : int, optional
+        size in bytes of each part of a multipart transfer
+        (default is DEFAULT_PART_SIZE)
+    max_workers : int, optional
+        number of parts transferred at once
+        (default is DEFAULT_MAX_WORKERS)
+    retries : int, optional
+        number of times a failed request is retried
+        (default is DEFAULT_RETRIES)
+    retry_delay : float, optional
+        seconds waited before the first retry, doubled for every retry after
+        (default is DEFAULT_RETRY_DELAY)
+    """
+
+    def __init__(self,
+                 part_size=DEFAULT_PART_SIZE,
+                 max_workers=DEFAULT_MAX_WORKERS,
+                 retries=DEFAULT_RETRIES,
+                 retry_delay=DEFAULT_RETRY_DELAY):
         self.type = "remote-datmo"
+        self.part_size = part_size
+        self.max_workers = max_workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+    def get_part_count(self, src_filepath):
+        """Return the number of parts a file is uploaded in with upload_multipart()"""
+        size = os.path.getsize(src_filepath)
+        return max(1, (size + self.part_size - 1) // self.part_size)
+
+    def _retry(self, function, *args):
+        """Call the function until it succeeds or has been retried self.retries times"""
+        attempt = 0
+        while True:
+            try:
+                return function(*args)
+            except (RemoteTransferError, requests.RequestException):
+                if attempt >= self.retries:
+                    raise
+                time.sleep(self.retry_delay * 2**attempt)
+                attempt += 1
+
+    def _map(self, function, items):
+        pool = ThreadPool(max(1, min(self.max_workers, len(items))))
+        try:
+            return pool.map(function, items)
+        finally:
+            pool.close()
+            pool.join()
 
     @staticmethod
-    def upload(src_filepath, s3_presigned_url):
+    def _check_response(res, message_key):
+        if not 200 <= res.status_code < 300:
+            raise RemoteTransferError(
+                __("error", message_key, (res.status_code, res.text)))
+
+    def upload(self, src_filepath, s3_presigned_url):
+        """Upload a file with a single request streaming its contents
+
+        Parameters
+        ----------
+        src_filepath : str
+            absolute path of the file to upload
+        s3_presigned_url : str
+            url presigned for a PUT of the object
+
+        Returns
+        -------
+        bool
+            True if success
+
+        Raises
+        ------
+        PathDoesNotExist
+            if the file does not exist
+        RemoteTransferError
+            if the upload still fails after being retried
+        """
         if not os.path.isfile(src_filepath):
-            raise Exception(
-                "Can't upload file: %s, validation failed." % src_filepath)
-        with open(src_filepath, "r") as f:
-            data = f.read()
-            res = requests.put(s3_presigned_url, data=data)
-            if res.status_code == 200:
-                pass
-            else:
-                raise Exception("Upload failed: %s" % res.text)
+            raise PathDoesNotExist(
+                __("error", "controller.file.driver.s3_remote.upload",
+                   src_filepath))
+        return self.upload_fileobj(
+            partial(open, src_filepath, "rb"), os.path.getsize(src_filepath),
+            s3_presigned_url)
 
-    @staticmethod
-    def download(s3_presigned_url, dst_filepath):
-        res = requests.get(s3_presigned_url, stream=True)
-        if res.status_code == 200:
-            pass
-        else:
-            raise Exception("Upload failed: %s" % res.text)
-        with open(dst_filepath, "w") as handle:
-            for block in res.iter_content(1024):
-                handle.write(to_unicode(block))
+    def upload_fileobj(self, open_file, size, s3_presigned_url):
+        """Upload the contents of a file object with a single request streaming them
+
+        Parameters
+        ----------
+        open_file : function
+            function returning a binary python file object for the contents,
+            called again for each retry
+        size : int
+            size of the contents in bytes
+        s3_presigned_url : str
+            url presigned for a PUT of the object
+
+        Returns
+        -------
+        bool
+            True if success
+
+        Raises
+        ------
+        RemoteTransferError
+            if the upload still fails after being retried
+        """
+
+        def put_file():
+            with open_file() as f:
+                res = requests.put(
+                    s3_presigned_url,
+                    data=f,
+                    headers={"Content-Length": str(size)})
+            self._check_response(res,
+                                 "controller.file.driver.s3_remote.transfer")
+
+        self._retry(put_file)
+        return True
+
+    def upload_multipart(self,
+                         src_filepath,
+                         part_urls,
+                         complete_url,
+                         completed_parts=None):
+        """Upload a file in parts of self.part_size bytes in parallel
+
+        Parameters
+        ----------
+        src_filepath : str
+            absolute path of the file to upload
+        part_urls : list
+            urls presigned for the PUT of each part in order, there must be
+            get_part_count(src_filepath) of them
+        complete_url : str
+            url presigned for the POST completing the multipart upload
+        completed_parts : dict, optional
+            ETags of the parts already uploaded by part number, as given by
+            the RemoteTransferError of a failed upload, which are not sent again
+            (default is None, which uploads every part)
+
+        Returns
+        -------
+        dict
+            ETags of the parts uploaded by part number
+
+        Raises
+        ------
+        PathDoesNotExist
+            if the file does not exist
+        RemoteTransferError
+            if any part still fails after being retried, with the parts which
+            succeeded in its completed_parts attribute so the upload can resume
+        """
+        if not os.path.isfile(src_filepath):
+            raise PathDoesNotExist(
+                __("error", "controller.file.driver.s3_remote.upload",
+                   src_filepath))
+        part_count = self.get_part_count(src_filepath)
+        if len(part_urls) != part_count:
+            raise RemoteTransferError(
+                __("error", "controller.file.driver.s3_remote.upload.parts",
+                   (part_count, len(part_urls))))
+        completed_parts = dict(completed_parts or {})
+
+        def put_part(part_number):
+            with open(src_filepath, "rb") as f:
+                f.seek((part_number - 1) * self.part_size)
+                data = f.read(self.part_size)
+            res = requests.put(part_urls[part_number - 1], data=data)
+            self._check_response(res,
+                                 "controller.file.driver.s3_remote.transfer")
+            return res.headers.get("ETag")
+
+        def upload_part(part_number):
+            try:
+                return part_number, self._retry(put_part, part_number)
+            except (RemoteTransferError, requests.RequestException):
+                return part_number, None
+
+        for part_number, etag in self._map(upload_part, [
+                part_number for part_number in range(1, part_count + 1)
+                if part_number not in completed_parts
+        ]):
+            if etag is not None:
+                completed_parts[part_number] = etag
+        if len(completed_parts) < part_count:
+            raise RemoteTransferError(
+                __("error", "controller.file.driver.s3_remote.upload.failed",
+                   (part_count - len(completed_parts), src_filepath)),
+                completed_parts=completed_parts)
+
+        complete_body = "<CompleteMultipartUpload>%s</CompleteMultipartUpload>" % "".join(
+            "<Part><PartNumber>%d</PartNumber><ETag>%s</ETag></Part>" %
+            (part_number, completed_parts[part_number])
+            for part_number in sorted(completed_parts))
+
+        def post_complete():
+            res = requests.post(
+                complete_url, data=complete_body.encode("utf-8"))
+            self._check_response(res,
+                                 "controller.file.driver.s3_remote.transfer")
+
+        self._retry(post_complete)
+        return completed_parts
+
+    def download(self, s3_presigned_url, dst_filepath):
+        """Download a file streaming its contents, in parallel byte ranges if large
+
+        The first part is requested as a byte range. If the remote serves
+        ranges and the file is larger, the remaining parts are downloaded in
+        parallel, else the whole file is streamed from the first response.
+        The file is written beside the dst filepath and only moved there once
+        complete
+
+        Parameters
+        ----------
+        s3_presigned_url : str
+            url presigned for a GET of the object
+        dst_filepath : str
+            absolute path to write the file to
+
+        Returns
+        -------
+        bool
+            True if success
+
+        Raises
+        ------
+        RemoteTransferError
+            if the download still fails after being retried
+        """
+        temp_filepath = dst_filepath + ".datmo-download"
+        size, received = self._retry(self._download_first_part,
+                                     s3_presigned_url, temp_filepath)
+        if size is not None and received < size:
+            # The rest of the first part is fetched if the remote sent less
+            ranges = [(received, min(self.part_size, size) - 1)
+                      ] if received < min(self.part_size, size) else []
+            ranges.extend((start, min(start + self.part_size, size) - 1)
+                          for start in range(self.part_size, size,
+                                             self.part_size))
+            self._map(
+                partial(self._download_range, s3_presigned_url,
+                        temp_filepath), ranges)
+        if os.path.exists(dst_filepath):
+            os.remove(dst_filepath)
+        os.rename(temp_filepath, dst_filepath)
+        return True
+
+    def _download_first_part(self, s3_presigned_url, temp_filepath):
+        """Download the first part of the file
+
+        Returns
+        -------
+        tuple
+            size of the file if the remote serves byte ranges else None, and
+            the number of bytes received
+        """
+        res = requests.get(
+            s3_presigned_url,
+            headers={"Range": "bytes=0-%d" % (self.part_size - 1)},
+            stream=True)
+        self._check_response(res, "controller.file.driver.s3_remote.transfer")
+        size = None
+        match = _CONTENT_RANGE_PATTERN.match(
+            res.headers.get("Content-Range", ""))
+        if res.status_code == 206 and match:
+            size = int(match.group(3))
+        received = 0
+        with open(temp_filepath, "wb") as f:
+            if size is not None:
+                # Allocate the whole file so parts can be written in place
+                f.truncate(size)
+            for block in res.iter_content(TRANSFER_BUFFER_SIZE):
+                f.write(block)
+                received += len(block)
+        return size, received
+
+    def _download_range(self, s3_presigned_url, temp_filepath, byte_range):
+        """Download a byte range into its place in the file, resuming after failures"""
+        start, end = byte_range
+        # Bytes written are kept across retries so only the rest is requested
+        position = [start]
+
+        def get_range():
+            res = requests.get(
+                s3_presigned_url,
+                headers={"Range": "bytes=%d-%d" % (position[0], end)},
+                stream=True)
+            self._check_response(res,
+                                 "controller.file.driver.s3_remote.transfer")
+            if res.status_code != 206:
+                raise RemoteTransferError(
+                    __("error",
+                       "controller.file.driver.s3_remote.download.range",
+                       s3_presigned_url))
+            with open(temp_filepath, "r+b") as f:
+                f.seek(position[0])
+                for block in res.iter_content(TRANSFER_BUFFER_SIZE):
+                    f.write(block)
+                    position[0] += len(block)
+            if position[0] <= end:
+                raise RemoteTransferError(
+                    __("error",
+                       "controller.file.driver.s3_remote.download.incomplete",
+                       (position[0] - start, end - start + 1)))
+
+        self._retry(get_range)
+        return True
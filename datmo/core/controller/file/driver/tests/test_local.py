@@ -6,8 +6,10 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import os
+import stat
 import shutil
 import tempfile
+import random
 import platform
 from io import TextIOWrapper
 try:
@@ -492,6 +494,35 @@ class TestLocalFileDriver():
         result_2 = self.local_file_driver.get_dirhash(temp_dir_2)
         assert result == result_2
 
+    def test_hash_algorithm(self):
+        local_file_driver = LocalFileDriver(
+            root=self.temp_dir, hash_algorithm="sha256")
+        assert local_file_driver.hash_algorithm == "sha256"
+        local_file_driver.init()
+        assert local_file_driver.is_initialized
+        filepath = os.path.join(self.temp_dir, "test.txt")
+        with open(filepath, "wb") as f:
+            f.write(to_bytes("hello\n"))
+        result = local_file_driver.get_filehash(filepath)
+        assert len(result) == 64
+        filehash = local_file_driver.create_collection([filepath])
+        assert len(filehash) == 64
+        assert local_file_driver.exists_collection(filehash)
+
+        # Changing the hash algorithm keeps the project initialized and its
+        # collections found by their hash
+        local_file_driver_2 = LocalFileDriver(
+            root=self.temp_dir, hash_algorithm="sha512")
+        assert local_file_driver_2.is_initialized
+        assert local_file_driver_2.exists_collection(filehash)
+        assert [
+            os.path.basename(f.name)
+            for f in local_file_driver_2.list_collection_files(filehash)
+        ] == ["test.txt"]
+        filehash_2 = local_file_driver_2.create_collection([filepath])
+        assert len(filehash_2) == 128
+        assert local_file_driver_2.exists_collection(filehash_2)
+
     def test_get_absolute_collection_path(self):
         self.local_file_driver.init()
         filehash = self.local_file_driver. \
@@ -570,9 +601,17 @@ class TestLocalFileDriver():
         filehash = self.local_file_driver.create_collection([])
         collection_path = os.path.join(self.local_file_driver.datmo_directory,
                                        "collections", filehash)
+        self.local_file_driver.get_collection_manifest(filehash)
         result = self.local_file_driver.delete_collection(filehash)
         assert result == True and \
             not os.path.isdir(collection_path)
+        # The manifest of the collection deleted is no longer cached
+        failed = False
+        try:
+            self.local_file_driver.get_collection_manifest(filehash)
+        except PathDoesNotExist:
+            failed = True
+        assert failed
 
     def test_list_file_collections(self):
         self.local_file_driver.init()
@@ -607,3 +646,274 @@ class TestLocalFileDriver():
                                           "dirpath2")) and \
                os.path.isfile(os.path.join(dst_dirpath,
                                            "filepath1"))
+
+    def test_get_collection_manifest(self):
+        self.local_file_driver.init()
+        self.local_file_driver.create("dirpath1", directory=True)
+        filepath1 = os.path.join(self.local_file_driver.root, "dirpath1",
+                                 "filepath1")
+        with open(filepath1, "wb") as f:
+            f.write(to_bytes("hello\n"))
+        dirpath1 = os.path.join(self.local_file_driver.root, "dirpath1")
+        filehash = self.local_file_driver.create_collection([dirpath1])
+        result = self.local_file_driver.get_collection_manifest(filehash)
+        assert result == {
+            os.path.join("dirpath1", "filepath1"): {
+                "size": 6,
+                "hash": "b1946ac92492d2347c6235b4d2611184",
+                "mode": stat.S_IMODE(os.stat(filepath1).st_mode),
+                "storage": "raw"
+            }
+        }
+        # Changing the manifest returned leaves the cached one as it is
+        result[os.path.join("dirpath1", "filepath1")]["storage"] = "zlib"
+        result["other"] = {}
+        assert self.local_file_driver.get_collection_manifest(filehash) == {
+            os.path.join("dirpath1", "filepath1"): {
+                "size": 6,
+                "hash": "b1946ac92492d2347c6235b4d2611184",
+                "mode": stat.S_IMODE(os.stat(filepath1).st_mode),
+                "storage": "raw"
+            }
+        }
+        # Manifest is written when the collection is created
+        manifest_filepath = os.path.join(self.local_file_driver.datmo_directory,
+                                         "manifests", filehash + ".json")
+        assert os.path.isfile(manifest_filepath)
+        # Collections without a manifest have one written on first use
+        os.remove(manifest_filepath)
+        local_file_driver = LocalFileDriver(root=self.temp_dir)
+        result_2 = local_file_driver.get_collection_manifest(filehash)
+        assert result_2[os.path.join("dirpath1", "filepath1")]["hash"] == \
+               "b1946ac92492d2347c6235b4d2611184"
+        assert os.path.isfile(manifest_filepath)
+        failed = False
+        try:
+            self.local_file_driver.get_collection_manifest("not_a_hash")
+        except PathDoesNotExist:
+            failed = True
+        assert failed
+
+    def test_checkout_collection(self):
+        self.local_file_driver.init()
+        self.local_file_driver.create("dirpath1", directory=True)
+        self.local_file_driver.create("dirpath2", directory=True)
+        dirpath1 = os.path.join(self.local_file_driver.root, "dirpath1")
+        dirpath2 = os.path.join(self.local_file_driver.root, "dirpath2")
+        for filename, contents in [("same", "same\n"), ("changed", "one\n"),
+                                   ("stale", "stale\n")]:
+            with open(os.path.join(dirpath1, filename), "wb") as f:
+                f.write(to_bytes(contents))
+        for filename, contents in [("same", "same\n"), ("changed", "two\n"),
+                                   ("added", "added\n")]:
+            with open(os.path.join(dirpath2, filename), "wb") as f:
+                f.write(to_bytes(contents))
+        os.makedirs(os.path.join(dirpath2, "empty_dir"))
+        filehash = self.local_file_driver.create_collection([
+            os.path.join(dirpath2, name) for name in os.listdir(dirpath2)
+        ])
+        dst_dirpath = self.local_file_driver.files_directory
+        self.local_file_driver.copytree(dirpath1, dst_dirpath)
+        os.makedirs(os.path.join(dst_dirpath, "stale_dir"))
+        same_filepath = os.path.join(dst_dirpath, "same")
+        same_inode = os.stat(same_filepath).st_ino
+
+        result = self.local_file_driver.checkout_collection(
+            filehash, dst_dirpath)
+        assert result
+        assert sorted(os.listdir(dst_dirpath)) == \
+               ["added", "changed", "empty_dir", "same"]
+        assert self.local_file_driver.get_dirhash(dst_dirpath) == filehash
+        # Unchanged files are left in place
+        assert os.stat(same_filepath).st_ino == same_inode
+        with open(os.path.join(dst_dirpath, "changed"), "rb") as f:
+            assert f.read() == to_bytes("two\n")
+
+        # Checkout with an already calculated manifest
+        result = self.local_file_driver.checkout_collection(
+            self.local_file_driver.empty_collection_hash,
+            dst_dirpath,
+            dst_manifest=self.local_file_driver.get_manifest(dst_dirpath))
+        assert result
+        assert os.listdir(dst_dirpath) == []
+
+    def test_checkout_collection_paths(self):
+        self.local_file_driver.init()
+        self.local_file_driver.create("dirpath1", directory=True)
+        dirpath1 = os.path.join(self.local_file_driver.root, "dirpath1")
+        os.makedirs(os.path.join(dirpath1, "models"))
+        for filename, contents in [("config.json", "{}"),
+                                   (os.path.join("models", "a.pt"), "a"),
+                                   (os.path.join("models", "b.pt"), "b")]:
+            with open(os.path.join(dirpath1, filename), "wb") as f:
+                f.write(to_bytes(contents))
+        filehash = self.local_file_driver.create_collection([
+            os.path.join(dirpath1, name) for name in os.listdir(dirpath1)
+        ])
+        dst_dirpath = self.local_file_driver.files_directory
+        with open(os.path.join(dst_dirpath, "config.json"), "wb") as f:
+            f.write(to_bytes("changed"))
+
+        result = self.local_file_driver.checkout_collection_paths(
+            filehash, dst_dirpath, ["models/a.pt"])
+        assert result == [os.path.join("models", "a.pt")]
+        assert os.listdir(os.path.join(dst_dirpath, "models")) == ["a.pt"]
+        with open(os.path.join(dst_dirpath, "config.json"), "rb") as f:
+            assert f.read() == to_bytes("changed")
+
+        # Files matching are replaced
+        result = self.local_file_driver.checkout_collection_paths(
+            filehash, dst_dirpath, ["*.json"])
+        assert result == ["config.json"]
+        with open(os.path.join(dst_dirpath, "config.json"), "rb") as f:
+            assert f.read() == to_bytes("{}")
+
+    def test_create_collection_chunked(self):
+        local_file_driver = LocalFileDriver(
+            root=self.temp_dir, chunk_threshold=1024)
+        local_file_driver.init()
+        random_generator = random.Random(0)
+        data = bytes(
+            bytearray(
+                random_generator.getrandbits(8)
+                for _ in range(3 * 1024 * 1024)))
+        self.local_file_driver.create("dirpath1", directory=True)
+        filepath1 = os.path.join(self.temp_dir, "dirpath1", "weights")
+        with open(filepath1, "wb") as f:
+            f.write(data)
+        filepath2 = os.path.join(self.temp_dir, "small")
+        with open(filepath2, "wb") as f:
+            f.write(to_bytes("hello\n"))
+        dirpath1 = os.path.join(self.temp_dir, "dirpath1")
+        filehash = local_file_driver.create_collection([dirpath1, filepath2])
+        # The hash is the same as the one of the files stored in full
+        assert filehash == self.local_file_driver.create_collection(
+            [dirpath1, filepath2])
+        collection_path = local_file_driver.get_collection_path(filehash)
+        assert os.path.isfile(
+            os.path.join(collection_path, "dirpath1", "weights.datmo-chunks"))
+        assert os.path.isfile(os.path.join(collection_path, "small"))
+        chunk_count = sum(
+            len(filenames)
+            for _, _, filenames in os.walk(local_file_driver.chunks_directory))
+        assert chunk_count > 1
+
+        # Changing a few bytes only adds the chunks around them
+        with open(filepath1, "wb") as f:
+            f.write(data[:2000000] + to_bytes("changed") + data[2000000:])
+        filehash_2 = local_file_driver.create_collection([dirpath1])
+        assert filehash_2 != filehash
+        new_chunk_count = sum(
+            len(filenames)
+            for _, _, filenames in os.walk(local_file_driver.chunks_directory))
+        assert 0 < new_chunk_count - chunk_count <= 2
+
+        # Files are streamed back together on read
+        manifest = local_file_driver.get_collection_manifest(filehash)
+        assert manifest[os.path.join("dirpath1", "weights")]["size"] == \
+               len(data)
+        collection_files = local_file_driver.get_collection_files(
+            filehash, mode="rb")
+        contents = sorted(f.read() for f in collection_files)
+        assert contents == sorted([data, to_bytes("hello\n")])
+        dst_dirpath = os.path.join(self.temp_dir, "new_dir")
+        os.makedirs(dst_dirpath)
+        local_file_driver.transfer_collection(filehash, dst_dirpath)
+        assert local_file_driver.get_dirhash(dst_dirpath) == filehash
+        local_file_driver.checkout_collection(filehash_2, dst_dirpath)
+        assert local_file_driver.get_dirhash(dst_dirpath) == filehash_2
+
+    def test_create_collection_chunked_index(self):
+        local_file_driver = LocalFileDriver(
+            root=self.temp_dir, chunk_threshold=1024)
+        local_file_driver.init()
+        random_generator = random.Random(0)
+        data = bytes(
+            bytearray(
+                random_generator.getrandbits(8) for _ in range(512 * 1024)))
+        filepath = os.path.join(self.temp_dir, "weights")
+        with open(filepath, "wb") as f:
+            f.write(data)
+        # Files modified just now are not indexed
+        filehash = local_file_driver.create_collection([filepath])
+        assert local_file_driver._load_chunk_index() == {}
+        old_time = os.stat(filepath).st_mtime - 10
+        os.utime(filepath, (old_time, old_time))
+        assert local_file_driver.create_collection([filepath]) == filehash
+        assert list(local_file_driver._load_chunk_index()) == [filepath]
+
+        # Files with the size and modification time indexed are not read again
+        with open(filepath, "wb") as f:
+            f.write(data[::-1])
+        os.utime(filepath, (old_time, old_time))
+        assert local_file_driver.create_collection([filepath]) == filehash
+
+        # Files are chunked again once modified or their chunks are removed
+        os.utime(filepath, (old_time - 10, old_time - 10))
+        filehash_2 = local_file_driver.create_collection([filepath])
+        assert filehash_2 != filehash
+        shutil.rmtree(local_file_driver.chunks_directory)
+        assert local_file_driver.create_collection([filepath]) == filehash_2
+        collection_files = local_file_driver.get_collection_files(
+            filehash_2, mode="rb")
+        assert [f.read() for f in collection_files] == [data[::-1]]
+
+    def test_create_collection_compressed(self):
+        local_file_driver = LocalFileDriver(
+            root=self.temp_dir, compression="zlib")
+        local_file_driver.init()
+        data = to_bytes("a,b,c\n" * 100000)
+        filepath1 = os.path.join(self.temp_dir, "data.csv")
+        with open(filepath1, "wb") as f:
+            f.write(data)
+        filepath2 = os.path.join(self.temp_dir, "Dockerfile")
+        with open(filepath2, "wb") as f:
+            f.write(to_bytes("FROM datmo/xgboost:cpu\n"))
+        filehash = local_file_driver.create_collection([filepath1, filepath2])
+        assert filehash == self.local_file_driver.create_collection(
+            [filepath1, filepath2])
+        collection_path = local_file_driver.get_collection_path(filehash)
+        compressed_filepath = os.path.join(collection_path,
+                                           "data.csv.datmo-gz")
+        assert os.path.getsize(compressed_filepath) < len(data) / 10
+        # Small files are stored raw
+        assert os.path.isfile(os.path.join(collection_path, "Dockerfile"))
+
+        # Files are decompressed while streamed
+        manifest = local_file_driver.get_collection_manifest(filehash)
+        assert manifest["data.csv"]["size"] == len(data)
+        collection_files = local_file_driver.get_collection_files(filehash)
+        contents = sorted(f.read() for f in collection_files)
+        assert contents[1] == data.decode("utf-8")
+        dst_dirpath = os.path.join(self.temp_dir, "new_dir")
+        os.makedirs(dst_dirpath)
+        local_file_driver.checkout_collection(filehash, dst_dirpath)
+        assert sorted(os.listdir(dst_dirpath)) == ["Dockerfile", "data.csv"]
+        assert local_file_driver.get_dirhash(dst_dirpath) == filehash
+
+    def test_find_in_collection(self):
+        self.local_file_driver.init()
+        self.local_file_driver.create("dirpath1", directory=True)
+        self.local_file_driver.create(os.path.join("dirpath1", "stats.json"))
+        self.local_file_driver.create("stats.json")
+        with open(os.path.join(self.temp_dir, "stats.json"), "wb") as f:
+            f.write(to_bytes("{}"))
+        filehash = self.local_file_driver.create_collection([
+            os.path.join(self.temp_dir, "dirpath1"),
+            os.path.join(self.temp_dir, "stats.json")
+        ])
+        result = self.local_file_driver.find_in_collection(
+            filehash, "stats.json")
+        assert result == ["stats.json", os.path.join("dirpath1", "stats.json")]
+        assert self.local_file_driver.find_in_collection(filehash,
+                                                         "other") == []
+        assert self.local_file_driver.get_collection_size(filehash) == 2
+        with self.local_file_driver.open_collection_file(
+                filehash, "stats.json", mode="r") as f:
+            assert f.read() == "{}"
+        failed = False
+        try:
+            self.local_file_driver.open_collection_file(filehash, "other")
+        except PathDoesNotExist:
+            failed = True
+        assert failed
@@ -0,0 +1,90 @@
+"""
+Tests for remote.py
+"""
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import tempfile
+import platform
+import threading
+from io import open
+from functools import partial
+
+from datmo.core.controller.file.driver.remote import (
+    DirectoryRemoteFileDriver, HTTPRemoteFileDriver, get_remote_file_driver)
+from datmo.core.controller.file.driver.tests.test_s3_remote import (
+    ThreadingHTTPServer, S3StandInHandler)
+from datmo.core.util.exceptions import PathDoesNotExist
+from datmo.core.util.file_reference import FileReference
+
+# provide mountable tmp directory for docker
+tempfile.tempdir = "/tmp" if not platform.system() == "Windows" else None
+test_datmo_dir = os.environ.get('TEST_DATMO_DIR', tempfile.gettempdir())
+
+
+class TestRemoteFileDriver():
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp(dir=test_datmo_dir)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), S3StandInHandler)
+        self.server.lock = threading.Lock()
+        self.server.objects = {}
+        self.server.parts = {}
+        self.server.failures = {}
+        self.server.short_reads = {}
+        self.server.requests = []
+        self.server.serve_ranges = True
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+        self.data = os.urandom(2048)
+        self.filepath = os.path.join(self.temp_dir, "data.bin")
+        with open(self.filepath, "wb") as f:
+            f.write(self.data)
+
+    def teardown_method(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _check_remote_file_driver(self, remote_file_driver):
+        assert remote_file_driver.exists_blobs(["abcd", "ef01"]) == set()
+        assert remote_file_driver.upload_blob(
+            "abcd",
+            FileReference(self.filepath, len(self.data),
+                          partial(open, self.filepath)))
+        assert remote_file_driver.exists_blobs(["abcd", "ef01"]) == {"abcd"}
+        dst_filepath = os.path.join(self.temp_dir, "dst.bin")
+        assert remote_file_driver.download_blob("abcd", dst_filepath)
+        with open(dst_filepath, "rb") as f:
+            assert f.read() == self.data
+
+        assert remote_file_driver.get_object("collections/abcd.json") is None
+        assert remote_file_driver.put_object("collections/abcd.json",
+                                             {"files": {}})
+        assert remote_file_driver.get_object("collections/abcd.json") == {
+            "files": {}
+        }
+
+    def test_directory_remote_file_driver(self):
+        remote_dirpath = os.path.join(self.temp_dir, "remote")
+        remote_file_driver = get_remote_file_driver(remote_dirpath)
+        assert isinstance(remote_file_driver, DirectoryRemoteFileDriver)
+        self._check_remote_file_driver(remote_file_driver)
+        assert os.path.isfile(
+            os.path.join(remote_dirpath, "blobs", "ab", "abcd"))
+
+        failed = False
+        try:
+            remote_file_driver.download_blob(
+                "ef01", os.path.join(self.temp_dir, "dst.bin"))
+        except PathDoesNotExist:
+            failed = True
+        assert failed
+
+    def test_http_remote_file_driver(self):
+        remote_file_driver = get_remote_file_driver(self.url)
+        assert isinstance(remote_file_driver, HTTPRemoteFileDriver)
+        self._check_remote_file_driver(remote_file_driver)
+        assert self.server.objects["/blobs/ab/abcd"] == self.data
@@ -0,0 +1,295 @@
+"""
+Tests for s3_remote.py
+"""
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import re
+import hashlib
+import tempfile
+import platform
+import threading
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+
+from datmo.core.controller.file.driver.s3_remote import S3RemoteFileDriver
+from datmo.core.util.exceptions import PathDoesNotExist, RemoteTransferError
+
+# provide mountable tmp directory for docker
+tempfile.tempdir = "/tmp" if not platform.system() == "Windows" else None
+test_datmo_dir = os.environ.get('TEST_DATMO_DIR', tempfile.gettempdir())
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class S3StandInHandler(BaseHTTPRequestHandler):
+    """Serves objects like S3 does through presigned urls
+
+    Parts are uploaded with ?partNumber=N and completed with a POST. Requests
+    for a path listed in failures fail that many times first, and GETs of a
+    path listed in short_reads send only half of the range that many times
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def _split_path(self):
+        key, _, query = self.path.partition("?")
+        params = dict(
+            param.split("=", 1) for param in query.split("&") if param)
+        return key, params
+
+    def _fail(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path,
+                                    self.headers.get("Range")))
+            if server.failures.get(self.path, 0) > 0:
+                server.failures[self.path] -= 1
+                failed = True
+            else:
+                failed = False
+        if failed:
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        return failed
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_PUT(self):
+        data = self._read_body()
+        if self._fail():
+            return
+        key, params = self._split_path()
+        with self.server.lock:
+            if "partNumber" in params:
+                self.server.parts[(key, int(params["partNumber"]))] = data
+            else:
+                self.server.objects[key] = data
+        self.send_response(200)
+        self.send_header("ETag", '"%s"' % hashlib.md5(data).hexdigest())
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        body = self._read_body().decode("utf-8")
+        if self._fail():
+            return
+        key, _ = self._split_path()
+        part_numbers = [
+            int(part_number)
+            for part_number in re.findall(r"<PartNumber>(\d+)</PartNumber>",
+                                          body)
+        ]
+        with self.server.lock:
+            self.server.objects[key] = b"".join(
+                self.server.parts[(key, part_number)]
+                for part_number in part_numbers)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_not_found(self):
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        if self._fail():
+            return
+        key, _ = self._split_path()
+        if key not in self.server.objects:
+            return self._send_not_found()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(self.server.objects[key])))
+        self.end_headers()
+
+    def do_GET(self):
+        if self._fail():
+            return
+        key, _ = self._split_path()
+        if key not in self.server.objects:
+            return self._send_not_found()
+        data = self.server.objects[key]
+        range_header = self.headers.get("Range")
+        if not self.server.serve_ranges or not range_header:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        start, end = [
+            int(value)
+            for value in re.match(r"bytes=(\d+)-(\d+)", range_header).groups()
+        ]
+        end = min(end, len(data) - 1)
+        with self.server.lock:
+            if self.server.short_reads.get(key, 0) > 0:
+                self.server.short_reads[key] -= 1
+                end = start + (end - start) // 2
+        self.send_response(206)
+        self.send_header("Content-Range",
+                         "bytes %d-%d/%d" % (start, end, len(data)))
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(data[start:end + 1])
+
+
+class TestS3RemoteFileDriver():
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp(dir=test_datmo_dir)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), S3StandInHandler)
+        self.server.lock = threading.Lock()
+        self.server.objects = {}
+        self.server.parts = {}
+        self.server.failures = {}
+        self.server.short_reads = {}
+        self.server.requests = []
+        self.server.serve_ranges = True
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+        self.s3_remote_file_driver = S3RemoteFileDriver(
+            part_size=1024, max_workers=3, retries=2, retry_delay=0)
+        self.data = os.urandom(3 * 1024 + 100)
+        self.filepath = os.path.join(self.temp_dir, "data.bin")
+        with open(self.filepath, "wb") as f:
+            f.write(self.data)
+
+    def teardown_method(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_upload(self):
+        result = self.s3_remote_file_driver.upload(self.filepath,
+                                                   self.url + "/data.bin")
+        assert result == True
+        assert self.server.objects["/data.bin"] == self.data
+
+        # Failed requests are retried
+        self.server.failures["/retry.bin"] = 2
+        self.s3_remote_file_driver.upload(self.filepath,
+                                          self.url + "/retry.bin")
+        assert self.server.objects["/retry.bin"] == self.data
+
+        failed = False
+        try:
+            self.s3_remote_file_driver.upload(
+                os.path.join(self.temp_dir, "does_not_exist"),
+                self.url + "/data.bin")
+        except PathDoesNotExist:
+            failed = True
+        assert failed
+
+        # File objects are opened again for each retry
+        opened = []
+
+        def open_file():
+            opened.append(True)
+            return io.BytesIO(self.data)
+
+        self.server.failures["/fileobj.bin"] = 1
+        result = self.s3_remote_file_driver.upload_fileobj(
+            open_file, len(self.data), self.url + "/fileobj.bin")
+        assert result == True
+        assert self.server.objects["/fileobj.bin"] == self.data
+        assert len(opened) == 2
+
+    def test_upload_multipart(self):
+        part_count = self.s3_remote_file_driver.get_part_count(self.filepath)
+        assert part_count == 4
+        part_urls = [
+            self.url + "/data.bin?partNumber=%d&uploadId=1" % part_number
+            for part_number in range(1, part_count + 1)
+        ]
+        complete_url = self.url + "/data.bin?uploadId=1"
+
+        # A part failing more than the retries fails the upload
+        self.server.failures["/data.bin?partNumber=2&uploadId=1"] = 3
+        failed = False
+        try:
+            self.s3_remote_file_driver.upload_multipart(
+                self.filepath, part_urls, complete_url)
+        except RemoteTransferError as e:
+            failed = True
+            completed_parts = e.completed_parts
+        assert failed
+        assert sorted(completed_parts) == [1, 3, 4]
+        assert "/data.bin" not in self.server.objects
+
+        # Resuming only uploads the failed part
+        self.server.requests = []
+        result = self.s3_remote_file_driver.upload_multipart(
+            self.filepath,
+            part_urls,
+            complete_url,
+            completed_parts=completed_parts)
+        assert sorted(result) == [1, 2, 3, 4]
+        assert [(method, path) for method, path, _ in self.server.requests
+                ] == [("PUT", "/data.bin?partNumber=2&uploadId=1"),
+                      ("POST", "/data.bin?uploadId=1")]
+        assert self.server.objects["/data.bin"] == self.data
+
+        failed = False
+        try:
+            self.s3_remote_file_driver.upload_multipart(
+                self.filepath, part_urls[:2], complete_url)
+        except RemoteTransferError:
+            failed = True
+        assert failed
+
+    def test_download(self):
+        self.server.objects["/data.bin"] = self.data
+        dst_filepath = os.path.join(self.temp_dir, "dst.bin")
+        result = self.s3_remote_file_driver.download(self.url + "/data.bin",
+                                                     dst_filepath)
+        assert result == True
+        with open(dst_filepath, "rb") as f:
+            assert f.read() == self.data
+        assert sorted(
+            byte_range for _, _, byte_range in self.server.requests) == [
+            "bytes=0-1023", "bytes=1024-2047", "bytes=2048-3071",
+            "bytes=3072-3171"
+        ]
+        assert not os.path.exists(dst_filepath + ".datmo-download")
+
+        # Short responses are resumed from the bytes received
+        self.server.requests = []
+        self.server.short_reads["/data.bin"] = 2
+        self.s3_remote_file_driver.download(self.url + "/data.bin",
+                                            dst_filepath)
+        with open(dst_filepath, "rb") as f:
+            assert f.read() == self.data
+
+        # Remotes which do not serve ranges stream the whole file
+        self.server.requests = []
+        self.server.serve_ranges = False
+        self.s3_remote_file_driver.download(self.url + "/data.bin",
+                                            dst_filepath)
+        with open(dst_filepath, "rb") as f:
+            assert f.read() == self.data
+        assert len(self.server.requests) == 1
+
+    def test_download_failure(self):
+        self.server.objects["/data.bin"] = self.data
+        self.server.failures["/data.bin"] = 3
+        failed = False
+        try:
+            self.s3_remote_file_driver.download(
+                self.url + "/data.bin", os.path.join(self.temp_dir, "dst.bin"))
+        except RemoteTransferError:
+            failed = True
+        assert failed
+        assert not os.path.exists(os.path.join(self.temp_dir, "dst.bin"))
@@ -1,11 +1,11 @@
 import os
-import shutil
 
 from datmo.core.util.i18n import get as __
 from datmo.core.controller.base import BaseController
-from datmo.core.util.misc_functions import list_all_filepaths, get_datmo_temp_path
+from datmo.core.util.misc_functions import list_all_filepaths, reduce_filehashes, get_filehash
 from datmo.core.entity.file_collection import FileCollection
-from datmo.core.util.exceptions import PathDoesNotExist, EnvironmentInitFailed, FileNotInitialized, UnstagedChanges
+from datmo.core.util.exceptions import PathDoesNotExist, EnvironmentInitFailed, FileNotInitialized, UnstagedChanges, \
+    EntityNotFound
 
 
 class FileCollectionController(BaseController):
@@ -25,6 +25,8 @@ class FileCollectionController(BaseController):
         list all file collections within the project
     delete(id)
         delete the specified file collection from the project
+    diff(file_collection_id_1, file_collection_id_2)
+        list the files added, removed and modified between two file collections
     """
 
     def __init__(self):
@@ -72,10 +74,9 @@ class FileCollectionController(BaseController):
 
         # Parse paths to create collection and add in filehash
         create_dict['filehash'] = self.file_driver.create_collection(paths)
+        create_dict['hash_algorithm'] = self.file_driver.hash_algorithm
         # If file collection with filehash exists, return it
-        results = self.dal.file_collection.query({
-            "filehash": create_dict['filehash']
-        })
+        results = self._query_filehash(create_dict['filehash'])
         if results: return results[0]
 
         # Add in path of the collection created above
@@ -125,6 +126,93 @@ class FileCollectionController(BaseController):
 
         return delete_file_collection_success and delete_file_collection_obj_success
 
+    def diff(self, file_collection_id_1, file_collection_id_2):
+        """List the files added, removed and modified between two file collections
+
+        The diff is computed from the collection manifests, which hold the size
+        and hash of every file, so no file contents are read unless the two
+        collections were hashed with different algorithms
+
+        Parameters
+        ----------
+        file_collection_id_1 : str
+            id of the file collection to compare from
+        file_collection_id_2 : str
+            id of the file collection to compare to
+
+        Returns
+        -------
+        dict
+            dictionary with the lists "added", "removed" and "modified" of
+            entries of the form {"path": str, "size_1": int or None,
+            "size_2": int or None, "size_delta": int} sorted by path, and the
+            total "size_delta" in bytes
+
+        Raises
+        ------
+        PathDoesNotExist
+            if either FileCollection does not exist
+        """
+        file_collection_objs = []
+        for file_collection_id in [file_collection_id_1, file_collection_id_2]:
+            try:
+                file_collection_obj = self.dal.file_collection.get_by_id(
+                    file_collection_id)
+            except EntityNotFound:
+                raise PathDoesNotExist(
+                    __("error", "controller.file_collection.diff",
+                       file_collection_id))
+            file_collection_objs.append(file_collection_obj)
+        filehash_1, filehash_2 = [
+            file_collection_obj.filehash
+            for file_collection_obj in file_collection_objs
+        ]
+        manifest_1 = self.file_driver.get_collection_manifest(filehash_1)
+        manifest_2 = self.file_driver.get_collection_manifest(filehash_2)
+        hash_algorithm_1 = self.file_driver.get_collection_hash_algorithm(
+            filehash_1)
+        hash_algorithm_2 = self.file_driver.get_collection_hash_algorithm(
+            filehash_2)
+
+        def is_modified(path):
+            entry_1, entry_2 = manifest_1[path], manifest_2[path]
+            if entry_1["size"] != entry_2["size"]:
+                return True
+            if hash_algorithm_1 == hash_algorithm_2:
+                return entry_1["hash"] != entry_2["hash"]
+            # Hashes of different algorithms are only comparable by rehashing
+            return entry_1["hash"] != get_filehash(
+                self.file_driver.get_collection_filepath(filehash_2, path),
+                hash_algorithm_1)
+
+        def get_entry(path):
+            size_1 = manifest_1[path]["size"] if path in manifest_1 else None
+            size_2 = manifest_2[path]["size"] if path in manifest_2 else None
+            return {
+                "path": path,
+                "size_1": size_1,
+                "size_2": size_2,
+                "size_delta": (size_2 or 0) - (size_1 or 0)
+            }
+
+        result = {"added": [], "removed": [], "modified": [], "size_delta": 0}
+        if filehash_1 == filehash_2:
+            return result
+        paths_1, paths_2 = set(manifest_1), set(manifest_2)
+        result["added"] = [get_entry(path) for path in sorted(paths_2 - paths_1)]
+        result["removed"] = [
+            get_entry(path) for path in sorted(paths_1 - paths_2)
+        ]
+        result["modified"] = [
+            get_entry(path) for path in sorted(paths_1 & paths_2)
+            if is_modified(path)
+        ]
+        result["size_delta"] = sum(
+            entry["size_delta"]
+            for entry in result["added"] + result["removed"] +
+            result["modified"])
+        return result
+
     def exists(self, file_collection_id=None, file_hash=None):
         """Returns a boolean if the file collection exists
 
@@ -147,48 +235,78 @@ class FileCollectionController(BaseController):
                 "id": file_collection_id
             })
         elif file_hash is not None:
-            file_collection_objs = self.dal.file_collection.query({
-                "filehash": file_hash
-            })
+            file_collection_objs = self._query_filehash(file_hash)
         file_collection_exists = False
         if file_collection_objs:
             file_collection_exists = True
         return file_collection_exists
 
-    def _calculate_project_files_hash(self):
-        """Return the file hash of the file collections filepaths for project files directory
+    def _query_filehash(self, file_hash):
+        """Return the file collections for the hash computed with the current hash algorithm
+
+        Collections created with other hash algorithms are kept valid but are
+        only matched when looked up by the same (algorithm, hash) pair
+
+        Parameters
+        ----------
+        file_hash : str
+            file hash for the file collection to search for
 
         Returns
         -------
-        str
-            unique hash of the project files directory
+        list
+            list of FileCollection objects matching the hash and algorithm
         """
-        # Populate paths from the project files directory
-        paths = []
-        if os.path.isdir(self.file_driver.files_directory):
-            paths.extend([
-                os.path.join(self.file_driver.files_directory,
-                             filepath) for filepath in list_all_filepaths(
-                                 self.file_driver.files_directory)
-            ])
+        return [
+            file_collection_obj
+            for file_collection_obj in self.dal.file_collection.query({
+                "filehash": file_hash
+            }) if file_collection_obj.hash_algorithm ==
+            self.file_driver.hash_algorithm
+        ]
+
+    def _get_project_files_manifest(self):
+        """Return the manifest of the project files directory
+
+        Returns
+        -------
+        dict
+            dictionary keyed by relative filepath with values of the form
+            {"size": int, "hash": str}, empty if there is no files directory
+        """
+        if not os.path.isdir(self.file_driver.files_directory):
+            return {}
+        return self.file_driver.get_manifest(self.file_driver.files_directory)
 
-        # Create a temp dir to use for calculating the hash
-        _temp_dir = get_datmo_temp_path(self.home)
+    def _calculate_project_files_hash(self, manifest=None):
+        """Return the file hash of the file collections filepaths for project files directory
 
-        # Hash the paths of the files
-        dirhash = self.file_driver.calculate_hash_paths(paths, _temp_dir)
+        The collection hash only depends on the file contents, so it is reduced
+        from the hashes of the files in place instead of copying them first
 
-        # Remove temporary directory
-        shutil.rmtree(_temp_dir)
+        Parameters
+        ----------
+        manifest : dict, optional
+            manifest of the project files directory if already calculated
+            (default is None, which calculates it)
 
-        return dirhash
+        Returns
+        -------
+        str
+            unique hash of the project files directory
+        """
+        if manifest is None:
+            manifest = self._get_project_files_manifest()
+        return reduce_filehashes([entry["hash"] for entry in manifest.values()],
+                                 self.file_driver.hash_algorithm)
 
-    def _has_unstaged_changes(self):
+    def _has_unstaged_changes(self, manifest=None):
         """Return whether there are unstaged changes"""
-        file_hash = self._calculate_project_files_hash()
-        files = list_all_filepaths(self.file_driver.files_directory)
+        if manifest is None:
+            manifest = self._get_project_files_manifest()
+        file_hash = self._calculate_project_files_hash(manifest)
         # if already exists in the db or is an empty directory
-        if self.exists(file_hash=file_hash) or not files:
+        if self.exists(file_hash=file_hash) or not manifest:
             return False
         return True
 
@@ -236,29 +354,19 @@ class FileCollectionController(BaseController):
         if not self.exists(file_collection_id=file_collection_id):
             raise PathDoesNotExist(
                 __("error", "controller.file_collection.checkout_file"))
+        # Hash the project files once for the unstaged check and the diff
+        manifest = self._get_project_files_manifest()
         # Check if unstaged changes exist
-        self.check_unstaged_changes()
+        if self._has_unstaged_changes(manifest):
+            raise UnstagedChanges()
         # Check if environment has is same as current
         results = self.dal.file_collection.query({"id": file_collection_id})
         file_collection_obj = results[0]
         file_hash = file_collection_obj.filehash
 
-        if self._calculate_project_files_hash() == file_hash:
+        if self._calculate_project_files_hash(manifest) == file_hash:
             return True
-        # Remove all content from `datmo_file` folder
-        # TODO Use datmo environment path as a class attribute
-        for file in os.listdir(self.file_driver.files_directory):
-            file_path = os.path.join(self.file_driver.files_directory, file)
-            try:
-                if os.path.isfile(file_path):
-                    os.remove(file_path)
-                elif os.path.isdir(file_path):
-                    shutil.rmtree(file_path)
-            except Exception as e:
-                print(e)
-        # Add in files for that file collection id
-        file_collection_path = os.path.join(self.home,
-                                            file_collection_obj.path)
-        self.file_driver.copytree(file_collection_path,
-                                  self.file_driver.files_directory)
-        return True
+        # Only remove, add or replace the files which differ from the collection
+        self.file_driver.ensure_datmo_files_dir()
+        return self.file_driver.checkout_collection(
+            file_hash, self.file_driver.files_directory, dst_manifest=manifest)
@@ -27,7 +27,8 @@ from datmo.config import Config
 from datmo.core.controller.project import ProjectController
 from datmo.core.controller.file.file_collection import \
     FileCollectionController
-from datmo.core.util.exceptions import EntityNotFound, UnstagedChanges
+from datmo.core.util.exceptions import EntityNotFound, UnstagedChanges, \
+    PathDoesNotExist
 
 
 class TestFileCollectionController():
@@ -145,6 +146,65 @@ class TestFileCollectionController():
         assert result == True and \
             thrown == True
 
+    def test_diff(self):
+        self.project_controller.init("test_diff", "test description")
+
+        filepaths = {}
+        for name, contents in [("same", "same"), ("removed", "removed"),
+                               ("modified", "before"), ("added", "added"),
+                               ("modified_2", "after!!")]:
+            filepaths[name] = os.path.join(self.file_collection_controller.home,
+                                           name)
+            with open(filepaths[name], "wb") as f:
+                f.write(to_bytes(contents))
+        file_collection_obj_1 = self.file_collection_controller.create([
+            filepaths["same"], filepaths["removed"], filepaths["modified"]
+        ])
+        file_collection_obj_2 = self.file_collection_controller.create([
+            filepaths["same"], filepaths["added"],
+            filepaths["modified_2"] + ">modified"
+        ])
+
+        result = self.file_collection_controller.diff(
+            file_collection_obj_1.id, file_collection_obj_2.id)
+        assert result["added"] == [{
+            "path": "added",
+            "size_1": None,
+            "size_2": 5,
+            "size_delta": 5
+        }]
+        assert result["removed"] == [{
+            "path": "removed",
+            "size_1": 7,
+            "size_2": None,
+            "size_delta": -7
+        }]
+        assert result["modified"] == [{
+            "path": "modified",
+            "size_1": 6,
+            "size_2": 7,
+            "size_delta": 1
+        }]
+        assert result["size_delta"] == -1
+
+        # A collection has no changes with itself
+        result = self.file_collection_controller.diff(
+            file_collection_obj_1.id, file_collection_obj_1.id)
+        assert result == {
+            "added": [],
+            "removed": [],
+            "modified": [],
+            "size_delta": 0
+        }
+
+        failed = False
+        try:
+            self.file_collection_controller.diff(file_collection_obj_1.id,
+                                                 "does_not_exist")
+        except PathDoesNotExist:
+            failed = True
+        assert failed
+
     def test_exists_file(self):
         self.project_controller.init("test6", "test description")
 
@@ -1,10 +1,26 @@
+import os
+import time
+import errno
+from functools import partial
+from multiprocessing.pool import ThreadPool
+
 from datmo.core.util.validation import validate
 from datmo.core.util.i18n import get as __
+from datmo.core.util.json_store import JSONStore
+from datmo.core.util.misc_functions import get_tree_hash, reduce_filehashes
 from datmo.core.controller.base import BaseController
 from datmo.core.entity.model import Model
 from datmo.core.entity.session import Session
 from datmo.core.util.exceptions import (ProjectNotInitialized,
-                                        EnvironmentInitFailed, FileIOError)
+                                        EnvironmentInitFailed, FileIOError,
+                                        PathDoesNotExist)
+
+# Number of threads used to remove unreferenced objects in parallel
+DEFAULT_GC_WORKERS = 4
+# Number of threads used to hash objects in parallel when checking them
+DEFAULT_FSCK_WORKERS = 4
+# File within the .datmo directory recording when each object was last verified
+FSCK_STATE_FILENAME = "fsck.json"
 
 
 class ProjectController(BaseController):
@@ -24,6 +40,10 @@ class ProjectController(BaseController):
         Remove all datmo references from the current repository. NOTE: THIS WILL DELETE ALL DATMO WORK
     status()
         Give the user a picture of the status of the project, snapshots, and tasks
+    gc(remove=False, workers=DEFAULT_GC_WORKERS)
+        Find and optionally remove objects no longer referenced by any snapshot
+    fsck(days=None, workers=DEFAULT_FSCK_WORKERS)
+        Hash the stored collections and code objects again to check their integrity
     """
 
     def __init__(self):
@@ -171,6 +191,9 @@ class ProjectController(BaseController):
             if self.code_driver.is_initialized:
                 for ref in self.code_driver.list_refs():
                     self.code_driver.delete_ref(ref)
+                # Objects are stored apart from the refs using them
+                if self.code_driver.type == "file":
+                    self.code_driver.prune_objects()
         except Exception:
             self.logger.warning(__("warn", "controller.project.cleanup.code"))
         try:
@@ -254,3 +277,469 @@ class ProjectController(BaseController):
                 break
 
         return status_dict, latest_snapshot, ascending_unstaged_tasks
+
+    def gc(self, remove=False, workers=DEFAULT_GC_WORKERS):
+        """Find and optionally remove objects no longer referenced by any snapshot
+
+        Every snapshot is kept and marks its code, environment and file
+        collection, and every marked environment marks its own file collection.
+        The latest and current code refs and the latest environment are marked
+        too, even before a snapshot uses them. Everything left unmarked is
+        swept, along with the code refs, code objects, stored collections,
+        chunks, manifests and cached files only used by it
+
+        Parameters
+        ----------
+        remove : bool, optional
+            remove the unreferenced objects instead of only reporting them
+            (default is False)
+        workers : int, optional
+            number of threads used to remove objects in parallel
+            (default is DEFAULT_GC_WORKERS)
+
+        Returns
+        -------
+        dict
+            dictionary of the names of the unreferenced objects of each kind:
+            "code", "environment" and "file_collection" object ids, "code_ref"
+            commit ids, "code_object" hashes of the objects of the file code
+            driver, "collection" filehashes and "chunks", "manifests" and
+            "cache" stored objects. If remove is True only the objects which
+            were removed are included
+
+        Raises
+        ------
+        ProjectNotInitialized
+            if the project has not been initialized
+        """
+        if not self.is_initialized:
+            raise ProjectNotInitialized(__("error", "controller.project.gc"))
+        garbage = self._find_garbage()
+        if not remove:
+            return garbage
+        if garbage["environment"]:
+            # Environments are only removed along with their images
+            try:
+                self.environment_driver.init()
+            except EnvironmentInitFailed:
+                self.logger.warning(
+                    __("warn", "controller.project.gc.environment"))
+                garbage = self._find_garbage(keep_environments=True)
+        return self._remove_garbage(garbage, workers)
+
+    def _find_garbage(self, keep_environments=False):
+        """Mark the objects referenced by snapshots and return everything else
+
+        Parameters
+        ----------
+        keep_environments : bool, optional
+            mark every environment as if it were referenced
+            (default is False)
+
+        Returns
+        -------
+        dict
+            dictionary of the names of the unreferenced objects of each kind
+        """
+        snapshot_objs = self.dal.snapshot.query({})
+        code_objs = self.dal.code.query({})
+        environment_objs = self.dal.environment.query({})
+        file_collection_objs = self.dal.file_collection.query({})
+
+        # Mark
+        root_commit_ids, root_environment_ids = self._find_gc_roots()
+        marked_code_ids = set(
+            snapshot_obj.code_id for snapshot_obj in snapshot_objs)
+        marked_code_ids.update(code_obj.id for code_obj in code_objs
+                               if code_obj.commit_id in root_commit_ids)
+        marked_environment_ids = set(
+            snapshot_obj.environment_id for snapshot_obj in snapshot_objs)
+        marked_environment_ids.update(root_environment_ids)
+        if keep_environments:
+            marked_environment_ids.update(
+                environment_obj.id for environment_obj in environment_objs)
+        marked_file_collection_ids = set(
+            snapshot_obj.file_collection_id for snapshot_obj in snapshot_objs)
+        marked_file_collection_ids.update(
+            environment_obj.file_collection_id
+            for environment_obj in environment_objs
+            if environment_obj.id in marked_environment_ids)
+        marked_commit_ids = set(code_obj.commit_id for code_obj in code_objs
+                                if code_obj.id in marked_code_ids)
+        marked_commit_ids.update(root_commit_ids)
+        marked_filehashes = set(
+            file_collection_obj.filehash
+            for file_collection_obj in file_collection_objs
+            if file_collection_obj.id in marked_file_collection_ids)
+        # The empty collections are part of the initialized file structure,
+        # made with the hash algorithm of the project at the time
+        marked_filehashes.update(self.file_driver.empty_collection_hashes)
+        marked_objects = {"chunks": set(), "cache": set()}
+        for filehash in marked_filehashes:
+            if not self.file_driver.exists_collection(filehash):
+                continue
+            collection_objects = self.file_driver.get_collection_objects(
+                filehash)
+            for kind, names in collection_objects.items():
+                marked_objects[kind].update(names)
+
+        # Sweep
+        garbage = {
+            "code": [
+                code_obj.id for code_obj in code_objs
+                if code_obj.id not in marked_code_ids
+            ],
+            "environment": [
+                environment_obj.id for environment_obj in environment_objs
+                if environment_obj.id not in marked_environment_ids
+            ],
+            "file_collection": [
+                file_collection_obj.id
+                for file_collection_obj in file_collection_objs
+                if file_collection_obj.id not in marked_file_collection_ids
+            ],
+            "code_ref": [
+                commit_id
+                for commit_id in sorted(self.code_driver.list_refs() or [])
+                if commit_id not in marked_commit_ids
+            ],
+            "collection": [
+                filehash for filehash in sorted(
+                    self.file_driver.list_file_collections())
+                if filehash not in marked_filehashes
+            ]
+        }
+        stored_objects = self.file_driver.list_stored_objects()
+        for kind in ["chunks", "cache"]:
+            garbage[kind] = [
+                name for name in stored_objects[kind]
+                if name not in marked_objects[kind]
+            ]
+        # Code objects are shared by refs, so they are kept if any kept ref
+        # uses them
+        garbage["code_object"] = self.code_driver.list_unreferenced_objects(
+            sorted(marked_commit_ids & set(self.code_driver.list_refs()))) \
+            if self.code_driver.type == "file" else []
+        # Manifests of swept collections are removed along with them
+        garbage["manifests"] = [
+            filehash for filehash in stored_objects["manifests"]
+            if filehash not in marked_filehashes and
+            filehash not in garbage["collection"]
+        ]
+        return garbage
+
+    def _find_gc_roots(self):
+        """Return the code refs and environments kept even if no snapshot uses them
+
+        The latest code ref and the ref of the current code are kept, as is
+        the latest environment, so work set up for the next snapshot, such as
+        an environment from `datmo environment setup`, is not collected
+
+        Returns
+        -------
+        tuple
+            set of commit ids and set of environment ids
+        """
+        root_commit_ids = set()
+        if self.code_driver.is_initialized:
+            root_commit_ids.add(self.code_driver.latest_ref())
+            try:
+                root_commit_ids.add(self.code_driver.current_ref())
+            except Exception:
+                # Code without any files or commits has no current ref
+                pass
+        root_commit_ids.discard(None)
+        latest_environment_objs = self.dal.environment.query(
+            {}, sort_key="created_at", sort_order="descending")
+        root_environment_ids = set(
+            [latest_environment_objs[0].id]) if latest_environment_objs \
+            else set()
+        return root_commit_ids, root_environment_ids
+
+    def _remove_garbage(self, garbage, workers):
+        """Remove the unreferenced objects found, returning those removed
+
+        Stored objects, code refs and environment images are removed in
+        parallel, then the unreferenced objects are deleted from the database
+        """
+        removals = [("code_ref", commit_id,
+                     partial(self.code_driver.delete_ref, commit_id))
+                    for commit_id in garbage["code_ref"]]
+        removals.extend(
+            ("collection", filehash,
+             partial(self.file_driver.delete_collection, filehash))
+            for filehash in garbage["collection"])
+        for kind in ["chunks", "manifests", "cache"]:
+            removals.extend(
+                (kind, name,
+                 partial(self.file_driver.delete_stored_object, kind, name))
+                for name in garbage[kind])
+        removals.extend(
+            ("environment", environment_id,
+             partial(
+                 self.environment_driver.remove, environment_id, force=True))
+            for environment_id in garbage["environment"])
+
+        def remove_object(removal):
+            kind, name, remove_function = removal
+            try:
+                remove_function()
+                return True
+            except Exception:
+                self.logger.warning(
+                    __("warn", "controller.project.gc.remove", (kind, name)))
+                return False
+
+        pool = ThreadPool(max(1, workers))
+        try:
+            results = pool.map(remove_object, removals)
+        finally:
+            pool.close()
+            pool.join()
+
+        removed = dict((kind, []) for kind in garbage)
+        for (kind, name, _), result in zip(removals, results):
+            if result:
+                removed[kind].append(name)
+        # Objects are swept once the refs using them are removed, keeping
+        # those of any ref which could not be removed
+        if garbage["code_object"]:
+            try:
+                removed["code_object"] = self.code_driver.prune_objects()
+            except Exception:
+                self.logger.warning(
+                    __("warn", "controller.project.gc.remove",
+                       ("code_object", ", ".join(garbage["code_object"]))))
+        # The database is only written from this thread, and rows are kept
+        # while the ref or collection they point to could not be removed
+        kept_commit_ids = set(garbage["code_ref"]) - set(removed["code_ref"])
+        for code_id in garbage["code"]:
+            if self.dal.code.get_by_id(code_id).commit_id in kept_commit_ids:
+                continue
+            self.dal.code.delete(code_id)
+            removed["code"].append(code_id)
+        kept_filehashes = set(garbage["collection"]) - \
+            set(removed["collection"])
+        for file_collection_id in garbage["file_collection"]:
+            if self.dal.file_collection.get_by_id(
+                    file_collection_id).filehash in kept_filehashes:
+                continue
+            self.dal.file_collection.delete(file_collection_id)
+            removed["file_collection"].append(file_collection_id)
+        for environment_id in removed["environment"]:
+            self.dal.environment.delete(environment_id)
+        return removed
+
+    def fsck(self, days=None, workers=DEFAULT_FSCK_WORKERS):
+        """Hash the stored collections and code objects again to check their integrity
+
+        Every file of each collection is hashed from its stored contents and
+        compared to its manifest, whose hashes must in turn reduce to the
+        collection hash. The objects of the file code driver are checked the
+        same way against their names and commits. The time each object is
+        verified is recorded, so later checks can skip recently verified ones
+
+        Parameters
+        ----------
+        days : float, optional
+            only check the objects not verified in this many days
+            (default is None, which checks every object)
+        workers : int, optional
+            number of threads hashing objects in parallel
+            (default is DEFAULT_FSCK_WORKERS)
+
+        Returns
+        -------
+        dict
+            dictionary with the number of objects "checked" and "skipped", the
+            "bytes" hashed and the "seconds" taken, and the names of the
+            "corrupt" objects and of the "missing" ones
+
+        Raises
+        ------
+        ProjectNotInitialized
+            if the project has not been initialized
+        """
+        if not self.is_initialized:
+            raise ProjectNotInitialized(__("error", "controller.project.fsck"))
+        state_store = JSONStore(
+            os.path.join(self.file_driver.datmo_directory,
+                         FSCK_STATE_FILENAME))
+        verified_at = state_store.to_dict()
+        start_time = time.time()
+        checks = self._find_fsck_checks()
+        if days is not None:
+            verified_since = start_time - days * 24 * 60 * 60
+            pending_checks = [(name, check_function)
+                              for name, check_function in checks
+                              if verified_at.get(name, 0) < verified_since]
+        else:
+            pending_checks = checks
+
+        def run_check(check):
+            _, check_function = check
+            try:
+                valid, size = check_function()
+                return ("valid" if valid else "corrupt"), size
+            except PathDoesNotExist:
+                return "missing", 0
+            except (IOError, OSError) as e:
+                return ("missing" if e.errno == errno.ENOENT else "corrupt"), 0
+            except Exception:
+                # Contents which cannot be decompressed or parsed
+                return "corrupt", 0
+
+        pool = ThreadPool(max(1, workers))
+        try:
+            results = pool.map(run_check, pending_checks)
+        finally:
+            pool.close()
+            pool.join()
+
+        report = {
+            "checked": len(pending_checks),
+            "skipped": len(checks) - len(pending_checks),
+            "bytes": sum(size for _, size in results),
+            "seconds": time.time() - start_time,
+            "corrupt": [],
+            "missing": []
+        }
+        # Objects which no longer exist are forgotten
+        names = set(name for name, _ in checks)
+        verified_at = dict((name, timestamp)
+                           for name, timestamp in verified_at.items()
+                           if name in names)
+        for (name, _), (status, _) in zip(pending_checks, results):
+            if status == "valid":
+                verified_at[name] = start_time
+            else:
+                verified_at.pop(name, None)
+                report[status].append(name)
+        state_store.to_file(verified_at)
+        return report
+
+    def repack(self, days=None, compression=None):
+        """Move the loose code objects of the file code driver into a pack
+
+        Packed objects which no code ref uses any more are dropped
+
+        Parameters
+        ----------
+        days : float, optional
+            only pack the loose objects not modified in this many days
+            (default is None, which packs every loose object)
+        compression : str, optional
+            name of the compression of the objects in the pack
+            (default is None, which stores the objects raw)
+
+        Returns
+        -------
+        dict
+            dictionary with the number of "objects" packed and the number of
+            "loose" objects they include, the number of packed objects
+            "dropped", the "size" of the pack in bytes and its "filepath",
+            which is None if no pack was written
+
+        Raises
+        ------
+        ProjectNotInitialized
+            if the project has not been initialized
+        """
+        if not self.is_initialized:
+            raise ProjectNotInitialized(
+                __("error", "controller.project.repack"))
+        # Git packs its own objects
+        if self.code_driver.type != "file":
+            return {
+                "objects": 0,
+                "loose": 0,
+                "dropped": 0,
+                "size": 0,
+                "filepath": None
+            }
+        return self.code_driver.repack(days=days, compression=compression)
+
+    def _find_fsck_checks(self):
+        """Return the name of each object to check with a function checking it
+
+        Each function returns whether the object is valid and the number of
+        bytes hashed to tell
+        """
+        checks = []
+        hash_algorithms = dict(
+            (file_collection_obj.filehash, file_collection_obj.hash_algorithm)
+            for file_collection_obj in self.dal.file_collection.query({}))
+        for filehash in sorted(self.file_driver.list_file_collections()):
+            name = "collection/" + filehash
+            try:
+                manifest = self.file_driver.get_collection_manifest(filehash)
+            except (PathDoesNotExist, IOError, OSError, ValueError):
+                checks.append((name, self._fsck_corrupt))
+                continue
+            if filehash in hash_algorithms and hash_algorithms[filehash] == \
+                    self.file_driver.get_collection_hash_algorithm(filehash):
+                checks.append((name,
+                               partial(self._fsck_reduced_hash, filehash, [
+                                   entry["hash"] for entry in manifest.values()
+                               ], hash_algorithms[filehash])))
+            for relative_filepath in sorted(manifest):
+                checks.append((
+                    "%s/%s" % (name, relative_filepath.replace(os.sep, "/")),
+                    partial(self._fsck_collection_file, filehash,
+                            relative_filepath, manifest[relative_filepath])))
+
+        # Git keeps and checks its own objects
+        if self.code_driver.type == "file":
+            code_hash_algorithms = dict(
+                (code_obj.commit_id, code_obj.hash_algorithm)
+                for code_obj in self.dal.code.query({}))
+            objects = {}
+            for commit_id in sorted(self.code_driver.list_refs() or []):
+                hash_algorithm = code_hash_algorithms.get(
+                    commit_id, self.code_driver.hash_algorithm)
+                ref_objects = self.code_driver.get_ref_objects(commit_id)
+                checks.append(("code_ref/" + commit_id,
+                               partial(self._fsck_code_ref, commit_id,
+                                       ref_objects, hash_algorithm)))
+                # Objects shared by several files are checked once
+                for tracked_filepath, filehash in ref_objects.items():
+                    objects[self.code_driver.get_object_filepath(
+                        tracked_filepath, filehash)] = (tracked_filepath,
+                                                        filehash,
+                                                        hash_algorithm)
+            code_dirpath = os.path.join(self.file_driver.datmo_directory,
+                                        "code")
+            for object_filepath, object_args in sorted(objects.items()):
+                checks.append(
+                    ("code/" + os.path.relpath(object_filepath, code_dirpath)
+                     .replace(os.sep, "/"),
+                     partial(self._fsck_code_object, *object_args)))
+        return checks
+
+    @staticmethod
+    def _fsck_corrupt():
+        return False, 0
+
+    @staticmethod
+    def _fsck_reduced_hash(expected_hash, filehashes, hash_algorithm):
+        return reduce_filehashes(filehashes, hash_algorithm) == \
+            expected_hash, 0
+
+    @staticmethod
+    def _fsck_code_ref(commit_id, filehashes, hash_algorithm):
+        # Commits made before Merkle commit hashes reduce the file hashes alone
+        return commit_id in (get_tree_hash(filehashes, hash_algorithm),
+                             reduce_filehashes(
+                                 list(filehashes.values()),
+                                 hash_algorithm)), 0
+
+    def _fsck_collection_file(self, filehash, relative_filepath, entry):
+        file_hash, size = self.file_driver.hash_collection_file(
+            filehash, relative_filepath)
+        return file_hash == entry["hash"] and size == entry["size"], size
+
+    def _fsck_code_object(self, tracked_filepath, filehash, hash_algorithm):
+        # Objects are hashed wherever they are stored, loose or packed
+        object_hash, size = self.code_driver.hash_object(
+            tracked_filepath, filehash, hash_algorithm)
+        return object_hash == filehash, size
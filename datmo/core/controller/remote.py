@@ -0,0 +1,839 @@
+import io
+import os
+import re
+import json
+import time
+import shutil
+import tarfile
+from datetime import datetime
+from functools import partial
+from multiprocessing.pool import ThreadPool
+
+from datmo.core.controller.base import BaseController
+from datmo.core.controller.file.file_collection import FileCollectionController
+from datmo.core.controller.file.driver.remote import get_remote_file_driver
+from datmo.core.entity.code import Code
+from datmo.core.entity.environment import Environment
+from datmo.core.entity.file_collection import FileCollection
+from datmo.core.entity.snapshot import Snapshot
+from datmo.core.util.i18n import get as __
+from datmo.core.util.misc_functions import (get_datmo_temp_path, get_filehash,
+                                            get_hash_function,
+                                            HASH_BUFFER_SIZE)
+from datmo.core.util.file_reference import FileReference
+from datmo.core.util.compression import validate_compression
+from datmo.core.util.exceptions import (ProjectNotInitialized,
+                                        RequiredArgumentMissing,
+                                        SnapshotDoesNotExist,
+                                        RemoteTransferError, FileIOError,
+                                        InvalidHashAlgorithm)
+
+# Number of blobs transferred at once
+DEFAULT_TRANSFER_WORKERS = 4
+# Name of the remote object holding the records of the snapshots pushed
+SNAPSHOTS_OBJECT_NAME = "snapshots.json"
+# Name of the bundle member holding the records of the snapshots exported,
+# which is written first so imports know what follows
+BUNDLE_OBJECT_NAME = "datmo-bundle.json"
+BUNDLE_VERSION = 1
+# Streaming tar modes for each compression of a bundle
+_BUNDLE_TAR_MODES = {None: "w|", "zlib": "w|gz", "lzma": "w|xz"}
+_RECORD_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+_RECORD_DATETIME_KEYS = ["created_at", "updated_at"]
+
+
+def _to_record(entity):
+    record = entity.to_dictionary().copy()
+    for key in _RECORD_DATETIME_KEYS:
+        if isinstance(record.get(key), datetime):
+            record[key] = record[key].strftime(_RECORD_DATETIME_FORMAT)
+    return record
+
+
+def _is_hex_digest(value, digest_size):
+    return isinstance(value, (str, type(u""))) and re.match(
+        r"[0-9a-f]{%d}\Z" % (2 * digest_size), value) is not None
+
+
+def _is_relative_path(path):
+    """Returns True if the "/" separated path stays within the directory it is relative to"""
+    if not isinstance(path, (str, type(u""))) or os.path.isabs(path) or \
+            os.path.splitdrive(path)[0]:
+        return False
+    for part in path.split("/"):
+        if part in ["", ".", ".."] or (os.sep != "/" and os.sep in part):
+            return False
+    return True
+
+
+def _from_record(record):
+    dictionary = record.copy()
+    for key in _RECORD_DATETIME_KEYS:
+        if dictionary.get(key):
+            dictionary[key] = datetime.strptime(dictionary[key],
+                                                _RECORD_DATETIME_FORMAT)
+    return dictionary
+
+
+class RemoteController(BaseController):
+    """RemoteController inherits from BaseController and manages business logic related to
+    sharing snapshots through a remote
+
+    A remote stores the files of each collection once as blobs named by their
+    hash, along with the manifest of each collection and the records of the
+    snapshots pushed. Pushing and pulling exchange manifests first so only the
+    blobs the other side lacks are transferred. A bundle holds the same in a
+    single tar file, along with the code of each snapshot, to move snapshots
+    without a remote
+
+    Parameters
+    ----------
+    home : str
+        home path of the project
+
+    Methods
+    -------
+    push(remote=None, snapshot_ids=None, workers=DEFAULT_TRANSFER_WORKERS)
+        Push snapshots and their file collections to a remote
+    pull(remote=None, snapshot_ids=None, workers=DEFAULT_TRANSFER_WORKERS)
+        Pull snapshots and their file collections from a remote
+    export_bundle(snapshot_ids, filepath, compression=None)
+        Write snapshots with their code, environment and files to a tar file
+    import_bundle(filepath)
+        Create the snapshots written to a tar file by export_bundle()
+    """
+
+    def __init__(self):
+        super(RemoteController, self).__init__()
+        self.file_collection = FileCollectionController()
+        if not self.is_initialized:
+            raise ProjectNotInitialized(
+                __("error", "controller.remote.__init__"))
+
+    def _get_remote_file_driver(self, remote):
+        """Return the driver for the remote given, or the one last used"""
+        if remote is None:
+            remote = self.config_store.get("remote")
+        if not remote:
+            raise RequiredArgumentMissing(
+                __("error", "controller.remote.remote"))
+        self.config_store.save("remote", remote)
+        return get_remote_file_driver(remote)
+
+    @staticmethod
+    def _map(function, items, workers):
+        pool = ThreadPool(max(1, min(workers, len(items))))
+        try:
+            return pool.map(function, items)
+        finally:
+            pool.close()
+            pool.join()
+
+    def push(self, remote=None, snapshot_ids=None,
+             workers=DEFAULT_TRANSFER_WORKERS):
+        """Push snapshots and their file collections to a remote
+
+        Code is not pushed, as the code driver keeps its own history
+
+        Parameters
+        ----------
+        remote : str, optional
+            http(s) url or directory path of the remote
+            (default is None, which uses the remote last pushed to or pulled from)
+        snapshot_ids : list, optional
+            ids of the snapshots to push
+            (default is None, which pushes every snapshot)
+        workers : int, optional
+            number of blobs uploaded at once
+            (default is DEFAULT_TRANSFER_WORKERS)
+
+        Returns
+        -------
+        dict
+            dictionary with the ids of the snapshots pushed ("snapshots") and
+            the hashes of the blobs uploaded ("blobs")
+
+        Raises
+        ------
+        RequiredArgumentMissing
+            if no remote is given and none has been used before
+        SnapshotDoesNotExist
+            if a snapshot id given does not exist
+        """
+        remote_file_driver = self._get_remote_file_driver(remote)
+        if snapshot_ids is None:
+            snapshot_objs = self.dal.snapshot.query({})
+        else:
+            snapshot_objs = []
+            for snapshot_id in snapshot_ids:
+                results = self.dal.snapshot.query({"id": snapshot_id})
+                if not results:
+                    raise SnapshotDoesNotExist(
+                        __("error", "controller.remote.snapshot",
+                           snapshot_id))
+                snapshot_objs.extend(results)
+        snapshot_records = remote_file_driver.get_object(
+            SNAPSHOTS_OBJECT_NAME) or {}
+        snapshot_objs = [
+            snapshot_obj for snapshot_obj in snapshot_objs
+            if snapshot_obj.id not in snapshot_records
+        ]
+
+        # Collect the records and the collections the remote does not have
+        new_snapshot_records = {}
+        manifests = {}
+        for snapshot_obj in snapshot_objs:
+            snapshot_record, file_collection_objs = self._get_snapshot_record(
+                snapshot_obj)
+            new_snapshot_records[snapshot_obj.id] = snapshot_record
+            for file_collection_obj in file_collection_objs:
+                filehash = file_collection_obj.filehash
+                if filehash in manifests or remote_file_driver.get_object(
+                        self._get_manifest_name(filehash)) is not None:
+                    continue
+                manifests[filehash] = self._get_manifest(file_collection_obj)
+
+        # Upload the blobs missing from the remote
+        blob_sources = {}
+        for filehash, manifest in manifests.items():
+            for relative_filepath, entry in manifest["files"].items():
+                blob_sources[entry["hash"]] = (filehash, relative_filepath)
+        missing_blob_hashes = sorted(
+            set(blob_sources) -
+            remote_file_driver.exists_blobs(list(blob_sources)))
+
+        def upload_blob(blob_hash):
+            filehash, relative_filepath = blob_sources[blob_hash]
+            return remote_file_driver.upload_blob(
+                blob_hash, self._get_blob_reference(filehash,
+                                                    relative_filepath))
+
+        self._map(upload_blob, missing_blob_hashes, workers)
+
+        # Manifests and records are only written once their blobs are stored
+        for filehash, manifest in manifests.items():
+            remote_file_driver.put_object(
+                self._get_manifest_name(filehash), manifest)
+        if new_snapshot_records:
+            snapshot_records.update(new_snapshot_records)
+            remote_file_driver.put_object(SNAPSHOTS_OBJECT_NAME,
+                                          snapshot_records)
+        return {
+            "snapshots": sorted(new_snapshot_records),
+            "blobs": missing_blob_hashes
+        }
+
+    def pull(self, remote=None, snapshot_ids=None,
+             workers=DEFAULT_TRANSFER_WORKERS):
+        """Pull snapshots and their file collections from a remote
+
+        Files already stored in a local collection are copied from it and only
+        the other blobs are downloaded, each verified against its hash
+
+        Parameters
+        ----------
+        remote : str, optional
+            http(s) url or directory path of the remote
+            (default is None, which uses the remote last pushed to or pulled from)
+        snapshot_ids : list, optional
+            ids of the snapshots to pull
+            (default is None, which pulls every snapshot)
+        workers : int, optional
+            number of blobs downloaded at once
+            (default is DEFAULT_TRANSFER_WORKERS)
+
+        Returns
+        -------
+        dict
+            dictionary with the ids of the snapshots pulled ("snapshots") and
+            the hashes of the blobs downloaded ("blobs")
+
+        Raises
+        ------
+        RequiredArgumentMissing
+            if no remote is given and none has been used before
+        SnapshotDoesNotExist
+            if a snapshot id given is not on the remote
+        RemoteTransferError
+            if a blob downloaded does not match its hash
+        """
+        remote_file_driver = self._get_remote_file_driver(remote)
+        snapshot_records = remote_file_driver.get_object(
+            SNAPSHOTS_OBJECT_NAME) or {}
+        if snapshot_ids is None:
+            snapshot_ids = sorted(snapshot_records)
+        for snapshot_id in snapshot_ids:
+            if snapshot_id not in snapshot_records:
+                raise SnapshotDoesNotExist(
+                    __("error", "controller.remote.snapshot", snapshot_id))
+        snapshot_ids = [
+            snapshot_id for snapshot_id in snapshot_ids
+            if not self.dal.snapshot.query({
+                "id": snapshot_id
+            })
+        ]
+
+        # Fetch the manifests of the collections missing locally
+        manifests = {}
+        for snapshot_id in snapshot_ids:
+            for record in snapshot_records[snapshot_id][
+                    "file_collections"].values():
+                if record["filehash"] in manifests or \
+                        self._find_file_collection(record):
+                    continue
+                manifests[record["filehash"]] = self._validate_manifest(
+                    record["filehash"],
+                    remote_file_driver.get_object(
+                        self._get_manifest_name(record["filehash"])))
+
+        # Download the blobs not stored in any local collection
+        blob_hash_algorithms = {}
+        for manifest in manifests.values():
+            for entry in manifest["files"].values():
+                blob_hash_algorithms[entry["hash"]] = manifest[
+                    "hash_algorithm"]
+        local_blob_sources = self._get_local_blob_sources(
+            set(blob_hash_algorithms))
+        missing_blob_hashes = sorted(
+            set(blob_hash_algorithms) - set(local_blob_sources))
+        blobs_dirpath = get_datmo_temp_path(self.home)
+
+        def download_blob(blob_hash):
+            blob_filepath = os.path.join(blobs_dirpath, blob_hash)
+            remote_file_driver.download_blob(blob_hash, blob_filepath)
+            if get_filehash(blob_filepath,
+                            blob_hash_algorithms[blob_hash]) != blob_hash:
+                raise RemoteTransferError(
+                    __("error", "controller.remote.pull.hash", blob_hash))
+            return blob_filepath
+
+        try:
+            downloaded_blobs = dict(
+                zip(missing_blob_hashes,
+                    self._map(download_blob, missing_blob_hashes, workers)))
+            file_collection_objs = self._create_file_collections(
+                manifests, downloaded_blobs, local_blob_sources)
+        finally:
+            shutil.rmtree(blobs_dirpath)
+
+        for snapshot_id in snapshot_ids:
+            self._create_snapshot(snapshot_records[snapshot_id],
+                                  file_collection_objs)
+        return {"snapshots": snapshot_ids, "blobs": missing_blob_hashes}
+
+    def export_bundle(self, snapshot_ids, filepath, compression=None):
+        """Write snapshots with their code, environment and files to a tar file
+
+        The tar is written as a stream, each file being copied in blocks, so
+        memory use does not grow with the size of the snapshots. Files shared
+        by several collections are written once
+
+        Parameters
+        ----------
+        snapshot_ids : list
+            ids of the snapshots to export
+        filepath : str
+            path of the tar file to write
+        compression : str, optional
+            compression of the tar file, "zlib" or "lzma"
+            (default is None, which does not compress)
+
+        Returns
+        -------
+        dict
+            dictionary with the ids of the snapshots exported ("snapshots") and
+            the hashes of the blobs written ("blobs")
+
+        Raises
+        ------
+        SnapshotDoesNotExist
+            if a snapshot id given does not exist
+        InvalidCompression
+            if the compression is not available
+        """
+        if compression is not None:
+            validate_compression(compression)
+        snapshot_records, manifests, commit_ids = {}, {}, set()
+        for snapshot_id in snapshot_ids:
+            results = self.dal.snapshot.query({"id": snapshot_id})
+            if not results:
+                raise SnapshotDoesNotExist(
+                    __("error", "controller.remote.snapshot", snapshot_id))
+            snapshot_record, file_collection_objs = self._get_snapshot_record(
+                results[0])
+            snapshot_records[snapshot_id] = snapshot_record
+            commit_ids.add(snapshot_record["code"]["commit_id"])
+            for file_collection_obj in file_collection_objs:
+                manifests[file_collection_obj.filehash] = self._get_manifest(
+                    file_collection_obj)
+        blob_sources = {}
+        for filehash, manifest in manifests.items():
+            for relative_filepath, entry in manifest["files"].items():
+                blob_sources[entry["hash"]] = (filehash, relative_filepath)
+
+        def add_object(tar, name, obj):
+            data = json.dumps(obj, sort_keys=True).encode("utf-8")
+            tarinfo = tarfile.TarInfo(name)
+            tarinfo.size = len(data)
+            tarinfo.mtime = int(time.time())
+            tar.addfile(tarinfo, io.BytesIO(data))
+
+        code_dirpath = get_datmo_temp_path(self.home)
+        try:
+            with tarfile.open(filepath, _BUNDLE_TAR_MODES[compression]) as tar:
+                # Records and manifests come first so imports can tell which
+                # blobs they need before reaching them
+                add_object(tar, BUNDLE_OBJECT_NAME, {
+                    "version": BUNDLE_VERSION,
+                    "snapshots": snapshot_records
+                })
+                for filehash in sorted(manifests):
+                    add_object(tar, self._get_manifest_name(filehash),
+                               manifests[filehash])
+                for commit_id in sorted(commit_ids):
+                    commit_dirpath = os.path.join(code_dirpath, commit_id)
+                    os.makedirs(commit_dirpath)
+                    self.code_driver.export_ref(commit_id, commit_dirpath)
+                    tar.add(commit_dirpath, arcname="code/" + commit_id)
+                    shutil.rmtree(commit_dirpath)
+                # Blobs are streamed from how they are stored, so files
+                # stored chunked or compressed are not restored to the cache
+                for blob_hash in sorted(blob_sources):
+                    blob_reference = self._get_blob_reference(
+                        *blob_sources[blob_hash])
+                    tarinfo = tarfile.TarInfo("blobs/" + blob_hash)
+                    tarinfo.size = blob_reference.size
+                    tarinfo.mtime = int(time.time())
+                    with blob_reference.open() as f:
+                        tar.addfile(tarinfo, f)
+        finally:
+            shutil.rmtree(code_dirpath)
+        return {
+            "snapshots": sorted(snapshot_records),
+            "blobs": sorted(blob_sources)
+        }
+
+    def import_bundle(self, filepath):
+        """Create the snapshots written to a tar file by export_bundle()
+
+        The tar is read as a stream. Blobs of collections which already exist
+        or which are stored in any local collection are skipped, and the
+        others are verified against their hash
+
+        Parameters
+        ----------
+        filepath : str
+            path of the tar file, compressed or not
+
+        Returns
+        -------
+        dict
+            dictionary with the ids of the snapshots created ("snapshots") and
+            the hashes of the blobs extracted ("blobs")
+
+        Raises
+        ------
+        FileIOError
+            if the file is not a bundle
+        RemoteTransferError
+            if a blob does not match its hash
+        """
+        snapshot_records, manifests = None, {}
+        local_blob_sources, blob_hash_algorithms = None, {}
+        extracted_blobs = {}
+
+        def get_blob_hash_algorithms():
+            for manifest in manifests.values():
+                for entry in manifest["files"].values():
+                    blob_hash_algorithms[entry["hash"]] = manifest[
+                        "hash_algorithm"]
+            return blob_hash_algorithms
+
+        temp_dirpath = get_datmo_temp_path(self.home)
+        code_dirpath = os.path.join(temp_dirpath, "code")
+        blobs_dirpath = os.path.join(temp_dirpath, "blobs")
+        try:
+            with tarfile.open(filepath, "r|*") as tar:
+                for member in tar:
+                    name = member.name
+                    if snapshot_records is None:
+                        if name != BUNDLE_OBJECT_NAME:
+                            raise FileIOError(
+                                __("error", "controller.remote.import_bundle",
+                                   filepath))
+                        snapshot_records = self._read_bundle_object(
+                            tar, member)["snapshots"]
+                        snapshot_ids = [
+                            snapshot_id
+                            for snapshot_id in sorted(snapshot_records)
+                            if not self.dal.snapshot.query({
+                                "id": snapshot_id
+                            })
+                        ]
+                        records = [
+                            record for snapshot_id in snapshot_ids
+                            for record in snapshot_records[snapshot_id][
+                                "file_collections"].values()
+                        ]
+                        needed_filehashes = set(
+                            record["filehash"] for record in records
+                            if not self._find_file_collection(record))
+                        needed_commit_ids = set(
+                            snapshot_records[snapshot_id]["code"]["commit_id"]
+                            for snapshot_id in snapshot_ids)
+                    elif name.startswith("collections/"):
+                        filehash = os.path.splitext(name.split("/", 1)[1])[0]
+                        if filehash in needed_filehashes:
+                            manifests[filehash] = self._validate_manifest(
+                                filehash, self._read_bundle_object(
+                                    tar, member))
+                    elif name.startswith("code/") and member.isfile():
+                        parts = name.split("/")
+                        if any(part in ["", ".", ".."] for part in parts):
+                            raise FileIOError(
+                                __("error", "controller.remote.import_bundle",
+                                   filepath))
+                        if parts[1] in needed_commit_ids and \
+                                not self.code_driver.exists_ref(parts[1]):
+                            self._extract_bundle_member(
+                                tar, member,
+                                os.path.join(code_dirpath, *parts[1:]))
+                    elif name.startswith("blobs/"):
+                        if local_blob_sources is None:
+                            # Every manifest has been read by the first blob
+                            local_blob_sources = self._get_local_blob_sources(
+                                set(get_blob_hash_algorithms()))
+                        blob_hash = name.split("/", 1)[1]
+                        if blob_hash not in blob_hash_algorithms or \
+                                blob_hash in local_blob_sources:
+                            continue
+                        blob_filepath = os.path.join(blobs_dirpath, blob_hash)
+                        self._extract_bundle_member(tar, member, blob_filepath)
+                        if get_filehash(blob_filepath, blob_hash_algorithms[
+                                blob_hash]) != blob_hash:
+                            raise RemoteTransferError(
+                                __("error", "controller.remote.pull.hash",
+                                   blob_hash))
+                        extracted_blobs[blob_hash] = blob_filepath
+            if snapshot_records is None:
+                raise FileIOError(
+                    __("error", "controller.remote.import_bundle", filepath))
+            if local_blob_sources is None:
+                local_blob_sources = self._get_local_blob_sources(
+                    set(get_blob_hash_algorithms()))
+            for blob_hash in sorted(blob_hash_algorithms):
+                if blob_hash not in extracted_blobs and \
+                        blob_hash not in local_blob_sources:
+                    raise FileIOError(
+                        __("error", "controller.remote.import_bundle.blob",
+                           (blob_hash, filepath)))
+            for commit_id in sorted(needed_commit_ids):
+                commit_dirpath = os.path.join(code_dirpath, commit_id)
+                if os.path.isdir(commit_dirpath):
+                    self.code_driver.import_ref(commit_id, commit_dirpath)
+            file_collection_objs = self._create_file_collections(
+                manifests, extracted_blobs, local_blob_sources)
+        finally:
+            shutil.rmtree(temp_dirpath)
+
+        for snapshot_id in snapshot_ids:
+            self._create_snapshot(snapshot_records[snapshot_id],
+                                  file_collection_objs)
+        return {
+            "snapshots": snapshot_ids,
+            "blobs": sorted(extracted_blobs)
+        }
+
+    @staticmethod
+    def _read_bundle_object(tar, member):
+        return json.loads(tar.extractfile(member).read().decode("utf-8"))
+
+    @staticmethod
+    def _extract_bundle_member(tar, member, dst_filepath):
+        """Stream a file of the bundle to the dst filepath in blocks"""
+        if not os.path.isdir(os.path.dirname(dst_filepath)):
+            os.makedirs(os.path.dirname(dst_filepath))
+        with open(dst_filepath, "wb") as f:
+            shutil.copyfileobj(tar.extractfile(member), f)
+
+    def _get_snapshot_record(self, snapshot_obj):
+        """Return the record of a snapshot with its code, environment and file
+        collections, and the file collection objects it refers to"""
+        environment_obj = self.dal.environment.get_by_id(
+            snapshot_obj.environment_id)
+        file_collection_objs = [
+            self.dal.file_collection.get_by_id(file_collection_id)
+            for file_collection_id in [
+                snapshot_obj.file_collection_id,
+                environment_obj.file_collection_id
+            ]
+        ]
+        snapshot_record = {
+            "snapshot":
+                _to_record(snapshot_obj),
+            "code":
+                _to_record(self.dal.code.get_by_id(snapshot_obj.code_id)),
+            "environment":
+                _to_record(environment_obj),
+            "file_collections":
+                dict((file_collection_obj.id, _to_record(file_collection_obj))
+                     for file_collection_obj in file_collection_objs)
+        }
+        return snapshot_record, file_collection_objs
+
+    def _get_manifest(self, file_collection_obj):
+        """Return the portable manifest of a file collection"""
+        filehash = file_collection_obj.filehash
+        return {
+            "hash_algorithm":
+                file_collection_obj.hash_algorithm,
+            "files":
+                dict((relative_filepath.replace(os.sep, "/"), {
+                    "size": entry["size"],
+                    "hash": entry["hash"],
+                    "mode": entry["mode"]
+                }) for relative_filepath, entry in self.file_driver.
+                     get_collection_manifest(filehash).items()),
+            "directories": [
+                relative_dirpath.replace(os.sep, "/") for relative_dirpath in
+                self.file_driver.get_collection_directories(filehash)
+            ]
+        }
+
+    @staticmethod
+    def _validate_manifest(filehash, manifest):
+        """Check a manifest read from a remote or bundle before any file is written from it
+
+        Blob hashes and paths are used to name files, so hashes must be hex
+        digests of the hash algorithm and paths must stay within the collection
+
+        Raises
+        ------
+        RemoteTransferError
+            if the manifest names a hash or path which is not valid
+        """
+
+        def fail(value):
+            raise RemoteTransferError(
+                __("error", "controller.remote.manifest", (filehash, value)))
+
+        if not isinstance(manifest, dict):
+            fail(manifest)
+        try:
+            digest_size = get_hash_function(
+                manifest.get("hash_algorithm"))().digest_size
+        except InvalidHashAlgorithm:
+            fail(manifest.get("hash_algorithm"))
+        if not _is_hex_digest(filehash, digest_size):
+            fail(filehash)
+        if not isinstance(manifest.get("files"), dict) or \
+                not isinstance(manifest.get("directories"), list):
+            fail(manifest)
+        for relative_filepath, entry in manifest["files"].items():
+            if not _is_relative_path(relative_filepath):
+                fail(relative_filepath)
+            if not isinstance(entry, dict) or \
+                    not _is_hex_digest(entry.get("hash"), digest_size):
+                fail(entry)
+        for relative_dirpath in manifest["directories"]:
+            if not _is_relative_path(relative_dirpath):
+                fail(relative_dirpath)
+        return manifest
+
+    def _get_blob_reference(self, filehash, relative_filepath):
+        """Return a reference streaming a file of a local collection from how it is stored
+
+        Files stored chunked or compressed are decoded as they are read, so
+        they are never written out whole to be transferred
+        """
+        relative_filepath = relative_filepath.replace("/", os.sep)
+        entry = self.file_driver.get_collection_manifest(filehash)[
+            relative_filepath]
+        return FileReference(
+            relative_filepath,
+            entry["size"],
+            partial(self.file_driver.open_collection_file, filehash,
+                    relative_filepath),
+            mode="rb")
+
+    @staticmethod
+    def _get_manifest_name(filehash):
+        return "collections/%s.json" % filehash
+
+    def _find_file_collection(self, record):
+        """Return the local file collection with the same files as the record or None"""
+        for file_collection_obj in self.dal.file_collection.query({
+                "filehash": record["filehash"]
+        }):
+            if file_collection_obj.hash_algorithm == record.get(
+                    "hash_algorithm", "md5") and \
+                    self.file_driver.exists_collection(record["filehash"]):
+                return file_collection_obj
+        return None
+
+    def _get_local_blob_sources(self, blob_hashes):
+        """Return where files with the hashes given are stored in local collections"""
+        local_blob_sources = {}
+        for file_collection_obj in self.dal.file_collection.query({}):
+            if not self.file_driver.exists_collection(
+                    file_collection_obj.filehash):
+                continue
+            for relative_filepath, entry in self.file_driver.\
+                    get_collection_manifest(file_collection_obj.filehash).items():
+                if entry["hash"] in blob_hashes:
+                    local_blob_sources[entry["hash"]] = (
+                        file_collection_obj.filehash, relative_filepath)
+        return local_blob_sources
+
+    def _create_file_collections(self, manifests, downloaded_blobs,
+                                 local_blob_sources):
+        """Build each collection from the blobs and store it like any other
+
+        Returns
+        -------
+        dict
+            file collection objects created by the filehash of their manifest
+
+        Raises
+        ------
+        RemoteTransferError
+            if a collection built does not match its hash
+        """
+        # Blobs are moved into the first collection using them, which is
+        # then their source for the collections after it
+        downloaded_blobs = dict(downloaded_blobs)
+        local_blob_sources = dict(local_blob_sources)
+        file_collection_objs = {}
+        for filehash, manifest in manifests.items():
+            file_collection_obj = self._create_file_collection(
+                manifest, downloaded_blobs, local_blob_sources)
+            if manifest["hash_algorithm"] == \
+                    file_collection_obj.hash_algorithm and \
+                    file_collection_obj.filehash != filehash:
+                raise RemoteTransferError(
+                    __("error", "controller.remote.pull.hash", filehash))
+            file_collection_objs[filehash] = file_collection_obj
+        return file_collection_objs
+
+    def _create_file_collection(self, manifest, downloaded_blobs,
+                                local_blob_sources):
+        """Build a collection from the blobs and store it like any other
+
+        Blobs downloaded are moved into the collection rather than copied, so
+        each is only written again when the collection stores it. Files from
+        local collections are streamed from how they are stored
+        """
+        collection_dirpath = get_datmo_temp_path(self.home)
+        moved_blobs = {}
+        try:
+            for relative_dirpath in manifest["directories"]:
+                dirpath = os.path.join(collection_dirpath,
+                                       *relative_dirpath.split("/"))
+                if not os.path.isdir(dirpath):
+                    os.makedirs(dirpath)
+            for relative_filepath, entry in manifest["files"].items():
+                dst_filepath = os.path.join(collection_dirpath,
+                                            *relative_filepath.split("/"))
+                if not os.path.isdir(os.path.dirname(dst_filepath)):
+                    os.makedirs(os.path.dirname(dst_filepath))
+                if entry["hash"] in moved_blobs:
+                    shutil.copyfile(
+                        os.path.join(collection_dirpath,
+                                     moved_blobs[entry["hash"]]), dst_filepath)
+                elif entry["hash"] in downloaded_blobs:
+                    os.rename(downloaded_blobs[entry["hash"]], dst_filepath)
+                    moved_blobs[entry["hash"]] = os.path.relpath(
+                        dst_filepath, collection_dirpath)
+                else:
+                    filehash, local_relative_filepath = local_blob_sources[
+                        entry["hash"]]
+                    with self.file_driver.open_collection_file(
+                            filehash, local_relative_filepath) as src_file, \
+                            open(dst_filepath, "wb") as dst_file:
+                        shutil.copyfileobj(src_file, dst_file,
+                                           HASH_BUFFER_SIZE)
+                os.chmod(dst_filepath, entry["mode"])
+            paths = [
+                os.path.join(collection_dirpath, name)
+                for name in sorted(os.listdir(collection_dirpath))
+            ]
+            if paths:
+                file_collection_obj = self.file_collection.create(paths)
+                for blob_hash, relative_filepath in moved_blobs.items():
+                    del downloaded_blobs[blob_hash]
+                    local_blob_sources[blob_hash] = (
+                        file_collection_obj.filehash, relative_filepath)
+                return file_collection_obj
+            # An empty list of paths would collect the project files instead
+            filehash = self.file_driver.create_collection([])
+            return self._find_file_collection({
+                "filehash": filehash,
+                "hash_algorithm": self.file_driver.hash_algorithm
+            }) or self.dal.file_collection.create(
+                FileCollection({
+                    "model_id": self.model.id,
+                    "filehash": filehash,
+                    "hash_algorithm": self.file_driver.hash_algorithm,
+                    "path": self.file_driver.get_relative_collection_path(
+                        filehash),
+                    "driver_type": self.file_driver.type
+                }))
+        finally:
+            shutil.rmtree(collection_dirpath)
+
+    def _create_snapshot(self, snapshot_record, file_collection_objs):
+        """Create the records of a pulled snapshot, reusing local ones where equal"""
+
+        def get_file_collection_id(file_collection_id):
+            record = snapshot_record["file_collections"][file_collection_id]
+            file_collection_obj = self._find_file_collection(record) or \
+                                  file_collection_objs[record["filehash"]]
+            return file_collection_obj.id
+
+        code_record = snapshot_record["code"]
+        code_objs = [
+            code_obj for code_obj in self.dal.code.query({
+                "commit_id": code_record["commit_id"]
+            }) if code_obj.hash_algorithm == code_record.get("hash_algorithm")
+        ]
+        if not self.code_driver.exists_ref(code_record["commit_id"]):
+            self.logger.warning(
+                __("warn", "controller.remote.pull.code",
+                   code_record["commit_id"]))
+        if code_objs:
+            code_obj = code_objs[0]
+        else:
+            code_dictionary = _from_record(code_record)
+            code_dictionary["model_id"] = self.model.id
+            code_obj = self.dal.code.create(Code(code_dictionary))
+
+        environment_record = snapshot_record["environment"]
+        environment_dictionary = _from_record(environment_record)
+        environment_dictionary["model_id"] = self.model.id
+        environment_dictionary["file_collection_id"] = get_file_collection_id(
+            environment_record["file_collection_id"])
+        environment_dictionary["unique_hash"] = self.dal.file_collection.\
+            get_by_id(environment_dictionary["file_collection_id"]).filehash
+        environment_objs = self.dal.environment.query({
+            "unique_hash": environment_dictionary["unique_hash"]
+        })
+        if environment_objs:
+            environment_obj = environment_objs[0]
+        else:
+            environment_obj = self.dal.environment.create(
+                Environment(environment_dictionary))
+
+        snapshot_dictionary = _from_record(snapshot_record["snapshot"])
+        snapshot_dictionary.update({
+            "model_id":
+                self.model.id,
+            "session_id":
+                self.current_session.id,
+            "code_id":
+                code_obj.id,
+            "environment_id":
+                environment_obj.id,
+            "file_collection_id":
+                get_file_collection_id(snapshot_dictionary["file_collection_id"])
+        })
+        return self.dal.snapshot.create(Snapshot(snapshot_dictionary))
@@ -1,4 +1,11 @@
 import os
+import mmap
+from contextlib import contextmanager
+try:
+    # memoryview cannot be made over a memory map in python 2
+    to_buffer = buffer
+except NameError:
+    to_buffer = memoryview
 
 from datmo.core.controller.base import BaseController
 from datmo.core.controller.code.code import CodeController
@@ -10,7 +17,8 @@ from datmo.core.util.validation import validate
 from datmo.core.util.json_store import JSONStore
 from datmo.core.util.exceptions import (
     FileIOError, RequiredArgumentMissing, ProjectNotInitialized,
-    SessionDoesNotExist, EntityNotFound, TaskNotComplete, DoesNotExist)
+    SessionDoesNotExist, EntityNotFound, TaskNotComplete, DoesNotExist,
+    PathDoesNotExist)
 
 
 class SnapshotController(BaseController):
@@ -31,10 +39,20 @@ class SnapshotController(BaseController):
     -------
     create(dictionary)
         Create a snapshot within the project
-    checkout(id)
-        Checkout to a specific snapshot within the project
+    checkout(id, paths=None)
+        Checkout to a specific snapshot, or only its files matching the paths
     list(session_id=None)
         List all snapshots present within the project based on given filters
+    get_files(snapshot_id, mode="r")
+        Open the files for the snapshot
+    list_files(snapshot_id, mode="r")
+        List references to the files for the snapshot without opening them
+    open_mmap(snapshot_id, path)
+        Memory map a file in the snapshot read only
+    get_file_buffer(snapshot_id, path)
+        Get a context manager with a read only buffer over a file in the snapshot
+    diff(snapshot_id_1, snapshot_id_2)
+        List the files added, removed and modified between two snapshots
     delete(id)
         Delete the snapshot specified from the project
 
@@ -278,12 +296,54 @@ class SnapshotController(BaseController):
 
         return self.dal.snapshot.update(snapshot_update_dict)
 
-    def checkout(self, snapshot_id):
+    def checkout(self, snapshot_id, paths=None):
+        """Checkout to a snapshot, or only to its files matching the paths
+
+        A checkout of paths restores the code and project files matching them
+        and nothing else, so the environment is left as is and other files
+        are neither hashed nor touched. Files matching are overwritten
+
+        Parameters
+        ----------
+        snapshot_id : str
+            id for the snapshot to checkout
+        paths : list, optional
+            .gitignore style patterns of the filepaths to checkout, relative
+            to the project root for code and to the project files directory
+            for files, e.g. ["models/*.pt", "config.json"]
+            (default is None, which checks out the whole snapshot)
+
+        Returns
+        -------
+        bool
+            True if success
+
+        Raises
+        ------
+        UnstagedChanges
+            if there are unstaged changes when checking out the whole snapshot
+        PathDoesNotExist
+            if no files of the snapshot match the paths
+        """
         # Get snapshot object
         snapshot_obj = self.dal.snapshot.get_by_id(snapshot_id)
         code_obj = self.dal.code.get_by_id(snapshot_obj.code_id)
         file_collection_obj = self.dal.file_collection.\
             get_by_id(snapshot_obj.file_collection_id)
+
+        if paths:
+            code_filepaths = self.code_driver.checkout_paths(
+                code_obj.commit_id, paths)
+            self.file_driver.ensure_datmo_files_dir()
+            file_filepaths = self.file_driver.checkout_collection_paths(
+                file_collection_obj.filehash,
+                self.file_driver.files_directory, paths)
+            if not code_filepaths and not file_filepaths:
+                raise PathDoesNotExist(
+                    __("error", "controller.snapshot.checkout.paths",
+                       (snapshot_id, ", ".join(paths))))
+            return True
+
         environment_obj = self.dal.environment. \
             get_by_id(snapshot_obj.environment_id)
 
@@ -413,6 +473,184 @@ class SnapshotController(BaseController):
         return self.file_driver.get_collection_files(
             file_collection_obj.filehash, mode=mode)
 
+    def list_files(self, snapshot_id, mode="r"):
+        """List references to the files for snapshot id without opening them
+
+        Parameters
+        ----------
+        snapshot_id : str
+            id for the snapshot you would like to list files for
+        mode : str
+            file open mode used when reading from the references
+            (default is "r" to open file for read)
+
+        Returns
+        -------
+        list
+            list of datmo.core.util.file_reference.FileReference objects
+
+        Raises
+        ------
+        DoesNotExist
+            snapshot object does not exist
+        """
+        try:
+            snapshot_obj = self.dal.snapshot.get_by_id(snapshot_id)
+        except EntityNotFound:
+            raise DoesNotExist()
+        file_collection_obj = self.dal.file_collection.get_by_id(
+            snapshot_obj.file_collection_id)
+        return self.file_driver.list_collection_files(
+            file_collection_obj.filehash, mode=mode)
+
+    def get_filepath(self, snapshot_id, path):
+        """Get a read only filepath with the contents of a file in the snapshot
+
+        This can be given to libraries which map files themselves,
+        e.g. numpy.load(filepath, mmap_mode="r")
+
+        Parameters
+        ----------
+        snapshot_id : str
+            id for the snapshot the file is in
+        path : str
+            path of the file relative to the snapshot file collection
+
+        Returns
+        -------
+        str
+            absolute filepath which must not be written to
+
+        Raises
+        ------
+        DoesNotExist
+            snapshot object does not exist
+        PathDoesNotExist
+            file does not exist in the snapshot
+        """
+        try:
+            snapshot_obj = self.dal.snapshot.get_by_id(snapshot_id)
+        except EntityNotFound:
+            raise DoesNotExist()
+        file_collection_obj = self.dal.file_collection.get_by_id(
+            snapshot_obj.file_collection_id)
+        return self.file_driver.get_collection_filepath(
+            file_collection_obj.filehash, path)
+
+    def open_mmap(self, snapshot_id, path):
+        """Memory map a file in the snapshot read only, without copying it into memory
+
+        Parameters
+        ----------
+        snapshot_id : str
+            id for the snapshot the file is in
+        path : str
+            path of the file relative to the snapshot file collection
+
+        Returns
+        -------
+        mmap.mmap
+            read only memory map of the file, which should be closed when done
+
+        Raises
+        ------
+        DoesNotExist
+            snapshot object does not exist
+        PathDoesNotExist
+            file does not exist in the snapshot
+        ValueError
+            file is empty and cannot be mapped
+        """
+        filepath = self.get_filepath(snapshot_id, path)
+        with open(filepath, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get_file_buffer(self, snapshot_id, path):
+        """Get a read only buffer over a file in the snapshot, without copying it into memory
+
+        Objects made from the buffer read the file itself, so they are used
+        within the with block, e.g.
+
+            with snapshot_controller.get_file_buffer(snapshot_id, path) as buf:
+                array = numpy.frombuffer(buf, dtype)
+                mean = array.mean()
+
+        Neither the buffer nor such objects may outlive the block, only the
+        results computed from them. The memory map under the buffer is closed
+        when the block exits, unless objects made from it are still alive, in
+        which case it is closed once they are collected. The buffer cannot be
+        written to, as the file is shared with the snapshot
+
+        Parameters
+        ----------
+        snapshot_id : str
+            id for the snapshot the file is in
+        path : str
+            path of the file relative to the snapshot file collection
+
+        Returns
+        -------
+        contextmanager
+            context manager giving a read only buffer over a memory map of the
+            file, a memoryview or a buffer in python 2
+
+        Raises
+        ------
+        DoesNotExist
+            snapshot object does not exist
+        PathDoesNotExist
+            file does not exist in the snapshot
+        """
+        filepath = self.get_filepath(snapshot_id, path)
+        return self._open_file_buffer(filepath)
+
+    @staticmethod
+    @contextmanager
+    def _open_file_buffer(filepath):
+        if not os.path.getsize(filepath):
+            # Empty files cannot be mapped
+            yield to_buffer(b"")
+            return
+        with open(filepath, "rb") as f:
+            file_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        file_buffer = to_buffer(file_map)
+        try:
+            yield file_buffer
+        finally:
+            try:
+                if hasattr(file_buffer, "release"):
+                    file_buffer.release()
+                file_map.close()
+            except BufferError:
+                # Objects made from the buffer still use the memory map
+                pass
+
+    def diff(self, snapshot_id_1, snapshot_id_2):
+        """List the files added, removed and modified between two snapshots
+
+        Parameters
+        ----------
+        snapshot_id_1 : str
+            id for the snapshot to compare from
+        snapshot_id_2 : str
+            id for the snapshot to compare to
+
+        Returns
+        -------
+        dict
+            file changes with size deltas as given by
+            datmo.core.controller.file.file_collection.FileCollectionController.diff
+
+        Raises
+        ------
+        DoesNotExist
+            either snapshot object does not exist
+        """
+        snapshot_obj_1 = self.get(snapshot_id_1)
+        snapshot_obj_2 = self.get(snapshot_id_2)
+        return self.file_collection.diff(snapshot_obj_1.file_collection_id,
+                                         snapshot_obj_2.file_collection_id)
+
     def delete(self, snapshot_id):
         """Delete all traces of a snapshot
 
@@ -588,22 +826,20 @@ class SnapshotController(BaseController):
 
         file_collection_obj = self.file_collection.dal.file_collection.\
             get_by_id(file_collection_id)
-        file_collection_path = \
-            self.file_collection.file_driver.get_collection_path(
-                file_collection_obj.filehash)
-        # find all of the possible paths it could exist
-        possible_paths = [os.path.join(self.home, file_to_find)] + \
-                            [os.path.join(self.home, item[0], file_to_find)
-                            for item in os.walk(file_collection_path)]
-        existing_possible_paths = [
-            possible_path for possible_path in possible_paths
-            if os.path.isfile(possible_path)
-        ]
-        if not existing_possible_paths:
+        # The file in the project root takes precedence over the collection
+        home_filepath = os.path.join(self.home, file_to_find)
+        if os.path.isfile(home_filepath):
+            return JSONStore(home_filepath).to_dict()
+        # Lookup the file by name in the collection manifest instead of walking it
+        file_driver = self.file_collection.file_driver
+        collection_filepaths = file_driver.find_in_collection(
+            file_collection_obj.filehash, file_to_find)
+        if not collection_filepaths:
             # TODO: Add some info / warning that no file was found
             # create some default stats
             return {}
-        else:
-            # If any such path exists, transform file to stats dict
-            json_file = JSONStore(existing_possible_paths[0])
-            return json_file.to_dict()
+        # If any such path exists, transform file to stats dict
+        with file_driver.open_collection_file(
+                file_collection_obj.filehash, collection_filepaths[0],
+                mode="r") as f:
+            return JSONStore.parse(f.read())
@@ -1,6 +1,8 @@
 import os
 import shlex
+from io import open
 from datetime import datetime
+from functools import partial
 
 from datmo.core.controller.base import BaseController
 from datmo.core.controller.snapshot import SnapshotController
@@ -8,6 +10,7 @@ from datmo.core.controller.environment.environment import EnvironmentController
 from datmo.core.entity.task import Task
 from datmo.core.util.validation import validate
 from datmo.core.util.spinner import Spinner
+from datmo.core.util.file_reference import FileReference
 from datmo.core.util.i18n import get as __
 from datmo.core.util.exceptions import (
     TaskRunError, RequiredArgumentMissing, ProjectNotInitialized,
@@ -41,6 +44,10 @@ class TaskController(BaseController):
         runs the task and tracks the run, logs, inputs and outputs
     list(session_id=None)
         lists all tasks within the project given filters
+    get_files(task_id, mode="r")
+        opens the files for the task
+    list_files(task_id, mode="r")
+        lists references to the files for the task without opening them
     delete(id)
         deletes the specified task from the project
     """
@@ -78,7 +85,8 @@ class TaskController(BaseController):
             self.spinner.stop()
         return task_obj
 
-    def _run_helper(self, environment_id, options, log_filepath):
+    def _run_helper(self, environment_id, options, log_filepath,
+                    build=True):
         """Run environment with parameters
 
         Parameters
@@ -104,6 +112,9 @@ class TaskController(BaseController):
             tty : bool
         log_filepath : str
             absolute filepath to the log file
+        build : bool, optional
+            build the environment first, unless an image of it exists
+            (default is True, False if the caller built it already)
 
         Returns
         -------
@@ -128,7 +139,8 @@ class TaskController(BaseController):
             "api": False,
         }
 
-        self.environment.build(environment_id)
+        if build:
+            self.environment.build(environment_id)
 
         # Run container with environment
         return_code, run_id, logs = self.environment.run(
@@ -276,11 +288,12 @@ class TaskController(BaseController):
         # Copy over files from the before_snapshot file collection to task dir
         file_collection_obj =  \
             self.dal.file_collection.get_by_id(before_snapshot_obj.file_collection_id)
-        self.file_driver.copytree(
-            os.path.join(self.home, file_collection_obj.path),
+        self.file_driver.transfer_collection(
+            file_collection_obj.filehash,
             os.path.join(self.home, task_obj.task_dirpath))
 
         return_code, run_id, logs = 0, None, None
+        build_cache_hit = None
 
         try:
             # Set the parameters set in the task
@@ -309,11 +322,16 @@ class TaskController(BaseController):
                 "tty": task_obj.interactive,
                 "api": False
             }
+            # The image is looked for once, by the build itself
+            build_cache_hit = self.environment.ensure_image(
+                before_snapshot_obj.environment_id,
+                rebuild=task_dict.get('rebuild', False))
             # Run environment via the helper function
             return_code, run_id, logs =  \
                 self._run_helper(before_snapshot_obj.environment_id,
                                  environment_run_options,
-                                 os.path.join(self.home, task_obj.log_filepath))
+                                 os.path.join(self.home, task_obj.log_filepath),
+                                 build=False)
             
         except Exception as e:
             return_code = 1
@@ -349,7 +367,8 @@ class TaskController(BaseController):
                 "status": "SUCCESS" if return_code == 0 else "FAILED",
                 # "results": task_obj.results, # TODO: update during run
                 "end_time": end_time,
-                "duration": duration
+                "duration": duration,
+                "build_cache_hit": build_cache_hit
             }
             if logs is not None:
                 update_task_dict["results"] = self._parse_logs_for_results(
@@ -439,6 +458,57 @@ class TaskController(BaseController):
             # Error because the task does not have any files associated with it
             raise PathDoesNotExist()
 
+    def list_files(self, task_id, mode="r"):
+        """List references to the files for task id without opening them. It looks in the same
+        areas in the same order as get_files
+
+        Parameters
+        ----------
+        task_id : str
+            id for the task you would like to list files for
+        mode : str
+            file open mode used when reading from the references
+            (default is "r" to open file for read)
+
+        Returns
+        -------
+        list
+            list of datmo.core.util.file_reference.FileReference objects
+
+        Raises
+        ------
+        DoesNotExist
+            task object does not exist
+        PathDoesNotExist
+            no files exist for the task
+        """
+        try:
+            task_obj = self.dal.task.get_by_id(task_id)
+        except EntityNotFound:
+            raise DoesNotExist()
+        if task_obj.after_snapshot_id:
+            return self.snapshot.list_files(
+                task_obj.after_snapshot_id, mode=mode)
+        elif task_obj.task_dirpath:
+            task_dirpath = os.path.join(self.home, task_obj.task_dirpath)
+            file_references = []
+            for dirname, _, filenames in os.walk(task_dirpath):
+                for filename in sorted(filenames):
+                    filepath = os.path.join(dirname, filename)
+                    file_references.append(
+                        FileReference(
+                            filepath,
+                            os.path.getsize(filepath),
+                            partial(open, filepath),
+                            mode=mode))
+            return file_references
+        elif task_obj.before_snapshot_id:
+            return self.snapshot.list_files(
+                task_obj.before_snapshot_id, mode=mode)
+        else:
+            # Error because the task does not have any files associated with it
+            raise PathDoesNotExist()
+
     def delete(self, task_id):
         if not task_id:
             raise RequiredArgumentMissing(
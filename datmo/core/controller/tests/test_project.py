@@ -31,10 +31,14 @@ except TypeError:
 from datmo.config import Config
 from datmo.core.controller.project import ProjectController
 from datmo.core.controller.snapshot import SnapshotController
+from datmo.core.controller.code.code import CodeController
+from datmo.core.controller.environment.environment import EnvironmentController
+from datmo.core.controller.file.file_collection import FileCollectionController
 from datmo.core.controller.task import TaskController
 from datmo.core.entity.snapshot import Snapshot
 from datmo.core.entity.task import Task
-from datmo.core.util.exceptions import ValidationFailed
+from datmo.core.util.exceptions import (ValidationFailed,
+                                        ProjectNotInitialized)
 from datmo.core.util.misc_functions import pytest_docker_environment_failed_instantiation
 
 # provide mountable tmp directory for docker
@@ -300,3 +304,243 @@ class TestProjectController():
         assert latest_snapshot.id == first_snapshot.id
         assert isinstance(ascending_unstaged_task_list[0], Task)
         assert ascending_unstaged_task_list[0].id == updated_first_task.id
+
+    def test_gc(self):
+        failed = False
+        try:
+            self.project_controller.gc()
+        except ProjectNotInitialized:
+            failed = True
+        assert failed
+
+        self.project_controller.init("test5", "test description")
+        self.snapshot_controller = SnapshotController()
+        self.code_controller = CodeController()
+        self.file_collection_controller = FileCollectionController()
+
+        # Create a snapshot which must be kept
+        env_def_path = os.path.join(self.snapshot_controller.home,
+                                    "Dockerfile")
+        with open(env_def_path, "wb") as f:
+            f.write(to_bytes("FROM python:3.5-alpine"))
+        filepath = os.path.join(self.snapshot_controller.home, "filepath1")
+        with open(filepath, "wb") as f:
+            f.write(to_bytes("snapshot contents"))
+
+        # Create a code object no snapshot references, before the snapshot so
+        # it is neither the latest nor the current code
+        with open(os.path.join(self.snapshot_controller.home, "script.py"),
+                  "wb") as f:
+            f.write(to_bytes("print('hello')"))
+        code_obj = self.code_controller.create()
+        with open(os.path.join(self.snapshot_controller.home, "script.py"),
+                  "wb") as f:
+            f.write(to_bytes("print('hello world')"))
+        snapshot_obj = self.snapshot_controller.create({
+            "message": "my test snapshot",
+            "paths": [filepath],
+            "environment_paths": [env_def_path]
+        })
+
+        # The latest environment is kept before any snapshot uses it
+        os.makedirs(os.path.join(self.snapshot_controller.home, "setup"))
+        setup_env_def_path = os.path.join(self.snapshot_controller.home,
+                                          "setup", "Dockerfile")
+        with open(setup_env_def_path, "wb") as f:
+            f.write(to_bytes("FROM python:3.6-alpine"))
+        setup_environment_obj = EnvironmentController().create({
+            "paths": [setup_env_def_path]
+        })
+
+        # Create a chunked collection no snapshot references
+        orphan_filepath = os.path.join(self.snapshot_controller.home,
+                                       "orphan")
+        with open(orphan_filepath, "wb") as f:
+            f.write(os.urandom(1024))
+        self.file_collection_controller.file_driver.chunk_threshold = 1
+        file_collection_obj = self.file_collection_controller.create(
+            [orphan_filepath])
+        stored_chunks = self.project_controller.file_driver.\
+            list_stored_objects()["chunks"]
+        assert stored_chunks
+
+        # Dry run only reports the unreferenced objects
+        garbage = self.project_controller.gc()
+        assert garbage["code"] == [code_obj.id]
+        assert garbage["code_ref"] == [code_obj.commit_id]
+        # Only the object no kept ref uses is collected with the ref
+        script_filehash = self.project_controller.code_driver.\
+            get_ref_objects(code_obj.commit_id)["script.py"]
+        assert garbage["code_object"] == [script_filehash]
+        assert garbage["file_collection"] == [file_collection_obj.id]
+        assert garbage["collection"] == [file_collection_obj.filehash]
+        assert garbage["chunks"] == stored_chunks
+        assert not garbage["environment"]
+        assert not garbage["manifests"]
+        assert self.project_controller.dal.code.query({"id": code_obj.id})
+        assert self.project_controller.file_driver.exists_collection(
+            file_collection_obj.filehash)
+
+        # Remove the unreferenced objects and keep the snapshot intact
+        removed = self.project_controller.gc(remove=True, workers=2)
+        assert removed == garbage
+        assert not self.project_controller.dal.code.query({
+            "id": code_obj.id
+        })
+        assert not self.project_controller.dal.file_collection.query({
+            "id": file_collection_obj.id
+        })
+        assert not self.project_controller.code_driver.exists_ref(
+            code_obj.commit_id)
+        assert not os.path.exists(
+            self.project_controller.code_driver.get_object_filepath(
+                "script.py", script_filehash))
+        assert not self.project_controller.file_driver.exists_collection(
+            file_collection_obj.filehash)
+        assert not self.project_controller.file_driver.list_stored_objects(
+        )["chunks"]
+        assert [
+            os.path.basename(f.name)
+            for f in self.snapshot_controller.list_files(snapshot_obj.id)
+        ] == ["filepath1"]
+        assert self.project_controller.dal.environment.query({
+            "id": setup_environment_obj.id
+        })
+        assert self.project_controller.code_driver.exists_ref(
+            self.project_controller.code_driver.latest_ref())
+
+        # Nothing is left to collect
+        garbage = self.project_controller.gc()
+        assert not any(garbage.values())
+
+    def test_gc_remove_failed(self):
+        self.project_controller.init("test5", "test description")
+        self.code_controller = CodeController()
+        self.file_collection_controller = FileCollectionController()
+
+        # Create a code object and a collection no snapshot references,
+        # before the latest code
+        script_filepath = os.path.join(self.project_controller.home,
+                                       "script.py")
+        with open(script_filepath, "wb") as f:
+            f.write(to_bytes("print('hello')"))
+        code_obj = self.code_controller.create()
+        with open(script_filepath, "wb") as f:
+            f.write(to_bytes("print('hello world')"))
+        _ = self.code_controller.create()
+        orphan_filepath = os.path.join(self.project_controller.home, "orphan")
+        with open(orphan_filepath, "wb") as f:
+            f.write(to_bytes("orphan"))
+        file_collection_obj = self.file_collection_controller.create(
+            [orphan_filepath])
+
+        # Rows are kept while the ref or collection they point to is not
+        # removed, so they are collected again later
+        def fail(*args, **kwargs):
+            raise Exception("removal failed")
+
+        delete_ref = self.project_controller.code_driver.delete_ref
+        delete_collection = self.project_controller.file_driver.\
+            delete_collection
+        self.project_controller.code_driver.delete_ref = fail
+        self.project_controller.file_driver.delete_collection = fail
+        removed = self.project_controller.gc(remove=True)
+        assert not removed["code"] and not removed["code_ref"]
+        assert not removed["file_collection"] and not removed["collection"]
+        assert self.project_controller.dal.code.query({"id": code_obj.id})
+        assert self.project_controller.dal.file_collection.query({
+            "id": file_collection_obj.id
+        })
+
+        self.project_controller.code_driver.delete_ref = delete_ref
+        self.project_controller.file_driver.delete_collection = \
+            delete_collection
+        removed = self.project_controller.gc(remove=True)
+        assert removed["code"] == [code_obj.id]
+        assert removed["code_ref"] == [code_obj.commit_id]
+        assert removed["file_collection"] == [file_collection_obj.id]
+        assert removed["collection"] == [file_collection_obj.filehash]
+        assert not self.project_controller.dal.code.query({"id": code_obj.id})
+
+    def test_repack(self):
+        failed = False
+        try:
+            self.project_controller.repack()
+        except ProjectNotInitialized:
+            failed = True
+        assert failed
+
+        self.project_controller.init("test7", "test description")
+        self.code_controller = CodeController()
+        with open(os.path.join(self.project_controller.home, "script.py"),
+                  "wb") as f:
+            f.write(to_bytes("print('hello')"))
+        code_obj = self.code_controller.create()
+        result = self.project_controller.repack(compression="zlib")
+        assert result["objects"] == 1
+        # Packed objects are still checked by fsck
+        report = self.project_controller.fsck()
+        assert report["corrupt"] == [] and report["missing"] == []
+        assert report["bytes"] >= len("print('hello')")
+
+    def test_fsck(self):
+        failed = False
+        try:
+            self.project_controller.fsck()
+        except ProjectNotInitialized:
+            failed = True
+        assert failed
+
+        self.project_controller.init("test6", "test description")
+        self.code_controller = CodeController()
+        self.file_collection_controller = FileCollectionController()
+        home = self.project_controller.home
+        with open(os.path.join(home, "script.py"), "wb") as f:
+            f.write(to_bytes("print('hello')"))
+        code_obj = self.code_controller.create()
+        filepath = os.path.join(home, "filepath1")
+        with open(filepath, "wb") as f:
+            f.write(to_bytes("collection contents"))
+        chunked_filepath = os.path.join(home, "chunked")
+        with open(chunked_filepath, "wb") as f:
+            f.write(os.urandom(4096))
+        self.file_collection_controller.file_driver.chunk_threshold = 1024
+        file_collection_obj = self.file_collection_controller.create(
+            [filepath, chunked_filepath])
+        filehash = file_collection_obj.filehash
+
+        report = self.project_controller.fsck(workers=2)
+        assert report["corrupt"] == [] and report["missing"] == []
+        assert report["skipped"] == 0
+        assert report["bytes"] >= 4096 + len("collection contents")
+        checked = report["checked"]
+
+        # Objects verified recently are skipped
+        report = self.project_controller.fsck(days=1)
+        assert report["checked"] == 0 and report["skipped"] == checked
+
+        # Changed and removed objects are reported
+        stored_filepath = os.path.join(
+            self.project_controller.file_driver.get_collection_path(filehash),
+            "filepath1")
+        os.chmod(stored_filepath, 0o644)
+        with open(stored_filepath, "wb") as f:
+            f.write(to_bytes("collection c0ntents"))
+        object_filepath = self.project_controller.code_driver.\
+            get_object_filepath("script.py", self.project_controller.
+                                code_driver.get_ref_objects(
+                                    code_obj.commit_id)["script.py"])
+        os.chmod(object_filepath, 0o644)
+        os.remove(object_filepath)
+        report = self.project_controller.fsck()
+        assert report["checked"] == checked
+        assert report["corrupt"] == [
+            "collection/%s/filepath1" % filehash
+        ]
+        object_hash = os.path.basename(object_filepath)
+        assert report["missing"] == [
+            "code/objects/%s/%s" % (object_hash[:2], object_hash)
+        ]
+        # Objects found invalid are checked again
+        report = self.project_controller.fsck(days=1)
+        assert report["checked"] == 2
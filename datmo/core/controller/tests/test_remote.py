@@ -0,0 +1,374 @@
+"""
+Tests for RemoteController
+"""
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import json
+import tarfile
+import tempfile
+import platform
+try:
+
+    def to_bytes(val):
+        return bytes(val)
+
+    to_bytes("test")
+except TypeError:
+
+    def to_bytes(val):
+        return bytes(val, "utf-8")
+
+    to_bytes("test")
+
+from datmo.config import Config
+from datmo.core.controller.project import ProjectController
+from datmo.core.controller.snapshot import SnapshotController
+from datmo.core.controller.remote import RemoteController
+from datmo.core.util.exceptions import (
+    ProjectNotInitialized, RequiredArgumentMissing, SnapshotDoesNotExist,
+    InvalidCompression, FileIOError, RemoteTransferError)
+
+# provide mountable tmp directory for docker
+tempfile.tempdir = "/tmp" if not platform.system() == "Windows" else None
+test_datmo_dir = os.environ.get('TEST_DATMO_DIR', tempfile.gettempdir())
+
+
+class TestRemoteController():
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp(dir=test_datmo_dir)
+        self.other_temp_dir = tempfile.mkdtemp(dir=test_datmo_dir)
+        self.remote_dir = tempfile.mkdtemp(dir=test_datmo_dir)
+        Config().set_home(self.temp_dir)
+
+    def teardown_method(self):
+        pass
+
+    def __setup(self, home):
+        Config().set_home(home)
+        ProjectController().init("test", "test description")
+        self.snapshot_controller = SnapshotController()
+        self.remote_controller = RemoteController()
+
+    def __create_snapshot(self, contents):
+        home = self.snapshot_controller.home
+        with open(os.path.join(home, "Dockerfile"), "wb") as f:
+            f.write(to_bytes("FROM python:3.5-alpine"))
+        os.makedirs(os.path.join(home, "dirpath", "empty"))
+        with open(os.path.join(home, "dirpath", "filepath1"), "wb") as f:
+            f.write(to_bytes(contents))
+        with open(os.path.join(home, "filepath2"), "wb") as f:
+            f.write(to_bytes("shared contents"))
+        return self.snapshot_controller.create({
+            "message":
+                "my test snapshot",
+            "paths": [
+                os.path.join(home, "dirpath"),
+                os.path.join(home, "filepath2")
+            ],
+            "environment_paths": [os.path.join(home, "Dockerfile")]
+        })
+
+    def test_init_fail_project_not_init(self):
+        failed = False
+        try:
+            RemoteController()
+        except ProjectNotInitialized:
+            failed = True
+        assert failed
+
+    def test_push_pull(self):
+        self.__setup(self.temp_dir)
+        failed = False
+        try:
+            self.remote_controller.push()
+        except RequiredArgumentMissing:
+            failed = True
+        assert failed
+        failed = False
+        try:
+            self.remote_controller.push(self.remote_dir, ["not_a_snapshot"])
+        except SnapshotDoesNotExist:
+            failed = True
+        assert failed
+
+        snapshot_obj = self.__create_snapshot("first contents")
+        filehash = self.snapshot_controller.dal.file_collection.get_by_id(
+            snapshot_obj.file_collection_id).filehash
+        result = self.remote_controller.push(self.remote_dir, workers=2)
+        assert result["snapshots"] == [snapshot_obj.id]
+        # Two snapshot files and three environment files
+        assert len(result["blobs"]) == 5
+
+        # Pushing again sends nothing, the remote is used by default
+        result = self.remote_controller.push()
+        assert result == {"snapshots": [], "blobs": []}
+
+        # Pull into a project which shares one of the files
+        self.__setup(self.other_temp_dir)
+        self.snapshot_controller.file_collection.create(
+            [self.__write("filepath2", "shared contents")])
+        result = self.remote_controller.pull(self.remote_dir, workers=2)
+        assert result["snapshots"] == [snapshot_obj.id]
+        assert len(result["blobs"]) == 4
+
+        pulled_snapshot_obj = self.snapshot_controller.get(snapshot_obj.id)
+        assert pulled_snapshot_obj.message == snapshot_obj.message
+        file_driver = self.snapshot_controller.file_collection.file_driver
+        assert self.snapshot_controller.dal.file_collection.get_by_id(
+            pulled_snapshot_obj.file_collection_id).filehash == filehash
+        collection_path = file_driver.get_collection_path(filehash)
+        files = dict((os.path.relpath(f.name, collection_path), f.read())
+                     for f in self.snapshot_controller.list_files(
+                         pulled_snapshot_obj.id))
+        assert files == {
+            os.path.join("dirpath", "filepath1"): "first contents",
+            "filepath2": "shared contents"
+        }
+        assert os.path.join("dirpath", "empty") in \
+               file_driver.get_collection_directories(filehash)
+
+        # Pulling again transfers nothing
+        result = self.remote_controller.pull()
+        assert result == {"snapshots": [], "blobs": []}
+
+        failed = False
+        try:
+            self.remote_controller.pull(snapshot_ids=["not_a_snapshot"])
+        except SnapshotDoesNotExist:
+            failed = True
+        assert failed
+
+    def test_push_pull_stored(self):
+        self.__setup(self.temp_dir)
+        file_driver = self.snapshot_controller.file_collection.file_driver
+        file_driver.chunk_threshold = 1024
+        contents = "first contents\n" * 10000
+        snapshot_obj = self.__create_snapshot(contents)
+        filehash = self.snapshot_controller.dal.file_collection.get_by_id(
+            snapshot_obj.file_collection_id).filehash
+        entry = file_driver.get_collection_manifest(filehash)[os.path.join(
+            "dirpath", "filepath1")]
+        assert entry["storage"] == "chunks"
+        self.remote_controller.push(self.remote_dir)
+        # Files stored chunked are streamed rather than restored to the cache
+        assert not os.path.isdir(file_driver.cache_directory)
+        with open(
+                os.path.join(self.remote_dir, "blobs", entry["hash"][:2],
+                             entry["hash"]), "rb") as f:
+            assert f.read() == to_bytes(contents)
+
+        # Collections pulled are stored chunked or compressed like any other
+        self.__setup(self.other_temp_dir)
+        file_driver = self.remote_controller.file_collection.file_driver
+        file_driver.compression = "zlib"
+        self.snapshot_controller.file_collection.file_driver.compression = \
+            "zlib"
+        self.snapshot_controller.file_collection.create(
+            [self.__write("filepath2", "shared contents")])
+        self.remote_controller.pull(self.remote_dir)
+        assert not os.path.isdir(file_driver.cache_directory)
+        pulled_filehash = self.snapshot_controller.dal.file_collection.\
+            get_by_id(self.snapshot_controller.get(
+                snapshot_obj.id).file_collection_id).filehash
+        manifest = file_driver.get_collection_manifest(pulled_filehash)
+        assert manifest[os.path.join("dirpath", "filepath1")]["storage"] == \
+            "zlib"
+        files = dict(
+            (os.path.basename(f.name), f.read())
+            for f in self.snapshot_controller.list_files(snapshot_obj.id))
+        assert files == {
+            "filepath1": contents,
+            "filepath2": "shared contents"
+        }
+
+    def test_pull_malicious(self):
+        self.__setup(self.temp_dir)
+        snapshot_obj = self.__create_snapshot("first contents")
+        filehash = self.snapshot_controller.dal.file_collection.get_by_id(
+            snapshot_obj.file_collection_id).filehash
+        self.remote_controller.push(self.remote_dir)
+        manifest_filepath = os.path.join(self.remote_dir, "collections",
+                                         filehash + ".json")
+        with open(manifest_filepath, "r") as f:
+            manifest = json.load(f)
+        blob_hash = manifest["files"]["filepath2"]["hash"]
+        escaped_filepath = os.path.join(
+            os.path.dirname(self.other_temp_dir), "escaped")
+
+        # Hashes and paths which leave the collection are refused before
+        # any file is written
+        self.__setup(self.other_temp_dir)
+        for files, directories in [
+            ({"filepath2": {"hash": "../../../../../escaped", "size": 15,
+                            "mode": 420}}, []),
+            ({"../../../../escaped": {"hash": blob_hash, "size": 15,
+                                      "mode": 420}}, []),
+            ({"filepath2": {"hash": blob_hash, "size": 15, "mode": 420}},
+             ["dirpath/../../../../../escaped"]),
+        ]:
+            with open(manifest_filepath, "wb") as f:
+                f.write(
+                    json.dumps(
+                        dict(manifest, files=files,
+                             directories=directories)).encode("utf-8"))
+            failed = False
+            try:
+                self.remote_controller.pull(self.remote_dir)
+            except RemoteTransferError:
+                failed = True
+            assert failed
+            assert not os.path.exists(escaped_filepath)
+        assert self.snapshot_controller.dal.snapshot.query({}) == []
+
+    def test_export_import_bundle(self):
+        self.__setup(self.temp_dir)
+        snapshot_obj = self.__create_snapshot("first contents")
+        code_obj = self.snapshot_controller.dal.code.get_by_id(
+            snapshot_obj.code_id)
+        bundle_filepath = os.path.join(self.remote_dir, "bundle.tar")
+        failed = False
+        try:
+            self.remote_controller.export_bundle(["not_a_snapshot"],
+                                                 bundle_filepath)
+        except SnapshotDoesNotExist:
+            failed = True
+        assert failed
+        failed = False
+        try:
+            self.remote_controller.export_bundle(
+                [snapshot_obj.id], bundle_filepath, compression="not_one")
+        except InvalidCompression:
+            failed = True
+        assert failed
+
+        result = self.remote_controller.export_bundle(
+            [snapshot_obj.id], bundle_filepath, compression="zlib")
+        assert result["snapshots"] == [snapshot_obj.id]
+        assert len(result["blobs"]) == 5
+        with tarfile.open(bundle_filepath, "r:gz") as tar:
+            names = tar.getnames()
+        assert names[0] == "datmo-bundle.json"
+        assert "code/" + code_obj.commit_id in names
+
+        # Import into a project which shares one of the files
+        self.__setup(self.other_temp_dir)
+        self.snapshot_controller.file_collection.create(
+            [self.__write("filepath2", "shared contents")])
+        result = self.remote_controller.import_bundle(bundle_filepath)
+        assert result["snapshots"] == [snapshot_obj.id]
+        assert len(result["blobs"]) == 4
+        imported_snapshot_obj = self.snapshot_controller.get(snapshot_obj.id)
+        assert imported_snapshot_obj.message == snapshot_obj.message
+        assert self.snapshot_controller.code_driver.exists_ref(
+            code_obj.commit_id)
+        files = sorted(
+            f.read() for f in self.snapshot_controller.list_files(
+                imported_snapshot_obj.id))
+        assert files == ["first contents", "shared contents"]
+
+        # Importing again creates nothing
+        result = self.remote_controller.import_bundle(bundle_filepath)
+        assert result == {"snapshots": [], "blobs": []}
+
+        # Files which are not bundles are refused
+        with tarfile.open(os.path.join(self.remote_dir, "other.tar"),
+                          "w") as tar:
+            tar.add(self.__write("other", "other"), arcname="other")
+        failed = False
+        try:
+            self.remote_controller.import_bundle(
+                os.path.join(self.remote_dir, "other.tar"))
+        except FileIOError:
+            failed = True
+        assert failed
+
+    def test_export_bundle_stored(self):
+        self.__setup(self.temp_dir)
+        file_driver = self.snapshot_controller.file_collection.file_driver
+        file_driver.chunk_threshold = 1024
+        contents = "first contents\n" * 10000
+        snapshot_obj = self.__create_snapshot(contents)
+        filehash = self.snapshot_controller.dal.file_collection.get_by_id(
+            snapshot_obj.file_collection_id).filehash
+        entry = file_driver.get_collection_manifest(filehash)[os.path.join(
+            "dirpath", "filepath1")]
+        assert entry["storage"] == "chunks"
+        bundle_filepath = os.path.join(self.remote_dir, "bundle.tar")
+        self.remote_controller.export_bundle([snapshot_obj.id],
+                                             bundle_filepath)
+        # Files stored chunked are streamed rather than restored to the cache
+        assert not os.path.isdir(file_driver.cache_directory)
+        with tarfile.open(bundle_filepath, "r") as tar:
+            assert tar.extractfile("blobs/" + entry["hash"]).read() == \
+                to_bytes(contents)
+
+    def test_import_bundle_malicious(self):
+        self.__setup(self.temp_dir)
+        snapshot_obj = self.__create_snapshot("first contents")
+        filehash = self.snapshot_controller.dal.file_collection.get_by_id(
+            snapshot_obj.file_collection_id).filehash
+        bundle_filepath = os.path.join(self.remote_dir, "bundle.tar")
+        self.remote_controller.export_bundle([snapshot_obj.id],
+                                             bundle_filepath)
+        with tarfile.open(bundle_filepath, "r") as tar:
+            members = [(member, tar.extractfile(member).read()
+                        if member.isfile() else None) for member in tar]
+        manifest_name = "collections/%s.json" % filehash
+        manifest = json.loads(
+            dict((member.name, data)
+                 for member, data in members)[manifest_name].decode("utf-8"))
+        blob_hash = manifest["files"]["filepath2"]["hash"]
+        escaped_filepath = os.path.join(
+            os.path.dirname(self.other_temp_dir), "escaped")
+
+        def write_bundle(files, directories):
+            malicious_manifest = dict(
+                manifest, files=files, directories=directories)
+            with tarfile.open(bundle_filepath, "w") as tar:
+                for member, data in members:
+                    if member.name == manifest_name:
+                        data = json.dumps(malicious_manifest).encode("utf-8")
+                        member.size = len(data)
+                    if member.name == "blobs/" + blob_hash:
+                        # The blob is renamed to the path to escape to
+                        for bad_hash in files.values():
+                            bad_member = tarfile.TarInfo(
+                                "blobs/" + bad_hash["hash"])
+                            bad_member.size = len(data)
+                            tar.addfile(bad_member, io.BytesIO(data))
+                    tar.addfile(member, io.BytesIO(data)
+                                if data is not None else None)
+
+        # Hashes and paths which leave the collection are refused before
+        # any file is written
+        self.__setup(self.other_temp_dir)
+        for files, directories in [
+            ({"filepath2": {"hash": "../../../../../escaped", "size": 15, "mode": 420}},
+             []),
+            ({"../../../../escaped": {"hash": blob_hash, "size": 15, "mode": 420}},
+             []),
+            ({"/tmp/escaped": {"hash": blob_hash, "size": 15, "mode": 420}},
+             []),
+            ({"filepath2": {"hash": blob_hash, "size": 15, "mode": 420}},
+             ["dirpath/../../../../../escaped"]),
+        ]:
+            write_bundle(files, directories)
+            failed = False
+            try:
+                self.remote_controller.import_bundle(bundle_filepath)
+            except RemoteTransferError:
+                failed = True
+            assert failed
+            assert not os.path.exists(escaped_filepath)
+            assert not os.path.exists("/tmp/escaped")
+        assert self.snapshot_controller.dal.snapshot.query({}) == []
+
+    def __write(self, name, contents):
+        filepath = os.path.join(self.snapshot_controller.home, name)
+        with open(filepath, "wb") as f:
+            f.write(to_bytes(contents))
+        return filepath
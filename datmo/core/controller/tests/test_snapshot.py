@@ -30,7 +30,7 @@ from datmo.core.entity.snapshot import Snapshot
 from datmo.core.util.exceptions import (
     EntityNotFound, CommitFailed, SessionDoesNotExist, RequiredArgumentMissing,
     TaskNotComplete, InvalidArgumentType, ProjectNotInitialized,
-    InvalidProjectPath, DoesNotExist)
+    InvalidProjectPath, DoesNotExist, PathDoesNotExist)
 from datmo.core.util.misc_functions import pytest_docker_environment_failed_instantiation
 
 # provide mountable tmp directory for docker
@@ -625,6 +625,77 @@ class TestSnapshotController():
 
         assert result == True
 
+    def test_checkout_git_private_index(self):
+        Config().set_home(self.temp_dir)
+        self.project_controller = ProjectController()
+        self.project_controller.config_store.save("code_driver", "git")
+        self.project_controller.config_store.save("git_private_index", True)
+        self.project_controller.init("test", "test description")
+        self.task_controller = TaskController()
+        self.snapshot_controller = SnapshotController()
+        assert self.snapshot_controller.code_driver.type == "git"
+        assert self.snapshot_controller.code_driver.private_index
+        snapshot_obj_1 = self.__default_create()
+        code_filepath = os.path.join(self.snapshot_controller.home,
+                                     "filepath2")
+        # The code of the snapshot is left untracked on the branch of the user
+        assert not self.snapshot_controller.code_driver.\
+            check_unstaged_changes()
+
+        with open(code_filepath, "wb") as f:
+            f.write(to_bytes(str("import os\n")))
+        snapshot_obj_2 = self.snapshot_controller.create({
+            "message": "my test snapshot"
+        })
+        assert snapshot_obj_2.code_id != snapshot_obj_1.code_id
+
+        result = self.snapshot_controller.checkout(snapshot_obj_1.id)
+        assert result == True
+        with open(code_filepath, "r") as f:
+            assert f.read() == "import sys\n"
+        assert self.snapshot_controller.code_driver.current_ref() == \
+            self.snapshot_controller.dal.code.get_by_id(
+                snapshot_obj_1.code_id).commit_id
+
+    def test_checkout_paths(self):
+        self.__setup()
+        snapshot_obj_1 = self.__default_create()
+        files_directory = self.snapshot_controller.file_driver.files_directory
+        code_filepath = os.path.join(self.snapshot_controller.home,
+                                     "filepath2")
+        file_filepath = os.path.join(files_directory, "filepath1")
+        with open(code_filepath, "wb") as f:
+            f.write(to_bytes(str("import os\n")))
+        with open(file_filepath, "wb") as f:
+            f.write(to_bytes(str("changed")))
+        with open(os.path.join(files_directory, "new_file"), "wb") as f:
+            f.write(to_bytes(str("new")))
+
+        # Only the code file matching is restored
+        result = self.snapshot_controller.checkout(
+            snapshot_obj_1.id, paths=["filepath2"])
+        assert result == True
+        with open(code_filepath, "r") as f:
+            assert f.read() == "import sys\n"
+        with open(file_filepath, "r") as f:
+            assert f.read() == "changed"
+
+        # Patterns match files in the project files directory
+        result = self.snapshot_controller.checkout(
+            snapshot_obj_1.id, paths=["file*1"])
+        assert result == True
+        with open(file_filepath, "r") as f:
+            assert f.read() == ""
+        assert os.path.isfile(os.path.join(files_directory, "new_file"))
+
+        failed = False
+        try:
+            self.snapshot_controller.checkout(
+                snapshot_obj_1.id, paths=["does_not_exist/*"])
+        except PathDoesNotExist:
+            failed = True
+        assert failed
+
     def test_list(self):
         self.__setup()
         # Check for error if incorrect session given
@@ -855,6 +926,75 @@ class TestSnapshotController():
                             file_collection_obj.filehash,
                             "filepath1") in file_names
 
+    def test_open_mmap(self):
+        self.__setup()
+        # Large compressible files are stored compressed
+        self.snapshot_controller.file_collection.file_driver.compression = \
+            "zlib"
+        data = to_bytes("0123456789abcdef" * 8192)
+        with open(
+                os.path.join(
+                    self.project_controller.file_driver.files_directory,
+                    "weights.bin"), "wb") as f:
+            f.write(data)
+        snapshot_obj = self.__default_create()
+
+        # Test failure cases
+        failed = False
+        try:
+            self.snapshot_controller.open_mmap("random", "weights.bin")
+        except DoesNotExist:
+            failed = True
+        assert failed
+        failed = False
+        try:
+            self.snapshot_controller.open_mmap(snapshot_obj.id, "random")
+        except PathDoesNotExist:
+            failed = True
+        assert failed
+
+        # Test success cases
+        result = self.snapshot_controller.open_mmap(snapshot_obj.id,
+                                                    "weights.bin")
+        assert result[:] == data
+        failed = False
+        try:
+            result[0] = 0
+        except TypeError:
+            failed = True
+        assert failed
+        result.close()
+        filepath = self.snapshot_controller.get_filepath(
+            snapshot_obj.id, "weights.bin")
+        assert filepath.startswith(
+            os.path.join(self.snapshot_controller.home, ".datmo", "cache"))
+
+        with self.snapshot_controller.get_file_buffer(
+                snapshot_obj.id, "weights.bin") as result:
+            assert bytes(result) == data
+            failed = False
+            try:
+                result[0] = b"0"
+            except TypeError:
+                failed = True
+            assert failed
+        # The buffer is released once the block exits
+        if isinstance(result, memoryview):
+            failed = False
+            try:
+                bytes(result)
+            except ValueError:
+                failed = True
+            assert failed
+        # Objects made from the buffer can outlive the block
+        with self.snapshot_controller.get_file_buffer(
+                snapshot_obj.id, "weights.bin") as result:
+            head = result[:16]
+        assert bytes(head) == data[:16]
+        with self.snapshot_controller.get_file_buffer(
+                snapshot_obj.id, "filepath1") as result:
+            assert bytes(result) == b""
+
     def test_delete(self):
         self.__setup()
         # Create snapshot in the project
@@ -20,6 +20,10 @@ class Code():
             the driver class that created the entity
         commit_id : str
             commit id given by the driver
+        hash_algorithm : str, optional
+            name of the hash algorithm used by the driver to compute the commit id
+            (default is "sha1" for git and "md5" otherwise, the algorithms used
+            before it was selectable)
         created_at : datetime.datetime, optional
             (default is datetime.utcnow(), at time of instantiation)
         updated_at : datetime.datetime, optional
@@ -35,6 +39,8 @@ class Code():
         the driver class that created the entity
     commit_id : str
         commit id given by the driver
+    hash_algorithm : str
+        name of the hash algorithm used by the driver to compute the commit id
     created_at : datetime.datetime
     updated_at : datetime.datetime
 
@@ -46,6 +52,8 @@ class Code():
         self.driver_type = dictionary['driver_type']
 
         self.commit_id = dictionary['commit_id']
+        self.hash_algorithm = dictionary.get(
+            'hash_algorithm', "sha1" if self.driver_type == "git" else "md5")
 
         self.created_at = dictionary.get('created_at', datetime.utcnow())
         self.updated_at = dictionary.get('updated_at', self.created_at)
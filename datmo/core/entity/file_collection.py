@@ -20,6 +20,9 @@ class FileCollection():
             the driver class that created the entity
         filehash : str
             hash of file collection contents
+        hash_algorithm : str, optional
+            name of the hash algorithm used to compute the filehash
+            (default is "md5", the algorithm used before it was selectable)
         path : str
             path to collection relative to project root
         created_at : datetime.datetime, optional
@@ -37,6 +40,8 @@ class FileCollection():
         the driver class that created the entity
     filehash : str
         hash of file collection contents
+    hash_algorithm : str
+        name of the hash algorithm used to compute the filehash
     path : str
         path to collection relative to project root
     created_at : datetime.datetime
@@ -49,6 +54,7 @@ class FileCollection():
         self.driver_type = dictionary['driver_type']
 
         self.filehash = dictionary['filehash']
+        self.hash_algorithm = dictionary.get('hash_algorithm', "md5")
         self.path = dictionary['path']
 
         self.created_at = dictionary.get('created_at', datetime.utcnow())
@@ -75,6 +75,9 @@ class Task():
         duration : float, optional
             float object signifying number of seconds for run
             (default is None, which means it isn't set yet)
+        build_cache_hit : bool, optional
+            boolean to signify the environment image existed and was not built for the run
+            (default is None, which means it isn't set yet)
         created_at : datetime.datetime, optional
             (default is datetime.utcnow(), at time of instantiation)
         updated_at : datetime.datetime, optional
@@ -123,6 +126,8 @@ class Task():
         timestamp for the beginning time of the task
     duration : float or None
         float object signifying number of seconds for run
+    build_cache_hit : bool or None
+        boolean to signify the environment image existed and was not built for the run
     created_at : datetime.datetime
     updated_at : datetime.datetime
     """
@@ -153,6 +158,7 @@ class Task():
         self.results = dictionary.get('results', None)
         self.end_time = dictionary.get('end_time', None)
         self.duration = dictionary.get('duration', None)
+        self.build_cache_hit = dictionary.get('build_cache_hit', None)
 
         self.created_at = dictionary.get('created_at', datetime.utcnow())
         self.updated_at = dictionary.get('updated_at', self.created_at)
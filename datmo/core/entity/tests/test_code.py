@@ -18,6 +18,7 @@ class TestCode():
         for k, v in self.input_dict.items():
             assert getattr(code_entity, k) == v
         assert code_entity.id == None
+        assert code_entity.hash_algorithm == "sha1"
         assert code_entity.created_at
         assert code_entity.updated_at
 
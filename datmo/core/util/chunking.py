@@ -0,0 +1,285 @@
+import io
+import os
+import binascii
+import hashlib
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Chunk sizes used for content defined chunking of large files
+CHUNK_MIN_SIZE = 256 * 1024
+CHUNK_AVG_SIZE = 1024 * 1024
+CHUNK_MAX_SIZE = 4 * 1024 * 1024
+CHUNK_READ_SIZE = 1024 * 1024
+# Bytes searched for a boundary at once, bounding the work done past it
+CHUNK_SCAN_SIZE = 32 * 1024
+
+_HASH_MASK = 0xFFFFFFFFFFFFFFFF
+# Deterministic random values for each byte used by the gear rolling hash
+_GEAR = [
+    int(hashlib.md5(("%d" % i).encode("ascii")).hexdigest()[:16], 16)
+    for i in range(256)
+]
+# Each byte of the gear values, to translate data into the bytes of its lanes
+_GEAR_BYTE_TABLES = [
+    bytes(bytearray((gear >> (8 * i)) & 0xFF for gear in _GEAR))
+    for i in range(8)
+]
+# Bytes of the lane holding the hash of each position, one more than the hash
+# so the carry of an addition stays within the lane
+_LANE_SIZE = 9
+_GEAR_ARRAY = numpy.array(
+    _GEAR, dtype=numpy.uint64) if numpy is not None else None
+# Integers with a constant in every lane, by lane count and boundary mask
+_LANE_CONSTANTS = {}
+
+
+def _get_boundary_mask(avg_size):
+    # The high bits of the gear hash depend on the last 64 bytes, so boundaries
+    # are found when the top log2(avg_size) bits are all zero
+    bits = max(1, int(avg_size).bit_length() - 1)
+    return ((1 << bits) - 1) << (64 - bits)
+
+
+def _int_from_bytes(data):
+    """Returns the little endian integer of the bytes given"""
+    if hasattr(int, "from_bytes"):
+        return int.from_bytes(data, "little")
+    return int(binascii.hexlify(data[::-1]), 16) if data else 0
+
+
+def _get_lane_constants(count, mask):
+    key = (count, mask)
+    if key not in _LANE_CONSTANTS:
+        # Multiplying a value by ones repeats it in every lane
+        ones = _int_from_bytes(
+            (b"\x01" + b"\x00" * (_LANE_SIZE - 1)) * count)
+        _LANE_CONSTANTS[key] = (_HASH_MASK * ones, mask * ones,
+                                (1 << 64) * ones,
+                                dict((shift, (_HASH_MASK >> shift) * ones)
+                                     for shift in [1, 2, 4, 8, 16, 32]))
+    return _LANE_CONSTANTS[key]
+
+
+def _scan_lanes(data, start, end, mask):
+    """Returns the first boundary within data[start:end] or None, with python integers
+
+    The hash of every position is held in its own lane of one large integer.
+    The hash is the sum of the gear values of the last 64 bytes shifted by
+    their distance, so each step adds the lanes shifted by twice as many
+    bytes and 6 steps cover the 64 bytes, running as integer operations over
+    the whole slice instead of bytecodes for each byte
+    """
+    low = max(0, start - 64)
+    # Slices are padded to the same number of lanes to reuse the constants
+    count = CHUNK_SCAN_SIZE + 64
+    segment = bytes(data[low:end])
+    segment += b"\x00" * (count - len(segment))
+    lanes = bytearray(_LANE_SIZE * count)
+    for i, table in enumerate(_GEAR_BYTE_TABLES):
+        lanes[i::_LANE_SIZE] = segment.translate(table)
+    lane_bits = 8 * _LANE_SIZE
+    hash_mask, boundary_mask, carry_bits, shift_masks = \
+        _get_lane_constants(count, mask)
+    rolling_hash = _int_from_bytes(lanes)
+    shift = 1
+    while shift < 64:
+        # Bits shifted past the hash are dropped first so no lane overflows
+        rolling_hash = (rolling_hash + (
+            (rolling_hash & shift_masks[shift]) <<
+            (shift * lane_bits + shift))) & hash_mask
+        shift *= 2
+    # Adding the hash mask carries into bit 64 of every lane but boundaries
+    carried = (rolling_hash & boundary_mask) + hash_mask
+    boundaries = (~carried & carry_bits) >> ((start - low) * lane_bits)
+    # Lanes of the padding are not part of the data
+    boundaries &= (1 << ((end - start) * lane_bits)) - 1
+    if not boundaries:
+        return None
+    return start + ((boundaries & -boundaries).bit_length() - 1) // \
+        lane_bits + 1
+
+
+def _scan_numpy(data, start, end, mask):
+    """Returns the first boundary within data[start:end] or None, with numpy arrays"""
+    low = max(0, start - 64)
+    rolling_hash = _GEAR_ARRAY[numpy.frombuffer(
+        bytes(data[low:end]), dtype=numpy.uint8)]
+    shift = 1
+    while shift < 64:
+        rolling_hash[shift:] += rolling_hash[:-shift] << numpy.uint64(shift)
+        shift *= 2
+    boundaries = numpy.flatnonzero(
+        (rolling_hash[start - low:] & numpy.uint64(mask)) == 0)
+    if not boundaries.size:
+        return None
+    return start + int(boundaries[0]) + 1
+
+
+def find_chunk_boundary(data, min_size=CHUNK_MIN_SIZE,
+                        avg_size=CHUNK_AVG_SIZE, max_size=CHUNK_MAX_SIZE):
+    """Returns the length of the first content defined chunk within data
+
+    Data past min_size is searched in slices of CHUNK_SCAN_SIZE, hashing
+    every position of a slice at once with numpy if installed or else with
+    python integers, which is several times faster than hashing byte by byte
+
+    Parameters
+    ----------
+    data : bytearray
+        data to find the chunk boundary in
+    min_size : int, optional
+        minimum size of a chunk
+    avg_size : int, optional
+        average size of a chunk, must be a power of 2
+    max_size : int, optional
+        maximum size of a chunk
+
+    Returns
+    -------
+    int
+        length of the chunk, which is the length of data if no boundary is found
+    """
+    length = min(len(data), max_size)
+    if length <= min_size:
+        return length
+    mask = _get_boundary_mask(avg_size)
+    scan = _scan_numpy if numpy is not None else _scan_lanes
+    for start in range(min_size, length, CHUNK_SCAN_SIZE):
+        boundary = scan(data, start, min(length, start + CHUNK_SCAN_SIZE),
+                        mask)
+        if boundary is not None:
+            return boundary
+    return length
+
+
+def iter_chunks(fileobj, min_size=CHUNK_MIN_SIZE, avg_size=CHUNK_AVG_SIZE,
+                max_size=CHUNK_MAX_SIZE):
+    """Yields content defined chunks of a binary file object
+
+    Boundaries are found with a gear rolling hash, so an insertion or deletion
+    only changes the chunks around it and the rest of the chunks are shared
+
+    Parameters
+    ----------
+    fileobj : file
+        python file object opened in binary mode
+    min_size : int, optional
+        minimum size of a chunk
+    avg_size : int, optional
+        average size of a chunk, must be a power of 2
+    max_size : int, optional
+        maximum size of a chunk
+
+    Yields
+    ------
+    bytes
+        contents of each chunk in order
+    """
+    buffer = bytearray()
+    eof = False
+    while True:
+        while not eof and len(buffer) < max_size:
+            data = fileobj.read(CHUNK_READ_SIZE)
+            if not data:
+                eof = True
+            buffer.extend(data)
+        if not buffer:
+            return
+        if eof and len(buffer) <= min_size:
+            length = len(buffer)
+        else:
+            length = find_chunk_boundary(buffer, min_size, avg_size, max_size)
+        yield bytes(buffer[:length])
+        del buffer[:length]
+
+
+class ChunkedFileReader(io.RawIOBase):
+    """Read only file object which streams the contents of a file stored as chunks
+
+    Parameters
+    ----------
+    chunks : list
+        list of tuples of the form (absolute_chunk_filepath, size) in order
+    name : str, optional
+        name of the file represented
+
+    Attributes
+    ----------
+    name : str
+        name of the file represented
+    size : int
+        total size of the file
+    """
+
+    def __init__(self, chunks, name=None):
+        super(ChunkedFileReader, self).__init__()
+        self.chunks = chunks
+        self.name = name
+        self.offsets = []
+        self.size = 0
+        for _, chunk_size in chunks:
+            self.offsets.append(self.size)
+            self.size += chunk_size
+        self._position = 0
+        self._chunk_index = None
+        self._chunk_file = None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("negative seek position %d" % offset)
+        self._position = offset
+        return self._position
+
+    def _find_chunk_index(self, position):
+        # Binary search for the last chunk starting at or before position
+        low, high = 0, len(self.offsets) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.offsets[middle] <= position:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def readinto(self, b):
+        if self._position >= self.size or not len(b):
+            return 0
+        chunk_index = self._find_chunk_index(self._position)
+        if chunk_index != self._chunk_index:
+            if self._chunk_file is not None:
+                self._chunk_file.close()
+            self._chunk_file = open(self.chunks[chunk_index][0], "rb")
+            self._chunk_index = chunk_index
+        self._chunk_file.seek(self._position - self.offsets[chunk_index])
+        data = self._chunk_file.read(
+            min(len(b), self.offsets[chunk_index] +
+                self.chunks[chunk_index][1] - self._position))
+        b[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def close(self):
+        if self._chunk_file is not None:
+            self._chunk_file.close()
+            self._chunk_file = None
+        super(ChunkedFileReader, self).close()
+
+
+def get_chunk_path(chunks_dirpath, chunk_hash):
+    """Returns the path a chunk is stored at in a chunk directory"""
+    return os.path.join(chunks_dirpath, chunk_hash[:2], chunk_hash)
@@ -0,0 +1,108 @@
+import os
+import gzip
+import zlib
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+from datmo.core.util.i18n import get as __
+from datmo.core.util.exceptions import InvalidCompression
+
+# Files smaller than this are never compressed so small definition files stay raw
+COMPRESSION_MIN_SIZE = 64 * 1024
+# Size of the sample used to measure the compression ratio of unknown file types
+COMPRESSION_SAMPLE_SIZE = 64 * 1024
+# Maximum sample compression ratio (compressed / raw) worth compressing
+COMPRESSION_MAX_RATIO = 0.8
+
+COMPRESSION_SUFFIXES = {"zlib": ".datmo-gz", "lzma": ".datmo-xz"}
+
+COMPRESSIBLE_EXTENSIONS = [
+    ".csv", ".tsv", ".txt", ".json", ".jsonl", ".log", ".xml", ".yaml",
+    ".yml", ".html", ".md", ".py", ".ipynb", ".svg", ".sql"
+]
+INCOMPRESSIBLE_EXTENSIONS = [
+    ".gz", ".tgz", ".bz2", ".xz", ".lzma", ".zip", ".7z", ".rar", ".npz",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp3", ".mp4", ".avi",
+    ".mkv", ".mov", ".parquet", ".whl", ".jar"
+]
+
+
+def get_supported_compressions():
+    """Returns the names of the compressions available in this python"""
+    return [
+        compression for compression in sorted(COMPRESSION_SUFFIXES)
+        if compression != "lzma" or lzma is not None
+    ]
+
+
+def validate_compression(compression):
+    """Raises an InvalidCompression error if the compression is not available"""
+    if compression not in get_supported_compressions():
+        raise InvalidCompression(
+            __("error", "util.compression.validate_compression",
+               (compression, ", ".join(get_supported_compressions()))))
+
+
+def should_compress(filepath):
+    """Returns whether a file is worth compressing
+
+    Known text formats are always compressed and known compressed formats
+    never are. Other files are compressed if a sample from the start of the
+    file compresses well enough
+
+    Parameters
+    ----------
+    filepath : str
+        absolute path of the file
+
+    Returns
+    -------
+    bool
+        True if the file should be compressed else False
+    """
+    extension = os.path.splitext(filepath)[1].lower()
+    if extension in COMPRESSIBLE_EXTENSIONS:
+        return True
+    if extension in INCOMPRESSIBLE_EXTENSIONS:
+        return False
+    with open(filepath, "rb") as f:
+        sample = f.read(COMPRESSION_SAMPLE_SIZE)
+    if not sample:
+        return False
+    compressed_sample = zlib.compress(sample, 1)
+    return len(compressed_sample) <= COMPRESSION_MAX_RATIO * len(sample)
+
+
+def open_compressed(filepath, compression, mode="rb"):
+    """Returns a streaming binary file object for a compressed file
+
+    Parameters
+    ----------
+    filepath : str
+        absolute path of the compressed file
+    compression : str
+        name of the compression, either "zlib" (gzip format) or "lzma" (xz format)
+    mode : str, optional
+        either "rb" or "wb"
+        (default is "rb")
+
+    Returns
+    -------
+    file
+        python file object which compresses on write or decompresses on read
+    """
+    validate_compression(compression)
+    if compression == "lzma":
+        return lzma.LZMAFile(filepath, mode)
+    # mtime is fixed so the same contents are always stored identically
+    return gzip.GzipFile(filepath, mode, compresslevel=6, mtime=0)
+
+
+def get_compression_from_path(filepath):
+    """Returns the compression a stored file uses from its suffix or None"""
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if filepath.endswith(suffix):
+            return compression
+    return None
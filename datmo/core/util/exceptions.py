@@ -142,6 +142,12 @@ class FileIOError(FileExecutionError):
     pass
 
 
+class RemoteTransferError(FileIOError):
+    def __init__(self, message, completed_parts=None):
+        super(RemoteTransferError, self).__init__(message)
+        self.completed_parts = completed_parts or {}
+
+
 class FileStructureError(FileExecutionError):
     pass
 
@@ -210,6 +216,14 @@ class InvalidDestinationName(ArgumentError):
     pass
 
 
+class InvalidHashAlgorithm(ArgumentError):
+    pass
+
+
+class InvalidCompression(ArgumentError):
+    pass
+
+
 class ValidationFailed(ArgumentError):
     def __init__(self, error_obj):
         self.errors = error_obj
@@ -0,0 +1,169 @@
+import itertools
+import threading
+from collections import OrderedDict
+
+# Maximum number of file handles kept open at once by file references
+MAX_OPEN_FILE_HANDLES = 64
+# Unique keys of file references, unlike id() they are never reused
+_FILE_REFERENCE_KEYS = itertools.count()
+
+
+class FileHandlePool(object):
+    """Bounded pool of file handles opened for file references
+
+    When the pool is full the least recently used handle is closed and its
+    position remembered, so it is reopened where it was left on next use.
+    The pool is shared across threads, so the lock must be held while a
+    handle returned by acquire() is used
+
+    Parameters
+    ----------
+    max_size : int, optional
+        maximum number of handles open at once
+        (default is MAX_OPEN_FILE_HANDLES)
+
+    Attributes
+    ----------
+    max_size : int
+    lock : threading.RLock
+        lock held while the pool or a handle from it is used
+    """
+
+    def __init__(self, max_size=MAX_OPEN_FILE_HANDLES):
+        self.max_size = max_size
+        self.lock = threading.RLock()
+        self._handles = OrderedDict()
+        self._positions = {}
+
+    def __len__(self):
+        return len(self._handles)
+
+    def acquire(self, file_reference):
+        """Return an open handle for the file reference, opening it if needed"""
+        key = file_reference.key
+        with self.lock:
+            handle = self._handles.pop(key, None)
+            if handle is None:
+                while len(self._handles) >= self.max_size:
+                    evicted_key, evicted_handle = self._handles.popitem(
+                        last=False)
+                    self._positions[evicted_key] = evicted_handle.tell()
+                    evicted_handle.close()
+                handle = file_reference.open()
+                position = self._positions.pop(key, None)
+                if position is not None:
+                    handle.seek(position)
+            self._handles[key] = handle
+            return handle
+
+    def release(self, file_reference):
+        """Close the handle of the file reference and forget its position"""
+        key = file_reference.key
+        with self.lock:
+            self._positions.pop(key, None)
+            handle = self._handles.pop(key, None)
+            if handle is not None:
+                handle.close()
+
+
+FILE_HANDLE_POOL = FileHandlePool()
+
+
+class FileReference(object):
+    """Reference to a file which is only opened when read
+
+    Reading directly from the reference uses a handle from a bounded pool, so
+    any number of references can be listed and read without reaching the open
+    file limit. Use open() to get a handle owned by the caller instead
+
+    Parameters
+    ----------
+    name : str
+        name of the file
+    size : int
+        size of the file in bytes
+    opener : function
+        function taking a file open mode and returning a python file object
+    mode : str, optional
+        file open mode used when reading from the reference
+        (default is "r")
+    pool : FileHandlePool, optional
+        pool of handles used when reading from the reference
+        (default is the shared FILE_HANDLE_POOL)
+
+    Attributes
+    ----------
+    name : str
+    size : int
+    mode : str
+    key : int
+        key unique to the reference, used by the pool
+    """
+
+    def __init__(self, name, size, opener, mode="r", pool=None):
+        self.name = name
+        self.size = size
+        self.mode = mode
+        self.key = next(_FILE_REFERENCE_KEYS)
+        self._opener = opener
+        self._pool = pool if pool is not None else FILE_HANDLE_POOL
+
+    def open(self, mode=None):
+        """Open the file
+
+        Parameters
+        ----------
+        mode : str, optional
+            file open mode (default is None, which uses the reference mode)
+
+        Returns
+        -------
+        file
+            python file object which the caller must close
+        """
+        return self._opener(mode if mode is not None else self.mode)
+
+    def _call_handle(self, method_name, *args):
+        # The handle could be evicted by another thread once the lock is released
+        with self._pool.lock:
+            return getattr(self._pool.acquire(self), method_name)(*args)
+
+    def read(self, size=-1):
+        return self._call_handle("read", size)
+
+    def readline(self, size=-1):
+        return self._call_handle("readline", size)
+
+    def readlines(self):
+        return self._call_handle("readlines")
+
+    def seek(self, offset, whence=0):
+        return self._call_handle("seek", offset, whence)
+
+    def tell(self):
+        return self._call_handle("tell")
+
+    def close(self):
+        self._pool.release(self)
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __repr__(self):
+        return "<FileReference name=%r size=%d>" % (self.name, self.size)
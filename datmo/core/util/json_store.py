@@ -39,15 +39,20 @@ class JSONStore():
         # keep file in memory until a write occurs
         self.in_memory_settings = False
 
-    def to_file(self, dictionary):
-        with open(self.filepath, "wb") as outfile:
-            str_ = json.dumps(
+    @staticmethod
+    def serialize(dictionary):
+        """Return the contents of the file the dictionary is saved as"""
+        return to_bytes(
+            json.dumps(
                 dictionary,
                 indent=4,
                 sort_keys=True,
                 separators=(',', ': '),
-                ensure_ascii=False)
-            outfile.write(to_bytes(str_))
+                ensure_ascii=False))
+
+    def to_file(self, dictionary):
+        with open(self.filepath, "wb") as outfile:
+            outfile.write(self.serialize(dictionary))
         return
 
     def save(self, key, value):
@@ -109,11 +114,33 @@ class JSONStore():
         if os.path.exists(self.filepath):
             with open(self.filepath) as data_file:
                 meta_data_string = data_file.read()
-            if not meta_data_string:
-                return {}
-            try:
-                output_dict = json.loads(meta_data_string)
-                output_dict = yaml.safe_load(json.dumps(output_dict))
-            except Exception as err:
-                raise FileIOError(err)
+            output_dict = JSONStore.parse(meta_data_string)
+        return output_dict
+
+    @staticmethod
+    def parse(meta_data_string):
+        """Return the dictionary for a JSON string read from a file
+
+        Parameters
+        ----------
+        meta_data_string : str
+            contents of a JSON file
+
+        Returns
+        -------
+        dict
+            output dictionary, empty if the string is empty
+
+        Raises
+        ------
+        FileIOError
+            if the string is not valid JSON
+        """
+        if not meta_data_string:
+            return {}
+        try:
+            output_dict = json.loads(meta_data_string)
+            output_dict = yaml.safe_load(json.dumps(output_dict))
+        except Exception as err:
+            raise FileIOError(err)
         return output_dict
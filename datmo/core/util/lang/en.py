@@ -28,6 +28,22 @@ MESSAGES = {
             "Removed project {name} @ ({path}) ",
         "cli.project.cleanup.failure":
             "Failed to remove project {name} @ ({path}) ",
+        "cli.project.gc":
+            "Found %s unreferenced %s",
+        "cli.project.gc.remove":
+            "Removed %s unreferenced %s",
+        "cli.project.fsck":
+            "Checked %s objects, skipped %s verified recently: %.1f MB in %.2f s (%.1f MB/s)",
+        "cli.project.repack":
+            "Packed %s code objects, %s of them loose, into %s (%.1f MB)",
+        "cli.project.repack.none":
+            "No loose code objects to pack",
+        "cli.project.repack.dropped":
+            "Dropped %s packed code objects no code ref uses",
+        "cli.remote.push":
+            "Pushed %s snapshots, uploading %s files",
+        "cli.remote.pull":
+            "Pulled %s snapshots, downloading %s files",
         "cli.general.abort":
             u'\u274c' + "  Your changes have been aborted!",
         "cli.general.success":
@@ -63,8 +79,16 @@ MESSAGES = {
             "Updating a snapshot",
         "cli.snapshot.update.success":
             "Updated snapshot with id: %s",
+        "cli.snapshot.diff.files":
+            "Files: %s added, %s removed, %s modified (%+d B)",
+        "cli.snapshot.export":
+            "Exported snapshot %s to %s with %s files",
+        "cli.snapshot.import":
+            "Imported %s snapshots, extracting %s files",
         "cli.snapshot.checkout.success":
             "Moved to snapshot with id: %s",
+        "cli.snapshot.checkout.paths.success":
+            "Checked out files of snapshot %s matching: %s",
         "cli.task.run":
             "Running a new task",
         "cli.task.run.stop":
@@ -102,7 +126,13 @@ MESSAGES = {
         "controller.project.cleanup.code":
             "Error cleaning up project code",
         "controller.project.cleanup.files":
-            "Error cleaning up project files"
+            "Error cleaning up project files",
+        "controller.project.gc.environment":
+            "Environment driver not initialized, unreferenced environments will be kept",
+        "controller.project.gc.remove":
+            "Error removing unreferenced %s: %s",
+        "controller.remote.pull.code":
+            "Code %s is not in the code driver, fetch it with the code driver's own remote"
     },
     "error": {
         "exception.validationfailed":
@@ -145,6 +175,10 @@ MESSAGES = {
             "Error due to passing excluded args while creating snapshot from task: %s",
         "util.misc_functions.get_filehash":
             "Filepath does not point to a valid file: %s",
+        "util.misc_functions.get_hash_function":
+            "Hash algorithm is not supported: %s",
+        "util.compression.validate_compression":
+            "Compression %s is not supported, choose from: %s",
         "util.misc_functions.mutually_exclusive":
             "Mutually exclusive arguments passed: %s",
         "controller.code.driver.file.create_ref.no_commit":
@@ -155,6 +189,8 @@ MESSAGES = {
             "Commit ref does not exist",
         "controller.code.driver.file.checkout_ref":
             "Commit ref does not exist",
+        "controller.code.driver.file.object":
+            "Code object of %s is not stored: %s",
         "controller.code.driver.git.__init__.dne":
             "File path does not exist: %s",
         "controller.code.driver.git.__init__.giterror":
@@ -191,6 +227,8 @@ MESSAGES = {
             "Error in git stash pop: %s",
         "controller.code.driver.git.stash_apply":
             "Error in git stash_apply: %s",
+        "controller.code.driver.git.cat_file":
+            "Error reading the git object %s with git cat-file",
         "controller.code.driver.git.latest_commit":
             "Error in git latest commit: %s",
         "controller.code.driver.git.reset":
@@ -221,6 +259,8 @@ MESSAGES = {
             "Error in git checkout code ref with id %s: %s",
         "controller.code.driver.git.create_ref.cannot_commit":
             "Git commit failed: %s",
+        "controller.code.driver.git.index":
+            "Error in git with the datmo index: %s",
         "controller.code.driver.git.create_ref.no_commit":
             "Commit ref given does not match a git commit within the tree: %s",
         "controller.code.create":
@@ -305,12 +345,42 @@ MESSAGES = {
             "Collection with id %s does not currently exist",
         "controller.file.driver.local.transfer_collection.dst":
             "Destination directory path is not a valid directory: %s",
+        "controller.file.driver.s3_remote.upload":
+            "Can't upload file, it does not exist: %s",
+        "controller.file.driver.s3_remote.upload.parts":
+            "Multipart upload needs %s part urls but %s were given",
+        "controller.file.driver.s3_remote.upload.failed":
+            "%s parts failed to upload for file: %s",
+        "controller.file.driver.s3_remote.transfer":
+            "Remote transfer failed with status %s: %s",
+        "controller.file.driver.s3_remote.download.range":
+            "Remote stopped serving byte ranges for url: %s",
+        "controller.file.driver.s3_remote.download.incomplete":
+            "Remote sent %s of %s bytes for the byte range",
+        "controller.file.driver.remote.blob":
+            "Blob does not exist on the remote: %s",
+        "controller.remote.__init__":
+            "Project has not been initialized",
+        "controller.remote.remote":
+            "No remote given and no remote has been used before",
+        "controller.remote.snapshot":
+            "Snapshot does not exist: %s",
+        "controller.remote.import_bundle":
+            "Not a snapshot bundle: %s",
+        "controller.remote.import_bundle.blob":
+            "File %s is missing from the bundle: %s",
+        "controller.remote.pull.hash":
+            "Contents pulled do not match their hash: %s",
+        "controller.remote.manifest":
+            "Manifest of collection %s names a hash or path which is not valid: %s",
         "controller.file.driver.local.list_file_collections":
             "Project file structure is not properly initialized",
         "controller.file_collection.create":
             "Required argument not present in input",
         "controller.file_collection.delete":
             "FileCollection with id %s does NOT exist",
+        "controller.file_collection.diff":
+            "FileCollection with id %s does NOT exist",
         "controller.file_collection.checkout_file":
             "FileCollection id does NOT exist",
         "controller.base.__init__":
@@ -321,6 +391,16 @@ MESSAGES = {
             "Required argument %s not present in input",
         "controller.project.status":
             "Project has not been initialized",
+        "controller.project.gc":
+            "Project has not been initialized",
+        "controller.project.fsck":
+            "Project has not been initialized",
+        "controller.project.repack":
+            "Project has not been initialized",
+        "cli.project.fsck.corrupt":
+            "Corrupt: %s",
+        "cli.project.fsck.missing":
+            "Missing: %s",
         "controller.snapshot.__init__":
             "Project has not been initialized",
         "controller.snapshot.create.arg":
@@ -331,6 +411,8 @@ MESSAGES = {
             "Stats file does not exist",
         "controller.snapshot.create_from_task":
             "Task specified by id %s has not been completed",
+        "controller.snapshot.checkout.paths":
+            "No files of snapshot %s match the paths: %s",
         "controller.snapshot.list":
             "Session does not exist for id: %s",
         "controller.snapshot.delete.arg":
@@ -3,10 +3,12 @@
 import os
 import re
 import ast
+import stat
 import hashlib
 import textwrap
 import datetime
 import pytz
+import pathspec
 import tzlocal
 import pytest
 import platform
@@ -29,13 +31,29 @@ except TypeError:
 
     to_bytes("test")
 from glob import glob
+try:
+    from os import scandir as _scandir
+except ImportError:
+    try:
+        from scandir import scandir as _scandir
+    except ImportError:
+        _scandir = None
 
 from datmo.core.controller.environment.driver.dockerenv import DockerEnvironmentDriver
 from datmo.core.util.i18n import get as __
 from datmo.core.util.exceptions import (
     PathDoesNotExist, MutuallyExclusiveArguments, RequiredArgumentMissing,
     EnvironmentInitFailed, EnvironmentExecutionError, InvalidDestinationName,
-    TooManyArgumentsFound)
+    TooManyArgumentsFound, InvalidHashAlgorithm)
+
+# Hash algorithms which can be selected for file collections and code.
+# md5 is the default to keep hashes created by earlier versions valid,
+# blake2b is the fastest secure option available in hashlib
+SUPPORTED_HASH_ALGORITHMS = [
+    "md5", "sha1", "sha256", "sha512", "blake2b", "blake2s"
+]
+DEFAULT_HASH_ALGORITHM = "md5"
+HASH_BUFFER_SIZE = 1024 * 1024
 
 
 def grep(pattern, fileObj):
@@ -250,15 +268,313 @@ def format_table(data, padding=2):
     return table_str
 
 
-def list_all_filepaths(absolute_dirpath):
-    """Returns all filepaths within dir relative to dir root"""
+def _list_dir_entries(absolute_dirpath):
+    """Returns (name, is_dir, is_symlink) for each entry of the directory"""
+    if _scandir is not None:
+        return [(entry.name, entry.is_dir(), entry.is_symlink())
+                for entry in _scandir(absolute_dirpath)]
+    entries = []
+    for name in os.listdir(absolute_dirpath):
+        path = os.path.join(absolute_dirpath, name)
+        entries.append((name, os.path.isdir(path), os.path.islink(path)))
+    return entries
+
+
+def scan_tree(absolute_dirpath, ignore_patterns=None, followlinks=False):
+    """Yields the paths within dir relative to dir root in a single pass
+
+    Every directory is listed once with os.scandir. The ignore patterns are
+    compiled once and a directory which matches them is skipped whole
+    without being descended into, like git does
+
+    Parameters
+    ----------
+    absolute_dirpath : str
+        absolute path of the directory to scan
+    ignore_patterns : list, optional
+        .gitignore style patterns of the paths to leave out
+        (default is None, which yields every path)
+    followlinks : bool, optional
+        descend into symlinks to directories
+        (default is False, which yields them as directories but does not
+        descend into them, like os.walk)
+
+    Yields
+    ------
+    tuple
+        (relative_path, is_dir), each directory yielded before its contents
+    """
+    spec = pathspec.PathSpec.from_lines('gitwildmatch', ignore_patterns) \
+        if ignore_patterns else None
+    # Relative paths of the directories left to scan, in os.sep and "/" form
+    pending_dirpaths = [("", "")]
+    while pending_dirpaths:
+        relative_dirpath, posix_dirpath = pending_dirpaths.pop()
+        try:
+            entries = _list_dir_entries(
+                os.path.join(absolute_dirpath, relative_dirpath))
+        except OSError:
+            # Directories removed or unreadable while scanning, as in os.walk
+            continue
+        subdirpaths = []
+        for name, is_dir, is_symlink in sorted(entries):
+            relative_path = os.path.join(relative_dirpath, name)
+            posix_path = posix_dirpath + name
+            if spec is not None and spec.match_file(
+                    posix_path + "/" if is_dir else posix_path):
+                continue
+            yield relative_path, is_dir
+            if is_dir and (followlinks or not is_symlink):
+                subdirpaths.append((relative_path, posix_path + "/"))
+        # Subdirectories are scanned depth first in name order
+        pending_dirpaths.extend(reversed(subdirpaths))
+
+
+def list_all_filepaths(absolute_dirpath, ignore_patterns=None):
+    """Returns all filepaths within dir relative to dir root
+
+    Parameters
+    ----------
+    absolute_dirpath : str
+        absolute path of the directory to list
+    ignore_patterns : list, optional
+        .gitignore style patterns of the files to leave out, directories
+        matching them are not walked at all
+        (default is None, which lists every file)
+
+    Returns
+    -------
+    list
+        filepaths relative to the directory
+    """
     return [
-        os.path.relpath(os.path.join(dirpath, file), absolute_dirpath)
-        for (dirpath, dirnames, filenames) in os.walk(absolute_dirpath)
-        for file in filenames
+        relative_path for relative_path, is_dir in scan_tree(
+            absolute_dirpath, ignore_patterns=ignore_patterns)
+        if not is_dir
     ]
 
 
+def match_paths(relative_paths, patterns):
+    """Returns the relative paths matching any of the patterns
+
+    Parameters
+    ----------
+    relative_paths : list
+        filepaths relative to a root directory
+    patterns : list
+        .gitignore style patterns, e.g. "models/*.pt" or "config.json"
+
+    Returns
+    -------
+    list
+        sorted relative paths which match
+    """
+    spec = pathspec.PathSpec.from_lines('gitwildmatch', patterns)
+    return sorted(
+        relative_path for relative_path in relative_paths
+        if spec.match_file(relative_path.replace(os.sep, "/")))
+
+
+def get_hash_function(hash_algorithm=DEFAULT_HASH_ALGORITHM):
+    """Returns a constructor for new hash objects of the algorithm given
+
+    Parameters
+    ----------
+    hash_algorithm : str, optional
+        name of the hash algorithm (e.g. "md5", "sha256", "blake2b")
+        (default is "md5")
+
+    Returns
+    -------
+    function
+        function which returns a new hashlib hash object when called
+
+    Raises
+    ------
+    InvalidHashAlgorithm
+        if the hash algorithm is not supported on this platform
+    """
+    if hash_algorithm not in SUPPORTED_HASH_ALGORITHMS or \
+            hash_algorithm not in hashlib.algorithms_available:
+        raise InvalidHashAlgorithm(
+            __("error", "util.misc_functions.get_hash_function",
+               str(hash_algorithm)))
+    return lambda: hashlib.new(hash_algorithm)
+
+
+def get_filehash(absolute_filepath, hash_algorithm=DEFAULT_HASH_ALGORITHM):
+    """Returns the hash of the contents of the file given
+
+    Parameters
+    ----------
+    absolute_filepath : str
+        absolute path of the file to hash
+    hash_algorithm : str, optional
+        name of the hash algorithm to use
+        (default is "md5")
+
+    Returns
+    -------
+    str
+        hex digest of the file contents
+
+    Raises
+    ------
+    PathDoesNotExist
+        if the filepath does not point to a file
+    """
+    if not os.path.isfile(absolute_filepath):
+        raise PathDoesNotExist(
+            __("error", "util.misc_functions.get_filehash",
+               absolute_filepath))
+    hasher = get_hash_function(hash_algorithm)()
+    with open(absolute_filepath, "rb") as f:
+        while True:
+            data = f.read(HASH_BUFFER_SIZE)
+            if not data:
+                break
+            hasher.update(data)
+    return hasher.hexdigest()
+
+
+def reduce_filehashes(filehashes, hash_algorithm=DEFAULT_HASH_ALGORITHM):
+    """Returns a single hash for a list of file hashes (order does not matter)
+
+    Notes
+    -----
+    This is the same reduction used by checksumdir, so directory hashes computed
+    with md5 match those created before the hash algorithm was selectable
+
+    Parameters
+    ----------
+    filehashes : list
+        list of hex digests of individual files
+    hash_algorithm : str, optional
+        name of the hash algorithm to use
+        (default is "md5")
+
+    Returns
+    -------
+    str
+        hex digest for all of the file hashes
+    """
+    hasher = get_hash_function(hash_algorithm)()
+    for filehash in sorted(filehashes):
+        hasher.update(filehash.encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def get_tree_hash(filehashes, hash_algorithm=DEFAULT_HASH_ALGORITHM):
+    """Returns a Merkle hash of a tree of files from the hash of each file
+
+    Each directory is hashed from the sorted names, types and hashes of its
+    entries, so the hash changes when any file is changed, renamed or moved
+
+    Parameters
+    ----------
+    filehashes : dict
+        hex digests of the contents of each file keyed by its path relative
+        to the root of the tree
+    hash_algorithm : str, optional
+        name of the hash algorithm to use
+        (default is "md5")
+
+    Returns
+    -------
+    str
+        hex digest of the root of the tree
+    """
+    tree = {}
+    for relative_filepath, filehash in filehashes.items():
+        # Names are hashed as utf-8, which python 2 paths may already be in
+        names = [
+            name.encode("utf-8") if isinstance(name, to_unicode) else name
+            for name in relative_filepath.replace(os.sep, "/").split("/")
+        ]
+        node = tree
+        for name in names[:-1]:
+            node = node.setdefault(name, {})
+        node[names[-1]] = filehash
+
+    def hash_tree(node):
+        hasher = get_hash_function(hash_algorithm)()
+        for name in sorted(node):
+            if isinstance(node[name], dict):
+                entry_type, entry_hash = "tree", hash_tree(node[name])
+            else:
+                entry_type, entry_hash = "blob", node[name]
+            hasher.update(("%s %s " % (entry_type, entry_hash)).encode(
+                "ascii") + name + b"\0")
+        return hasher.hexdigest()
+
+    return hash_tree(tree)
+
+
+def get_dir_manifest(absolute_dirpath, hash_algorithm=DEFAULT_HASH_ALGORITHM):
+    """Returns the size and hash of every file within the directory
+
+    Parameters
+    ----------
+    absolute_dirpath : str
+        absolute path of the directory to describe
+    hash_algorithm : str, optional
+        name of the hash algorithm to use
+        (default is "md5")
+
+    Returns
+    -------
+    dict
+        dictionary keyed by the filepath relative to the directory with values
+        of the form {"size": int, "hash": str}
+
+    Raises
+    ------
+    PathDoesNotExist
+        if the dirpath does not point to a directory
+    """
+    if not os.path.isdir(absolute_dirpath):
+        raise PathDoesNotExist(
+            __("error", "util.misc_functions.get_filehash", absolute_dirpath))
+    manifest = {}
+    for relative_filepath in list_all_filepaths(absolute_dirpath):
+        filepath = os.path.join(absolute_dirpath, relative_filepath)
+        # broken links are hashed as empty files
+        if os.path.isfile(filepath):
+            manifest[relative_filepath] = {
+                "size": os.path.getsize(filepath),
+                "hash": get_filehash(filepath, hash_algorithm)
+            }
+        else:
+            manifest[relative_filepath] = {
+                "size": 0,
+                "hash": get_hash_function(hash_algorithm)().hexdigest()
+            }
+    return manifest
+
+
+def get_dirhash(absolute_dirpath, hash_algorithm=DEFAULT_HASH_ALGORITHM):
+    """Returns the hash of the contents of all files within the directory
+
+    File names and empty directories are not taken into account, only the file contents
+
+    Parameters
+    ----------
+    absolute_dirpath : str
+        absolute path of the directory to hash
+    hash_algorithm : str, optional
+        name of the hash algorithm to use
+        (default is "md5")
+
+    Returns
+    -------
+    str
+        hex digest of the directory contents
+    """
+    manifest = get_dir_manifest(absolute_dirpath, hash_algorithm)
+    return reduce_filehashes([entry["hash"] for entry in manifest.values()],
+                             hash_algorithm)
+
+
 def get_datmo_temp_path(filepath):
     # Create temp directory within .datmo/tmp
     datmo_temp_path = os.path.join(filepath, ".datmo", "tmp")
@@ -342,10 +658,14 @@ def parse_paths(default_src_prefix, paths, dest_prefix):
             src_abs_path = os.path.join(default_src_prefix, src_path)
         else:
             src_abs_path = src_path
-        # Check if source is file or directory and save accordingly
-        if os.path.isfile(src_abs_path):
+        # Check if source is file or directory with a single stat
+        try:
+            src_mode = os.stat(src_abs_path).st_mode
+        except OSError:
+            raise PathDoesNotExist(src_abs_path)
+        if stat.S_ISREG(src_mode):
             files.append((src_abs_path, dest_abs_path))
-        elif os.path.isdir(src_abs_path):
+        elif stat.S_ISDIR(src_mode):
             directories.append((src_abs_path, dest_abs_path))
         else:
             raise PathDoesNotExist(src_abs_path)
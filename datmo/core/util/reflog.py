@@ -0,0 +1,160 @@
+import os
+import json
+import time
+from io import open
+from collections import OrderedDict
+try:
+    to_unicode = unicode
+except NameError:
+    to_unicode = str
+
+# The log is rewritten without tombstones once they are this many and
+# outnumber the refs still in the log
+COMPACT_MIN_TOMBSTONES = 100
+
+
+class RefLog(object):
+    """Append only log of the refs created and deleted by a code driver
+
+    Each line of the log is a json entry with the commit id, the time it was
+    created and the latest ref at that time as its parent. Deleted refs are
+    logged as tombstones. The log is read once into an ordered index, giving
+    the latest ref and membership of a ref without listing or stating the
+    refs, and is read again only when changed by another process
+
+    Parameters
+    ----------
+    filepath : str
+        absolute path of the log file
+    list_existing_refs : function
+        returns the commit ids of the refs which exist, oldest first, to
+        start the log from when it does not exist yet
+    """
+
+    def __init__(self, filepath, list_existing_refs):
+        self.filepath = filepath
+        self.list_existing_refs = list_existing_refs
+        self._refs = None
+        self._tombstones = 0
+        self._file_signature = None
+
+    def _get_file_signature(self):
+        try:
+            file_stat = os.stat(self.filepath)
+        except OSError:
+            return None
+        return file_stat.st_size, file_stat.st_mtime
+
+    def _load(self):
+        """Return the index of live refs, reading the log again if it changed"""
+        file_signature = self._get_file_signature()
+        if self._refs is not None and file_signature == self._file_signature:
+            return self._refs
+        if file_signature is None:
+            # Refs made before the log existed are logged oldest first
+            self._refs = OrderedDict()
+            self._tombstones = 0
+            self._file_signature = None
+            commit_ids = self.list_existing_refs()
+            if commit_ids:
+                self._write([self._new_entry(commit_id)
+                             for commit_id in commit_ids])
+            return self._refs
+        refs, tombstones = OrderedDict(), 0
+        with open(self.filepath, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line left partly written is ignored
+                    continue
+                refs.pop(entry["commit_id"], None)
+                if entry.get("deleted"):
+                    tombstones += 1
+                else:
+                    refs[entry["commit_id"]] = entry
+        self._refs, self._tombstones = refs, tombstones
+        self._file_signature = file_signature
+        return self._refs
+
+    def _new_entry(self, commit_id, deleted=False):
+        latest_commit_id = next(reversed(self._refs), None)
+        entry = {
+            "commit_id": commit_id,
+            "created_at": time.time(),
+            "parent": latest_commit_id
+        }
+        if deleted:
+            entry["deleted"] = True
+        self._apply(entry)
+        return entry
+
+    def _apply(self, entry):
+        self._refs.pop(entry["commit_id"], None)
+        if entry.get("deleted"):
+            self._tombstones += 1
+        else:
+            self._refs[entry["commit_id"]] = entry
+
+    def _write(self, entries, mode="a"):
+        if not os.path.isdir(os.path.dirname(self.filepath)):
+            os.makedirs(os.path.dirname(self.filepath))
+        with open(self.filepath, mode) as f:
+            f.write(
+                to_unicode("".join(
+                    json.dumps(entry, sort_keys=True) + "\n"
+                    for entry in entries)))
+        self._file_signature = self._get_file_signature()
+
+    def _compact(self):
+        """Rewrite the log with only the refs which were not deleted"""
+        temp_filepath = self.filepath + ".tmp"
+        with open(temp_filepath, "w") as f:
+            f.write(
+                to_unicode("".join(
+                    json.dumps(entry, sort_keys=True) + "\n"
+                    for entry in self._refs.values())))
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+        os.rename(temp_filepath, self.filepath)
+        self._tombstones = 0
+        self._file_signature = self._get_file_signature()
+
+    def add(self, commit_id):
+        """Log a ref as created, making it the latest ref"""
+        self._load()
+        self._write([self._new_entry(commit_id)])
+        return True
+
+    def delete(self, commit_id):
+        """Log a tombstone for a ref"""
+        if commit_id not in self._load():
+            return False
+        self._write([self._new_entry(commit_id, deleted=True)])
+        if self._tombstones >= COMPACT_MIN_TOMBSTONES and \
+                self._tombstones > len(self._refs):
+            self._compact()
+        return True
+
+    def clear(self):
+        """Remove the log along with every ref in it"""
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+        self._refs = None
+        self._file_signature = None
+        return True
+
+    def exists(self, commit_id):
+        return commit_id in self._load()
+
+    def latest(self):
+        """Return the commit id of the latest ref created, None if there are none"""
+        return next(reversed(self._load()), None)
+
+    def list(self):
+        """Return the commit ids of the refs, oldest first"""
+        return list(self._load())
+
+    def get(self, commit_id):
+        """Return the entry of a ref with its "commit_id", "created_at" and "parent" """
+        return self._load().get(commit_id)
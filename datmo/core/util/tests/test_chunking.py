@@ -0,0 +1,130 @@
+"""
+Tests for chunking.py
+"""
+import os
+import io
+import time
+import random
+import tempfile
+import platform
+
+from datmo.core.util import chunking
+from datmo.core.util.chunking import (find_chunk_boundary, iter_chunks,
+                                      get_chunk_path, ChunkedFileReader)
+
+
+def find_chunk_boundary_bytewise(data, min_size, avg_size, max_size):
+    # Reference hashing one byte at a time, which defines the boundaries
+    length = min(len(data), max_size)
+    if length <= min_size:
+        return length
+    mask = chunking._get_boundary_mask(avg_size)
+    rolling_hash = 0
+    for i in range(max(0, min_size - 64), length):
+        rolling_hash = ((rolling_hash << 1) + chunking._GEAR[data[i]]) & \
+            chunking._HASH_MASK
+        if i >= min_size and not rolling_hash & mask:
+            return i + 1
+    return length
+
+
+class TestChunking():
+    def setup_method(self):
+        # provide mountable tmp directory for docker
+        tempfile.tempdir = "/tmp" if platform.system() != "Windows" else None
+        test_datmo_dir = os.environ.get('TEST_DATMO_DIR',
+                                        tempfile.gettempdir())
+        self.temp_dir = tempfile.mkdtemp(dir=test_datmo_dir)
+        random_generator = random.Random(0)
+        self.data = bytes(
+            bytearray(
+                random_generator.getrandbits(8) for _ in range(512 * 1024)))
+
+    def test_find_chunk_boundary(self):
+        data = bytearray(self.data)
+        result = find_chunk_boundary(
+            data, min_size=1024, avg_size=4096, max_size=16384)
+        assert 1024 < result <= 16384
+        # Boundaries only depend on the content before them
+        assert find_chunk_boundary(
+            data[:result], min_size=1024, avg_size=4096,
+            max_size=16384) == result
+        # Data smaller than the minimum size is a single chunk
+        assert find_chunk_boundary(
+            data[:512], min_size=1024, avg_size=4096, max_size=16384) == 512
+
+    def test_find_chunk_boundary_scans(self):
+        data = bytearray(self.data)
+        zeros = bytearray(100000)
+        scans = [None] if chunking.numpy is None else [None, chunking.numpy]
+        original_numpy = chunking.numpy
+        try:
+            for numpy in scans:
+                chunking.numpy = numpy
+                # Boundaries are the same as hashing byte by byte, whichever
+                # slice they are found in
+                for sizes in [(1024, 4096, 100000), (16, 64, 1024),
+                              (40000, 65536, 300000)]:
+                    for offset in range(0, 200000, 9973):
+                        assert find_chunk_boundary(data[offset:], *sizes) == \
+                               find_chunk_boundary_bytewise(
+                                   data[offset:], *sizes)
+                assert find_chunk_boundary(zeros, 1024, 4096, 50000) == \
+                       find_chunk_boundary_bytewise(zeros, 1024, 4096, 50000)
+        finally:
+            chunking.numpy = original_numpy
+
+    def test_find_chunk_boundary_throughput(self):
+        data = bytearray(os.urandom(8 * 1024 * 1024))
+        # No boundary is found, so all of the data is hashed
+        start_time = time.time()
+        assert find_chunk_boundary(
+            data, min_size=0, avg_size=2**62, max_size=len(data)) == len(data)
+        rate = len(data) / (time.time() - start_time)
+        sample = data[:512 * 1024]
+        start_time = time.time()
+        find_chunk_boundary_bytewise(
+            sample, min_size=0, avg_size=2**62, max_size=len(sample))
+        bytewise_rate = len(sample) / (time.time() - start_time)
+        assert rate > 2 * bytewise_rate
+
+    def test_iter_chunks(self):
+        chunks = list(
+            iter_chunks(
+                io.BytesIO(self.data),
+                min_size=1024,
+                avg_size=4096,
+                max_size=16384))
+        assert b"".join(chunks) == self.data
+        assert all(len(chunk) <= 16384 for chunk in chunks)
+        # Inserting bytes only changes the chunks around the insertion
+        changed_data = self.data[:100000] + b"inserted" + self.data[100000:]
+        changed_chunks = list(
+            iter_chunks(
+                io.BytesIO(changed_data),
+                min_size=1024,
+                avg_size=4096,
+                max_size=16384))
+        assert b"".join(changed_chunks) == changed_data
+        assert len(set(chunks) - set(changed_chunks)) <= 2
+        assert list(iter_chunks(io.BytesIO(b""))) == []
+
+    def test_chunked_file_reader(self):
+        chunks = []
+        for i, start in enumerate(range(0, len(self.data), 100000)):
+            chunk_path = os.path.join(self.temp_dir, "chunk_%d" % i)
+            with open(chunk_path, "wb") as f:
+                f.write(self.data[start:start + 100000])
+            chunks.append((chunk_path, len(self.data[start:start + 100000])))
+        reader = io.BufferedReader(ChunkedFileReader(chunks, name="test"))
+        assert reader.name == "test"
+        assert reader.read() == self.data
+        reader.seek(99990)
+        assert reader.read(20) == self.data[99990:100010]
+        reader.seek(-10, io.SEEK_END)
+        assert reader.read() == self.data[-10:]
+        reader.close()
+
+    def test_get_chunk_path(self):
+        result = get_chunk_path(self.temp_dir, "abcdef")
+        assert result == os.path.join(self.temp_dir, "ab", "abcdef")
@@ -0,0 +1,81 @@
+"""
+Tests for compression.py
+"""
+import os
+import random
+import tempfile
+import platform
+try:
+
+    def to_bytes(val):
+        return bytes(val)
+
+    to_bytes("test")
+except TypeError:
+
+    def to_bytes(val):
+        return bytes(val, "utf-8")
+
+    to_bytes("test")
+
+from datmo.core.util.compression import (
+    get_supported_compressions, validate_compression, should_compress,
+    open_compressed, get_compression_from_path)
+from datmo.core.util.exceptions import InvalidCompression
+
+
+class TestCompression():
+    def setup_method(self):
+        # provide mountable tmp directory for docker
+        tempfile.tempdir = "/tmp" if platform.system() != "Windows" else None
+        test_datmo_dir = os.environ.get('TEST_DATMO_DIR',
+                                        tempfile.gettempdir())
+        self.temp_dir = tempfile.mkdtemp(dir=test_datmo_dir)
+
+    def test_validate_compression(self):
+        assert "zlib" in get_supported_compressions()
+        validate_compression("zlib")
+        failed = False
+        try:
+            validate_compression("not_a_compression")
+        except InvalidCompression:
+            failed = True
+        assert failed
+
+    def test_should_compress(self):
+        random_generator = random.Random(0)
+        random_data = bytes(
+            bytearray(random_generator.getrandbits(8) for _ in range(10000)))
+        filepath = os.path.join(self.temp_dir, "data.csv")
+        with open(filepath, "wb") as f:
+            f.write(random_data)
+        # Decided by file type
+        assert should_compress(filepath)
+        filepath = os.path.join(self.temp_dir, "data.zip")
+        with open(filepath, "wb") as f:
+            f.write(to_bytes("a,b,c\n" * 1000))
+        assert not should_compress(filepath)
+        # Decided by measured compression ratio
+        filepath = os.path.join(self.temp_dir, "data")
+        with open(filepath, "wb") as f:
+            f.write(random_data)
+        assert not should_compress(filepath)
+        with open(filepath, "wb") as f:
+            f.write(to_bytes("a,b,c\n" * 1000))
+        assert should_compress(filepath)
+
+    def test_open_compressed(self):
+        data = to_bytes("a,b,c\n" * 100000)
+        for compression in get_supported_compressions():
+            filepath = os.path.join(self.temp_dir, "data")
+            with open_compressed(filepath, compression, mode="wb") as f:
+                f.write(data)
+            assert os.path.getsize(filepath) < len(data) / 10
+            with open_compressed(filepath, compression) as f:
+                assert f.read(6) == to_bytes("a,b,c\n")
+                assert f.read() == data[6:]
+
+    def test_get_compression_from_path(self):
+        assert get_compression_from_path("data.csv.datmo-gz") == "zlib"
+        assert get_compression_from_path("data.csv.datmo-xz") == "lzma"
+        assert get_compression_from_path("data.csv") is None
@@ -0,0 +1,110 @@
+"""
+Tests for file_reference.py
+"""
+import os
+import tempfile
+import platform
+import threading
+from io import open
+from functools import partial
+try:
+    to_unicode = unicode
+except NameError:
+    to_unicode = str
+
+from datmo.core.util.file_reference import FileReference, FileHandlePool
+
+
+class TestFileReference():
+    def setup_method(self):
+        # provide mountable tmp directory for docker
+        tempfile.tempdir = "/tmp" if platform.system() != "Windows" else None
+        test_datmo_dir = os.environ.get('TEST_DATMO_DIR',
+                                        tempfile.gettempdir())
+        self.temp_dir = tempfile.mkdtemp(dir=test_datmo_dir)
+        self.filepaths = []
+        for i in range(5):
+            filepath = os.path.join(self.temp_dir, "file_%d" % i)
+            with open(filepath, "w") as f:
+                f.write(to_unicode("line 1 of %d\nline 2 of %d\n" % (i, i)))
+            self.filepaths.append(filepath)
+
+    def test_file_reference(self):
+        pool = FileHandlePool(max_size=2)
+        opened = []
+
+        def opener(filepath, mode):
+            opened.append(filepath)
+            return open(filepath, mode)
+
+        file_references = [
+            FileReference(
+                filepath,
+                os.path.getsize(filepath),
+                partial(opener, filepath),
+                pool=pool) for filepath in self.filepaths
+        ]
+        # Listing references does not open any files
+        assert opened == []
+        assert file_references[0].name == self.filepaths[0]
+        assert file_references[0].size == 24
+        assert file_references[0].mode == "r"
+
+        # Reading keeps at most max_size handles open and resumes position
+        for file_reference in file_references:
+            assert file_reference.readline() == "line 1 of %s\n" % \
+                   file_reference.name[-1]
+        assert len(pool) == 2
+        for file_reference in file_references:
+            assert file_reference.readline() == "line 2 of %s\n" % \
+                   file_reference.name[-1]
+        assert len(pool) == 2
+
+        with file_references[0] as f:
+            f.seek(0)
+            assert list(f) == ["line 1 of 0\n", "line 2 of 0\n"]
+        assert len(pool) == 1
+
+        # Handles opened by open() belong to the caller
+        with file_references[1].open(mode="rb") as f:
+            assert f.read() == b"line 1 of 1\nline 2 of 1\n"
+
+    def test_file_reference_threads(self):
+        pool = FileHandlePool(max_size=2)
+        file_references = [
+            FileReference(
+                filepath,
+                os.path.getsize(filepath),
+                partial(open, filepath),
+                pool=pool) for filepath in self.filepaths * 4
+        ]
+        # Each reference has its own key, even for the same file
+        assert len(set(f.key for f in file_references)) == 20
+        results, errors = {}, []
+
+        def read_lines(file_reference):
+            try:
+                lines = []
+                for _ in range(200):
+                    file_reference.seek(0)
+                    lines.append(file_reference.readline() +
+                                 file_reference.readline())
+                results[file_reference.key] = set(lines)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=read_lines, args=(file_reference, ))
+            for file_reference in file_references
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        for file_reference in file_references:
+            assert results[file_reference.key] == set([
+                "line 1 of %s\nline 2 of %s\n" % (file_reference.name[-1],
+                                                  file_reference.name[-1])
+            ])
+        assert len(pool) == 2
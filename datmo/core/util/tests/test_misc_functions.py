@@ -3,6 +3,7 @@
 Tests for misc_functions.py
 """
 import os
+import hashlib
 import tempfile
 import platform
 import datetime
@@ -28,9 +29,11 @@ except TypeError:
 from datmo.core.util.misc_functions import (
     create_unique_hash, mutually_exclusive, is_project_dir, find_project_dir,
     grep, prettify_datetime, format_table, parse_cli_key_value,
-    get_datmo_temp_path, parse_path, parse_paths, list_all_filepaths)
+    get_datmo_temp_path, parse_path, parse_paths, list_all_filepaths,
+    scan_tree,
+    get_hash_function, get_filehash, get_dirhash, get_tree_hash)
 
-from datmo.core.util.exceptions import MutuallyExclusiveArguments, RequiredArgumentMissing, InvalidDestinationName, PathDoesNotExist, TooManyArgumentsFound
+from datmo.core.util.exceptions import MutuallyExclusiveArguments, RequiredArgumentMissing, InvalidDestinationName, PathDoesNotExist, TooManyArgumentsFound, InvalidHashAlgorithm
 
 
 class TestMiscFunctions():
@@ -166,6 +169,107 @@ class TestMiscFunctions():
         assert "test.txt" in result
         assert os.path.join("test_dir", "test.txt") in result
 
+    def test_list_all_filepaths_ignore_patterns(self):
+        for relative_filepath in [
+                "test.txt", "test.pyc",
+                os.path.join("node_modules", "module", "index.js"),
+                os.path.join("src", "main.py"),
+                os.path.join("src", "node_modules", "index.js")
+        ]:
+            filepath = os.path.join(self.temp_dir, relative_filepath)
+            if not os.path.isdir(os.path.dirname(filepath)):
+                os.makedirs(os.path.dirname(filepath))
+            with open(filepath, "wb") as f:
+                f.write(to_bytes("test" + "\n"))
+        result = list_all_filepaths(
+            self.temp_dir, ignore_patterns=["node_modules/", "*.pyc"])
+        assert sorted(result) == sorted(
+            ["test.txt", os.path.join("src", "main.py")])
+
+    def test_scan_tree(self):
+        os.makedirs(os.path.join(self.temp_dir, "a", "b"))
+        os.makedirs(os.path.join(self.temp_dir, "empty"))
+        with open(os.path.join(self.temp_dir, "a", "b", "c.txt"), "wb") as f:
+            f.write(to_bytes("test" + "\n"))
+        result = list(scan_tree(self.temp_dir))
+        assert sorted(result) == [("a", True), (os.path.join("a", "b"), True),
+                                  (os.path.join("a", "b", "c.txt"), False),
+                                  ("empty", True)]
+        # Directories are given before their contents
+        assert result.index((os.path.join("a", "b"), True)) < result.index(
+            (os.path.join("a", "b", "c.txt"), False))
+        # Ignored directories are not descended into
+        result = list(scan_tree(self.temp_dir, ignore_patterns=["b"]))
+        assert sorted(result) == [("a", True), ("empty", True)]
+        # Links to directories are only followed when asked
+        if platform.system() != "Windows":
+            os.symlink(
+                os.path.join(self.temp_dir, "a"),
+                os.path.join(self.temp_dir, "link"))
+            assert ("link", True) in list(scan_tree(self.temp_dir))
+            assert os.path.join("link", "b") not in dict(
+                scan_tree(self.temp_dir))
+            assert dict(scan_tree(self.temp_dir, followlinks=True))[
+                os.path.join("link", "b", "c.txt")] is False
+
+    def test_get_hash_function(self):
+        result = get_hash_function("md5")
+        assert result().hexdigest() == "d41d8cd98f00b204e9800998ecf8427e"
+        result = get_hash_function("blake2b")
+        assert len(result().hexdigest()) == 128
+        failed = False
+        try:
+            get_hash_function("not_a_hash")
+        except InvalidHashAlgorithm:
+            failed = True
+        assert failed
+
+    def test_get_filehash(self):
+        filepath = os.path.join(self.temp_dir, "test.txt")
+        with open(filepath, "wb") as f:
+            f.write(to_bytes("hello\n"))
+        assert get_filehash(filepath) == "b1946ac92492d2347c6235b4d2611184"
+        assert get_filehash(filepath, "sha256") == \
+               "5891b5b522d5df086d0ff0b110fbd9d21bb4fc7163af34d08286a2e846f6be03"
+        failed = False
+        try:
+            get_filehash(os.path.join(self.temp_dir, "does_not_exist.txt"))
+        except PathDoesNotExist:
+            failed = True
+        assert failed
+
+    def test_get_dirhash(self):
+        dirpath = os.path.join(self.temp_dir, "test_dir")
+        os.makedirs(os.path.join(dirpath, "empty_dir"))
+        with open(os.path.join(dirpath, "test.txt"), "wb") as f:
+            f.write(to_bytes("hello\n"))
+        # Same value as checksumdir for md5, empty dirs are ignored
+        assert get_dirhash(dirpath) == "57ae7aad8abe2f317e460c92d3ed1178"
+        result = get_dirhash(dirpath, "blake2b")
+        assert len(result) == 128
+        assert result == get_dirhash(dirpath, "blake2b")
+
+    def test_get_tree_hash(self):
+        filehash = "b1946ac92492d2347c6235b4d2611184"
+        subdir_hash = hashlib.md5(
+            b"blob " + to_bytes(filehash) + b" \xc3\xa9t\xc3\xa9.txt\0"
+        ).hexdigest()
+        tree_hash = hashlib.md5(
+            b"blob " + to_bytes(filehash) + b" test.txt\0" + b"tree " +
+            to_bytes(subdir_hash) + b" \xc3\xa9t\xc3\xa9\0").hexdigest()
+        # Non ascii names are hashed as utf-8
+        filehashes = {
+            to_unicode("test.txt"): filehash,
+            os.path.join(u"\xe9t\xe9", u"\xe9t\xe9.txt"): filehash
+        }
+        assert get_tree_hash(filehashes) == tree_hash
+        # Moving a file changes the hash
+        filehashes = {
+            to_unicode("test.txt"): filehash,
+            u"\xe9t\xe9.txt": filehash
+        }
+        assert get_tree_hash(filehashes) != tree_hash
+
     def test_get_datmo_temp_path(self):
         datmo_temp_path = get_datmo_temp_path(self.temp_dir)
         exists = False
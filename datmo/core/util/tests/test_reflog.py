@@ -0,0 +1,85 @@
+"""
+Tests for reflog.py
+"""
+import os
+import tempfile
+import platform
+from io import open
+
+from datmo.core.util import reflog
+from datmo.core.util.reflog import RefLog
+
+
+class TestRefLog():
+    def setup_method(self):
+        # provide mountable tmp directory for docker
+        tempfile.tempdir = "/tmp" if platform.system() != "Windows" else None
+        test_datmo_dir = os.environ.get('TEST_DATMO_DIR',
+                                        tempfile.gettempdir())
+        self.temp_dir = tempfile.mkdtemp(dir=test_datmo_dir)
+        self.filepath = os.path.join(self.temp_dir, "reflog")
+        self.existing_refs = []
+        self.reflog = RefLog(self.filepath, lambda: self.existing_refs)
+
+    def test_add(self):
+        assert self.reflog.latest() is None
+        assert self.reflog.list() == []
+        assert not os.path.exists(self.filepath)
+        self.reflog.add("a")
+        self.reflog.add("b")
+        assert self.reflog.latest() == "b"
+        assert self.reflog.exists("a") and not self.reflog.exists("c")
+        assert self.reflog.list() == ["a", "b"]
+        assert self.reflog.get("b")["parent"] == "a"
+        assert self.reflog.get("a")["parent"] is None
+        # Adding a ref again makes it the latest
+        self.reflog.add("a")
+        assert self.reflog.latest() == "a"
+        assert self.reflog.list() == ["b", "a"]
+
+    def test_delete(self):
+        self.reflog.add("a")
+        self.reflog.add("b")
+        assert self.reflog.delete("b")
+        assert not self.reflog.delete("b")
+        assert not self.reflog.exists("b")
+        assert self.reflog.latest() == "a"
+        # Tombstones are kept in the log read by other instances
+        other_reflog = RefLog(self.filepath, lambda: [])
+        assert other_reflog.list() == ["a"]
+        self.reflog.clear()
+        assert self.reflog.list() == []
+
+    def test_compact(self):
+        reflog.COMPACT_MIN_TOMBSTONES, compact_min_tombstones = \
+            2, reflog.COMPACT_MIN_TOMBSTONES
+        try:
+            for commit_id in ["a", "b", "c", "d"]:
+                self.reflog.add(commit_id)
+            self.reflog.delete("a")
+            self.reflog.delete("b")
+            self.reflog.delete("c")
+        finally:
+            reflog.COMPACT_MIN_TOMBSTONES = compact_min_tombstones
+        with open(self.filepath, "r") as f:
+            assert len(f.readlines()) == 1
+        assert RefLog(self.filepath, lambda: []).list() == ["d"]
+
+    def test_existing_refs(self):
+        # Refs made before the log are logged in the order given
+        self.existing_refs = ["a", "b"]
+        assert self.reflog.latest() == "b"
+        assert os.path.exists(self.filepath)
+        self.existing_refs = []
+        self.reflog.add("c")
+        assert RefLog(self.filepath, lambda: []).list() == ["a", "b", "c"]
+
+    def test_changed_by_other_process(self):
+        self.reflog.add("a")
+        other_reflog = RefLog(self.filepath, lambda: [])
+        other_reflog.add("b")
+        assert self.reflog.latest() == "b"
+        # Lines left partly written are ignored
+        with open(self.filepath, "a") as f:
+            f.write(u'{"commit_id": "c"')
+        assert self.reflog.list() == ["a", "b"]
@@ -44,6 +44,8 @@ class Snapshot():
     label : str
         short description of snapshot
     created_at : datetime.datetime
+    files : list
+        references to the files of the snapshot, which are opened when read
 
     Raises
     ------
@@ -73,7 +75,9 @@ class Snapshot():
 
     @property
     def files(self):
-        self._files = self.get_files()
+        # snapshots are immutable so the references are only listed once
+        if self._files is None:
+            self._files = self.list_files()
         return self._files
 
     def __get_core_snapshot(self):
@@ -104,6 +108,94 @@ class Snapshot():
         snapshot_controller = SnapshotController()
         return snapshot_controller.get_files(self.id, mode=mode)
 
+    def list_files(self, mode="r"):
+        """Returns a list of references to the files for the snapshot without opening them
+
+        Parameters
+        ----------
+        mode : str
+            file object mode used when reading from the references
+            (default is "r" which signifies read mode)
+
+        Returns
+        -------
+        list
+            list of datmo.core.util.file_reference.FileReference objects
+            with name, size and open()
+        """
+        snapshot_controller = SnapshotController()
+        return snapshot_controller.list_files(self.id, mode=mode)
+
+    def get_filepath(self, path):
+        """Returns a read only filepath with the contents of a file in the snapshot
+
+        Parameters
+        ----------
+        path : str
+            path of the file relative to the snapshot files
+
+        Returns
+        -------
+        str
+            absolute filepath which must not be written to,
+            e.g. for numpy.load(filepath, mmap_mode="r")
+        """
+        snapshot_controller = SnapshotController()
+        return snapshot_controller.get_filepath(self.id, path)
+
+    def open_mmap(self, path):
+        """Returns a read only memory map of a file in the snapshot
+
+        Parameters
+        ----------
+        path : str
+            path of the file relative to the snapshot files
+
+        Returns
+        -------
+        mmap.mmap
+            read only memory map of the file, which should be closed when done
+        """
+        snapshot_controller = SnapshotController()
+        return snapshot_controller.open_mmap(self.id, path)
+
+    def get_file_buffer(self, path):
+        """Returns a read only buffer over a file in the snapshot without copying it
+
+        Parameters
+        ----------
+        path : str
+            path of the file relative to the snapshot files
+
+        Returns
+        -------
+        contextmanager
+            context manager giving a read only buffer which is only valid
+            within the with block, e.g. for numpy.frombuffer(buffer, dtype)
+            used within the block without a copy
+        """
+        snapshot_controller = SnapshotController()
+        return snapshot_controller.get_file_buffer(self.id, path)
+
+    def diff(self, other):
+        """Returns the files added, removed and modified since another snapshot
+
+        Parameters
+        ----------
+        other : datmo.snapshot.Snapshot or str
+            snapshot, or id of the snapshot, to compare from
+
+        Returns
+        -------
+        dict
+            lists of "added", "removed" and "modified" files of the form
+            {"path": str, "size_1": int or None, "size_2": int or None,
+            "size_delta": int} and the total "size_delta" in bytes
+        """
+        other_id = other.id if isinstance(other, Snapshot) else other
+        snapshot_controller = SnapshotController()
+        return snapshot_controller.diff(other_id, self.id)
+
     def __eq__(self, other):
         return self.id == other.id if other else False
 
@@ -411,3 +503,39 @@ def delete(snapshot_id=None):
     snapshot_controller = SnapshotController()
 
     snapshot_controller.delete(snapshot_id=snapshot_id)
+
+
+def checkout(snapshot_id, paths=None):
+    """Checkout to a snapshot within a project, or only to its files matching the paths
+
+    The project must be created before this is implemented. You can do that by using
+    the following command::
+
+        $ datmo init
+
+
+    Parameters
+    ----------
+    snapshot_id : str
+        snapshot id to checkout
+    paths : list, optional
+        .gitignore style patterns of the code and project files to checkout,
+        which leaves every other file and the environment as is
+        (default is None, which checks out the whole snapshot)
+
+    Returns
+    -------
+    bool
+        True if success
+
+    Examples
+    --------
+    You can use this function within a project repository to restore only the
+    model checkpoints of a snapshot.
+
+    >>> import datmo
+    >>> datmo.snapshot.checkout(snapshot_id="4L24adFfsa", paths=["models/*.pt"])
+    """
+    snapshot_controller = SnapshotController()
+
+    return snapshot_controller.checkout(snapshot_id, paths=paths)
@@ -42,12 +42,14 @@ class Task():
     results : dict or None
         dictionary containing output results from the task
     files : list
-        returns list of file objects for the task in read mode
+        returns list of references to the files for the task, which are opened when read
 
     Methods
     -------
     get_files(mode="r")
         Returns a list of file objects for the task
+    list_files(mode="r")
+        Returns a list of references to the files for the task without opening them
 
     Raises
     ------
@@ -117,7 +119,10 @@ class Task():
 
     @property
     def files(self):
-        self._files = self.get_files()
+        # files only change until the task is complete with an after snapshot
+        if self._files is None or not self._core_task.after_snapshot_id:
+            self._core_task = self.__get_core_task()
+            self._files = self.list_files()
         return self._files
 
     def __get_core_task(self):
@@ -148,6 +153,24 @@ class Task():
         task_controller = TaskController()
         return task_controller.get_files(self.id, mode=mode)
 
+    def list_files(self, mode="r"):
+        """Returns a list of references to the files for the task without opening them
+
+        Parameters
+        ----------
+        mode : str
+            file object mode used when reading from the references
+            (default is "r" which signifies read mode)
+
+        Returns
+        -------
+        list
+            list of datmo.core.util.file_reference.FileReference objects
+            with name, size and open()
+        """
+        task_controller = TaskController()
+        return task_controller.list_files(self.id, mode=mode)
+
     def __eq__(self, other):
         return self.id == other.id if other else False
 
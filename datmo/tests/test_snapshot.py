@@ -22,12 +22,13 @@ except TypeError:
 
     to_bytes("test")
 
-from datmo.snapshot import create, ls, update, delete
+from datmo.snapshot import create, ls, update, delete, checkout
 from datmo.config import Config
 from datmo.snapshot import Snapshot
 from datmo.task import run
 from datmo.core.entity.snapshot import Snapshot as CoreSnapshot
 from datmo.core.controller.project import ProjectController
+from datmo.core.util.file_reference import FileReference
 from datmo.core.util.exceptions import (
     CommitFailed, InvalidProjectPath, SessionDoesNotExist,
     SnapshotCreateFromTaskArgs, EntityNotFound, DoesNotExist)
@@ -414,9 +415,15 @@ class TestSnapshotModule():
         result = snapshot_entity.files
 
         assert len(result) == 1
-        assert isinstance(result[0], TextIOWrapper)
+        assert isinstance(result[0], FileReference)
         assert result[0].mode == "r"
         assert "script.py" in result[0].name
+        assert result[0].size == os.path.getsize(result[0].name)
+        # The references are listed once and only opened when read
+        assert snapshot_entity.files[0] is result[0]
+        with result[0].open() as f:
+            assert isinstance(f, TextIOWrapper)
+            assert f.read() == result[0].read()
 
     def test_task_entity_get_files(self):
         core_snapshot_entity = CoreSnapshot(self.input_dict)
@@ -446,6 +453,44 @@ class TestSnapshotModule():
         assert result[0].mode == "a"
         assert "script.py" in result[0].name
 
+    def test_snapshot_entity_get_file_buffer(self):
+        snapshot_entity = self.__setup()
+        contents = to_bytes("import numpy\nimport sklearn\n")
+        with snapshot_entity.get_file_buffer("script.py") as result:
+            assert bytes(result) == contents
+        result = snapshot_entity.open_mmap("script.py")
+        assert result[:] == contents
+        result.close()
+        with open(snapshot_entity.get_filepath("script.py"), "rb") as f:
+            assert f.read() == contents
+
+    def test_snapshot_entity_diff(self):
+        snapshot_entity_1 = self.__setup()
+        test_filepath = os.path.join(self.temp_dir, "data.csv")
+        with open(test_filepath, "wb") as f:
+            f.write(to_bytes("a,b\n"))
+        snapshot_entity_2 = create(
+            message="test",
+            paths=[os.path.join(self.temp_dir, "script.py"), test_filepath])
+        result = snapshot_entity_2.diff(snapshot_entity_1)
+        assert [entry["path"] for entry in result["added"]] == ["data.csv"]
+        assert result["removed"] == [] and result["modified"] == []
+        assert result["size_delta"] == 4
+        # Snapshots may also be given by id
+        result = snapshot_entity_1.diff(snapshot_entity_2.id)
+        assert [entry["path"] for entry in result["removed"]] == ["data.csv"]
+        assert result["size_delta"] == -4
+
+    def test_checkout_paths(self):
+        snapshot_entity = self.__setup()
+        test_filepath = os.path.join(self.temp_dir, "script.py")
+        with open(test_filepath, "wb") as f:
+            f.write(to_bytes("import os\n"))
+        result = checkout(snapshot_entity.id, paths=["*.py"])
+        assert result == True
+        with open(test_filepath, "r") as f:
+            assert f.read() == "import numpy\nimport sklearn\n"
+
     def test_snapshot_entity_str(self):
         snapshot_entity = self.__setup()
         for k in self.input_dict:
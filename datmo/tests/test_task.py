@@ -28,6 +28,7 @@ from datmo.config import Config
 from datmo.task import Task
 from datmo.core.entity.task import Task as CoreTask
 from datmo.core.controller.project import ProjectController
+from datmo.core.util.file_reference import FileReference
 from datmo.core.util.exceptions import (
     CommitFailed, DoesNotExist, InvalidProjectPath, SessionDoesNotExist)
 from datmo.core.util.misc_functions import pytest_docker_environment_failed_instantiation
@@ -332,9 +333,15 @@ class TestTaskModule():
         result = task_entity.files
 
         assert len(result) == 1
-        assert isinstance(result[0], TextIOWrapper)
+        assert isinstance(result[0], FileReference)
         assert result[0].mode == "r"
         assert result[0].name
+        assert result[0].size == os.path.getsize(result[0].name)
+        # The references are listed once and only opened when read
+        assert task_entity.files[0] is result[0]
+        with result[0].open() as f:
+            assert isinstance(f, TextIOWrapper)
+            assert f.read() == result[0].read()
 
     @pytest_docker_environment_failed_instantiation(test_datmo_dir)
     def test_task_entity_get_files(self):
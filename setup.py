@@ -24,7 +24,7 @@ setup(
         "pyyaml>=3.12", "pytz>=2017.3", "tzlocal>=1.5.1", "requests>=2.11.1",
         "prettytable>=0.7.2", "rsfile>=2.1", "humanfriendly>=3.6.1",
         "python-slugify>=1.2.4", "giturlparse.py>=0.0.5", "blitzdb>=0.2.12",
-        "kids.cache>=0.0.7", "pymongo>=3.6.0", "checksumdir>=1.1.4",
+        "kids.cache>=0.0.7", "pymongo>=3.6.0",
         "semver>=2.7.8", "backports.ssl-match-hostname>=3.5.0.1",
         "timeout-decorator==0.4.0", "cerberus>=1.2", "pytest==3.0.4",
         "pathspec==0.5.6"